@@ -3,19 +3,20 @@ Export Analytics Data API for Djobea AI
 Handles exporting analytics data in various formats
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
-import uuid
-import json
-import os
-from pathlib import Path
 
 from app.database import get_db
 from app.models.database_models import ServiceRequest, Provider, User
 from app.services.auth_service import AuthService
+from app.services.analytics_aggregates import RequestAggregate, summarize_requests, summarize_requests_by
+from app.services.analytics_export import (
+    COMPLETED, EXPORT_FORMATS, MEDIA_TYPES, ExportJob, get_analytics_export_queue
+)
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 # Remove internal imports since we'll create simplified data collection
 
@@ -44,8 +45,8 @@ class ExportFilters(BaseModel):
     status: Optional[List[str]] = Field(default=None, description="List of request statuses to filter by")
 
 class ExportRequest(BaseModel):
-    format: str = Field(..., description="Export format (xlsx, csv, json, pdf)")
-    data: List[str] = Field(..., description="Data types to include (kpis, performance, services, geographic, insights, leaderboard)")
+    format: str = Field(..., description="Export format (xlsx, csv, json, jsonl, pdf)")
+    data: List[str] = Field(..., description="Data types to include (kpis, performance, services, geographic, insights, leaderboard, requests)")
     period: str = Field(default="30d", description="Time period for data (7d, 30d, 90d, 1y)")
     filters: Optional[ExportFilters] = Field(default=None, description="Additional filters")
     includeCharts: bool = Field(default=True, description="Whether to include charts in export")
@@ -84,44 +85,44 @@ def _get_date_range(period: str) -> tuple[datetime, datetime]:
     
     return start_date, end_date
 
-async def _collect_export_data(
+def _request_filters(filters: Optional[ExportFilters]) -> List[Any]:
+    """ServiceRequest criteria for the export filters"""
+    request_filters = []
+    if filters:
+        if filters.regions:
+            request_filters.append(ServiceRequest.location.in_(filters.regions))
+        if filters.services:
+            request_filters.append(ServiceRequest.service_type.in_(filters.services))
+        if filters.status:
+            request_filters.append(ServiceRequest.status.in_(filters.status))
+    return request_filters
+
+def _collect_export_data(
     db: Session,
     data_types: List[str],
     period: str,
     filters: Optional[ExportFilters] = None
 ) -> Dict[str, Any]:
-    """Collect all requested data for export"""
+    """Collect the requested summary sections (runs on an export worker thread)"""
     
     start_date, end_date = _get_date_range(period)
     export_data = {}
     
-    # Base query
-    base_query = db.query(ServiceRequest).filter(
-        ServiceRequest.created_at >= start_date,
-        ServiceRequest.created_at <= end_date
-    )
-    
-    # Apply filters if provided
-    if filters:
-        if filters.regions:
-            base_query = base_query.filter(ServiceRequest.location.in_(filters.regions))
-        if filters.services:
-            base_query = base_query.filter(ServiceRequest.service_type.in_(filters.services))
-        if filters.status:
-            base_query = base_query.filter(ServiceRequest.status.in_(filters.status))
+    # Filters shared by every aggregate below
+    request_filters = _request_filters(filters)
     
     # Collect requested data types
     if "kpis" in data_types:
-        total_requests = base_query.count()
-        completed_requests = base_query.filter(ServiceRequest.status == "completed").count()
-        pending_requests = base_query.filter(ServiceRequest.status == "pending").count()
-        success_rate = (completed_requests / total_requests * 100) if total_requests > 0 else 0
+        stats = summarize_requests(
+            db, start_date, end_date, statuses=("completed", "pending"), filters=request_filters
+        )
+        completed_requests = stats.count("completed")
         
         export_data["kpis"] = {
-            "totalRequests": total_requests,
+            "totalRequests": stats.total,
             "completedRequests": completed_requests,
-            "pendingRequests": pending_requests,
-            "successRate": success_rate,
+            "pendingRequests": stats.count("pending"),
+            "successRate": stats.rate("completed"),
             "revenue": completed_requests * 15000  # Mock revenue
         }
     
@@ -135,8 +136,11 @@ async def _collect_export_data(
     if "services" in data_types:
         services_data = []
         service_types = db.query(ServiceRequest.service_type).distinct().all()
+        service_stats = summarize_requests_by(
+            db, ServiceRequest.service_type, start_date, end_date, filters=request_filters
+        )
         for service_type in service_types:
-            count = base_query.filter(ServiceRequest.service_type == service_type[0]).count()
+            count = service_stats.get(service_type[0], RequestAggregate()).total
             services_data.append({
                 "service": service_type[0],
                 "count": count,
@@ -147,8 +151,11 @@ async def _collect_export_data(
     if "geographic" in data_types:
         geographic_data = []
         locations = db.query(ServiceRequest.location).distinct().all()
+        location_stats = summarize_requests_by(
+            db, ServiceRequest.location, start_date, end_date, filters=request_filters
+        )
         for location in locations:
-            count = base_query.filter(ServiceRequest.location == location[0]).count()
+            count = location_stats.get(location[0], RequestAggregate()).total
             geographic_data.append({
                 "location": location[0],
                 "count": count,
@@ -177,65 +184,6 @@ async def _collect_export_data(
     
     return export_data
 
-async def _create_export_file(
-    export_data: Dict[str, Any],
-    format: str,
-    export_id: str,
-    include_charts: bool = True
-) -> tuple[str, int]:
-    """Create export file in the specified format"""
-    
-    # Create exports directory if it doesn't exist
-    exports_dir = Path("exports")
-    exports_dir.mkdir(exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"analytics_export_{timestamp}.{format}"
-    filepath = exports_dir / filename
-    
-    if format == "json":
-        # Export as JSON
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, ensure_ascii=False, indent=2, default=str)
-    
-    elif format == "csv":
-        # Export as CSV (simplified - only KPIs for now)
-        import csv
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            # Write headers
-            writer.writerow(["Data Type", "Metric", "Value", "Period"])
-            
-            # Write KPIs data
-            if "kpis" in export_data:
-                kpis = export_data["kpis"]
-                for key, value in kpis.items():
-                    if isinstance(value, (int, float)):
-                        writer.writerow(["KPI", key, value, "Current Period"])
-    
-    elif format == "xlsx":
-        # Export as Excel (mock implementation)
-        # In production, would use openpyxl or similar
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write("Excel export not fully implemented in this demo\n")
-            f.write(f"Export Data: {json.dumps(export_data, default=str)}")
-    
-    elif format == "pdf":
-        # Export as PDF (mock implementation)
-        # In production, would use reportlab or similar
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write("PDF export not fully implemented in this demo\n")
-            f.write(f"Export Data: {json.dumps(export_data, default=str)}")
-    
-    else:
-        raise ValueError(f"Unsupported export format: {format}")
-    
-    # Get file size
-    file_size = filepath.stat().st_size
-    
-    return filename, file_size
-
 async def _send_export_email(email: str, download_url: str, filename: str):
     """Send export email to user (mock implementation)"""
     # In production, would integrate with email service
@@ -243,58 +191,33 @@ async def _send_export_email(email: str, download_url: str, filename: str):
     print(f"Download URL: {download_url}")
     print(f"Filename: {filename}")
 
-# Background task for processing exports
-async def process_export_background(
-    export_id: str,
-    db: Session,
-    request: ExportRequest,
-    user_email: str
-):
-    """Background task to process export"""
-    try:
-        # Collect data
-        export_data = await _collect_export_data(
-            db, request.data, request.period, request.filters
-        )
-        
-        # Create file
-        filename, file_size = await _create_export_file(
-            export_data, request.format, export_id, request.includeCharts
-        )
-        
-        # Send email if requested
-        if request.email:
-            download_url = f"https://api.djobea.ai/exports/{filename}"
-            await _send_export_email(request.email, download_url, filename)
-        
-        print(f"Export {export_id} completed successfully")
-        
-    except Exception as e:
-        print(f"Export {export_id} failed: {str(e)}")
+def _get_owned_job(export_id: str, current_user) -> ExportJob:
+    """Export job of the current user, 404 otherwise"""
+    job = get_analytics_export_queue().get(export_id)
+    if job is None or job.owner_id != getattr(current_user, "id", None):
+        raise HTTPException(status_code=404, detail="Export not found")
+    return job
+
+def _download_url(export_id: str) -> str:
+    return f"/api/analytics/export/{export_id}/download"
 
 @router.post("/export", response_model=ExportAPIResponse)
 async def export_analytics_data(
     request: ExportRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Export analytics data in various formats"""
+    """Queue an analytics export; poll its status and download it once completed"""
     
     try:
-        # Generate export ID
-        export_id = f"export_{uuid.uuid4().hex[:8]}"
-        
         # Validate format
-        supported_formats = ["xlsx", "csv", "json", "pdf"]
-        if request.format not in supported_formats:
+        if request.format not in EXPORT_FORMATS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Unsupported format. Supported formats: {', '.join(supported_formats)}"
+                detail=f"Unsupported format. Supported formats: {', '.join(EXPORT_FORMATS)}"
             )
         
         # Validate data types
-        supported_data_types = ["kpis", "performance", "services", "geographic", "insights", "leaderboard"]
+        supported_data_types = ["kpis", "performance", "services", "geographic", "insights", "leaderboard", "requests"]
         invalid_types = [dt for dt in request.data if dt not in supported_data_types]
         if invalid_types:
             raise HTTPException(
@@ -302,40 +225,40 @@ async def export_analytics_data(
                 detail=f"Invalid data types: {', '.join(invalid_types)}"
             )
         
-        # For demo purposes, create export immediately
-        # In production, would use background tasks for large exports
-        export_data = await _collect_export_data(
-            db, request.data, request.period, request.filters
-        )
-        
-        filename, file_size = await _create_export_file(
-            export_data, request.format, export_id, request.includeCharts
-        )
-        
-        # Calculate expiration (7 days from now)
-        expires_at = datetime.now() + timedelta(days=7)
+        start_date, end_date = _get_date_range(request.period)
         
-        # Create download URL
-        download_url = f"https://api.djobea.ai/exports/{filename}"
+        async def notify(job: ExportJob):
+            await _send_export_email(request.email, _download_url(job.id), job.filename)
         
-        # Send email if requested
-        if request.email:
-            await _send_export_email(request.email, download_url, filename)
+        queue = get_analytics_export_queue()
+        job = await queue.submit(ExportJob(
+            format=request.format,
+            period=request.period,
+            start=start_date,
+            end=end_date,
+            build_summary=lambda db: _collect_export_data(db, request.data, request.period, request.filters),
+            include_requests="requests" in request.data,
+            request_filters=_request_filters(request.filters),
+            owner_id=getattr(current_user, "id", None),
+            on_complete=notify if request.email else None
+        ))
         
         return ExportAPIResponse(
             success=True,
             data=ExportResponse(
-                exportId=export_id,
-                downloadUrl=download_url,
-                filename=filename,
-                fileSize=file_size,
-                expiresAt=expires_at.isoformat() + "Z",
-                format=request.format,
-                status="completed"
+                exportId=job.id,
+                downloadUrl=_download_url(job.id),
+                filename=job.filename,
+                fileSize=0,
+                expiresAt=(job.created_at + queue.ttl).isoformat() + "Z",
+                format=job.format,
+                status=job.status
             ),
-            message="Export completed successfully"
+            message="Export queued"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -348,42 +271,40 @@ async def get_export_status(
     current_user = Depends(get_current_user)
 ):
     """Get export status by ID"""
-    
-    # Mock implementation - in production would track export status in database
+    job = _get_owned_job(export_id, current_user)
+    data = job.to_dict()
+    if job.status == COMPLETED:
+        data["downloadUrl"] = _download_url(job.id)
     return {
         "success": True,
-        "data": {
-            "exportId": export_id,
-            "status": "completed",
-            "progress": 100,
-            "createdAt": datetime.now().isoformat() + "Z",
-            "completedAt": datetime.now().isoformat() + "Z"
-        },
+        "data": data,
         "message": "Export status retrieved successfully"
     }
 
+@router.get("/export/{export_id}/download")
+async def download_export(
+    export_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Download a completed export (supports Range requests for resumed downloads)"""
+    job = _get_owned_job(export_id, current_user)
+    if job.status != COMPLETED or job.path is None or not job.path.exists():
+        raise HTTPException(status_code=409, detail=f"Export is {job.status}")
+    return FileResponse(job.path, media_type=MEDIA_TYPES[job.format], filename=job.filename)
+
 @router.delete("/export/{export_id}")
 async def cancel_export(
     export_id: str,
     current_user = Depends(get_current_user)
 ):
-    """Cancel or delete an export"""
-    
-    try:
-        # Mock implementation - in production would cancel background task
-        # and delete export file
-        
-        return {
-            "success": True,
-            "data": {
-                "exportId": export_id,
-                "status": "cancelled"
-            },
-            "message": "Export cancelled successfully"
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error cancelling export: {str(e)}"
-        )
\ No newline at end of file
+    """Cancel a pending export or delete a finished one"""
+    _get_owned_job(export_id, current_user)
+    job = get_analytics_export_queue().cancel(export_id)
+    return {
+        "success": True,
+        "data": {
+            "exportId": export_id,
+            "status": job.status
+        },
+        "message": "Export cancelled successfully"
+    }
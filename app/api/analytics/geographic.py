@@ -13,6 +13,7 @@ import logging
 from app.database import get_db
 from app.models.database_models import ServiceRequest, Provider, User
 from app.services.auth_service import auth_service
+from app.services.analytics_rollups import summarize_rollups
 from app.models.auth_models import User as AuthUser
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -65,25 +66,17 @@ async def get_geographic_analytics(
         days = period_map.get(period, 30)
         start_date = datetime.now() - timedelta(days=days)
         
-        # Get geographic data from service requests
-        query = db.query(
-            ServiceRequest.location,
-            func.count(ServiceRequest.id).label('requests'),
-            func.count(func.distinct(ServiceRequest.provider_id)).label('providers'),
-            func.sum(ServiceRequest.estimated_cost).label('revenue'),
-            func.avg(
-                func.extract('epoch', ServiceRequest.updated_at - ServiceRequest.created_at) / 3600
-            ).label('response_time')
-        ).filter(
-            ServiceRequest.created_at >= start_date,
-            ServiceRequest.location.isnot(None)
-        ).group_by(ServiceRequest.location)
+        # Get geographic data from the analytics rollups
+        filters = [lambda source: source.location.isnot(None)]
         
         # Apply region filter if specified
         if region:
-            query = query.filter(ServiceRequest.location.ilike(f"%{region}%"))
+            filters.append(lambda source: source.location.ilike(f"%{region}%"))
         
-        results = query.all()
+        region_stats = summarize_rollups(
+            db, start_date, datetime.now(), group_by="location", distinct_providers=True,
+            filters=lambda source: [build(source) for build in filters]
+        )
         
         # Process results and add geographic data
         geographic_data = []
@@ -112,8 +105,8 @@ async def get_geographic_analytics(
             "deido": [4.0611, 9.7070]
         }
         
-        for result in results:
-            location = result.location.lower() if result.location else "unknown"
+        for location_name, stats in region_stats.items():
+            location = location_name.lower() if location_name else "unknown"
             
             # Find coordinates for the location
             coordinates = None
@@ -125,11 +118,11 @@ async def get_geographic_analytics(
             if not coordinates:
                 coordinates = [4.0511, 9.7679]  # Default to Douala
             
-            requests_count = result.requests or 0
-            providers_count = result.providers or 0
-            revenue = float(result.revenue or 0)
+            requests_count = stats.total
+            providers_count = int(stats.measure("providers"))
+            revenue = stats.measure("estimated_cost")
             satisfaction = 0  # Default satisfaction since we don't have rating data
-            response_time = float(result.response_time or 0) if result.response_time else 0
+            response_time = stats.measure("resolution_hours")
             
             # Calculate growth (simplified calculation)
             growth = min(max(-50, (requests_count - 10) * 2), 100)  # Simulated growth
@@ -143,7 +136,7 @@ async def get_geographic_analytics(
                 satisfaction_count += 1
             
             geographic_data.append({
-                "region": result.location or "Unknown",
+                "region": location_name or "Unknown",
                 "requests": requests_count,
                 "providers": providers_count,
                 "revenue": revenue,
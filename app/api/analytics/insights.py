@@ -13,6 +13,7 @@ import logging
 from app.database import get_db
 from app.models.database_models import ServiceRequest, Provider, User
 from app.services.auth_service import auth_service
+from app.services.analytics_rollups import summarize_rollup_periods
 from app.models.auth_models import User as AuthUser
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -72,31 +73,14 @@ def get_time_range(period: str) -> tuple[datetime, datetime]:
 def calculate_performance_metrics(db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
     """Calculate performance metrics for the specified period"""
     try:
-        # Current period metrics
-        current_requests = db.query(ServiceRequest).filter(
-            ServiceRequest.created_at >= start_date,
-            ServiceRequest.created_at <= end_date
-        ).all()
+        # Current and previous period from the analytics rollups
+        current, previous = summarize_rollup_periods(db, start_date, end_date, statuses=("completed",))
         
-        # Previous period for comparison
-        period_length = end_date - start_date
-        prev_start = start_date - period_length
-        prev_end = start_date
+        current_count = current.total
+        previous_count = previous.total
         
-        previous_requests = db.query(ServiceRequest).filter(
-            ServiceRequest.created_at >= prev_start,
-            ServiceRequest.created_at < prev_end
-        ).all()
-        
-        # Calculate metrics
-        current_count = len(current_requests)
-        previous_count = len(previous_requests)
-        
-        completed_current = [r for r in current_requests if r.status == "completed"]
-        completed_previous = [r for r in previous_requests if r.status == "completed"]
-        
-        current_completion_rate = (len(completed_current) / current_count * 100) if current_count > 0 else 0
-        previous_completion_rate = (len(completed_previous) / previous_count * 100) if previous_count > 0 else 0
+        current_completion_rate = current.rate("completed")
+        previous_completion_rate = previous.rate("completed")
         
         # Calculate average response time (mock calculation)
         current_avg_response = 12.1  # minutes
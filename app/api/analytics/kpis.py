@@ -13,6 +13,8 @@ import json
 from app.database import get_db
 from app.models.database_models import User, Provider, ServiceRequest, Conversation
 from app.services.auth_service import auth_service
+from app.services.analytics_aggregates import RequestAggregate, status_count_column
+from app.services.analytics_rollups import summarize_rollup_periods, summarize_rollups
 from app.models.auth_models import User as AuthUser
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
@@ -20,6 +22,9 @@ from pydantic import BaseModel
 router = APIRouter()
 security = HTTPBearer()
 
+# Statuses the KPI payload breaks requests down by
+KPI_STATUSES = ("terminée", "en attente")
+
 class KPIValue(BaseModel):
     """KPI value structure"""
     value: Union[int, float]
@@ -112,24 +117,19 @@ def get_kpis(
         # Initialize KPI data
         kpi_data = {}
         
-        # Get all requests for current period
-        current_requests = db.query(ServiceRequest).filter(
-            ServiceRequest.created_at >= start_date,
-            ServiceRequest.created_at <= end_date
-        ).all()
-        
-        # Get all requests for previous period (if comparison requested)
-        previous_requests = []
+        # Aggregate both periods from the analytics rollups instead of loading request rows
         if compare:
-            previous_requests = db.query(ServiceRequest).filter(
-                ServiceRequest.created_at >= previous_start,
-                ServiceRequest.created_at < previous_end
-            ).all()
+            current_stats, previous_stats = summarize_rollup_periods(
+                db, start_date, end_date, statuses=KPI_STATUSES
+            )
+        else:
+            current_stats = summarize_rollups(db, start_date, end_date, statuses=KPI_STATUSES)
+            previous_stats = RequestAggregate()
         
         # Calculate total requests
         if not metrics or "totalRequests" in metrics:
-            total_requests_current = len(current_requests)
-            total_requests_previous = len(previous_requests) if compare else 0
+            total_requests_current = current_stats.total
+            total_requests_previous = previous_stats.total
             change = calculate_change_percentage(total_requests_current, total_requests_previous)
             
             kpi_data["totalRequests"] = KPIValue(
@@ -166,8 +166,8 @@ def get_kpis(
             )
         
         # Calculate completed requests
-        completed_requests_current = sum(1 for r in current_requests if r.status == "terminée")
-        completed_requests_previous = sum(1 for r in previous_requests if r.status == "terminée") if compare else 0
+        completed_requests_current = current_stats.count("terminée")
+        completed_requests_previous = previous_stats.count("terminée")
         
         if not metrics or "completedRequests" in metrics:
             change = calculate_change_percentage(completed_requests_current, completed_requests_previous)
@@ -201,29 +201,9 @@ def get_kpis(
         
         # Calculate average response time
         if not metrics or "averageResponseTime" in metrics:
-            # Calculate average response time for current period
-            total_response_time = 0
-            response_count = 0
-            
-            for request in current_requests:
-                if request.status != "en attente":
-                    # Estimate response time based on request creation vs assignment
-                    response_time = 15  # Average 15 minutes (placeholder calculation)
-                    total_response_time += response_time
-                    response_count += 1
-            
-            avg_response_time_current = total_response_time / response_count if response_count > 0 else 0
-            
-            # Calculate for previous period
-            avg_response_time_previous = 0
-            if compare:
-                prev_total = 0
-                prev_count = 0
-                for request in previous_requests:
-                    if request.status != "en attente":
-                        prev_total += 15
-                        prev_count += 1
-                avg_response_time_previous = prev_total / prev_count if prev_count > 0 else 0
+            # Placeholder estimate: 15 minutes for every request that left "en attente"
+            avg_response_time_current = 15 if current_stats.count_excluding("en attente") > 0 else 0
+            avg_response_time_previous = 15 if previous_stats.count_excluding("en attente") > 0 else 0
             
             change = calculate_change_percentage(avg_response_time_current, avg_response_time_previous)
             
@@ -238,29 +218,9 @@ def get_kpis(
         
         # Calculate customer satisfaction
         if not metrics or "customerSatisfaction" in metrics:
-            # Calculate satisfaction based on completed requests
-            total_satisfaction = 0
-            satisfaction_count = 0
-            
-            for request in current_requests:
-                if request.status == "terminée":
-                    # Estimate satisfaction based on completion (4.5-5.0 range)
-                    satisfaction = 4.7  # Average satisfaction score
-                    total_satisfaction += satisfaction
-                    satisfaction_count += 1
-            
-            avg_satisfaction_current = total_satisfaction / satisfaction_count if satisfaction_count > 0 else 0
-            
-            # Calculate for previous period
-            avg_satisfaction_previous = 0
-            if compare:
-                prev_total = 0
-                prev_count = 0
-                for request in previous_requests:
-                    if request.status == "terminée":
-                        prev_total += 4.7
-                        prev_count += 1
-                avg_satisfaction_previous = prev_total / prev_count if prev_count > 0 else 0
+            # Placeholder estimate: 4.7 average for completed requests
+            avg_satisfaction_current = 4.7 if completed_requests_current > 0 else 0
+            avg_satisfaction_previous = 4.7 if completed_requests_previous > 0 else 0
             
             change = calculate_change_percentage(avg_satisfaction_current, avg_satisfaction_previous)
             
@@ -301,41 +261,27 @@ def get_kpi_trends(
         # Calculate trends data
         trends_data = {}
         
-        # Get daily breakdown of requests
-        daily_requests = db.query(
-            func.date(ServiceRequest.created_at).label('date'),
-            func.count(ServiceRequest.id).label('count')
+        # Daily totals and completions in a single GROUP BY
+        day = func.date(ServiceRequest.created_at)
+        daily_stats = db.query(
+            day.label('date'),
+            func.count(ServiceRequest.id).label('total'),
+            status_count_column("terminée", 'completed')
         ).filter(
             ServiceRequest.created_at >= start_date,
             ServiceRequest.created_at <= end_date
-        ).group_by(func.date(ServiceRequest.created_at)).all()
+        ).group_by(day).all()
         
         trends_data["requestsTrend"] = [
-            {"date": str(day.date), "value": day.count}
-            for day in daily_requests
+            {"date": str(row.date), "value": row.total}
+            for row in daily_stats
         ]
         
-        # Get completion rate trend - simplified approach
-        daily_completions = db.query(
-            func.date(ServiceRequest.created_at).label('date'),
-            func.count(ServiceRequest.id).label('total')
-        ).filter(
-            ServiceRequest.created_at >= start_date,
-            ServiceRequest.created_at <= end_date
-        ).group_by(func.date(ServiceRequest.created_at)).all()
-        
-        # Calculate completion rate for each day
         completion_trends = []
-        for day in daily_completions:
-            # Get completed requests for this day
-            completed_count = db.query(ServiceRequest).filter(
-                func.date(ServiceRequest.created_at) == day.date,
-                ServiceRequest.status == "terminée"
-            ).count()
-            
-            completion_rate = (completed_count / day.total * 100) if day.total > 0 else 0
+        for row in daily_stats:
+            completion_rate = ((row.completed or 0) / row.total * 100) if row.total > 0 else 0
             completion_trends.append({
-                "date": str(day.date),
+                "date": str(row.date),
                 "value": completion_rate
             })
         
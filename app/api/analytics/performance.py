@@ -5,7 +5,7 @@ Provides detailed performance metrics over time with configurable granularity
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_
+from sqlalchemy import func, desc, and_, case, cast, literal, Integer
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import json
@@ -13,6 +13,8 @@ import json
 from app.database import get_db
 from app.models.database_models import User, Provider, ServiceRequest, Conversation
 from app.services.auth_service import auth_service
+from app.services.analytics_aggregates import status_count_column
+from app.services.analytics_rollups import summarize_rollups
 from app.models.auth_models import User as AuthUser
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
@@ -123,64 +125,55 @@ def format_date_label(date: datetime, granularity: str) -> str:
     else:
         return date.strftime("%Y-%m-%d")
 
-def calculate_success_rate(requests: List[ServiceRequest]) -> float:
-    """Calculate success rate for a list of requests"""
-    if not requests:
-        return 0.0
-    
-    completed = sum(1 for req in requests if req.status == "terminée")
-    return (completed / len(requests)) * 100
+# Fixed-width buckets are computed arithmetically from the period start;
+# months vary in length and fall back to a CASE over the interval boundaries
+BUCKET_STEPS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
 
-def calculate_response_time(requests: List[ServiceRequest]) -> float:
-    """Calculate average response time for requests"""
-    if not requests:
-        return 0.0
+def bucket_index_expression(db: Session, start_date: datetime, intervals: List[datetime], granularity: str):
+    """SQL expression giving the index of the interval a request was created in"""
+    if len(intervals) < 2:
+        return literal(0)
+    if granularity == "month":
+        return case(
+            *[(ServiceRequest.created_at < boundary, i) for i, boundary in enumerate(intervals[1:])],
+            else_=len(intervals) - 1
+        )
     
-    # For requests that have been assigned, calculate estimated response time
-    response_times = []
-    for req in requests:
-        if req.status != "en attente":
-            # Estimate response time based on request type and urgency
-            base_time = 15.0  # Base 15 minutes
-            
-            if req.urgency == "high":
-                response_time = base_time * 0.7  # 30% faster for urgent
-            elif req.urgency == "low":
-                response_time = base_time * 1.3  # 30% slower for low priority
-            else:
-                response_time = base_time
-            
-            response_times.append(response_time)
+    step_seconds = BUCKET_STEPS.get(granularity, BUCKET_STEPS["day"]).total_seconds()
+    if db.get_bind().dialect.name == "postgresql":
+        elapsed = func.extract("epoch", ServiceRequest.created_at - start_date)
+        return func.floor(elapsed / step_seconds)
     
-    return sum(response_times) / len(response_times) if response_times else 0.0
+    # SQLite: julianday arithmetic, rounded to the millisecond to absorb float error;
+    # elapsed time is never negative so the integer cast floors
+    elapsed = func.round((func.julianday(ServiceRequest.created_at) - func.julianday(start_date)) * 86400.0, 3)
+    return cast(elapsed / step_seconds, Integer)
 
-def calculate_ai_efficiency(requests: List[ServiceRequest], conversations: List[Conversation]) -> float:
-    """Calculate AI efficiency based on conversation quality"""
-    if not requests:
-        return 0.0
-    
-    # Calculate efficiency based on request completion and conversation quality
-    efficiency_scores = []
-    
-    for req in requests:
-        base_score = 85.0  # Base efficiency score
-        
-        # Adjust based on status
-        if req.status == "terminée":
-            base_score += 10.0
-        elif req.status == "annulée":
-            base_score -= 15.0
-        
-        # Adjust based on urgency handling
-        if req.urgency == "high" and req.status == "terminée":
-            base_score += 5.0
-        
-        # Simulate some variation
-        import random
-        variation = random.uniform(-5, 5)
-        efficiency_scores.append(min(100, max(0, base_score + variation)))
-    
-    return sum(efficiency_scores) / len(efficiency_scores) if efficiency_scores else 0.0
+def response_time_value(source):
+    """Estimated response time in minutes for one request, NULL while still pending"""
+    return case(
+        (source.status == "en attente", None),
+        (source.urgency == "high", 15.0 * 0.7),
+        (source.urgency == "low", 15.0 * 1.3),
+        else_=15.0
+    )
+
+def ai_efficiency_value(source):
+    """AI efficiency score for one request, based on its outcome and urgency"""
+    status_adjustment = case(
+        (source.status == "terminée", 10.0),
+        (source.status == "annulée", -15.0),
+        else_=0.0
+    )
+    urgency_bonus = case(
+        (and_(source.urgency == "high", source.status == "terminée"), 5.0),
+        else_=0.0
+    )
+    return 85.0 + status_adjustment + urgency_bonus
 
 @router.get("/performance", response_model=PerformanceResponse)
 def get_performance_data(
@@ -208,34 +201,32 @@ def get_performance_data(
         # Initialize datasets
         datasets = []
         
-        # Calculate metrics for each interval
+        # All metrics for every interval from a single bucketed query
+        bucket = bucket_index_expression(db, start_date, intervals, granularity)
+        rows = db.query(
+            bucket.label("bucket"),
+            func.count(ServiceRequest.id).label("total"),
+            status_count_column("terminée", "completed"),
+            func.avg(response_time_value(ServiceRequest)).label("response_time"),
+            func.avg(ai_efficiency_value(ServiceRequest)).label("ai_efficiency")
+        ).filter(
+            ServiceRequest.created_at >= start_date,
+            ServiceRequest.created_at < end_date
+        ).group_by(bucket).all()
+        buckets = {int(row.bucket): row for row in rows if row.bucket is not None}
+        
         success_rate_data = []
         response_time_data = []
         ai_efficiency_data = []
         
-        for i, interval in enumerate(intervals):
-            # Define interval boundaries
-            if i + 1 < len(intervals):
-                interval_end = intervals[i + 1]
+        for i in range(len(intervals)):
+            row = buckets.get(i)
+            if row is None or not row.total:
+                success_rate, response_time, ai_efficiency = 0.0, 0.0, 0.0
             else:
-                interval_end = end_date
-            
-            # Get requests for this interval
-            interval_requests = db.query(ServiceRequest).filter(
-                ServiceRequest.created_at >= interval,
-                ServiceRequest.created_at < interval_end
-            ).all()
-            
-            # Get conversations for this interval
-            interval_conversations = db.query(Conversation).filter(
-                Conversation.created_at >= interval,
-                Conversation.created_at < interval_end
-            ).all()
-            
-            # Calculate metrics
-            success_rate = calculate_success_rate(interval_requests)
-            response_time = calculate_response_time(interval_requests)
-            ai_efficiency = calculate_ai_efficiency(interval_requests, interval_conversations)
+                success_rate = (row.completed or 0) / row.total * 100
+                response_time = float(row.response_time or 0.0)
+                ai_efficiency = min(100.0, float(row.ai_efficiency or 0.0))
             
             success_rate_data.append(round(success_rate, 1))
             response_time_data.append(round(response_time, 1))
@@ -307,28 +298,29 @@ def get_performance_summary(
     try:
         start_date, end_date = get_date_range(period)
         
-        # Get all requests for the period
-        requests = db.query(ServiceRequest).filter(
-            ServiceRequest.created_at >= start_date,
-            ServiceRequest.created_at <= end_date
-        ).all()
+        # Aggregate the period from the analytics rollups
+        stats = summarize_rollups(
+            db, start_date, end_date,
+            statuses=("terminée", "en attente", "annulée"),
+            measures={
+                "response_time": response_time_value,
+                "ai_efficiency": ai_efficiency_value
+            }
+        )
         
-        # Get all conversations for the period
-        conversations = db.query(Conversation).filter(
+        conversation_count = db.query(func.count(Conversation.id)).filter(
             Conversation.created_at >= start_date,
             Conversation.created_at <= end_date
-        ).all()
+        ).scalar() or 0
         
-        # Calculate overall metrics
-        success_rate = calculate_success_rate(requests)
-        response_time = calculate_response_time(requests)
-        ai_efficiency = calculate_ai_efficiency(requests, conversations)
+        success_rate = stats.rate("terminée")
+        response_time = stats.measure("response_time")
+        ai_efficiency = min(100.0, stats.measure("ai_efficiency"))
         
-        # Additional metrics
-        total_requests = len(requests)
-        completed_requests = sum(1 for req in requests if req.status == "terminée")
-        pending_requests = sum(1 for req in requests if req.status == "en attente")
-        cancelled_requests = sum(1 for req in requests if req.status == "annulée")
+        total_requests = stats.total
+        completed_requests = stats.count("terminée")
+        pending_requests = stats.count("en attente")
+        cancelled_requests = stats.count("annulée")
         
         return {
             "success": True,
@@ -341,8 +333,8 @@ def get_performance_summary(
                 "successRate": round(success_rate, 1),
                 "responseTime": round(response_time, 1),
                 "aiEfficiency": round(ai_efficiency, 1),
-                "conversationCount": len(conversations),
-                "averageConversationsPerRequest": round(len(conversations) / total_requests, 1) if total_requests > 0 else 0.0
+                "conversationCount": conversation_count,
+                "averageConversationsPerRequest": round(conversation_count / total_requests, 1) if total_requests > 0 else 0.0
             },
             "message": "Performance summary retrieved successfully"
         }
@@ -13,6 +13,8 @@ import json
 from app.database import get_db
 from app.models.database_models import User, Provider, ServiceRequest, Conversation
 from app.services.auth_service import auth_service
+from app.services.analytics_aggregates import RequestAggregate
+from app.services.analytics_rollups import summarize_rollups
 from app.models.auth_models import User as AuthUser
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
@@ -115,9 +117,9 @@ def map_service_type(service_type: str) -> str:
     }
     return service_map.get(service_type.lower(), service_type.capitalize())
 
-def calculate_service_metrics(requests: List[ServiceRequest], service_type: str) -> Dict:
-    """Calculate metrics for a specific service type"""
-    if not requests:
+def calculate_service_metrics(stats: RequestAggregate, service_type: str) -> Dict:
+    """Calculate metrics for a specific service type from its aggregated counts"""
+    if not stats.total:
         return {
             "requests": 0,
             "revenue": 0.0,
@@ -129,20 +131,8 @@ def calculate_service_metrics(requests: List[ServiceRequest], service_type: str)
         }
     
     # Calculate basic metrics
-    total_requests = len(requests)
-    completed_requests = [r for r in requests if r.status == "terminée"]
-    
-    # Revenue calculation (15% commission)
-    estimated_revenue = 0.0
-    for request in completed_requests:
-        if service_type.lower() == "plomberie":
-            estimated_revenue += 49.00 * 0.15  # 15% commission
-        elif service_type.lower() == "electricite":
-            estimated_revenue += 65.00 * 0.15
-        elif service_type.lower() == "electromenager":
-            estimated_revenue += 35.00 * 0.15
-        else:
-            estimated_revenue += 45.00 * 0.15  # Default service price
+    total_requests = stats.total
+    completed_requests = stats.count("terminée")
     
     # Average price calculation
     if service_type.lower() == "plomberie":
@@ -154,6 +144,9 @@ def calculate_service_metrics(requests: List[ServiceRequest], service_type: str)
     else:
         avg_price = 45.00
     
+    # Revenue calculation (15% commission)
+    estimated_revenue = completed_requests * avg_price * 0.15
+    
     # Satisfaction calculation (simulated based on service type)
     satisfaction_base = {
         "plomberie": 4.6,
@@ -177,7 +170,7 @@ def calculate_service_metrics(requests: List[ServiceRequest], service_type: str)
     response_time = response_time_base.get(service_type.lower(), 12.0)
     
     # Completion rate
-    completion_rate = (len(completed_requests) / total_requests) * 100 if total_requests > 0 else 0
+    completion_rate = stats.rate("terminée")
     
     # Growth calculation (simulated)
     growth_rates = {
@@ -216,25 +209,15 @@ def get_services_analytics(
     try:
         start_date, end_date = get_date_range(period)
         
-        # Get all service requests for the period
-        query = db.query(ServiceRequest).filter(
-            ServiceRequest.created_at >= start_date,
-            ServiceRequest.created_at <= end_date
-        )
-        
         # Filter by category if specified
+        filters = None
         if category:
-            query = query.filter(ServiceRequest.service_type.ilike(f"%{category}%"))
-        
-        requests = query.all()
+            filters = lambda source: [source.service_type.ilike(f"%{category}%")]
         
-        # Group requests by service type
-        service_groups = {}
-        for request in requests:
-            service_type = request.service_type or "autres"
-            if service_type not in service_groups:
-                service_groups[service_type] = []
-            service_groups[service_type].append(request)
+        # Group requests by service type from the analytics rollups
+        service_groups = summarize_rollups(
+            db, start_date, end_date, statuses=("terminée",), filters=filters, group_by="service_type"
+        )
         
         # Calculate metrics for each service
         service_details = []
@@ -245,8 +228,9 @@ def get_services_analytics(
         satisfaction_sum = 0.0
         response_time_sum = 0.0
         
-        for service_type, service_requests in service_groups.items():
-            metrics = calculate_service_metrics(service_requests, service_type)
+        for service_type, service_stats in service_groups.items():
+            service_type = service_type or "autres"
+            metrics = calculate_service_metrics(service_stats, service_type)
             
             service_name = map_service_type(service_type)
             
@@ -331,22 +315,16 @@ def get_services_comparison(
     try:
         start_date, end_date = get_date_range(period)
         
-        # Get requests for specified services
-        query = db.query(ServiceRequest).filter(
-            ServiceRequest.created_at >= start_date,
-            ServiceRequest.created_at <= end_date
+        # Aggregate the specified services from the analytics rollups
+        filters = (lambda source: [source.service_type.in_(services)]) if services else None
+        service_groups = summarize_rollups(
+            db, start_date, end_date, statuses=("terminée",), filters=filters, group_by="service_type"
         )
         
-        if services:
-            query = query.filter(ServiceRequest.service_type.in_(services))
-        
-        requests = query.all()
-        
         # Create comparison data
         comparison_data = {}
         for service in services:
-            service_requests = [r for r in requests if r.service_type == service]
-            metrics = calculate_service_metrics(service_requests, service)
+            metrics = calculate_service_metrics(service_groups.get(service, RequestAggregate()), service)
             
             comparison_data[map_service_type(service)] = {
                 "requests": metrics["requests"],
@@ -2,7 +2,7 @@
 Complete Provider API implementation for Djobea AI
 Following the OpenAPI specification exactly
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
@@ -10,7 +10,10 @@ from loguru import logger
 import io
 import csv
 import json
+import tempfile
 from datetime import datetime
+from enum import Enum
+from itertools import islice
 
 from app.database import get_db
 from app.models.provider_models import (
@@ -29,6 +32,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 router = APIRouter(prefix="/api/providers", tags=["Providers"])
 security = HTTPBearer()
 
+# XLSX exports spill to a temporary file beyond this size
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -64,6 +70,8 @@ async def get_providers(
     availability: Optional[ProviderAvailability] = Query(None, description="Availability filter"),
     sortBy: Optional[SortBy] = Query(None, description="Sort by field"),
     sortOrder: Optional[SortOrder] = Query(SortOrder.ASC, description="Sort order"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    estimateTotal: bool = Query(False, description="Return an estimated total instead of an exact count"),
     current_user: User = Depends(get_current_user),
     provider_service: ProviderService = Depends(get_provider_service)
 ):
@@ -85,7 +93,9 @@ async def get_providers(
         )
         
         # Get providers
-        providers, pagination, stats = provider_service.get_providers(filters, page, limit)
+        providers, pagination, stats = provider_service.get_providers(
+            filters, page, limit, cursor=cursor, estimate_total=estimateTotal
+        )
         
         # Return response
         return ProvidersResponse(
@@ -98,6 +108,8 @@ async def get_providers(
             message="Providers retrieved successfully"
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting providers: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -292,15 +304,8 @@ async def export_providers(
         if request is None:
             request = ExportProvidersRequest()
         
-        # Get providers based on filters
-        if request.filters:
-            providers, _, _ = provider_service.get_providers(
-                request.filters,
-                request.filters.page or 1,
-                request.filters.limit or 100
-            )
-        else:
-            providers, _, _ = provider_service.get_providers(limit=1000)
+        # Stream every provider matching the filters along the keyset cursor
+        providers = provider_service.iter_providers(request.filters)
         
         # Generate export file
         if request.format == ExportFormat.CSV:
@@ -308,7 +313,8 @@ async def export_providers(
         elif request.format == ExportFormat.XLSX:
             return await _export_xlsx(providers)
         elif request.format == ExportFormat.PDF:
-            return await _export_pdf(providers)
+            # The PDF table is laid out in memory, so it keeps the previous 1000 row cap
+            return await _export_pdf(list(islice(providers, 1000)))
         else:
             return await _export_csv(providers)
             
@@ -316,94 +322,88 @@ async def export_providers(
         logger.error(f"Error exporting providers: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-async def _export_csv(providers: List[Provider]) -> StreamingResponse:
-    """Export providers to CSV format"""
+EXPORT_COLUMNS = [
+    "ID", "Name", "Email", "Phone", "WhatsApp", "Services", "Coverage Areas",
+    "Specialty", "Zone", "Rating", "Total Missions", "Success Rate", "Status",
+    "Availability", "Join Date", "Last Activity"
+]
+
+def _export_row(provider: Provider) -> list:
+    """Export columns of one provider, in EXPORT_COLUMNS order"""
+    return [
+        provider.id,
+        provider.name,
+        provider.email,
+        provider.phone,
+        provider.whatsapp,
+        ", ".join(provider.services),
+        ", ".join(provider.coverageAreas),
+        provider.specialty,
+        provider.zone,
+        provider.rating,
+        provider.totalMissions,
+        provider.successRate,
+        provider.status,
+        provider.availability,
+        provider.joinDate,
+        provider.lastActivity
+    ]
+
+def _csv_chunks(providers: Iterable[Provider], rows_per_chunk: int = 500) -> Iterator[bytes]:
+    """CSV body in chunks of rows, so only one chunk is held at a time"""
     output = io.StringIO()
     writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        "ID", "Name", "Email", "Phone", "WhatsApp", "Services", "Coverage Areas",
-        "Specialty", "Zone", "Rating", "Total Missions", "Success Rate", "Status",
-        "Availability", "Join Date", "Last Activity"
-    ])
-    
-    # Write data
-    for provider in providers:
-        writer.writerow([
-            provider.id,
-            provider.name,
-            provider.email,
-            provider.phone,
-            provider.whatsapp,
-            ", ".join(provider.services),
-            ", ".join(provider.coverageAreas),
-            provider.specialty,
-            provider.zone,
-            provider.rating,
-            provider.totalMissions,
-            provider.successRate,
-            provider.status,
-            provider.availability,
-            provider.joinDate,
-            provider.lastActivity
-        ])
-    
-    output.seek(0)
-    content = output.getvalue()
-    output.close()
-    
+    writer.writerow(EXPORT_COLUMNS)
+    for count, provider in enumerate(providers, 1):
+        writer.writerow(_export_row(provider))
+        if count % rows_per_chunk == 0:
+            yield output.getvalue().encode()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue().encode()
+
+async def _export_csv(providers: Iterable[Provider]) -> StreamingResponse:
+    """Export providers to CSV format"""
     return StreamingResponse(
-        io.BytesIO(content.encode()),
+        _csv_chunks(providers),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=providers.csv"}
     )
 
-async def _export_xlsx(providers: List[Provider]) -> StreamingResponse:
+def _xlsx_value(value):
+    """Cell value openpyxl accepts (plain enum values, naive datetimes)"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+async def _export_xlsx(providers: Iterable[Provider]) -> StreamingResponse:
     """Export providers to XLSX format"""
     try:
-        import pandas as pd
-        
-        # Convert to DataFrame
-        data = []
-        for provider in providers:
-            data.append({
-                "ID": provider.id,
-                "Name": provider.name,
-                "Email": provider.email,
-                "Phone": provider.phone,
-                "WhatsApp": provider.whatsapp,
-                "Services": ", ".join(provider.services),
-                "Coverage Areas": ", ".join(provider.coverageAreas),
-                "Specialty": provider.specialty,
-                "Zone": provider.zone,
-                "Rating": provider.rating,
-                "Total Missions": provider.totalMissions,
-                "Success Rate": provider.successRate,
-                "Status": provider.status,
-                "Availability": provider.availability,
-                "Join Date": provider.joinDate,
-                "Last Activity": provider.lastActivity
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Create Excel file
-        output = io.BytesIO()
-        df.to_excel(output, index=False)
-        output.seek(0)
-        
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=providers.xlsx"}
-        )
-        
+        from openpyxl import Workbook
     except ImportError:
-        # Fallback to CSV if pandas not available
-        logger.warning("pandas not available, falling back to CSV export")
+        # Fallback to CSV if openpyxl not available
+        logger.warning("openpyxl not available, falling back to CSV export")
         return await _export_csv(providers)
 
+    # Write-only workbooks stream rows to disk instead of keeping every cell
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Providers")
+    sheet.append(EXPORT_COLUMNS)
+    for provider in providers:
+        sheet.append([_xlsx_value(value) for value in _export_row(provider)])
+
+    output = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES)
+    workbook.save(output)
+    output.seek(0)
+
+    return StreamingResponse(
+        output,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": "attachment; filename=providers.xlsx"}
+    )
+
 async def _export_pdf(providers: List[Provider]) -> StreamingResponse:
     """Export providers to PDF format"""
     try:
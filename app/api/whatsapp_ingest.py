@@ -0,0 +1,68 @@
+"""
+WhatsApp Ingestion API for Djobea AI
+Twilio webhook that persists and acknowledges inbound messages immediately;
+the conversation pipeline runs afterwards in the message ingestion workers
+"""
+
+from fastapi import APIRouter, Depends, Form
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import Any, Dict
+
+from app.database import get_db
+from app.services.message_ingestion import get_message_ingestion_queue
+from app.services.whatsapp_service import whatsapp_service
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+
+@router.post("/whatsapp")
+async def whatsapp_webhook(
+    AccountSid: str = Form(...),
+    MessageSid: str = Form(...),
+    From: str = Form(...),
+    To: str = Form(...),
+    Body: str = Form(""),
+    NumMedia: int = Form(0),
+    MediaUrl0: str = Form(None),
+    MediaContentType0: str = Form(None),
+    db: Session = Depends(get_db)
+):
+    """Accept an incoming WhatsApp message (same form contract as the legacy webhook)"""
+    message_data = whatsapp_service.parse_incoming_message({
+        "AccountSid": AccountSid,
+        "MessageSid": MessageSid,
+        "From": From,
+        "To": To,
+        "Body": Body
+    })
+    if not message_data:
+        logger.error("Failed to parse incoming WhatsApp message")
+        return PlainTextResponse("", status_code=200)
+
+    has_media = NumMedia > 0 and MediaUrl0
+    try:
+        accepted = await get_message_ingestion_queue().ingest(
+            db,
+            message_sid=MessageSid,
+            phone_number=message_data["from"],
+            body=message_data["body"].strip(),
+            media_url=MediaUrl0 if has_media else None,
+            media_content_type=MediaContentType0 if has_media else None
+        )
+    except Exception as e:
+        # Not persisted: let Twilio retry
+        logger.error(f"Error persisting WhatsApp message {MessageSid}: {e}")
+        return PlainTextResponse("", status_code=500)
+
+    if not accepted:
+        logger.info(f"Ignoring duplicate WhatsApp message {MessageSid}")
+    return PlainTextResponse("", status_code=200)
+
+
+@router.get("/whatsapp/metrics")
+async def whatsapp_ingestion_metrics() -> Dict[str, Any]:
+    """Queue depth, lag and processing times of the inbound message workers"""
+    return get_message_ingestion_queue().get_stats()
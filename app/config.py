@@ -19,11 +19,46 @@ class Settings(BaseSettings):
     # Gemini API
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
     
+    # Shared async LLM client pool
+    llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    llm_max_keepalive_connections: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    llm_request_timeout_seconds: float = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "60"))
+    llm_claude_max_concurrency: int = int(os.getenv("LLM_CLAUDE_MAX_CONCURRENCY", "50"))
+    llm_gemini_max_concurrency: int = int(os.getenv("LLM_GEMINI_MAX_CONCURRENCY", "50"))
+    llm_openai_max_concurrency: int = int(os.getenv("LLM_OPENAI_MAX_CONCURRENCY", "50"))
+    
+    # LLM response cache
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    llm_cache_ttl_seconds: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+    llm_cache_redis_url: str = os.getenv("LLM_CACHE_REDIS_URL", "")
+    llm_cache_near_duplicate: bool = os.getenv("LLM_CACHE_NEAR_DUPLICATE", "false").lower() == "true"
+    llm_cache_similarity_threshold: float = float(os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0.8"))
+    llm_cache_excluded_intents: str = os.getenv("LLM_CACHE_EXCLUDED_INTENTS", "urgence,plainte,emergency,complaint")
+    
+    # Prompt assembly: static prompt prefixes (rules, service catalog, zones) are rebuilt when the catalog changes
+    # or after prompt_catalog_ttl_seconds, and marked for Anthropic prompt caching
+    prompt_catalog_ttl_seconds: float = float(os.getenv("PROMPT_CATALOG_TTL_SECONDS", "300"))
+    prompt_caching_enabled: bool = os.getenv("PROMPT_CACHING_ENABLED", "true").lower() == "true"
+    
+    # Local text classifiers (interruption, intent, emotion): the LLM is only asked below min_confidence
+    text_classifier_enabled: bool = os.getenv("TEXT_CLASSIFIER_ENABLED", "true").lower() == "true"
+    text_classifier_dir: str = os.getenv("TEXT_CLASSIFIER_DIR", "models/classifiers")
+    text_classifier_min_confidence: float = float(os.getenv("TEXT_CLASSIFIER_MIN_CONFIDENCE", "0.75"))
+    
     # Twilio WhatsApp
     twilio_account_sid: str = os.getenv("TWILIO_ACCOUNT_SID", "")
     twilio_auth_token: str = os.getenv("TWILIO_AUTH_TOKEN", "")
     twilio_phone_number: str = os.getenv("TWILIO_PHONE_NUMBER", "")
     
+    # Outbound notification dispatcher: worker pool, per-channel send rates (messages/second) and status write-back
+    notification_workers: int = int(os.getenv("NOTIFICATION_WORKERS", "8"))
+    notification_queue_size: int = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "1000"))
+    notification_whatsapp_rate: float = float(os.getenv("NOTIFICATION_WHATSAPP_RATE", "10"))
+    notification_whatsapp_burst: int = int(os.getenv("NOTIFICATION_WHATSAPP_BURST", "10"))
+    notification_writeback_interval_seconds: float = float(os.getenv("NOTIFICATION_WRITEBACK_INTERVAL_SECONDS", "1.0"))
+    notification_writeback_batch_size: int = int(os.getenv("NOTIFICATION_WRITEBACK_BATCH_SIZE", "100"))
+    
     # Monetbil Payment
     monetbil_service_key: str = os.getenv("MONETBIL_SERVICE_KEY", "")
     monetbil_service_secret: str = os.getenv("MONETBIL_SERVICE_SECRET", "")
@@ -52,7 +87,62 @@ class Settings(BaseSettings):
     # Session Management
     session_cache_ttl: int = int(os.getenv("SESSION_CACHE_TTL", "7200"))  # 2 hours
     session_timeout_minutes: int = int(os.getenv("SESSION_TIMEOUT_MINUTES", "120"))  # 2 hours
-    max_active_sessions: int = int(os.getenv("MAX_ACTIVE_SESSIONS", "1000"))
+    max_active_sessions: int = int(os.getenv("MAX_ACTIVE_SESSIONS", "1000"))  # resident in memory per worker
+    session_idle_eviction_seconds: int = int(os.getenv("SESSION_IDLE_EVICTION_SECONDS", "1800"))  # 30 minutes
+    
+    # Session store shared by sessions, service cache and rate limiter: "redis" or "local" (in-process)
+    session_store_backend: str = os.getenv("SESSION_STORE_BACKEND", "redis")
+    session_store_max_connections: int = int(os.getenv("SESSION_STORE_MAX_CONNECTIONS", "50"))
+    session_store_socket_timeout: float = float(os.getenv("SESSION_STORE_SOCKET_TIMEOUT", "1.0"))
+    session_store_retry_seconds: int = int(os.getenv("SESSION_STORE_RETRY_SECONDS", "30"))
+    
+    # Intent analysis: pattern matches at or above this confidence skip the LLM
+    intent_pattern_confidence_threshold: float = float(os.getenv("INTENT_PATTERN_CONFIDENCE_THRESHOLD", "0.85"))
+    
+    # Analytics rollups: hourly/daily request aggregates refreshed incrementally in the background
+    analytics_rollup_enabled: bool = os.getenv("ANALYTICS_ROLLUP_ENABLED", "true").lower() == "true"
+    analytics_rollup_interval_seconds: int = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "300"))
+    
+    # Deadline scheduler: proactive request updates, countdowns and timeouts run by one leader process
+    deadline_scheduler_enabled: bool = os.getenv("DEADLINE_SCHEDULER_ENABLED", "true").lower() == "true"
+    deadline_scheduler_tick_seconds: int = int(os.getenv("DEADLINE_SCHEDULER_TICK_SECONDS", "15"))
+    deadline_scheduler_batch_size: int = int(os.getenv("DEADLINE_SCHEDULER_BATCH_SIZE", "500"))
+    deadline_scheduler_lease_seconds: int = int(os.getenv("DEADLINE_SCHEDULER_LEASE_SECONDS", "60"))
+    
+    # Provider dashboard stats cache (entries are also dropped when the provider's requests change)
+    provider_stats_cache_ttl_seconds: int = int(os.getenv("PROVIDER_STATS_CACHE_TTL_SECONDS", "300"))
+    provider_stats_cache_max_entries: int = int(os.getenv("PROVIDER_STATS_CACHE_MAX_ENTRIES", "5000"))
+    
+    # Providers list: stats block cache, capped count for estimated totals and export chunk size
+    provider_list_stats_ttl_seconds: int = int(os.getenv("PROVIDER_LIST_STATS_TTL_SECONDS", "30"))
+    provider_list_count_cap: int = int(os.getenv("PROVIDER_LIST_COUNT_CAP", "10000"))
+    provider_export_chunk_size: int = int(os.getenv("PROVIDER_EXPORT_CHUNK_SIZE", "500"))
+    
+    # Shared system-state snapshot for prompts: refreshed every interval, or on provider/request writes at most once per min interval
+    system_state_refresh_seconds: float = float(os.getenv("SYSTEM_STATE_REFRESH_SECONDS", "15"))
+    system_state_min_refresh_seconds: float = float(os.getenv("SYSTEM_STATE_MIN_REFRESH_SECONDS", "1"))
+    
+    # Analytics exports: background jobs writing streamed files kept for analytics_export_ttl_hours
+    analytics_export_dir: str = os.getenv("ANALYTICS_EXPORT_DIR", "exports")
+    analytics_export_workers: int = int(os.getenv("ANALYTICS_EXPORT_WORKERS", "2"))
+    analytics_export_chunk_size: int = int(os.getenv("ANALYTICS_EXPORT_CHUNK_SIZE", "1000"))
+    analytics_export_ttl_hours: int = int(os.getenv("ANALYTICS_EXPORT_TTL_HOURS", "168"))
+    
+    # Analytics leaderboard: seconds a computed (category, period, metric) board is served from memory
+    leaderboard_cache_ttl_seconds: float = float(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "60"))
+    
+    # Write-behind sink for conversation logs and analytics events: bulk inserts every interval or batch_size rows
+    event_sink_flush_interval_seconds: float = float(os.getenv("EVENT_SINK_FLUSH_INTERVAL_SECONDS", "2.0"))
+    event_sink_batch_size: int = int(os.getenv("EVENT_SINK_BATCH_SIZE", "200"))
+    event_sink_max_buffer: int = int(os.getenv("EVENT_SINK_MAX_BUFFER", "5000"))
+    
+    # Inbound WhatsApp ingestion: messages are persisted and acknowledged, then processed in order per phone number
+    message_ingestion_workers: int = int(os.getenv("MESSAGE_INGESTION_WORKERS", "16"))
+    message_ingestion_max_attempts: int = int(os.getenv("MESSAGE_INGESTION_MAX_ATTEMPTS", "3"))
+    # A message claimed longer ago than this is assumed abandoned by its worker and is replayed
+    message_ingestion_stale_seconds: int = int(os.getenv("MESSAGE_INGESTION_STALE_SECONDS", "300"))
+    # Pause before retrying a message whose sender's older message is still being handled elsewhere
+    message_ingestion_claim_retry_seconds: float = float(os.getenv("MESSAGE_INGESTION_CLAIM_RETRY_SECONDS", "1.0"))
     
     # Business rules
     max_concurrent_requests: int = 50
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
@@ -67,11 +68,57 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+    # Keep analytics rollups current in the background
+    rollup_task = None
+    if settings.analytics_rollup_enabled:
+        from app.services.analytics_rollups import run_rollup_loop
+        rollup_task = asyncio.create_task(run_rollup_loop(settings.analytics_rollup_interval_seconds))
+
+    # Proactive request updates and timeouts (only the lease holder dispatches)
+    scheduler_task = None
+    if settings.deadline_scheduler_enabled:
+        from app.services.deadline_scheduler import run_deadline_scheduler_loop
+        scheduler_task = asyncio.create_task(run_deadline_scheduler_loop(settings.deadline_scheduler_tick_seconds))
+
+    # Load the local text classifiers once, before the first message
+    from app.services.text_classifier import get_text_classifiers
+    get_text_classifiers().load()
+
+    # Resume inbound WhatsApp messages accepted but not processed before the last shutdown
+    from app.services.message_ingestion import get_message_ingestion_queue
+    await get_message_ingestion_queue().recover()
+
     yield
 
     # Shutdown
     logger.info("Shutting down Djobea AI application...")
 
+    if rollup_task:
+        rollup_task.cancel()
+
+    if scheduler_task:
+        scheduler_task.cancel()
+        await asyncio.gather(scheduler_task, return_exceptions=True)
+
+    # Finish queued inbound messages before their replies' dispatcher stops
+    from app.services.message_ingestion import close_message_ingestion_queue
+    await close_message_ingestion_queue()
+
+    from app.services.llm_client_pool import close_llm_client_pool
+    await close_llm_client_pool()
+
+    from app.services.notification_dispatcher import close_notification_dispatcher
+    await close_notification_dispatcher()
+
+    from app.services.analytics_export import close_analytics_export_queue
+    await close_analytics_export_queue()
+
+    from app.services.session_store import close_session_store
+    await close_session_store()
+
+    from app.services.event_sink import close_event_sink
+    await close_event_sink()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -123,6 +170,11 @@ from app.api.providers_complete import router as providers_router
 
 app.include_router(providers_router)
 
+# WhatsApp webhook (acknowledge first, process in the ingestion workers)
+from app.api.whatsapp_ingest import router as whatsapp_ingest_router
+
+app.include_router(whatsapp_ingest_router, prefix="/webhook", tags=["webhook"])
+
 # Remove the options handler since the middleware handles it now
 
 # All other API endpoints moved to old-endpoint/ folder:
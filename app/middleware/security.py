@@ -5,7 +5,6 @@ Implements rate limiting, security headers, input validation, and protection
 
 import time
 import json
-import redis
 from typing import Dict, Any, Optional, List
 from fastapi import Request, Response, HTTPException, status
 from fastapi.responses import JSONResponse
@@ -17,37 +16,19 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from loguru import logger
 import re
-import os
 
 from app.config import get_settings
 from app.services.auth_service import AuthService
+from app.services.session_store import SessionStore, build_redis_url, get_session_store
 
 settings = get_settings()
 
-# Redis connection for rate limiting
-try:
-    redis_client = redis.Redis(
-        host=os.getenv("REDIS_HOST", "localhost"),
-        port=int(os.getenv("REDIS_PORT", "6379")),
-        password=os.getenv("REDIS_PASSWORD"),
-        decode_responses=True
-    )
-    redis_client.ping()
-    logger.info("Redis connection established for rate limiting")
-except Exception as e:
-    logger.warning(f"Redis not available, using in-memory rate limiting: {e}")
-    redis_client = None
-
 
 # Rate limiter configuration
-def get_redis_client():
-    """Get Redis client for rate limiting"""
-    return redis_client
-
-
 limiter = Limiter(
     key_func=get_remote_address,
-    storage_uri=f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}" if redis_client else "memory://",
+    storage_uri=build_redis_url(settings) if settings.session_store_backend == "redis" else "memory://",
+    in_memory_fallback_enabled=True,
     default_limits=["1000 per hour"]
 )
 
@@ -211,9 +192,9 @@ class InputValidationMiddleware(BaseHTTPMiddleware):
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """Advanced rate limiting middleware"""
     
-    def __init__(self, app, redis_client=None):
+    def __init__(self, app, store: Optional[SessionStore] = None):
         super().__init__(app)
-        self.redis_client = redis_client or get_redis_client()
+        self.store = store or get_session_store()
         
         # Rate limit configurations
         self.rate_limits = {
@@ -266,10 +247,6 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     
     async def _check_rate_limit(self, client_ip: str, category: str, endpoint: str) -> bool:
         """Check if request is within rate limit"""
-        if not self.redis_client:
-            # Fallback to simple in-memory check (not recommended for production)
-            return True
-        
         key = f"rate_limit:{category}:{client_ip}:{endpoint}"
         window = self.rate_limits[category]["window"]
         limit = self.rate_limits[category]["limit"]
@@ -278,19 +255,8 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         window_start = current_time - (current_time % window)
         
         try:
-            # Use Redis pipeline for atomic operations
-            pipe = self.redis_client.pipeline()
-            pipe.multi()
-            
-            # Increment counter for current window
-            pipe.hincrby(key, str(window_start), 1)
-            pipe.expire(key, window * 2)  # Keep data for 2 windows
-            
-            # Get current count
-            pipe.hget(key, str(window_start))
-            
-            results = pipe.execute()
-            current_count = int(results[2] or 0)
+            # Increment and refresh expiry in one pipelined round trip; keep data for 2 windows
+            current_count = await self.store.incr_window(key, str(window_start), window * 2)
             
             return current_count <= limit
             
@@ -300,9 +266,6 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     
     async def _get_limit_info(self, client_ip: str, category: str, endpoint: str) -> Dict[str, int]:
         """Get current rate limit information"""
-        if not self.redis_client:
-            return {"count": 0, "reset_time": int(time.time()) + self.rate_limits[category]["window"]}
-        
         key = f"rate_limit:{category}:{client_ip}:{endpoint}"
         window = self.rate_limits[category]["window"]
         
@@ -310,7 +273,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         window_start = current_time - (current_time % window)
         
         try:
-            count = int(self.redis_client.hget(key, str(window_start)) or 0)
+            count = await self.store.get_window(key, str(window_start))
             reset_time = window_start + window
             
             return {"count": count, "reset_time": reset_time}
@@ -403,7 +366,7 @@ def setup_security_middleware(app):
     
     # Custom security middleware (order matters)
     app.add_middleware(WebhookSecurityMiddleware)
-    app.add_middleware(RateLimitMiddleware, redis_client=redis_client)
+    app.add_middleware(RateLimitMiddleware)
     app.add_middleware(InputValidationMiddleware, max_content_length=10 * 1024 * 1024)
     app.add_middleware(SecurityHeadersMiddleware)
     
@@ -0,0 +1,66 @@
+"""
+Analytics rollup models for Djobea AI
+Pre-aggregated hourly and daily ServiceRequest summaries read by the analytics API
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Date, Float, UniqueConstraint
+from app.models.database_models import Base
+
+
+class RequestRollupHourly(Base):
+    """ServiceRequest counts per hour, service type, location, status, urgency and provider"""
+    __tablename__ = "analytics_request_rollup_hourly"
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "service_type", "location", "status", "urgency", "provider_id",
+                         name="uq_request_rollup_hourly_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False, index=True)
+
+    # Dimensions (same names as the ServiceRequest columns they come from)
+    service_type = Column(String(50), nullable=True)
+    location = Column(String(200), nullable=True)
+    status = Column(String(20), nullable=True)
+    urgency = Column(String(20), nullable=True)
+    provider_id = Column(Integer, nullable=True)
+
+    # Facts
+    request_count = Column(Integer, nullable=False, default=0)
+    estimated_cost_sum = Column(Float, nullable=False, default=0.0)
+    resolution_seconds_sum = Column(Float, nullable=False, default=0.0)
+    resolution_count = Column(Integer, nullable=False, default=0)
+
+
+class RequestRollupDaily(Base):
+    """ServiceRequest counts per day, service type, location, status, urgency and provider"""
+    __tablename__ = "analytics_request_rollup_daily"
+    __table_args__ = (
+        UniqueConstraint("bucket_date", "service_type", "location", "status", "urgency", "provider_id",
+                         name="uq_request_rollup_daily_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_date = Column(Date, nullable=False, index=True)
+
+    service_type = Column(String(50), nullable=True)
+    location = Column(String(200), nullable=True)
+    status = Column(String(20), nullable=True)
+    urgency = Column(String(20), nullable=True)
+    provider_id = Column(Integer, nullable=True)
+
+    request_count = Column(Integer, nullable=False, default=0)
+    estimated_cost_sum = Column(Float, nullable=False, default=0.0)
+    resolution_seconds_sum = Column(Float, nullable=False, default=0.0)
+    resolution_count = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """Last source change processed by a rollup job"""
+    __tablename__ = "analytics_rollup_watermarks"
+
+    name = Column(String(100), primary_key=True)
+    last_changed_at = Column(DateTime, nullable=True)
+    last_run_at = Column(DateTime, default=datetime.now)
+    rows_processed = Column(Integer, default=0)
+    buckets_refreshed = Column(Integer, default=0)
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, Date, Time, Text, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Date, Time, Text, Float, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -381,6 +381,10 @@ class ProviderProfileView(Base):
 class ServiceRequest(Base):
     """Service request model"""
     __tablename__ = "service_requests"
+    __table_args__ = (
+        # Provider dashboards filter one provider's requests by creation time range
+        Index('idx_service_request_provider_created', 'provider_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -407,8 +411,8 @@ class ServiceRequest(Base):
     
     # Status and timestamps
     status = Column(String(20), default=RequestStatus.PENDING)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     accepted_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     scheduled_at = Column(DateTime(timezone=True), nullable=True)  # Confirmed appointment time
@@ -614,8 +618,21 @@ def init_db(engine):
     # Import dynamic services models to register them
     from app.models.dynamic_services import Zone, ServiceCategory, Service, ServiceZone, DynamicServiceRequest, ServiceSearchLog
     
+    # Import analytics rollup models to register them
+    from app.models import analytics_rollup_models
+    
+    # Import deadline scheduler models to register them
+    from app.models import scheduler_models
+    
+    # Import inbound message ingestion models to register them
+    from app.models import ingestion_models
+    
     Base.metadata.create_all(bind=engine)
     
+    # Trigram indexes for fuzzy catalog lookups (PostgreSQL only)
+    from app.services.fuzzy_index import ensure_trigram_indexes
+    ensure_trigram_indexes(engine)
+    
     # Create some initial data if needed
     from sqlalchemy.orm import sessionmaker
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
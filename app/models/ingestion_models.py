@@ -0,0 +1,29 @@
+"""
+Inbound message ingestion models for Djobea AI
+Every WhatsApp message Twilio delivers, persisted before it is acknowledged
+and processed later by the ingestion workers
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.models.database_models import Base
+
+
+class InboundMessage(Base):
+    """One inbound WhatsApp message, unique per Twilio MessageSid"""
+    __tablename__ = "inbound_messages"
+    __table_args__ = (
+        Index("ix_inbound_messages_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    message_sid = Column(String(64), nullable=False, unique=True)
+    phone_number = Column(String(30), nullable=False, index=True)
+    body = Column(Text, nullable=False, default="")
+    media_url = Column(String(500))
+    media_content_type = Column(String(100))
+    status = Column(String(20), nullable=False, default="received")  # received, processing, processed, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = Column(DateTime)  # when a worker moved it to processing
+    processed_at = Column(DateTime)
@@ -165,6 +165,8 @@ class Pagination(BaseModel):
     totalPages: int = Field(..., ge=0)
     hasNext: bool
     hasPrev: bool
+    nextCursor: Optional[str] = None  # Opaque keyset cursor of the next page
+    estimatedTotal: bool = False
 
 class ProvidersStats(BaseModel):
     total: int = Field(..., ge=0)
@@ -0,0 +1,32 @@
+"""
+Deadline scheduler models for Djobea AI
+Durable per-request deadlines (status updates, countdown warnings, timeouts)
+and the lease that elects a single scheduler process
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from app.models.database_models import Base
+
+
+class ScheduledRequestAction(Base):
+    """Next due time of one proactive action for a service request"""
+    __tablename__ = "scheduled_request_actions"
+    __table_args__ = (
+        UniqueConstraint("request_id", "action", name="uq_scheduled_request_action"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(Integer, nullable=False, index=True)
+    action = Column(String(30), nullable=False)  # status_update, countdown_warning, timeout
+    due_at = Column(DateTime, nullable=False, index=True)
+    runs = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SchedulerLease(Base):
+    """Leader lease: only the current holder runs the scheduler loop"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,11 +1,11 @@
 import os
 import json
 import sys
-from typing import Dict, Optional, List
-from anthropic import Anthropic
+from typing import Callable, Dict, Optional, List
 from app.utils.logger import setup_logger
 from app.config import get_settings
 from app.services.multi_llm_service import MultiLLMService, LLMProvider
+from app.services.llm_client_pool import get_llm_client_pool
 
 logger = setup_logger(__name__)
 settings = get_settings()
@@ -23,11 +23,11 @@ class AIService:
         # Initialize multi-LLM service
         self.multi_llm = MultiLLMService()
         
-        # Legacy Claude client for backward compatibility
+        # Direct Claude access through the shared async client pool
         try:
-            anthropic_key = os.environ.get('ANTHROPIC_API_KEY')
-            if anthropic_key:
-                self.client = Anthropic(api_key=anthropic_key)
+            self.client_pool = get_llm_client_pool()
+            if self.client_pool.claude is not None:
+                self.client = self.client_pool.claude
             else:
                 self.client = None
                 logger.warning("No Anthropic API key found, using multi-LLM fallback only")
@@ -39,7 +39,7 @@ class AIService:
         self.target_area = f"{settings.target_district}, {settings.target_city}"
         self.supported_services = settings.supported_services
         
-    def extract_request_info(self, message: str, conversation_history: List[Dict] = None) -> Dict:
+    async def extract_request_info(self, message: str, conversation_history: List[Dict] = None) -> Dict:
         """Extract service request information from user message"""
         
         conversation_context = ""
@@ -93,7 +93,7 @@ class AIService:
         """
         
         try:
-            response = self.client.messages.create(
+            response = await self.client_pool.claude_messages(
                 model=self.model,
                 max_tokens=1000,
                 temperature=0.1,
@@ -129,7 +129,7 @@ class AIService:
             logger.error(f"Error in AI service: {e}")
             return self._get_fallback_response(message)
     
-    def generate_provider_notification(self, request_data: Dict) -> str:
+    async def generate_provider_notification(self, request_data: Dict) -> str:
         """Generate notification message for service provider"""
         
         system_prompt = """
@@ -156,7 +156,7 @@ class AIService:
         """
         
         try:
-            response = self.client.messages.create(
+            response = await self.client_pool.claude_messages(
                 model=self.model,
                 max_tokens=300,
                 temperature=0.3,
@@ -196,7 +196,7 @@ Djobea AI - Services à domicile
         
         return status_messages.get(status, "Statut de votre demande mis à jour.")
     
-    async def generate_response(self, messages: List[Dict], system_prompt: str = None, max_tokens: int = 1000, temperature: float = 0.7) -> str:
+    async def generate_response(self, messages: List[Dict], system_prompt: str = None, max_tokens: int = 1000, temperature: float = 0.7, intent: Optional[str] = None, use_cache: bool = True, match_text: Optional[str] = None, match_if: Optional[Callable[[str], bool]] = None) -> str:
         """Generate AI response using multi-LLM system with automatic fallback"""
         try:
             # First try multi-LLM service
@@ -204,7 +204,11 @@ Djobea AI - Services à domicile
                 messages=messages,
                 system_prompt=system_prompt,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                intent=intent,
+                use_cache=use_cache,
+                match_text=match_text,
+                match_if=match_if
             )
             
             logger.info(f"Successfully generated response using multi-LLM service")
@@ -245,7 +249,7 @@ Djobea AI - Services à domicile
                                 "content": str(msg)
                             })
                     
-                    response = self.client.messages.create(
+                    response = await self.client_pool.claude_messages(
                         model=self.model,
                         max_tokens=max_tokens,
                         temperature=temperature,
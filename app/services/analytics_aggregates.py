@@ -0,0 +1,148 @@
+"""
+Analytics aggregation helpers
+SQL-side counts, status breakdowns and averages over ServiceRequest so the
+analytics routers never materialize request rows to compute a summary.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, func, literal
+from sqlalchemy.orm import Session
+
+from app.models.database_models import ServiceRequest
+
+
+@dataclass
+class RequestAggregate:
+    """Aggregated ServiceRequest figures for one period or one group"""
+    total: int = 0
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    measures: Dict[str, Optional[float]] = field(default_factory=dict)
+
+    def count(self, status: str) -> int:
+        """Number of requests with the given status"""
+        return self.status_counts.get(status, 0)
+
+    def count_excluding(self, status: str) -> int:
+        """Number of requests whose status differs from the given one"""
+        return self.total - self.count(status)
+
+    def rate(self, status: str) -> float:
+        """Share of requests with the given status, as a percentage"""
+        return (self.count(status) / self.total * 100) if self.total > 0 else 0.0
+
+    def measure(self, name: str, default: float = 0.0) -> float:
+        """Value of an extra aggregate, or default when it is NULL"""
+        value = self.measures.get(name)
+        return float(value) if value is not None else default
+
+
+def status_count_column(status: str, label: str):
+    """SUM(CASE WHEN status = :status THEN 1 ELSE 0 END), portable across backends"""
+    return func.sum(case((ServiceRequest.status == status, 1), else_=0)).label(label)
+
+
+def _aggregate_columns(statuses: Iterable[str], measures: Optional[Dict[str, Any]]):
+    statuses = list(dict.fromkeys(statuses))
+    measures = measures or {}
+    columns = [func.count(ServiceRequest.id).label("total")]
+    columns += [status_count_column(status, f"status_{i}") for i, status in enumerate(statuses)]
+    columns += [expression.label(f"measure_{name}") for name, expression in measures.items()]
+    return columns, statuses, list(measures)
+
+
+def _to_aggregate(row, statuses, measure_names) -> RequestAggregate:
+    if row is None:
+        return RequestAggregate(
+            status_counts={status: 0 for status in statuses},
+            measures={name: None for name in measure_names},
+        )
+    mapping = row._mapping
+    return RequestAggregate(
+        total=int(mapping["total"] or 0),
+        status_counts={status: int(mapping[f"status_{i}"] or 0) for i, status in enumerate(statuses)},
+        measures={name: mapping[f"measure_{name}"] for name in measure_names},
+    )
+
+
+def _period_filters(start: datetime, end: datetime, end_inclusive: bool):
+    upper = ServiceRequest.created_at <= end if end_inclusive else ServiceRequest.created_at < end
+    return [ServiceRequest.created_at >= start, upper]
+
+
+def summarize_requests(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    statuses: Iterable[str] = (),
+    measures: Optional[Dict[str, Any]] = None,
+    filters: Iterable[Any] = (),
+    end_inclusive: bool = True,
+) -> RequestAggregate:
+    """Aggregate requests created in [start, end] with a single query
+
+    ``measures`` maps a name to an aggregate expression (e.g. ``func.avg(...)``)
+    evaluated in the same SELECT.
+    """
+    columns, statuses, measure_names = _aggregate_columns(statuses, measures)
+    row = db.query(*columns).filter(
+        *_period_filters(start, end, end_inclusive), *filters
+    ).one_or_none()
+    return _to_aggregate(row, statuses, measure_names)
+
+
+def summarize_periods(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    statuses: Iterable[str] = (),
+    measures: Optional[Dict[str, Any]] = None,
+    filters: Iterable[Any] = (),
+) -> Tuple[RequestAggregate, RequestAggregate]:
+    """Aggregate the period [start, end] and the equally long period before it
+
+    Both periods come back from one GROUP BY over a CASE period label; the
+    previous period is half-open so a request at ``start`` is counted once.
+    """
+    previous_start = start - (end - start)
+    columns, statuses, measure_names = _aggregate_columns(statuses, measures)
+    period = case((ServiceRequest.created_at >= start, literal("current")), else_=literal("previous"))
+
+    rows = db.query(period.label("period"), *columns).filter(
+        ServiceRequest.created_at >= previous_start,
+        ServiceRequest.created_at <= end,
+        *filters
+    ).group_by(period).all()
+
+    by_period = {row.period: row for row in rows}
+    return (
+        _to_aggregate(by_period.get("current"), statuses, measure_names),
+        _to_aggregate(by_period.get("previous"), statuses, measure_names),
+    )
+
+
+def summarize_requests_by(
+    db: Session,
+    group_column,
+    start: datetime,
+    end: datetime,
+    statuses: Iterable[str] = (),
+    measures: Optional[Dict[str, Any]] = None,
+    filters: Iterable[Any] = (),
+    end_inclusive: bool = True,
+) -> Dict[Any, RequestAggregate]:
+    """Aggregate requests per value of ``group_column`` with a single GROUP BY"""
+    columns, statuses, measure_names = _aggregate_columns(statuses, measures)
+    rows = db.query(group_column.label("group_key"), *columns).filter(
+        *_period_filters(start, end, end_inclusive), *filters
+    ).group_by(group_column).all()
+    return {row.group_key: _to_aggregate(row, statuses, measure_names) for row in rows}
+
+
+def change_percentage(current: float, previous: float) -> float:
+    """Period-over-period change, 100% when growing from zero"""
+    if previous == 0:
+        return 100.0 if current > 0 else 0.0
+    return ((current - previous) / previous) * 100
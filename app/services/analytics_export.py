@@ -0,0 +1,509 @@
+"""
+Analytics Export
+Background export jobs for the analytics API: a small async queue hands each
+job to a worker thread, request rows are streamed from a server-side cursor
+in chunks and written incrementally (CSV, JSON, JSON lines, write-only XLSX,
+page-by-page PDF), so a year of requests never sits in memory and the event
+loop is never blocked. Finished files are served from the export directory
+until they expire.
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.database_models import ServiceRequest
+
+settings = get_settings()
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+EXPORT_FORMATS = ("xlsx", "csv", "json", "jsonl", "pdf")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+# Request columns written for the "requests" data type
+REQUEST_COLUMNS: List[Tuple[str, Any]] = [
+    ("id", ServiceRequest.id),
+    ("createdAt", ServiceRequest.created_at),
+    ("serviceType", ServiceRequest.service_type),
+    ("location", ServiceRequest.location),
+    ("status", ServiceRequest.status),
+    ("urgency", ServiceRequest.urgency),
+    ("providerId", ServiceRequest.provider_id),
+    ("acceptedAt", ServiceRequest.accepted_at),
+    ("completedAt", ServiceRequest.completed_at),
+    ("estimatedCost", ServiceRequest.estimated_cost),
+    ("finalCost", ServiceRequest.final_cost),
+]
+
+SUMMARY_COLUMNS = ["Data Type", "Metric", "Value", "Period"]
+
+
+class ExportCancelled(Exception):
+    """Raised inside a writer when the job was cancelled"""
+
+
+@dataclass
+class ExportJob:
+    """One analytics export and its progress"""
+    format: str
+    period: str
+    start: datetime
+    end: datetime
+    # Builds the summary sections (kpis, services, ...) from a session
+    build_summary: Callable[[Session], Dict[str, Any]]
+    # Stream individual requests in the period
+    include_requests: bool = False
+    request_filters: List[Any] = field(default_factory=list)
+    owner_id: Optional[Any] = None
+    # Awaited on the event loop once the file is ready
+    on_complete: Optional[Callable[["ExportJob"], Awaitable[None]]] = None
+    id: str = field(default_factory=lambda: f"export_{uuid.uuid4().hex[:12]}")
+    status: str = QUEUED
+    rows_total: int = 0
+    rows_written: int = 0
+    filename: Optional[str] = None
+    path: Optional[Path] = None
+    file_size: int = 0
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    cancel_requested: bool = False
+
+    def __post_init__(self):
+        if self.filename is None:
+            self.filename = f"analytics_{self.created_at.strftime('%Y%m%d_%H%M%S')}_{self.id}.{self.format}"
+
+    @property
+    def progress(self) -> int:
+        """Percentage of the job done"""
+        if self.status == COMPLETED:
+            return 100
+        if self.status != RUNNING or not self.rows_total:
+            return 0
+        # The last percent is left for closing the file
+        return min(99, int(self.rows_written * 100 / self.rows_total))
+
+    def to_dict(self) -> Dict[str, Any]:
+        def iso(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() + "Z" if value else None
+
+        return {
+            "exportId": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "format": self.format,
+            "filename": self.filename,
+            "fileSize": self.file_size,
+            "rowsWritten": self.rows_written,
+            "error": self.error,
+            "createdAt": iso(self.created_at),
+            "startedAt": iso(self.started_at),
+            "completedAt": iso(self.completed_at),
+            "expiresAt": iso(self.expires_at),
+        }
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_request_rows(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    filters: Optional[List[Any]] = None,
+    chunk_size: Optional[int] = None
+) -> Iterator[Tuple]:
+    """Requests created in [start, end] read through a server-side cursor, chunk_size rows at a time"""
+    statement = (
+        select(*[column for _, column in REQUEST_COLUMNS])
+        .where(ServiceRequest.created_at >= start, ServiceRequest.created_at <= end, *(filters or []))
+        .order_by(ServiceRequest.created_at, ServiceRequest.id)
+        .execution_options(stream_results=True, yield_per=chunk_size or settings.analytics_export_chunk_size)
+    )
+    result = db.execute(statement)
+    try:
+        for row in result:
+            yield tuple(row)
+    finally:
+        result.close()
+
+
+def _tracked(job: ExportJob, rows: Iterator[Tuple]) -> Iterator[Tuple]:
+    """Count rows as the writer consumes them and stop at the first chunk boundary after a cancel"""
+    chunk_size = settings.analytics_export_chunk_size
+    for row in rows:
+        yield row
+        job.rows_written += 1
+        if job.rows_written % chunk_size == 0 and job.cancel_requested:
+            raise ExportCancelled()
+
+
+def count_request_rows(db: Session, start: datetime, end: datetime, filters: Optional[List[Any]] = None) -> int:
+    return db.execute(
+        select(func.count(ServiceRequest.id))
+        .where(ServiceRequest.created_at >= start, ServiceRequest.created_at <= end, *(filters or []))
+    ).scalar() or 0
+
+
+def summary_rows(summary: Dict[str, Any], period: str) -> Iterator[List[Any]]:
+    """Flatten summary sections into (data type, metric, value, period) rows"""
+    for section, content in summary.items():
+        if isinstance(content, dict):
+            for metric, value in content.items():
+                yield [section, metric, _cell(value), period]
+        elif isinstance(content, list):
+            for item in content:
+                if not isinstance(item, dict) or not item:
+                    yield [section, "", _cell(item), period]
+                    continue
+                label, *fields = item.items()
+                for metric, value in fields:
+                    yield [section, f"{label[1]}.{metric}", _cell(value), period]
+        else:
+            yield [section, "", _cell(content), period]
+
+
+# Writers take (path, job, summary, rows) and consume the request rows once
+
+def write_csv(path: Path, job: ExportJob, summary: Dict[str, Any], rows: Iterator[Tuple]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(SUMMARY_COLUMNS)
+        writer.writerows(summary_rows(summary, job.period))
+        if job.include_requests:
+            writer.writerow([])
+            writer.writerow([name for name, _ in REQUEST_COLUMNS])
+            for row in rows:
+                writer.writerow([_cell(value) for value in row])
+
+
+def write_json(path: Path, job: ExportJob, summary: Dict[str, Any], rows: Iterator[Tuple]):
+    names = [name for name, _ in REQUEST_COLUMNS]
+    with open(path, "w", encoding="utf-8") as f:
+        # Summary keys are written whole; the requests array is appended row by row
+        head = json.dumps({"period": job.period, **summary}, ensure_ascii=False, default=str)
+        if not job.include_requests:
+            f.write(head)
+            return
+        f.write(head[:-1] + ', "requests": [')
+        for count, row in enumerate(rows):
+            if count:
+                f.write(",")
+            f.write(json.dumps(dict(zip(names, row)), ensure_ascii=False, default=str))
+        f.write("]}")
+
+
+def write_jsonl(path: Path, job: ExportJob, summary: Dict[str, Any], rows: Iterator[Tuple]):
+    names = [name for name, _ in REQUEST_COLUMNS]
+    with open(path, "w", encoding="utf-8") as f:
+        for section, content in summary.items():
+            f.write(json.dumps({"type": section, "period": job.period, "data": content}, ensure_ascii=False, default=str))
+            f.write("\n")
+        for row in rows:
+            f.write(json.dumps({"type": "request", **dict(zip(names, row))}, ensure_ascii=False, default=str))
+            f.write("\n")
+
+
+def write_xlsx(path: Path, job: ExportJob, summary: Dict[str, Any], rows: Iterator[Tuple]):
+    from openpyxl import Workbook
+
+    # Write-only workbooks stream each row to a temporary file as it is appended
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Summary")
+    sheet.append(SUMMARY_COLUMNS)
+    for row in summary_rows(summary, job.period):
+        sheet.append(row)
+
+    if job.include_requests:
+        sheet = workbook.create_sheet("Requests")
+        sheet.append([name for name, _ in REQUEST_COLUMNS])
+        for row in rows:
+            sheet.append([
+                value.replace(tzinfo=None) if isinstance(value, datetime) else value
+                for value in row
+            ])
+    workbook.save(path)
+
+
+def write_pdf(path: Path, job: ExportJob, summary: Dict[str, Any], rows: Iterator[Tuple]):
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    # Drawn line by line on the canvas, one page at a time, instead of laying
+    # out a single table holding every row
+    width, height = landscape(A4)
+    margin, line_height = 36, 12
+    pdf = canvas.Canvas(str(path), pagesize=(width, height))
+
+    def new_page(title: Optional[str] = None) -> float:
+        y = height - margin
+        if title:
+            pdf.setFont("Helvetica-Bold", 14)
+            pdf.drawString(margin, y, title)
+            y -= 2 * line_height
+        pdf.setFont("Helvetica", 8)
+        return y
+
+    y = new_page(f"Djobea AI analytics export ({job.period})")
+    for section, metric, value, _ in summary_rows(summary, job.period):
+        if y < margin:
+            pdf.showPage()
+            y = new_page()
+        pdf.drawString(margin, y, f"{section}  {metric}  {value}"[:160])
+        y -= line_height
+
+    if job.include_requests:
+        header = [name for name, _ in REQUEST_COLUMNS]
+        column_width = (width - 2 * margin) / len(header)
+
+        def draw_row(values, y, bold=False):
+            pdf.setFont("Helvetica-Bold" if bold else "Helvetica", 7)
+            for i, value in enumerate(values):
+                text = "" if value is None else str(_cell(value))
+                pdf.drawString(margin + i * column_width, y, text[:24])
+
+        pdf.showPage()
+        y = new_page("Requests")
+        draw_row(header, y, bold=True)
+        y -= line_height
+        for row in rows:
+            if y < margin:
+                pdf.showPage()
+                y = new_page()
+                draw_row(header, y, bold=True)
+                y -= line_height
+            draw_row(row, y)
+            y -= line_height
+    pdf.save()
+
+
+WRITERS: Dict[str, Callable] = {
+    "csv": write_csv,
+    "json": write_json,
+    "jsonl": write_jsonl,
+    "xlsx": write_xlsx,
+    "pdf": write_pdf,
+}
+
+
+class AnalyticsExportQueue:
+    """
+    Process-wide analytics export queue
+
+    Jobs are tracked in memory next to the files they produce; each one runs
+    on a worker thread with its own session. Finished files are deleted once
+    they expire.
+    """
+
+    def __init__(
+        self,
+        export_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        ttl_hours: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None
+    ):
+        self.export_dir = Path(export_dir or settings.analytics_export_dir)
+        self.workers = workers or settings.analytics_export_workers
+        self.ttl = timedelta(hours=ttl_hours or settings.analytics_export_ttl_hours)
+        self.session_factory = session_factory
+        self.jobs: Dict[str, ExportJob] = {}
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def submit(self, job: ExportJob) -> ExportJob:
+        """Queue an export; poll get() for its status"""
+        if job.format not in WRITERS:
+            raise ValueError(f"Unsupported export format: {job.format}")
+        self._ensure_started()
+        self.purge_expired()
+        self.jobs[job.id] = job
+        await self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[ExportJob]:
+        """Cancel a queued or running export, or delete a finished one's file"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status in (QUEUED, RUNNING):
+            # A running job stops at its next chunk boundary
+            job.cancel_requested = True
+            if job.status == QUEUED:
+                self._mark_cancelled(job)
+        else:
+            self._remove_file(job)
+            self._mark_cancelled(job)
+        return job
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Forget finished jobs past their expiry and delete their files"""
+        now = now or datetime.utcnow()
+        expired = [job for job in self.jobs.values() if job.expires_at and job.expires_at <= now]
+        for job in expired:
+            self._remove_file(job)
+            del self.jobs[job.id]
+        return len(expired)
+
+    async def close(self):
+        """Stop the workers; running jobs finish their current chunk and are cancelled"""
+        for job in self.jobs.values():
+            if job.status in (QUEUED, RUNNING):
+                job.cancel_requested = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self.jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "jobs": by_status,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "workers": self.workers
+        }
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Analytics export queue started with {self.workers} workers")
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.cancel_requested:
+                    if job.status != CANCELLED:
+                        self._mark_cancelled(job)
+                    continue
+                await loop.run_in_executor(self._executor, self.run_job, job)
+                if job.status == COMPLETED and job.on_complete:
+                    await job.on_complete(job)
+            except Exception as e:
+                logger.error(f"Analytics export worker error for {job.id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def run_job(self, job: ExportJob):
+        """Produce the export file (blocking; runs on a worker thread)"""
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        final_path = self.export_dir / job.filename
+        partial_path = final_path.with_name(final_path.name + ".part")
+
+        started = time.monotonic()
+        try:
+            with self._session() as db:
+                summary = job.build_summary(db)
+                rows: Iterator[Tuple] = iter(())
+                if job.include_requests:
+                    job.rows_total = count_request_rows(db, job.start, job.end, job.request_filters)
+                    rows = _tracked(job, stream_request_rows(db, job.start, job.end, job.request_filters))
+                WRITERS[job.format](partial_path, job, summary, rows)
+            os.replace(partial_path, final_path)
+        except ExportCancelled:
+            partial_path.unlink(missing_ok=True)
+            self._mark_cancelled(job)
+            logger.info(f"Analytics export {job.id} cancelled after {job.rows_written} rows")
+            return
+        except Exception as e:
+            partial_path.unlink(missing_ok=True)
+            job.status = FAILED
+            job.error = str(e)
+            job.completed_at = datetime.utcnow()
+            job.expires_at = job.completed_at + self.ttl
+            logger.error(f"Analytics export {job.id} failed: {e}")
+            return
+
+        job.path = final_path
+        job.file_size = final_path.stat().st_size
+        job.completed_at = datetime.utcnow()
+        job.expires_at = job.completed_at + self.ttl
+        job.status = COMPLETED
+        logger.info(
+            f"Analytics export {job.id} completed: {job.rows_written} rows, "
+            f"{job.file_size} bytes in {time.monotonic() - started:.1f}s"
+        )
+
+    def _mark_cancelled(self, job: ExportJob):
+        """Cancelled jobs expire like finished ones so purge_expired forgets them"""
+        job.status = CANCELLED
+        job.expires_at = datetime.utcnow() + self.ttl
+
+    def _remove_file(self, job: ExportJob):
+        if job.path is not None:
+            job.path.unlink(missing_ok=True)
+            job.path = None
+
+
+# Process-wide export queue
+_export_queue: Optional[AnalyticsExportQueue] = None
+
+
+def get_analytics_export_queue() -> AnalyticsExportQueue:
+    """Get the shared analytics export queue"""
+    global _export_queue
+    if _export_queue is None:
+        _export_queue = AnalyticsExportQueue()
+    return _export_queue
+
+
+async def close_analytics_export_queue():
+    """Stop the export workers; called on application shutdown"""
+    global _export_queue
+    if _export_queue is not None:
+        await _export_queue.close()
+        _export_queue = None
@@ -0,0 +1,446 @@
+"""
+Analytics rollups
+Incremental hourly/daily ServiceRequest rollups and the reader the analytics
+API uses to answer period queries from them.
+
+The refresh job only looks at requests created or updated since its last
+watermark, and rebuilds every hour bucket those requests fall in from the raw
+rows, so status changes on old requests are reflected without double
+counting. Daily rows are rebuilt from the hourly rows of the touched days.
+
+Readers cover whole days from the daily table, edge hours from the hourly
+table, and only fall back to ServiceRequest for partial hours (the period
+start and everything since the last refresh).
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import and_, case, delete, func, insert, literal_column, or_
+from sqlalchemy.orm import Session
+
+from app.models.analytics_rollup_models import RequestRollupDaily, RequestRollupHourly, RollupWatermark
+from app.models.database_models import ServiceRequest
+from app.services.analytics_aggregates import RequestAggregate
+
+HOURLY_WATERMARK = "service_requests_hourly"
+DIMENSIONS = ("service_type", "location", "status", "urgency", "provider_id")
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value: datetime) -> datetime:
+    floored = floor_hour(value)
+    return floored if floored == value else floored + timedelta(hours=1)
+
+
+def floor_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def ceil_day(value: datetime) -> datetime:
+    floored = floor_day(value)
+    return floored if floored == value else floored + timedelta(days=1)
+
+
+def _naive(value):
+    """Local naive datetime, matching the datetime.now() values the API filters with"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _as_date(value) -> date:
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _hour_bucket_expression(dialect: str):
+    if dialect == "postgresql":
+        return func.date_trunc(literal_column("'hour'"), ServiceRequest.created_at)
+    return func.strftime(literal_column("'%Y-%m-%d %H:00:00'"), ServiceRequest.created_at)
+
+
+def _seconds_between_expression(start, end, dialect: str):
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    return (func.julianday(end) - func.julianday(start)) * 86400.0
+
+
+def _contiguous_runs(values: List, max_gap) -> List[Tuple[Any, Any]]:
+    """Split sorted bucket starts into (first, last) runs so each run is one range query"""
+    runs = []
+    for value in values:
+        if runs and value - runs[-1][1] <= max_gap:
+            runs[-1][1] = value
+        else:
+            runs.append([value, value])
+    return [(first, last) for first, last in runs]
+
+
+def _chunks(values: List, size: int = 500):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class AnalyticsRollupService:
+    """Keeps the hourly and daily request rollups in step with service_requests"""
+
+    # Re-read changes this far behind the watermark to catch late commits
+    overlap = timedelta(minutes=10)
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def get_watermark(self) -> Optional[RollupWatermark]:
+        return self.db.get(RollupWatermark, HOURLY_WATERMARK)
+
+    def refresh(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Fold every request changed since the last run into the rollups"""
+        now = now or datetime.now()
+        watermark = self.get_watermark()
+        since = None
+        if watermark and watermark.last_changed_at:
+            since = watermark.last_changed_at - self.overlap
+
+        try:
+            hours, rows_processed, last_changed_at = self._changed_hours(since)
+            self._rebuild_hours(hours)
+            days = sorted({hour.date() for hour in hours})
+            self._rebuild_days(days)
+
+            if watermark is None:
+                watermark = RollupWatermark(name=HOURLY_WATERMARK)
+                self.db.add(watermark)
+            if last_changed_at and (not watermark.last_changed_at or last_changed_at > watermark.last_changed_at):
+                watermark.last_changed_at = last_changed_at
+            watermark.last_run_at = now
+            watermark.rows_processed = rows_processed
+            watermark.buckets_refreshed = len(hours)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error refreshing analytics rollups: {e}")
+            raise
+
+        logger.info(f"Analytics rollups refreshed: {rows_processed} rows, {len(hours)} hours, {len(days)} days")
+        return {
+            "rows_processed": rows_processed,
+            "hours_refreshed": len(hours),
+            "days_refreshed": len(days),
+            "last_changed_at": watermark.last_changed_at,
+            "last_run_at": now
+        }
+
+    def _changed_hours(self, since: Optional[datetime]) -> Tuple[List[datetime], int, Optional[datetime]]:
+        bucket = _hour_bucket_expression(self.dialect)
+        changed_at = func.coalesce(ServiceRequest.updated_at, ServiceRequest.created_at)
+        query = self.db.query(
+            bucket.label("bucket"), func.count(ServiceRequest.id), func.max(changed_at)
+        )
+        if since is not None:
+            query = query.filter(or_(ServiceRequest.created_at >= since, ServiceRequest.updated_at >= since))
+
+        hours, rows_processed, last_changed_at = [], 0, None
+        for bucket_value, count, max_changed in query.group_by(bucket).all():
+            if bucket_value is None:
+                continue
+            hours.append(_naive(bucket_value))
+            rows_processed += count
+            max_changed = _naive(max_changed)
+            if max_changed and (last_changed_at is None or max_changed > last_changed_at):
+                last_changed_at = max_changed
+        return sorted(hours), rows_processed, last_changed_at
+
+    def _rebuild_hours(self, hours: List[datetime]):
+        if not hours:
+            return
+        affected = set(hours)
+        for chunk in _chunks(hours):
+            self.db.execute(delete(RequestRollupHourly).where(RequestRollupHourly.bucket_start.in_(chunk)))
+
+        bucket = _hour_bucket_expression(self.dialect)
+        resolution = _seconds_between_expression(ServiceRequest.created_at, ServiceRequest.updated_at, self.dialect)
+        dimensions = [getattr(ServiceRequest, name) for name in DIMENSIONS]
+        for first, last in _contiguous_runs(hours, timedelta(hours=24)):
+            rows = self.db.query(
+                bucket.label("bucket"), *dimensions,
+                func.count(ServiceRequest.id),
+                func.coalesce(func.sum(ServiceRequest.estimated_cost), 0.0),
+                func.coalesce(func.sum(resolution), 0.0),
+                func.count(ServiceRequest.updated_at)
+            ).filter(
+                ServiceRequest.created_at >= first,
+                ServiceRequest.created_at < last + timedelta(hours=1)
+            ).group_by(bucket, *dimensions).all()
+
+            mappings = []
+            for row in rows:
+                bucket_start = _naive(row[0])
+                if bucket_start not in affected:
+                    continue
+                mapping = {"bucket_start": bucket_start}
+                mapping.update(zip(DIMENSIONS, row[1:]))
+                count, cost, resolution_sum, resolution_count = row[1 + len(DIMENSIONS):]
+                mapping.update(
+                    request_count=count, estimated_cost_sum=float(cost or 0),
+                    resolution_seconds_sum=float(resolution_sum or 0), resolution_count=resolution_count
+                )
+                mappings.append(mapping)
+            if mappings:
+                self.db.execute(insert(RequestRollupHourly), mappings)
+
+    def _rebuild_days(self, days: List[date]):
+        if not days:
+            return
+        for chunk in _chunks(days):
+            self.db.execute(delete(RequestRollupDaily).where(RequestRollupDaily.bucket_date.in_(chunk)))
+
+        affected = set(days)
+        day = func.date(RequestRollupHourly.bucket_start)
+        dimensions = [getattr(RequestRollupHourly, name) for name in DIMENSIONS]
+        for first, last in _contiguous_runs(days, timedelta(days=7)):
+            start = datetime.combine(first, datetime.min.time())
+            end = datetime.combine(last, datetime.min.time()) + timedelta(days=1)
+            rows = self.db.query(
+                day.label("day"), *dimensions,
+                func.sum(RequestRollupHourly.request_count),
+                func.sum(RequestRollupHourly.estimated_cost_sum),
+                func.sum(RequestRollupHourly.resolution_seconds_sum),
+                func.sum(RequestRollupHourly.resolution_count)
+            ).filter(
+                RequestRollupHourly.bucket_start >= start,
+                RequestRollupHourly.bucket_start < end
+            ).group_by(day, *dimensions).all()
+
+            mappings = []
+            for row in rows:
+                bucket_date = _as_date(row[0])
+                if bucket_date not in affected:
+                    continue
+                mapping = {"bucket_date": bucket_date}
+                mapping.update(zip(DIMENSIONS, row[1:]))
+                count, cost, resolution_sum, resolution_count = row[1 + len(DIMENSIONS):]
+                mapping.update(
+                    request_count=int(count or 0), estimated_cost_sum=float(cost or 0),
+                    resolution_seconds_sum=float(resolution_sum or 0), resolution_count=int(resolution_count or 0)
+                )
+                mappings.append(mapping)
+            if mappings:
+                self.db.execute(insert(RequestRollupDaily), mappings)
+
+
+class _Source:
+    """One table the reader aggregates over, with its per-row weight and fact columns"""
+
+    def __init__(self, entity, time_column, weight, cost_sum, resolution_sum, resolution_count):
+        self.entity = entity
+        self.time_column = time_column
+        self.weight = weight
+        self.cost_sum = cost_sum
+        self.resolution_sum = resolution_sum
+        self.resolution_count = resolution_count
+
+
+def _sources(dialect: str) -> Dict[str, _Source]:
+    raw_resolution = _seconds_between_expression(ServiceRequest.created_at, ServiceRequest.updated_at, dialect)
+    return {
+        "raw": _Source(
+            ServiceRequest, ServiceRequest.created_at, literal_column("1"),
+            func.sum(ServiceRequest.estimated_cost), func.sum(raw_resolution),
+            func.count(ServiceRequest.updated_at)
+        ),
+        "hourly": _Source(
+            RequestRollupHourly, RequestRollupHourly.bucket_start, RequestRollupHourly.request_count,
+            func.sum(RequestRollupHourly.estimated_cost_sum), func.sum(RequestRollupHourly.resolution_seconds_sum),
+            func.sum(RequestRollupHourly.resolution_count)
+        ),
+        "daily": _Source(
+            RequestRollupDaily, RequestRollupDaily.bucket_date, RequestRollupDaily.request_count,
+            func.sum(RequestRollupDaily.estimated_cost_sum), func.sum(RequestRollupDaily.resolution_seconds_sum),
+            func.sum(RequestRollupDaily.resolution_count)
+        ),
+    }
+
+
+def plan_segments(start: datetime, end: datetime, covered_until: Optional[datetime],
+                  end_inclusive: bool = True) -> Dict[str, list]:
+    """Split [start, end] into raw, hourly-rollup and daily-rollup ranges
+
+    Raw ranges are (lo, hi, hi_inclusive); rollup ranges are half-open.
+    """
+    segments = {"raw": [], "hourly": [], "daily": []}
+    hour_lo = ceil_hour(start)
+    hour_hi = min(floor_hour(covered_until), floor_hour(end)) if covered_until else None
+    if hour_hi is None or hour_lo >= hour_hi:
+        segments["raw"].append((start, end, end_inclusive))
+        return segments
+
+    if start < hour_lo:
+        segments["raw"].append((start, hour_lo, False))
+    if end > hour_hi or (end_inclusive and end == hour_hi):
+        segments["raw"].append((hour_hi, end, end_inclusive))
+
+    day_lo, day_hi = ceil_day(hour_lo), floor_day(hour_hi)
+    if day_lo < day_hi:
+        segments["daily"].append((day_lo.date(), day_hi.date()))
+        for lo, hi in ((hour_lo, day_lo), (day_hi, hour_hi)):
+            if lo < hi:
+                segments["hourly"].append((lo, hi))
+    else:
+        segments["hourly"].append((hour_lo, hour_hi))
+    return segments
+
+
+def summarize_rollups(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    statuses: Iterable[str] = (),
+    measures: Optional[Dict[str, Callable]] = None,
+    filters: Optional[Callable] = None,
+    group_by: Optional[str] = None,
+    end_inclusive: bool = True,
+    distinct_providers: bool = False,
+):
+    """Aggregate requests created in [start, end] from the rollups
+
+    ``filters`` and each value of ``measures`` receive the table being read
+    (ServiceRequest or a rollup model, which share the dimension column
+    names) and return filter clauses or a per-request value expression;
+    measures come back as request-weighted averages. ``estimated_cost`` (sum)
+    and ``resolution_hours`` (average) are always included, plus
+    ``providers`` (distinct provider count) when ``distinct_providers`` is
+    set. Returns a
+    RequestAggregate, or a dict of them keyed by the ``group_by`` dimension.
+    """
+    statuses = list(dict.fromkeys(statuses))
+    measures = measures or {}
+    watermark = db.get(RollupWatermark, HOURLY_WATERMARK)
+    covered_until = watermark.last_run_at if watermark else None
+    segments = plan_segments(start, end, covered_until, end_inclusive)
+    sources = _sources(db.get_bind().dialect.name)
+
+    totals = defaultdict(lambda: defaultdict(float))
+    providers = defaultdict(set)
+    for source_name, ranges in segments.items():
+        if not ranges:
+            continue
+        source = sources[source_name]
+        time_column = source.time_column
+        if source_name == "raw":
+            clauses = [
+                and_(time_column >= lo, time_column <= hi if inclusive else time_column < hi)
+                for lo, hi, inclusive in ranges
+            ]
+        else:
+            clauses = [and_(time_column >= lo, time_column < hi) for lo, hi in ranges]
+
+        columns = [
+            func.sum(source.weight), source.cost_sum, source.resolution_sum, source.resolution_count
+        ]
+        columns += [
+            func.sum(case((source.entity.status == status, source.weight), else_=0)) for status in statuses
+        ]
+        for build in measures.values():
+            value = build(source.entity)
+            columns.append(func.sum(value * source.weight))
+            columns.append(func.sum(case((value.is_(None), 0), else_=source.weight)))
+
+        group_column = getattr(source.entity, group_by) if group_by else None
+        query = db.query(*([group_column] if group_by else []), *columns).filter(or_(*clauses))
+        if filters:
+            query = query.filter(*filters(source.entity))
+        if group_by:
+            query = query.group_by(group_column)
+
+        for row in query.all():
+            key = row[0] if group_by else None
+            values = row[1:] if group_by else row
+            bucket = totals[key]
+            bucket["total"] += float(values[0] or 0)
+            bucket["cost"] += float(values[1] or 0)
+            bucket["resolution_sum"] += float(values[2] or 0)
+            bucket["resolution_count"] += float(values[3] or 0)
+            offset = 4
+            for status in statuses:
+                bucket[f"status:{status}"] += float(values[offset] or 0)
+                offset += 1
+            for name in measures:
+                bucket[f"sum:{name}"] += float(values[offset] or 0)
+                bucket[f"count:{name}"] += float(values[offset + 1] or 0)
+                offset += 2
+
+        if distinct_providers:
+            provider_column = source.entity.provider_id
+            provider_query = db.query(*([group_column] if group_by else []), provider_column).filter(
+                or_(*clauses), provider_column.isnot(None)
+            )
+            if filters:
+                provider_query = provider_query.filter(*filters(source.entity))
+            for row in provider_query.distinct().all():
+                providers[row[0] if group_by else None].add(row[-1])
+
+    def to_aggregate(key) -> RequestAggregate:
+        bucket = totals[key]
+        resolution_count = bucket["resolution_count"]
+        aggregate_measures = {
+            "estimated_cost": bucket["cost"],
+            "resolution_hours": (bucket["resolution_sum"] / resolution_count / 3600) if resolution_count else None,
+        }
+        for name in measures:
+            count = bucket[f"count:{name}"]
+            aggregate_measures[name] = bucket[f"sum:{name}"] / count if count else None
+        if distinct_providers:
+            aggregate_measures["providers"] = len(providers[key])
+        return RequestAggregate(
+            total=int(bucket["total"]),
+            status_counts={status: int(bucket[f"status:{status}"]) for status in statuses},
+            measures=aggregate_measures,
+        )
+
+    if group_by:
+        return {key: to_aggregate(key) for key in list(totals) if totals[key]["total"] > 0}
+    return to_aggregate(None)
+
+
+def summarize_rollup_periods(db: Session, start: datetime, end: datetime, **kwargs) -> Tuple[Any, Any]:
+    """Rollup aggregates for [start, end] and the equally long period before it"""
+    previous_start = start - (end - start)
+    current = summarize_rollups(db, start, end, **kwargs)
+    previous = summarize_rollups(db, previous_start, start, end_inclusive=False, **kwargs)
+    return current, previous
+
+
+def refresh_rollups() -> Dict[str, Any]:
+    """Run one refresh with a dedicated session"""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return AnalyticsRollupService(db).refresh()
+    finally:
+        db.close()
+
+
+async def run_rollup_loop(interval_seconds: int):
+    """Refresh the rollups forever; started from the application lifespan"""
+    while True:
+        try:
+            await asyncio.to_thread(refresh_rollups)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Analytics rollup loop error: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -3,19 +3,19 @@ Enhanced Communication Service for Djobea AI
 Handles proactive status updates and instant confirmations
 """
 
-import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from loguru import logger
 
 from app.config import get_settings
-from app.database import get_db
+from app.database import SessionLocal
 from app.models.database_models import ServiceRequest, User, Provider, RequestStatus
 from app.services.whatsapp_service import WhatsAppService
 from app.services.provider_profile_service import get_provider_profile_service
 from app.services.provider_fallback_service import ProviderFallbackService
 from app.services.web_chat_notification_service import web_chat_notification_service
+from app.services.deadline_scheduler import get_deadline_scheduler
 
 
 class CommunicationService:
@@ -24,7 +24,6 @@ class CommunicationService:
     def __init__(self):
         self.settings = get_settings()
         self.whatsapp_service = WhatsAppService()
-        self.active_tasks: Dict[int, asyncio.Task] = {}
     
     def get_pricing_estimate(self, service_type: str) -> Dict[str, any]:
         """Get pricing estimate for a service type"""
@@ -125,106 +124,20 @@ class CommunicationService:
             return False
     
     async def start_proactive_updates(self, request_id: int, db: Session) -> None:
-        """Start background task for proactive status updates"""
+        """Schedule proactive status updates, countdown warning and timeout for a request"""
         try:
-            # Cancel existing task if running
-            if request_id in self.active_tasks:
-                self.active_tasks[request_id].cancel()
-            
-            # Create new task
-            task = asyncio.create_task(self._proactive_update_loop(request_id))
-            self.active_tasks[request_id] = task
+            request = db.query(ServiceRequest).filter(ServiceRequest.id == request_id).first()
+            if not request:
+                logger.warning(f"Request {request_id} not found, no proactive updates scheduled")
+                return
             
-            logger.info(f"Started proactive updates for request {request_id}")
+            # Replaces any existing schedule; the deadline scheduler loop sends them
+            get_deadline_scheduler().schedule(db, request)
+            logger.info(f"Scheduled proactive updates for request {request_id}")
             
         except Exception as e:
             logger.error(f"Error starting proactive updates for request {request_id}: {e}")
     
-    async def _proactive_update_loop(self, request_id: int) -> None:
-        """Background loop for sending proactive updates"""
-        try:
-            update_count = 0
-            max_updates = 30  # Maximum updates to prevent infinite loops
-            
-            while update_count < max_updates:
-                await asyncio.sleep(60)  # Check every minute
-                
-                # Get fresh database session
-                db = next(get_db())
-                try:
-                    request = db.query(ServiceRequest).filter(ServiceRequest.id == request_id).first()
-                    if not request:
-                        logger.warning(f"Request {request_id} not found during proactive updates")
-                        break
-                    
-                    # Stop updates if request is completed or cancelled
-                    if request.status in [RequestStatus.COMPLETED, RequestStatus.CANCELLED]:
-                        logger.info(f"Stopping proactive updates for completed/cancelled request {request_id}")
-                        break
-                    
-                    # Calculate time since request creation with timezone handling
-                    current_time = datetime.now(request.created_at.tzinfo) if request.created_at.tzinfo else datetime.utcnow()
-                    time_since_creation = current_time - request.created_at
-                    minutes_elapsed = int(time_since_creation.total_seconds() / 60)
-                    
-                    # Determine update frequency based on urgency
-                    is_urgent = request.urgency and "urgent" in request.urgency.lower()
-                    update_interval = (
-                        self.settings.urgent_update_interval_minutes if is_urgent 
-                        else self.settings.proactive_update_interval_minutes
-                    )
-                    
-                    # Send update if it's time
-                    if minutes_elapsed > 0 and minutes_elapsed % update_interval == 0:
-                        await self._send_status_update(request, db)
-                        update_count += 1
-                    
-                    # Send countdown warnings
-                    timeout_minutes = self.settings.provider_response_timeout_minutes
-                    time_remaining = timeout_minutes - minutes_elapsed
-                    
-                    if time_remaining == self.settings.countdown_threshold_minutes:
-                        await self._send_countdown_warning(request, time_remaining, db)
-                    
-                    # Handle timeout
-                    if minutes_elapsed >= timeout_minutes and request.status == RequestStatus.PROVIDER_NOTIFIED:
-                        await self._handle_timeout(request, db)
-                        break
-                
-                finally:
-                    db.close()
-            
-        except asyncio.CancelledError:
-            logger.info(f"Proactive updates cancelled for request {request_id}")
-        except Exception as e:
-            logger.error(f"Error in proactive update loop for request {request_id}: {e}")
-            # Try to get more specific error information
-            try:
-                db = next(get_db())
-                try:
-                    request = db.query(ServiceRequest).filter(ServiceRequest.id == request_id).first()
-                    if request:
-                        logger.error(f"Request {request_id} details - Status: {request.status}, User: {request.user_id}, Service: {request.service_type}")
-                        
-                        # Store the error for later analysis
-                        from app.services.error_handling_service import ErrorHandlingService
-                        error_service = ErrorHandlingService(db)
-                        await error_service.handle_whatsapp_failure(
-                            request.user_id, 
-                            request_id, 
-                            f"Proactive update loop error: {str(e)}"
-                        )
-                    else:
-                        logger.error(f"Request {request_id} not found in database")
-                finally:
-                    db.close()
-            except Exception as inner_e:
-                logger.error(f"Error getting request details for {request_id}: {inner_e}")
-        finally:
-            # Clean up task reference
-            if request_id in self.active_tasks:
-                del self.active_tasks[request_id]
-    
     async def _send_status_update(self, request: ServiceRequest, db: Session) -> None:
         """Send status update based on current request state"""
         try:
@@ -557,12 +470,15 @@ Votre demande de {request.service_type} est en cours de traitement.
 ⏱ *Temps écoulé* : {minutes_elapsed} minutes
 💪 *Djobea AI* continue de chercher pour vous !"""
     
-    def stop_proactive_updates(self, request_id: int) -> None:
+    def stop_proactive_updates(self, request_id: int, db: Optional[Session] = None) -> None:
         """Stop proactive updates for a request"""
         try:
-            if request_id in self.active_tasks:
-                self.active_tasks[request_id].cancel()
-                del self.active_tasks[request_id]
+            if db is None:
+                with SessionLocal() as session:
+                    removed = get_deadline_scheduler().cancel(session, request_id)
+            else:
+                removed = get_deadline_scheduler().cancel(db, request_id)
+            if removed:
                 logger.info(f"Stopped proactive updates for request {request_id}")
         except Exception as e:
             logger.error(f"Error stopping proactive updates for request {request_id}: {e}")
@@ -13,6 +13,8 @@ from loguru import logger
 from app.models.escalation_detection_models import (
     ComplexityScoring, EscalationPattern, EscalationDetectionLog
 )
+from app.services.event_sink import get_event_sink
+from app.services.text_features import TextFeatures, ensure_text_features, register_lexicon, timed_stage
 
 class ComplexityScoringService:
     """Service for complexity scoring and pattern learning"""
@@ -51,11 +53,25 @@ class ComplexityScoringService:
             'frustration': ['frustré', 'énervé', 'agacé', 'marre', 'impatient'],
             'confusion': ['confus', 'perdu', 'comprends pas', 'difficile', 'compliqué']
         }
+        
+        # Complex sentence structures
+        self.complex_structures = ['parce que', 'cependant', 'néanmoins', 'toutefois', 'en revanche']
+        
+        # All keyword tables are matched through the shared feature extractor
+        register_lexicon({
+            'complexity.structures': self.complex_structures,
+            **{f'complexity.technical.{service}': terms for service, terms in self.technical_patterns.items()},
+            **{f'complexity.level.{level}': terms for level, terms in self.complexity_levels.items()},
+            **{f'complexity.emotion.{emotion}': terms for emotion, terms in self.emotional_complexity.items()}
+        })
     
     def calculate_complexity_score(self, message: str, conversation_history: List[Dict],
-                                 context: Dict[str, Any]) -> Dict[str, Any]:
+                                 context: Dict[str, Any],
+                                 features: Optional[TextFeatures] = None) -> Dict[str, Any]:
         """Calculate comprehensive complexity score"""
         try:
+            features = ensure_text_features(message, features)
+            
             # Initialize scoring components
             scoring_data = {
                 'message_content': message,
@@ -68,10 +84,11 @@ class ComplexityScoringService:
             }
             
             # Calculate individual complexity factors
-            linguistic_complexity = self._calculate_linguistic_complexity(message)
-            technical_complexity = self._calculate_technical_complexity(message, context)
+            with timed_stage("complexity.message"):
+                linguistic_complexity = self._calculate_linguistic_complexity(message, features)
+                technical_complexity = self._calculate_technical_complexity(message, context, features)
             behavioral_complexity = self._calculate_behavioral_complexity(conversation_history)
-            emotional_complexity = self._calculate_emotional_complexity(message, conversation_history)
+            emotional_complexity = self._calculate_emotional_complexity(message, conversation_history, features)
             contextual_complexity = self._calculate_contextual_complexity(context)
             
             # Calculate overall complexity
@@ -131,28 +148,31 @@ class ComplexityScoringService:
                 'escalation_probability': 0.0
             }
     
-    def _calculate_linguistic_complexity(self, message: str) -> float:
+    def _calculate_linguistic_complexity(self, message: str, features: Optional[TextFeatures] = None) -> float:
         """Calculate linguistic complexity of message"""
         if not message:
             return 0.0
         
+        features = ensure_text_features(message, features)
+        punctuation = features.punctuation
+        word_count = len(message.split())
         factors = {
             'message_length': min(len(message) / 200, 1.0),
-            'word_count': min(len(message.split()) / 50, 1.0),
-            'sentence_count': min(message.count('.') + message.count('!') + message.count('?'), 5) / 5,
-            'question_density': min(message.count('?') / max(len(message.split()), 1), 1.0),
-            'punctuation_density': min(len([c for c in message if c in '.,!?;:']) / max(len(message), 1), 1.0)
+            'word_count': min(word_count / 50, 1.0),
+            'sentence_count': min(punctuation.get('.', 0) + punctuation.get('!', 0) + punctuation.get('?', 0), 5) / 5,
+            'question_density': min(punctuation.get('?', 0) / max(word_count, 1), 1.0),
+            'punctuation_density': min(sum(punctuation.values()) / max(len(message), 1), 1.0)
         }
         
         # Check for complex sentence structures
-        complex_structures = ['parce que', 'cependant', 'néanmoins', 'toutefois', 'en revanche']
-        factors['complex_structures'] = sum(1 for struct in complex_structures if struct in message.lower()) / 5
+        factors['complex_structures'] = features.count('complexity.structures') / 5
         
         return sum(factors.values()) / len(factors)
     
-    def _calculate_technical_complexity(self, message: str, context: Dict[str, Any]) -> float:
+    def _calculate_technical_complexity(self, message: str, context: Dict[str, Any],
+                                        features: Optional[TextFeatures] = None) -> float:
         """Calculate technical complexity based on service type and technical terms"""
-        message_lower = message.lower()
+        features = ensure_text_features(message, features)
         service_type = context.get('service_type', '')
         
         # Base complexity by service type
@@ -167,13 +187,12 @@ class ComplexityScoringService:
         base_complexity = service_base_complexity.get(service_type, 0.5)
         
         # Count technical terms
-        technical_terms = self.technical_patterns.get(service_type, [])
-        technical_count = sum(1 for term in technical_terms if term in message_lower)
+        technical_count = features.count(f'complexity.technical.{service_type}')
         
         # Check complexity level indicators
         complexity_multiplier = 1.0
-        for level, indicators in self.complexity_levels.items():
-            if any(indicator in message_lower for indicator in indicators):
+        for level in self.complexity_levels:
+            if features.has(f'complexity.level.{level}'):
                 if level == 'simple':
                     complexity_multiplier = 0.8
                 elif level == 'medium':
@@ -205,14 +224,15 @@ class ComplexityScoringService:
         
         return sum(factors.values()) / len(factors)
     
-    def _calculate_emotional_complexity(self, message: str, conversation_history: List[Dict]) -> float:
+    def _calculate_emotional_complexity(self, message: str, conversation_history: List[Dict],
+                                        features: Optional[TextFeatures] = None) -> float:
         """Calculate emotional complexity and stress indicators"""
-        message_lower = message.lower()
+        features = ensure_text_features(message, features)
         
         # Current message emotional indicators
         emotion_scores = {}
-        for emotion, indicators in self.emotional_complexity.items():
-            score = sum(1 for indicator in indicators if indicator in message_lower)
+        for emotion in self.emotional_complexity:
+            score = features.count(f'complexity.emotion.{emotion}')
             emotion_scores[emotion] = min(score / 3, 1.0)
         
         # Historical emotional trend
@@ -520,14 +540,12 @@ class ComplexityScoringService:
                 }
             )
             
-            self.db.add(scoring_record)
-            self.db.commit()
+            get_event_sink().emit(self.db, scoring_record)
             
             return scoring_record
             
         except Exception as e:
             logger.error(f"Error storing complexity scoring: {str(e)}")
-            self.db.rollback()
             return None
     
     def get_complexity_analytics(self, days: int = 30) -> Dict[str, Any]:
@@ -15,6 +15,8 @@ from app.models.database_models import ActionType, User, Conversation
 from app.models.cultural_models import EmotionalProfile, ConversationEmotion
 from app.services.emotional_intelligence_service import EmotionalIntelligenceService
 from app.services.personalization_service import PersonalizationService
+from app.services.event_sink import get_event_sink
+from app.services.text_features import TextFeatures, ensure_text_features
 from loguru import logger
 settings = get_settings()
 
@@ -69,26 +71,6 @@ class DjobeaConversationManager:
         self.emotional_intelligence = emotional_intelligence_service
         self.personalization_service = PersonalizationService()
         
-        # Comprehensive Cameroon-specific expressions
-        self.local_expressions = {
-            # Electrical issues
-            "courant a jump": "panne électrique",
-            "light don go": "coupure électricité", 
-            "no current": "pas d'électricité",
-            "current no dey": "pas d'électricité",
-            
-            # Water issues
-            "coule-coule": "fuite d'eau",
-            "wata no dey comot": "pas d'eau",
-            "pipe don burst": "canalisation cassée",
-            "water no dey flow": "pas d'eau",
-            
-            # General expressions
-            "don spoil": "cassé",
-            "no dey work": "ne marche pas",
-            "i want make": "je veux que"
-        }
-        
     async def process_message_with_emotions(
         self, 
         db: Session, 
@@ -561,30 +543,10 @@ Que puis-je vous expliquer de plus sur le processus ? Vous recevrez une notifica
             logger.error(f"Error generating continuous response: {str(e)}")
             return "Nous recherchons activement un prestataire disponible dans votre secteur. Vous recevrez une notification dès qu'un professionnel accepte votre demande."
 
-    def _normalize_message(self, message: str) -> str:
+    def _normalize_message(self, message: str, features: Optional[TextFeatures] = None) -> str:
         """Normalize message by handling local expressions and typos"""
-        normalized = message.lower().strip()
-        
-        # Replace local expressions
-        for local_expr, standard_expr in self.local_expressions.items():
-            normalized = normalized.replace(local_expr, standard_expr)
-        
-        # Basic typo corrections for common WhatsApp abbreviations
-        typo_corrections = {
-            "slt": "salut",
-            "bjr": "bonjour", 
-            "stp": "s'il te plaît",
-            "svp": "s'il vous plaît",
-            "pb": "problème",
-            "qd": "quand",
-            "tt": "tout",
-            "pr": "pour"
-        }
-        
-        for typo, correction in typo_corrections.items():
-            normalized = re.sub(rf'\b{typo}\b', correction, normalized)
-        
-        return normalized
+        # Local expressions and WhatsApp abbreviations are rewritten once per message
+        return ensure_text_features(message, features).normalized
     
     def detect_quick_action(self, message: str) -> Optional[ActionType]:
         """Detect if message contains a quick action command"""
@@ -845,7 +807,8 @@ Je vous aiderai dès que possible !"""
             if not user:
                 return []
             
-            # Get all conversations for this user (recent session)
+            # Get all conversations for this user (recent session), including buffered ones
+            get_event_sink().flush()
             conversations = (
                 db.query(Conversation)
                 .filter(Conversation.user_id == user.id)
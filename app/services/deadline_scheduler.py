@@ -0,0 +1,254 @@
+"""
+Deadline Scheduler
+Durable replacement for the per-request proactive update tasks: every
+request's next status update, countdown warning and timeout is a row in
+scheduled_request_actions, and one loop in the lease-holding process pulls
+everything due each tick (the due_at index acts as the min-heap), loads the
+requests in one query and dispatches the actions.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.database_models import RequestStatus, ServiceRequest
+from app.models.scheduler_models import ScheduledRequestAction, SchedulerLease
+
+settings = get_settings()
+
+STATUS_UPDATE = "status_update"
+COUNTDOWN_WARNING = "countdown_warning"
+TIMEOUT = "timeout"
+
+# Maximum status updates sent per request
+MAX_STATUS_UPDATES = 30
+
+LEASE_NAME = "proactive_updates"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _update_interval(request: ServiceRequest) -> timedelta:
+    """Status update cadence, faster for urgent requests"""
+    is_urgent = request.urgency and "urgent" in request.urgency.lower()
+    minutes = (
+        settings.urgent_update_interval_minutes if is_urgent
+        else settings.proactive_update_interval_minutes
+    )
+    return timedelta(minutes=minutes)
+
+
+class DeadlineScheduler:
+    """
+    Single-timer scheduler for proactive request communication
+
+    Actions are dispatched to a CommunicationService (`_send_status_update`,
+    `_send_countdown_warning`, `_handle_timeout`). Only requests still
+    pending are acted on; anything else retires its remaining actions.
+    """
+
+    def __init__(
+        self,
+        communication=None,
+        batch_size: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        holder_id: Optional[str] = None
+    ):
+        self._communication = communication
+        self.batch_size = batch_size or settings.deadline_scheduler_batch_size
+        self.lease_seconds = lease_seconds or settings.deadline_scheduler_lease_seconds
+        self.holder_id = holder_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @property
+    def communication(self):
+        if self._communication is None:
+            from app.services.communication_service import CommunicationService
+            self._communication = CommunicationService()
+        return self._communication
+
+    def schedule(self, db: Session, request: ServiceRequest):
+        """(Re)schedule every proactive action of a request from its creation time"""
+        created = _naive_utc(request.created_at or datetime.utcnow())
+        timeout = timedelta(minutes=settings.provider_response_timeout_minutes)
+        countdown = timeout - timedelta(minutes=settings.countdown_threshold_minutes)
+
+        db.execute(delete(ScheduledRequestAction).where(ScheduledRequestAction.request_id == request.id))
+        db.add_all([
+            ScheduledRequestAction(request_id=request.id, action=STATUS_UPDATE, due_at=created + _update_interval(request)),
+            ScheduledRequestAction(request_id=request.id, action=COUNTDOWN_WARNING, due_at=created + countdown),
+            ScheduledRequestAction(request_id=request.id, action=TIMEOUT, due_at=created + timeout),
+        ])
+        db.commit()
+
+    def cancel(self, db: Session, request_id: int) -> int:
+        """Drop every pending action of a request"""
+        removed = db.execute(
+            delete(ScheduledRequestAction).where(ScheduledRequestAction.request_id == request_id)
+        ).rowcount
+        db.commit()
+        return removed
+
+    def acquire_lease(self, db: Session, now: Optional[datetime] = None) -> bool:
+        """Take or renew the leader lease; False while another process holds it"""
+        now = now or datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        renewed = db.execute(
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.name == LEASE_NAME,
+                or_(SchedulerLease.holder == self.holder_id, SchedulerLease.expires_at < now)
+            )
+            .values(holder=self.holder_id, expires_at=expires_at)
+        ).rowcount
+        if renewed:
+            db.commit()
+            return True
+
+        if db.get(SchedulerLease, LEASE_NAME) is not None:
+            db.rollback()
+            return False
+        try:
+            db.add(SchedulerLease(name=LEASE_NAME, holder=self.holder_id, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+
+    def release_lease(self, db: Session):
+        """Give up the lease so another process can take over immediately"""
+        db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == LEASE_NAME, SchedulerLease.holder == self.holder_id)
+            .values(expires_at=datetime.utcnow())
+        )
+        db.commit()
+
+    async def run_due(self, db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Dispatch every action due at `now` (leader only)"""
+        now = now or datetime.utcnow()
+        counts = {STATUS_UPDATE: 0, COUNTDOWN_WARNING: 0, TIMEOUT: 0, "retired": 0}
+        if not self.acquire_lease(db, now):
+            return counts
+
+        due: List[ScheduledRequestAction] = db.query(ScheduledRequestAction).filter(
+            ScheduledRequestAction.due_at <= now
+        ).order_by(ScheduledRequestAction.due_at).limit(self.batch_size).all()
+        if not due:
+            return counts
+
+        request_ids = {action.request_id for action in due}
+        requests = {
+            request.id: request
+            for request in db.query(ServiceRequest).filter(ServiceRequest.id.in_(request_ids)).all()
+        }
+
+        finished = set()
+        for action in due:
+            if action.request_id in finished:
+                continue
+            request = requests.get(action.request_id)
+            if request is None or request.status != RequestStatus.PENDING:
+                # Accepted, completed, cancelled or deleted: nothing left to say
+                finished.add(action.request_id)
+                counts["retired"] += 1
+                continue
+
+            try:
+                if action.action == STATUS_UPDATE:
+                    await self.communication._send_status_update(request, db)
+                    action.runs += 1
+                    if action.runs >= MAX_STATUS_UPDATES:
+                        db.delete(action)
+                    else:
+                        action.due_at = now + _update_interval(request)
+                elif action.action == COUNTDOWN_WARNING:
+                    await self.communication._send_countdown_warning(
+                        request, settings.countdown_threshold_minutes, db
+                    )
+                    db.delete(action)
+                elif action.action == TIMEOUT:
+                    await self.communication._handle_timeout(request, db)
+                    finished.add(action.request_id)
+                else:
+                    logger.warning(f"Unknown scheduled action {action.action} for request {action.request_id}")
+                    db.delete(action)
+                    continue
+                counts[action.action] += 1
+            except Exception as e:
+                logger.error(f"Scheduled {action.action} failed for request {action.request_id}: {e}")
+                # Retry on the next update interval rather than every tick
+                action.due_at = now + _update_interval(request)
+
+        if finished:
+            db.flush()
+            db.execute(
+                delete(ScheduledRequestAction)
+                .where(ScheduledRequestAction.request_id.in_(finished))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return counts
+
+    def get_stats(self, db: Session) -> Dict[str, Any]:
+        """Pending action counts and the current leader"""
+        pending = dict(
+            db.query(ScheduledRequestAction.action, func.count(ScheduledRequestAction.id))
+            .group_by(ScheduledRequestAction.action).all()
+        )
+        lease = db.get(SchedulerLease, LEASE_NAME)
+        return {
+            "pending": pending,
+            "leader": lease.holder if lease else None,
+            "is_leader": bool(lease and lease.holder == self.holder_id and lease.expires_at > datetime.utcnow())
+        }
+
+
+# Process-wide scheduler
+_scheduler: Optional[DeadlineScheduler] = None
+
+
+def get_deadline_scheduler() -> DeadlineScheduler:
+    """Get the shared deadline scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = DeadlineScheduler()
+    return _scheduler
+
+
+async def run_deadline_scheduler_loop(tick_seconds: int):
+    """Dispatch due actions forever; started from the application lifespan"""
+    from app.database import SessionLocal
+
+    scheduler = get_deadline_scheduler()
+    try:
+        while True:
+            try:
+                with SessionLocal() as db:
+                    counts = await scheduler.run_due(db)
+                if any(counts.values()):
+                    logger.info(f"Deadline scheduler tick: {counts}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Deadline scheduler loop error: {e}")
+            await asyncio.sleep(tick_seconds)
+    finally:
+        try:
+            with SessionLocal() as db:
+                scheduler.release_lease(db)
+        except Exception as e:
+            logger.warning(f"Could not release deadline scheduler lease: {e}")
@@ -13,6 +13,7 @@ from app.models.conversation_session import ConversationSession
 from app.models.action_codes import ActionCode
 from app.services.ai_service import AIService
 from app.services.session_manager import SessionManager
+from app.services.text_classifier import INTERRUPTION, NO_INTERRUPTION, classify
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -622,18 +623,13 @@ class DialogueFlowManager:
             if keyword in message_lower:
                 return True
         
-        # Check for topic change using AI
+        # Check for topic change once the conversation is under way
         if len(dialogue_context.conversation_history) > 2:
-            topic_change_prompt = f"""
-            Analyser si ce message indique un changement de sujet ou une interruption:
-            
-            CONTEXTE: {dialogue_context.collected_info}
-            NOUVEAU MESSAGE: {message}
-            
-            Répondre par 'OUI' si c'est une interruption, 'NON' sinon.
-            """
+            local = classify(INTERRUPTION, message)
+            if local is not None and local.label != NO_INTERRUPTION:
+                return True
             
-            # Simple heuristic for now - can be enhanced with AI
+            # A different service mentioned mid-conversation is a topic change
             current_service = dialogue_context.collected_info.get("service_type", "")
             new_services = ["plomberie", "électricité", "électroménager"]
             
@@ -1,21 +1,26 @@
 """
 Dynamic Service Cache - Intelligent caching for frequently used data
-Redis-based cache with fallback to in-memory storage
+Backed by the shared session store, with fallback to in-memory storage
 """
 from typing import Dict, List, Optional, Any
-import json
 import logging
 from datetime import datetime, timedelta
-import redis
 from sqlalchemy.orm import Session
 
+from app.services.session_store import RedisSessionStore, SessionStore, get_session_store
+
 logger = logging.getLogger(__name__)
 
 class DynamicServiceCache:
     """Intelligent cache for dynamic services system"""
     
-    def __init__(self, redis_url: Optional[str] = None):
-        self.redis_client = None
+    # Key namespaces owned by this cache
+    CACHE_PATTERNS = [
+        "zones:*", "services:*", "service_categories", "zone_hierarchy:*",
+        "search:*", "popular_services:*"
+    ]
+    
+    def __init__(self, redis_url: Optional[str] = None, store: Optional[SessionStore] = None):
         self.memory_cache: Dict[str, Dict[str, Any]] = {}
         self.cache_stats = {
             "hits": 0,
@@ -23,15 +28,10 @@ class DynamicServiceCache:
             "redis_errors": 0
         }
         
-        # Initialize Redis if available
-        if redis_url:
-            try:
-                self.redis_client = redis.from_url(redis_url, decode_responses=True)
-                self.redis_client.ping()
-                logger.info("Redis cache initialized successfully")
-            except Exception as e:
-                logger.warning(f"Redis not available, using memory cache: {e}")
-                self.redis_client = None
+        # A dedicated Redis URL gets its own pool; otherwise share the process-wide store
+        if store is None and redis_url:
+            store = RedisSessionStore(redis_url)
+        self.store = store or get_session_store()
     
     async def get_zones(self, zone_type: Optional[str] = None) -> Optional[List[Dict]]:
         """Get cached zones"""
@@ -124,30 +124,20 @@ class DynamicServiceCache:
             "misses": self.cache_stats["misses"],
             "hit_rate": hit_rate,
             "redis_errors": self.cache_stats["redis_errors"],
-            "redis_available": self.redis_client is not None,
+            "redis_available": self.store.backend == "redis",
             "memory_cache_size": len(self.memory_cache)
         }
         
-        # Add Redis info if available
-        if self.redis_client:
-            try:
-                redis_info = self.redis_client.info()
-                stats["redis_memory_used"] = redis_info.get("used_memory_human", "N/A")
-                stats["redis_connected_clients"] = redis_info.get("connected_clients", 0)
-            except Exception as e:
-                logger.error(f"Error getting Redis stats: {e}")
+        # Add backend info (Redis memory and clients when available)
+        stats.update(await self.store.info())
         
         return stats
     
     async def clear_all_cache(self):
         """Clear all cache"""
-        # Clear Redis cache
-        if self.redis_client:
-            try:
-                self.redis_client.flushdb()
-                logger.info("Redis cache cleared")
-            except Exception as e:
-                logger.error(f"Error clearing Redis cache: {e}")
+        # Clear the cache namespaces in the shared store (sessions and rate limits are kept)
+        for pattern in self.CACHE_PATTERNS:
+            await self._invalidate_pattern(pattern)
         
         # Clear memory cache
         self.memory_cache.clear()
@@ -156,16 +146,15 @@ class DynamicServiceCache:
     async def _get_cached_data(self, cache_key: str) -> Optional[Any]:
         """Get data from cache"""
         try:
-            # Try Redis first
-            if self.redis_client:
-                try:
-                    cached_data = self.redis_client.get(cache_key)
-                    if cached_data:
-                        self.cache_stats["hits"] += 1
-                        return json.loads(cached_data)
-                except Exception as e:
-                    logger.error(f"Redis get error: {e}")
-                    self.cache_stats["redis_errors"] += 1
+            # Try the shared store first
+            try:
+                cached_data = await self.store.get(cache_key)
+                if cached_data is not None:
+                    self.cache_stats["hits"] += 1
+                    return cached_data
+            except Exception as e:
+                logger.error(f"Store get error: {e}")
+                self.cache_stats["redis_errors"] += 1
             
             # Fall back to memory cache
             if cache_key in self.memory_cache:
@@ -188,14 +177,13 @@ class DynamicServiceCache:
     async def _set_cached_data(self, cache_key: str, data: Any, ttl: int):
         """Set data in cache"""
         try:
-            # Try Redis first
-            if self.redis_client:
-                try:
-                    self.redis_client.setex(cache_key, ttl, json.dumps(data, default=str))
-                    return
-                except Exception as e:
-                    logger.error(f"Redis set error: {e}")
-                    self.cache_stats["redis_errors"] += 1
+            # Try the shared store first
+            try:
+                await self.store.set(cache_key, data, ttl)
+                return
+            except Exception as e:
+                logger.error(f"Store set error: {e}")
+                self.cache_stats["redis_errors"] += 1
             
             # Fall back to memory cache
             self.memory_cache[cache_key] = {
@@ -213,15 +201,12 @@ class DynamicServiceCache:
     async def _invalidate_pattern(self, pattern: str):
         """Invalidate cache entries matching pattern"""
         try:
-            # Redis pattern invalidation
-            if self.redis_client:
-                try:
-                    keys = self.redis_client.keys(pattern)
-                    if keys:
-                        self.redis_client.delete(*keys)
-                except Exception as e:
-                    logger.error(f"Redis invalidation error: {e}")
-                    self.cache_stats["redis_errors"] += 1
+            # Store pattern invalidation
+            try:
+                await self.store.delete_pattern(pattern)
+            except Exception as e:
+                logger.error(f"Store invalidation error: {e}")
+                self.cache_stats["redis_errors"] += 1
             
             # Memory cache pattern invalidation
             keys_to_delete = []
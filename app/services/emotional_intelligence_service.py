@@ -16,8 +16,21 @@ from app.models.cultural_models import (
     EmotionalResponse, CulturalSensitivityRule, CulturalCalendar
 )
 from app.services.ai_service import AIService
+from app.services.text_classifier import EMOTION, classify
 from app.config import get_settings
 
+# Typical (intensity, sentiment) of each emotion label
+EMOTION_PROFILES = {
+    "joy": (0.8, 0.7),
+    "surprise": (0.6, 0.2),
+    "neutral": (0.5, 0.0),
+    "stress": (0.8, -0.3),
+    "fear": (0.7, -0.4),
+    "sadness": (0.6, -0.5),
+    "frustration": (0.7, -0.5),
+    "anger": (0.8, -0.7)
+}
+
 
 class EmotionalIntelligenceService:
     """Service for emotional analysis and culturally-aware responses"""
@@ -79,48 +92,14 @@ class EmotionalIntelligenceService:
                 EmotionalProfile.user_id == user_id
             ).first()
             
-            # Prepare analysis prompt
-            analysis_prompt = f"""
-            Analyze the emotional content of this WhatsApp message from a user in Cameroon:
-            
-            Message: "{message}"
-            
-            Consider:
-            1. Primary emotion (joy, fear, anger, sadness, surprise, neutral)
-            2. Emotional intensity (0.0 to 1.0)
-            3. Sentiment score (-1.0 to 1.0)
-            4. Urgency level (true/false)
-            5. Stress indicators
-            6. Politeness level (0.0 to 1.0)
-            7. Cultural expressions used
-            8. Recommended response tone
-            9. Required empathy level
-            
-            Return analysis as JSON with these fields:
-            {{
-                "primary_emotion": "emotion_name",
-                "emotion_intensity": 0.0,
-                "sentiment_score": 0.0,
-                "urgency_detected": false,
-                "stress_indicators": ["indicator1", "indicator2"],
-                "politeness_level": 0.0,
-                "cultural_expressions": ["expression1"],
-                "respect_markers": ["marker1"],
-                "community_references": ["reference1"],
-                "recommended_tone": "tone_name",
-                "empathy_level": "low/medium/high",
-                "cultural_sensitivity_needed": "low/medium/high"
-            }}
-            """
-            
-            # Get AI analysis
-            ai_response = await self.ai_service.analyze_message(analysis_prompt)
-            
-            try:
-                emotion_data = json.loads(ai_response)
-            except json.JSONDecodeError:
-                # Fallback analysis
-                emotion_data = self._fallback_emotion_analysis(message)
+            # Confident local classification replaces the LLM round-trip
+            local = classify(EMOTION, message)
+            if local is not None:
+                emotion_data = self._local_emotion_analysis(message, local.label, local.confidence)
+                model_version = f"local-emotion-{local.model_version}"
+            else:
+                emotion_data = await self._llm_emotion_analysis(message)
+                model_version = self.settings.claude_model
             
             # Create conversation emotion record
             conversation_emotion = ConversationEmotion(
@@ -140,7 +119,7 @@ class EmotionalIntelligenceService:
                 recommended_tone=emotion_data.get("recommended_tone", "respectful"),
                 empathy_level=emotion_data.get("empathy_level", "medium"),
                 cultural_sensitivity_needed=emotion_data.get("cultural_sensitivity_needed", "medium"),
-                ai_model_version=self.settings.claude_model
+                ai_model_version=model_version
             )
             
             db.add(conversation_emotion)
@@ -427,6 +406,69 @@ class EmotionalIntelligenceService:
             "cultural_sensitivity_needed": "medium"
         }
 
+    async def _llm_emotion_analysis(self, message: str) -> Dict[str, Any]:
+        """Emotion analysis from the LLM (lexicon fallback if its answer is not JSON)"""
+        
+        # Prepare analysis prompt
+        analysis_prompt = f"""
+        Analyze the emotional content of this WhatsApp message from a user in Cameroon:
+        
+        Message: "{message}"
+        
+        Consider:
+        1. Primary emotion (joy, fear, anger, sadness, surprise, neutral)
+        2. Emotional intensity (0.0 to 1.0)
+        3. Sentiment score (-1.0 to 1.0)
+        4. Urgency level (true/false)
+        5. Stress indicators
+        6. Politeness level (0.0 to 1.0)
+        7. Cultural expressions used
+        8. Recommended response tone
+        9. Required empathy level
+        
+        Return analysis as JSON with these fields:
+        {{
+            "primary_emotion": "emotion_name",
+            "emotion_intensity": 0.0,
+            "sentiment_score": 0.0,
+            "urgency_detected": false,
+            "stress_indicators": ["indicator1", "indicator2"],
+            "politeness_level": 0.0,
+            "cultural_expressions": ["expression1"],
+            "respect_markers": ["marker1"],
+            "community_references": ["reference1"],
+            "recommended_tone": "tone_name",
+            "empathy_level": "low/medium/high",
+            "cultural_sensitivity_needed": "low/medium/high"
+        }}
+        """
+        
+        # Get AI analysis
+        ai_response = await self.ai_service.analyze_message(analysis_prompt)
+        
+        try:
+            emotion_data = json.loads(ai_response)
+        except json.JSONDecodeError:
+            # Fallback analysis
+            emotion_data = self._fallback_emotion_analysis(message)
+
+        return emotion_data
+
+    def _local_emotion_analysis(self, message: str, emotion: str, confidence: float) -> Dict[str, Any]:
+        """Emotion analysis from the local classifier label plus the indicator lexicons"""
+        
+        analysis = self._fallback_emotion_analysis(message)
+        intensity, sentiment = EMOTION_PROFILES.get(emotion, (0.5, 0.0))
+        analysis.update({
+            "primary_emotion": emotion,
+            "emotion_intensity": intensity,
+            "sentiment_score": sentiment,
+            "confidence_level": confidence,
+            "recommended_tone": "empathetic" if sentiment < 0 else "respectful",
+            "empathy_level": "high" if sentiment < -0.3 else "medium"
+        })
+        return analysis
+
     def _create_default_emotion_analysis(
         self, 
         db: Session, 
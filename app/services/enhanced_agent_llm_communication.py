@@ -14,6 +14,8 @@ from loguru import logger
 from app.config import get_settings
 from app.services.ai_service import AIService
 from app.utils.conversation_state import ConversationState
+from app.services.system_state import get_system_state
+from app.services.prompt_assembly import PromptCatalog, SystemPrompt, get_prompt_assembler
 
 settings = get_settings()
 
@@ -76,6 +78,64 @@ class CommunicationMetrics:
             self.last_updated = datetime.now()
 
 
+COVERAGE_ZONES = {
+    "douala": {"available": True, "response_time": "15-30 min"},
+    "bonamoussadi": {"available": True, "response_time": "10-25 min"},
+    "akwa": {"available": True, "response_time": "20-35 min"}
+}
+
+
+def _render_protocol_rules(catalog: PromptCatalog) -> str:
+    """Static part of the agent protocol: prices, zones, conversation rules and response format"""
+    price_ranges = {
+        service: f"{pricing['min']}-{pricing['max']} XAF"
+        for service, pricing in settings.service_pricing.items()
+    }
+    zone_names = ", ".join(zone["name"] for zone in catalog.zones)
+    
+    return f"""
+AGENT-LLM COMMUNICATION PROTOCOL
+================================
+
+SERVICES AND PRICE RANGES: {price_ranges}
+COVERAGE ZONES: {COVERAGE_ZONES}
+KNOWN ZONES: {zone_names}
+
+CRITICAL CONVERSATION RULES:
+1. If message_count = 0: Use a greeting like "Bonjour! Comment puis-je vous aider?"
+2. If message_count > 0: NEVER use "Bonjour" again - continue the conversation naturally
+3. Avoid repetitive questions - if user already mentioned service type, ask for location instead
+4. Progress the conversation - each response should move toward completing the request
+5. Be contextual - reference what the user just said
+
+INSTRUCTIONS:
+1. Analyze the user's intent with high confidence
+2. Extract ALL relevant information (service_type, location, description, urgency)
+3. Provide a natural, NON-REPETITIVE response in French
+4. Indicate next conversation actions needed
+5. Assess confidence level (0.0-1.0)
+
+RESPONSE FORMAT (JSON):
+{{
+    "response_text": "Natural French response to user (NO repetitive greetings)",
+    "intent_confidence": 0.95,
+    "extracted_data": {{
+        "service_type": "service type or null",
+        "location": "location or null",
+        "description": "problem description or null",
+        "urgency": "normal/urgent/emergency or null"
+    }},
+    "next_actions": ["continue_conversation", "create_request", "gather_info"],
+    "conversation_state": "gathering_info/request_ready/completed",
+    "error_indicators": [],
+    "follow_up_needed": false
+}}
+
+CRITICAL: Always respond with valid JSON matching the exact format above.
+The conversation details for this turn follow in the user message.
+"""
+
+
 class EnhancedAgentLLMCommunicator:
     """Enhanced communication system between Agent and LLM"""
     
@@ -97,10 +157,10 @@ class EnhancedAgentLLMCommunicator:
         
         try:
             # Prepare structured prompt for LLM
-            structured_prompt = self._build_structured_prompt(agent_message, conversation_state)
+            system_prompt, structured_prompt = self._build_structured_prompt(agent_message, conversation_state)
             
             # Send to LLM with retry logic
-            llm_response = await self._send_to_llm_with_retry(structured_prompt)
+            llm_response = await self._send_to_llm_with_retry(structured_prompt, system_prompt)
             
             # Parse and validate response
             parsed_response = self._parse_llm_response(llm_response)
@@ -125,17 +185,16 @@ class EnhancedAgentLLMCommunicator:
         self, 
         agent_message: AgentMessage,
         conversation_state: ConversationState
-    ) -> str:
-        """Build structured prompt for better LLM understanding"""
+    ) -> Tuple[SystemPrompt, str]:
+        """Build the (cached protocol prefix, per-turn prompt) pair for the LLM"""
         
-        # Get dynamic services and zones
+        # Protocol rules, prices and zones only change with the catalog
+        system_prompt = get_prompt_assembler().build("agent_llm_protocol", _render_protocol_rules)
+        
+        # Live capacity per service
         services_info = self._get_dynamic_services_info()
-        zones_info = self._get_dynamic_zones_info()
         
         prompt = f"""
-AGENT-LLM COMMUNICATION PROTOCOL
-================================
-
 CONVERSATION CONTEXT:
 - User Message: "{agent_message.user_message}"
 - Language: {agent_message.language}
@@ -151,50 +210,18 @@ USER DATA:
 - Service History: {agent_message.user_data.get('service_history', [])}
 
 SYSTEM STATE:
-- Available Services: {services_info}
-- Coverage Zones: {zones_info}
+- Service Availability: {services_info}
 - Current Request Status: {agent_message.system_state.get('current_request_status', 'none')}
 - Provider Availability: {agent_message.system_state.get('provider_availability', 'unknown')}
+- System Load: {agent_message.system_state.get('system_load', 'unknown')}
 
 PREVIOUS CONTEXT:
 {json.dumps(agent_message.conversation_context, indent=2)}
-
-CRITICAL CONVERSATION RULES:
-1. If message_count = 0: Use a greeting like "Bonjour! Comment puis-je vous aider?"
-2. If message_count > 0: NEVER use "Bonjour" again - continue the conversation naturally
-3. Avoid repetitive questions - if user already mentioned service type, ask for location instead
-4. Progress the conversation - each response should move toward completing the request
-5. Be contextual - reference what the user just said
-
-INSTRUCTIONS:
-1. Analyze the user's intent with high confidence
-2. Extract ALL relevant information (service_type, location, description, urgency)
-3. Provide a natural, NON-REPETITIVE response in French
-4. Indicate next conversation actions needed
-5. Assess confidence level (0.0-1.0)
-
-RESPONSE FORMAT (JSON):
-{{
-    "response_text": "Natural French response to user (NO repetitive greetings)",
-    "intent_confidence": 0.95,
-    "extracted_data": {{
-        "service_type": "service type or null",
-        "location": "location or null",
-        "description": "problem description or null",
-        "urgency": "normal/urgent/emergency or null"
-    }},
-    "next_actions": ["continue_conversation", "create_request", "gather_info"],
-    "conversation_state": "gathering_info/request_ready/completed",
-    "error_indicators": [],
-    "follow_up_needed": false
-}}
-
-CRITICAL: Always respond with valid JSON matching the exact format above.
 """
         
-        return prompt
+        return system_prompt, prompt
     
-    async def _send_to_llm_with_retry(self, prompt: str, max_retries: int = 3) -> str:
+    async def _send_to_llm_with_retry(self, prompt: str, system_prompt: Optional[str] = None, max_retries: int = 3) -> str:
         """Send prompt to LLM with retry logic"""
         
         for attempt in range(max_retries):
@@ -203,6 +230,7 @@ CRITICAL: Always respond with valid JSON matching the exact format above.
                 messages = [{"role": "user", "content": prompt}]
                 response = await self.ai_service.generate_response(
                     messages=messages,
+                    system_prompt=system_prompt,
                     max_tokens=800,
                     temperature=0.1  # Lower temperature for more consistent responses
                 )
@@ -372,20 +400,22 @@ CRITICAL: Always respond with valid JSON matching the exact format above.
         )
     
     def _get_dynamic_services_info(self) -> Dict[str, Any]:
-        """Get dynamic services information"""
-        return {
-            "plomberie": {"price_range": "5000-15000 XAF", "available": True},
-            "electricite": {"price_range": "3000-10000 XAF", "available": True},
-            "electromenager": {"price_range": "2000-8000 XAF", "available": True}
-        }
+        """Get per-service availability (prices are part of the static prompt prefix)"""
+        # Capacity comes from the shared snapshot the engine refreshed for this message
+        system_state = get_system_state()
+        services_info = {}
+        for service in settings.service_pricing:
+            capacity = system_state.capacity_for(service)
+            services_info[service] = {
+                "available": capacity["available_providers"] > 0 if system_state.refreshed_at else True,
+                "available_providers": capacity["available_providers"],
+                "pending_requests": capacity["pending_requests"]
+            }
+        return services_info
     
     def _get_dynamic_zones_info(self) -> Dict[str, Any]:
         """Get dynamic zones information"""
-        return {
-            "douala": {"available": True, "response_time": "15-30 min"},
-            "bonamoussadi": {"available": True, "response_time": "10-25 min"},
-            "akwa": {"available": True, "response_time": "20-35 min"}
-        }
+        return dict(COVERAGE_ZONES)
     
     def get_communication_metrics(self) -> Dict[str, Any]:
         """Get current communication metrics"""
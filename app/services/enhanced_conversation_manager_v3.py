@@ -554,7 +554,7 @@ class EnhancedConversationManagerV3:
                     })
             
             # Use AI service to extract request information
-            extracted_info = self.ai_service.extract_request_info(
+            extracted_info = await self.ai_service.extract_request_info(
                 message=llm_request.message,
                 conversation_history=conversation_history
             )
@@ -14,61 +14,57 @@ from app.models.escalation_detection_models import (
     EscalationDetector, EscalationDetectionLog, EscalationBusinessRule, EscalationExecution,
     ComplexityScoring, EscalationAnalytics, EscalationPattern, EscalationFeedback
 )
+from app.services.escalation_pipeline import (
+    COMPLEXITY_INDICATORS, FRUSTRATION_KEYWORDS, HISTORY_WINDOW, NEGATIVE_WORDS, POSITIVE_WORDS,
+    CompiledDetector, CompiledRule, EscalationStateCache, MessageFeatures, SessionEscalationState,
+    analyze_message, get_escalation_snapshot, get_escalation_state_cache, invalidate_escalation_snapshot
+)
+from app.services.event_sink import get_event_sink
+from app.services.text_features import TextFeatures, timed_stage
 
 class EscalationDetectionService:
     """Service for detecting and managing escalations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, state_cache: Optional[EscalationStateCache] = None):
         self.db = db
+        self.state_cache = state_cache if state_cache is not None else get_escalation_state_cache()
         
         # Frustration keywords in French
-        self.frustration_keywords = [
-            'frustré', 'énervé', 'marre', 'problème', 'impossible', 
-            'nul', 'mauvais', 'lent', 'rapide', 'urgent', 'immédiat',
-            'catastrophe', 'désastre', 'inacceptable', 'ridicule',
-            'perte de temps', 'n\'importe quoi', 'incompétent'
-        ]
+        self.frustration_keywords = list(FRUSTRATION_KEYWORDS)
         
         # Complexity indicators
-        self.complexity_indicators = [
-            'compliqué', 'complexe', 'difficile', 'spécial', 'technique',
-            'plusieurs', 'nombreux', 'différent', 'exception', 'particulier'
-        ]
+        self.complexity_indicators = list(COMPLEXITY_INDICATORS)
         
         # Positive sentiment words
-        self.positive_words = [
-            'merci', 'parfait', 'excellent', 'bon', 'bien', 'super',
-            'génial', 'formidable', 'satisfait', 'content', 'heureux'
-        ]
+        self.positive_words = list(POSITIVE_WORDS)
         
         # Negative sentiment words
-        self.negative_words = [
-            'pas', 'non', 'mauvais', 'terrible', 'horrible', 'déçu',
-            'triste', 'fâché', 'colère', 'mécontent', 'insatisfait'
-        ]
+        self.negative_words = list(NEGATIVE_WORDS)
     
     def detect_escalation(self, user_id: str, session_id: str, message: str,
-                         context: Dict[str, Any] = None) -> Dict[str, Any]:
+                         context: Dict[str, Any] = None,
+                         text_features: Optional[TextFeatures] = None) -> Dict[str, Any]:
         """Main escalation detection function"""
+        context = context or {}
         try:
-            # Get conversation history
-            conversation_history = self._get_conversation_history(user_id, session_id)
+            # Compiled detectors/rules and the session's rolling state replace per-message reloads
+            snapshot = get_escalation_snapshot(self.db)
+            state = self._get_session_state(user_id, session_id)
+            features = analyze_message(message, text_features=text_features)
             
             # Run all active detectors
-            detection_results = []
-            active_detectors = self._get_active_detectors()
-            
-            for detector in active_detectors:
-                result = self._run_detector(detector, user_id, session_id, message, 
-                                          conversation_history, context)
-                detection_results.append(result)
+            with timed_stage("escalation.detectors"):
+                detection_results = [
+                    self._run_detector(detector, features, state, context)
+                    for detector in snapshot.detectors
+                ]
             
             # Calculate overall escalation score
             overall_score = self._calculate_overall_score(detection_results)
             
             # Check escalation rules
             escalation_decision = self._check_escalation_rules(
-                detection_results, overall_score, user_id, session_id, context
+                snapshot.rules, detection_results, overall_score, user_id, session_id, context
             )
             
             # Log detection
@@ -76,6 +72,7 @@ class EscalationDetectionService:
                 user_id, session_id, message, detection_results, 
                 overall_score, escalation_decision, context
             )
+            state.observe(features)
             
             # Execute escalation if triggered
             if escalation_decision.get('escalate', False):
@@ -108,21 +105,21 @@ class EscalationDetectionService:
                 'escalation_triggered': False
             }
     
-    def _run_detector(self, detector: EscalationDetector, user_id: str, session_id: str,
-                     message: str, history: List[Dict], context: Dict[str, Any]) -> Dict[str, Any]:
+    def _run_detector(self, detector: CompiledDetector, features: MessageFeatures,
+                     state: SessionEscalationState, context: Dict[str, Any]) -> Dict[str, Any]:
         """Run a specific detector"""
         try:
             if detector.detector_type == 'failure_counter':
-                return self._detect_failure_count(detector, user_id, session_id, history)
+                return self._detect_failure_count(detector, state)
             
             elif detector.detector_type == 'sentiment_analysis':
-                return self._detect_sentiment(detector, message, history)
+                return self._detect_sentiment(detector, features, state)
             
             elif detector.detector_type == 'duration_based':
-                return self._detect_duration_issues(detector, user_id, session_id, history)
+                return self._detect_duration_issues(detector, state)
             
             elif detector.detector_type == 'complexity_scoring':
-                return self._detect_complexity(detector, message, history, context)
+                return self._detect_complexity(detector, features, state, context)
             
             else:
                 return {
@@ -143,28 +140,12 @@ class EscalationDetectionService:
                 'error': str(e)
             }
     
-    def _detect_failure_count(self, detector: EscalationDetector, user_id: str,
-                             session_id: str, history: List[Dict]) -> Dict[str, Any]:
+    def _detect_failure_count(self, detector: CompiledDetector,
+                             state: SessionEscalationState) -> Dict[str, Any]:
         """Detect escalation based on failure count"""
-        # Count comprehension failures in recent history
-        failure_count = 0
-        clarification_requests = 0
-        
-        for entry in history[-10:]:  # Last 10 messages
-            message = entry.get('message', '').lower()
-            
-            # Check for AI confusion indicators
-            if any(phrase in message for phrase in [
-                'je ne comprends pas', 'pouvez-vous préciser', 'clarifier',
-                'reformuler', 'expliquer', 'détailler'
-            ]):
-                failure_count += 1
-            
-            # Check for clarification requests
-            if any(phrase in message for phrase in [
-                'que voulez-vous dire', 'comment', 'pourquoi', 'où exactement'
-            ]):
-                clarification_requests += 1
+        # Comprehension failures and clarification requests over the last 10 messages
+        failure_count = state.failure_count
+        clarification_requests = state.clarification_requests
         
         # Calculate score
         total_failures = failure_count + (clarification_requests * 0.5)
@@ -184,38 +165,23 @@ class EscalationDetectionService:
             }
         }
     
-    def _detect_sentiment(self, detector: EscalationDetector, message: str,
-                         history: List[Dict]) -> Dict[str, Any]:
+    def _detect_sentiment(self, detector: CompiledDetector, features: MessageFeatures,
+                         state: SessionEscalationState) -> Dict[str, Any]:
         """Detect escalation based on sentiment analysis"""
         # Simple sentiment analysis for French
-        message_lower = message.lower()
-        
-        # Count positive and negative words
-        positive_count = sum(1 for word in self.positive_words if word in message_lower)
-        negative_count = sum(1 for word in self.negative_words if word in message_lower)
-        frustration_count = sum(1 for word in self.frustration_keywords if word in message_lower)
+        positive_count = features.positive_count
+        negative_count = features.negative_count
+        frustration_count = features.frustration_count
         
         # Calculate sentiment score (-1 to 1)
-        total_words = len(message.split())
+        total_words = features.word_count
         if total_words == 0:
             sentiment_score = 0.0
         else:
             sentiment_score = (positive_count - negative_count - frustration_count * 2) / total_words
         
-        # Check recent message sentiment
-        recent_sentiment = []
-        for entry in history[-5:]:
-            hist_message = entry.get('message', '').lower()
-            hist_negative = sum(1 for word in self.negative_words if word in hist_message)
-            hist_frustration = sum(1 for word in self.frustration_keywords if word in hist_message)
-            hist_words = len(hist_message.split())
-            
-            if hist_words > 0:
-                hist_sentiment = -(hist_negative + hist_frustration * 2) / hist_words
-                recent_sentiment.append(hist_sentiment)
-        
-        # Calculate trend
-        avg_recent_sentiment = sum(recent_sentiment) / len(recent_sentiment) if recent_sentiment else 0
+        # Trend over the last 5 messages
+        avg_recent_sentiment = state.recent_sentiment
         
         # Calculate escalation score
         escalation_score = 0.0
@@ -244,10 +210,10 @@ class EscalationDetectionService:
             }
         }
     
-    def _detect_duration_issues(self, detector: EscalationDetector, user_id: str,
-                               session_id: str, history: List[Dict]) -> Dict[str, Any]:
+    def _detect_duration_issues(self, detector: CompiledDetector,
+                               state: SessionEscalationState) -> Dict[str, Any]:
         """Detect escalation based on conversation duration"""
-        if not history:
+        if not state.message_count:
             return {
                 'detector_id': detector.detector_id,
                 'detector_type': detector.detector_type,
@@ -256,14 +222,9 @@ class EscalationDetectionService:
                 'duration_minutes': 0.0
             }
         
-        # Calculate conversation duration
-        start_time = history[0].get('timestamp', datetime.utcnow())
-        end_time = history[-1].get('timestamp', datetime.utcnow())
-        
-        if isinstance(start_time, str):
-            start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-        if isinstance(end_time, str):
-            end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
+        # Calculate conversation duration over the history window
+        start_time = state.started_at
+        end_time = state.last_message_at
         
         duration = end_time - start_time
         duration_minutes = duration.total_seconds() / 60
@@ -273,7 +234,7 @@ class EscalationDetectionService:
         triggered = score >= detector.escalation_threshold
         
         # Consider message density
-        message_density = len(history) / max(duration_minutes, 1)
+        message_density = state.message_count / max(duration_minutes, 1)
         if message_density > 2:  # High message density might indicate struggle
             score *= 1.2
         
@@ -285,7 +246,7 @@ class EscalationDetectionService:
             'score': score,
             'triggered': triggered,
             'duration_minutes': duration_minutes,
-            'message_count': len(history),
+            'message_count': state.message_count,
             'message_density': message_density,
             'details': {
                 'duration_threshold': detector.duration_threshold_minutes,
@@ -294,18 +255,17 @@ class EscalationDetectionService:
             }
         }
     
-    def _detect_complexity(self, detector: EscalationDetector, message: str,
-                          history: List[Dict], context: Dict[str, Any]) -> Dict[str, Any]:
+    def _detect_complexity(self, detector: CompiledDetector, features: MessageFeatures,
+                          state: SessionEscalationState, context: Dict[str, Any]) -> Dict[str, Any]:
         """Detect escalation based on complexity scoring"""
         # Calculate complexity factors
         complexity_factors = {
-            'message_length': len(message) / 100,  # Normalize to 0-1
-            'technical_terms': sum(1 for word in self.complexity_indicators 
-                                 if word in message.lower()) / 5,
-            'question_count': message.count('?') / 3,
-            'conversation_length': len(history) / 20,
-            'topic_switches': self._count_topic_switches(history),
-            'repetition_level': self._calculate_repetition(history)
+            'message_length': len(features.text) / 100,  # Normalize to 0-1
+            'technical_terms': features.complexity_terms / 5,
+            'question_count': features.text.count('?') / 3,
+            'conversation_length': state.message_count / HISTORY_WINDOW,
+            'topic_switches': state.topic_switches,
+            'repetition_level': state.repetition_level
         }
         
         # Service-specific complexity
@@ -348,67 +308,6 @@ class EscalationDetectionService:
             }
         }
     
-    def _count_topic_switches(self, history: List[Dict]) -> float:
-        """Count topic switches in conversation"""
-        if len(history) < 2:
-            return 0.0
-        
-        topic_keywords = {
-            'plomberie': ['eau', 'fuite', 'robinet', 'tuyau', 'évier'],
-            'électricité': ['courant', 'électricité', 'lumière', 'prise', 'interrupteur'],
-            'électroménager': ['réfrigérateur', 'machine', 'four', 'lave-linge', 'climatiseur']
-        }
-        
-        topics = []
-        for entry in history:
-            message = entry.get('message', '').lower()
-            detected_topics = []
-            
-            for topic, keywords in topic_keywords.items():
-                if any(keyword in message for keyword in keywords):
-                    detected_topics.append(topic)
-            
-            if detected_topics:
-                topics.append(detected_topics[0])  # Take first detected topic
-        
-        # Count switches
-        switches = 0
-        for i in range(1, len(topics)):
-            if topics[i] != topics[i-1]:
-                switches += 1
-        
-        return min(switches / 3, 1.0)  # Normalize to 0-1
-    
-    def _calculate_repetition(self, history: List[Dict]) -> float:
-        """Calculate repetition level in conversation"""
-        if len(history) < 2:
-            return 0.0
-        
-        messages = [entry.get('message', '').lower() for entry in history]
-        
-        # Count similar messages
-        repetition_count = 0
-        for i in range(len(messages)):
-            for j in range(i + 1, len(messages)):
-                similarity = self._message_similarity(messages[i], messages[j])
-                if similarity > 0.7:
-                    repetition_count += 1
-        
-        return min(repetition_count / 5, 1.0)  # Normalize to 0-1
-    
-    def _message_similarity(self, msg1: str, msg2: str) -> float:
-        """Calculate similarity between two messages"""
-        words1 = set(msg1.split())
-        words2 = set(msg2.split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union) if union else 0.0
-    
     def _calculate_overall_score(self, detection_results: List[Dict]) -> float:
         """Calculate overall escalation score"""
         if not detection_results:
@@ -432,15 +331,11 @@ class EscalationDetectionService:
         
         return min(sum(weighted_scores), 1.0)
     
-    def _check_escalation_rules(self, detection_results: List[Dict], overall_score: float,
-                               user_id: str, session_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _check_escalation_rules(self, active_rules: Tuple[CompiledRule, ...], detection_results: List[Dict],
+                               overall_score: float, user_id: str, session_id: str,
+                               context: Dict[str, Any]) -> Dict[str, Any]:
         """Check if escalation rules are met"""
         try:
-            # Get active rules
-            active_rules = self.db.query(EscalationBusinessRule).filter(
-                EscalationBusinessRule.is_active == True
-            ).order_by(EscalationBusinessRule.priority_order).all()
-            
             for rule in active_rules:
                 # Check if rule conditions are met
                 if self._rule_conditions_met(rule, detection_results, overall_score, context):
@@ -470,7 +365,7 @@ class EscalationDetectionService:
                 'error': str(e)
             }
     
-    def _rule_conditions_met(self, rule: EscalationBusinessRule, detection_results: List[Dict],
+    def _rule_conditions_met(self, rule: CompiledRule, detection_results: List[Dict],
                             overall_score: float, context: Dict[str, Any]) -> bool:
         """Check if rule conditions are met"""
         # Check overall threshold
@@ -500,7 +395,7 @@ class EscalationDetectionService:
         
         return True
     
-    def _check_exceptions(self, rule: EscalationBusinessRule, user_id: str, session_id: str,
+    def _check_exceptions(self, rule: CompiledRule, user_id: str, session_id: str,
                          context: Dict[str, Any]) -> bool:
         """Check if any exception conditions apply"""
         if not rule.exception_conditions:
@@ -524,7 +419,7 @@ class EscalationDetectionService:
         
         return False
     
-    def _check_cooldown(self, rule: EscalationBusinessRule, user_id: str) -> bool:
+    def _check_cooldown(self, rule: CompiledRule, user_id: str) -> bool:
         """Check if cooldown period has passed"""
         if rule.cooldown_minutes <= 0:
             return True
@@ -542,6 +437,17 @@ class EscalationDetectionService:
         
         return recent_escalation is None
     
+    def _get_session_state(self, user_id: str, session_id: str) -> SessionEscalationState:
+        """Rolling state for a session, warmed from its detection logs on first use"""
+        state = self.state_cache.get(user_id, session_id)
+        if state is None:
+            state = SessionEscalationState()
+            get_event_sink().flush()
+            for entry in self._get_conversation_history(user_id, session_id):
+                state.observe(analyze_message(entry['message'], entry['timestamp']))
+            self.state_cache.put(user_id, session_id, state)
+        return state
+    
     def _get_conversation_history(self, user_id: str, session_id: str) -> List[Dict]:
         """Get conversation history for analysis"""
         try:
@@ -551,7 +457,7 @@ class EscalationDetectionService:
                     EscalationDetectionLog.user_id == user_id,
                     EscalationDetectionLog.session_id == session_id
                 )
-            ).order_by(EscalationDetectionLog.timestamp.desc()).limit(20).all()
+            ).order_by(EscalationDetectionLog.timestamp.desc()).limit(HISTORY_WINDOW).all()
             
             history = []
             for log in reversed(logs):
@@ -569,12 +475,6 @@ class EscalationDetectionService:
             logger.error(f"Error getting conversation history: {str(e)}")
             return []
     
-    def _get_active_detectors(self) -> List[EscalationDetector]:
-        """Get all active detectors"""
-        return self.db.query(EscalationDetector).filter(
-            EscalationDetector.is_active == True
-        ).order_by(EscalationDetector.priority_level.desc()).all()
-    
     def _log_detection(self, user_id: str, session_id: str, message: str,
                       detection_results: List[Dict], overall_score: float,
                       escalation_decision: Dict[str, Any], context: Dict[str, Any]) -> EscalationDetectionLog:
@@ -614,8 +514,12 @@ class EscalationDetectionService:
                 elif result.get('detector_type') == 'complexity_scoring':
                     log.complexity_score = result.get('score', 0.0)
             
-            self.db.add(log)
-            self.db.commit()
+            if escalation_decision.get('escalate', False):
+                # The escalation execution references this log, so it is written now
+                self.db.add(log)
+                self.db.commit()
+            else:
+                get_event_sink().emit(self.db, log)
             
             return log
             
@@ -685,6 +589,7 @@ class EscalationDetectionService:
             
             self.db.add(detector)
             self.db.commit()
+            invalidate_escalation_snapshot()
             
             return {
                 'success': True,
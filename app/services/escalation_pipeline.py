@@ -0,0 +1,393 @@
+"""
+Escalation Pipeline
+Compiled snapshot of escalation detectors and business rules, and the
+per-session rolling state the detectors read instead of replaying the
+conversation history on every message
+"""
+
+import time
+import zlib
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.escalation_detection_models import EscalationDetector, EscalationBusinessRule
+from app.services.text_features import TextFeatures, ensure_text_features, register_lexicon
+
+# French lexicons shared by the detectors
+FRUSTRATION_KEYWORDS = (
+    'frustré', 'énervé', 'marre', 'problème', 'impossible',
+    'nul', 'mauvais', 'lent', 'rapide', 'urgent', 'immédiat',
+    'catastrophe', 'désastre', 'inacceptable', 'ridicule',
+    'perte de temps', 'n\'importe quoi', 'incompétent'
+)
+COMPLEXITY_INDICATORS = (
+    'compliqué', 'complexe', 'difficile', 'spécial', 'technique',
+    'plusieurs', 'nombreux', 'différent', 'exception', 'particulier'
+)
+POSITIVE_WORDS = (
+    'merci', 'parfait', 'excellent', 'bon', 'bien', 'super',
+    'génial', 'formidable', 'satisfait', 'content', 'heureux'
+)
+NEGATIVE_WORDS = (
+    'pas', 'non', 'mauvais', 'terrible', 'horrible', 'déçu',
+    'triste', 'fâché', 'colère', 'mécontent', 'insatisfait'
+)
+FAILURE_PHRASES = (
+    'je ne comprends pas', 'pouvez-vous préciser', 'clarifier',
+    'reformuler', 'expliquer', 'détailler'
+)
+CLARIFICATION_PHRASES = (
+    'que voulez-vous dire', 'comment', 'pourquoi', 'où exactement'
+)
+TOPIC_KEYWORDS = (
+    ('plomberie', ('eau', 'fuite', 'robinet', 'tuyau', 'évier')),
+    ('électricité', ('courant', 'électricité', 'lumière', 'prise', 'interrupteur')),
+    ('électroménager', ('réfrigérateur', 'machine', 'four', 'lave-linge', 'climatiseur'))
+)
+
+register_lexicon({
+    "escalation.frustration": FRUSTRATION_KEYWORDS,
+    "escalation.complexity": COMPLEXITY_INDICATORS,
+    "escalation.positive": POSITIVE_WORDS,
+    "escalation.negative": NEGATIVE_WORDS,
+    "escalation.failure": FAILURE_PHRASES,
+    "escalation.clarification": CLARIFICATION_PHRASES,
+    **{f"escalation.topic.{name}": keywords for name, keywords in TOPIC_KEYWORDS}
+})
+
+# Rolling windows, matching the history the detectors used to reload
+HISTORY_WINDOW = 20
+FAILURE_WINDOW = 10
+SENTIMENT_WINDOW = 5
+
+# Word-set Jaccard above which two messages count as a repetition
+REPETITION_SIMILARITY = 0.7
+
+# MinHash sketch: messages whose estimate is below the floor skip the exact check
+MINHASH_SIZE = 16
+MINHASH_FLOOR = 0.25
+_MINHASH_PRIME = (1 << 61) - 1
+_MINHASH_PARAMS = tuple(
+    ((i * 0x9E3779B97F4A7C15 + 1) % _MINHASH_PRIME or 1, (i * 0xC2B2AE3D27D4EB4F + 7) % _MINHASH_PRIME)
+    for i in range(1, MINHASH_SIZE + 1)
+)
+
+# How often a cached snapshot re-checks the detector/rule tables for edits
+SNAPSHOT_CHECK_SECONDS = 30
+
+
+def minhash(words: FrozenSet[str]) -> Optional[Tuple[int, ...]]:
+    """MinHash signature of a word set (None for an empty set)"""
+    if not words:
+        return None
+    hashes = [zlib.crc32(word.encode("utf-8")) for word in words]
+    return tuple(min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in _MINHASH_PARAMS)
+
+
+def jaccard(words1: FrozenSet[str], words2: FrozenSet[str]) -> float:
+    if not words1 or not words2:
+        return 0.0
+    return len(words1 & words2) / len(words1 | words2)
+
+
+@dataclass
+class MessageFeatures:
+    """Everything the detectors need from one message, computed once"""
+    text: str
+    timestamp: datetime
+    word_count: int
+    words: FrozenSet[str]
+    sketch: Optional[Tuple[int, ...]]
+    positive_count: int
+    negative_count: int
+    frustration_count: int
+    complexity_terms: int
+    is_failure: bool
+    is_clarification: bool
+    topic: Optional[str]
+    # Later messages in the window that repeat this one
+    newer_similar: int = 0
+
+    @property
+    def history_sentiment(self) -> Optional[float]:
+        """Sentiment this message contributes to the recent trend"""
+        if self.word_count == 0:
+            return None
+        return -(self.negative_count + self.frustration_count * 2) / self.word_count
+
+    def is_similar(self, other: "MessageFeatures") -> bool:
+        if self.sketch is None or other.sketch is None:
+            return False
+        estimate = sum(1 for a, b in zip(self.sketch, other.sketch) if a == b) / MINHASH_SIZE
+        if estimate < MINHASH_FLOOR:
+            return False
+        return jaccard(self.words, other.words) > REPETITION_SIMILARITY
+
+
+def analyze_message(message: str, timestamp: Optional[datetime] = None,
+                    text_features: Optional[TextFeatures] = None) -> MessageFeatures:
+    """Detector features of a message, read from its shared text features"""
+    text_features = ensure_text_features(message, text_features)
+    words = frozenset(text_features.tokens)
+    topic = next(
+        (name for name, _ in TOPIC_KEYWORDS if text_features.has(f"escalation.topic.{name}")),
+        None
+    )
+    return MessageFeatures(
+        text=text_features.lowered,
+        timestamp=timestamp or datetime.utcnow(),
+        word_count=text_features.word_count,
+        words=words,
+        sketch=minhash(words),
+        positive_count=text_features.count("escalation.positive"),
+        negative_count=text_features.count("escalation.negative"),
+        frustration_count=text_features.count("escalation.frustration"),
+        complexity_terms=text_features.count("escalation.complexity"),
+        is_failure=text_features.has("escalation.failure"),
+        is_clarification=text_features.has("escalation.clarification"),
+        topic=topic
+    )
+
+
+class SessionEscalationState:
+    """
+    Rolling detector state for one conversation
+
+    Keeps the last HISTORY_WINDOW messages and running totals over them;
+    observing a message is O(window) with a fixed window, i.e. constant
+    per message regardless of how long the conversation gets.
+    """
+
+    def __init__(self):
+        self.window: Deque[MessageFeatures] = deque()
+        self.failures: Deque[Tuple[bool, bool]] = deque(maxlen=FAILURE_WINDOW)
+        self.failure_count = 0
+        self.clarification_requests = 0
+        self.sentiments: Deque[Optional[float]] = deque(maxlen=SENTIMENT_WINDOW)
+        self.topics: Deque[str] = deque()
+        self.topic_switch_count = 0
+        self.repetition_pairs = 0
+        self.observed = 0
+        self.last_used = time.monotonic()
+
+    def observe(self, features: MessageFeatures):
+        """Fold a message into the rolling state"""
+        self.observed += 1
+        self.last_used = time.monotonic()
+
+        if len(self.window) == HISTORY_WINDOW:
+            self._evict_oldest()
+
+        for entry in self.window:
+            if entry.is_similar(features):
+                entry.newer_similar += 1
+                self.repetition_pairs += 1
+        self.window.append(features)
+
+        if len(self.failures) == FAILURE_WINDOW:
+            old_failure, old_clarification = self.failures[0]
+            self.failure_count -= old_failure
+            self.clarification_requests -= old_clarification
+        self.failures.append((features.is_failure, features.is_clarification))
+        self.failure_count += features.is_failure
+        self.clarification_requests += features.is_clarification
+
+        self.sentiments.append(features.history_sentiment)
+
+        if features.topic:
+            if self.topics and self.topics[-1] != features.topic:
+                self.topic_switch_count += 1
+            self.topics.append(features.topic)
+
+    def _evict_oldest(self):
+        oldest = self.window.popleft()
+        self.repetition_pairs -= oldest.newer_similar
+        if oldest.topic:
+            self.topics.popleft()
+            if self.topics and self.topics[0] != oldest.topic:
+                self.topic_switch_count -= 1
+
+    @property
+    def message_count(self) -> int:
+        return len(self.window)
+
+    @property
+    def recent_sentiment(self) -> float:
+        values = [value for value in self.sentiments if value is not None]
+        return sum(values) / len(values) if values else 0.0
+
+    @property
+    def topic_switches(self) -> float:
+        return min(self.topic_switch_count / 3, 1.0)
+
+    @property
+    def repetition_level(self) -> float:
+        return min(self.repetition_pairs / 5, 1.0)
+
+    @property
+    def started_at(self) -> Optional[datetime]:
+        return self.window[0].timestamp if self.window else None
+
+    @property
+    def last_message_at(self) -> Optional[datetime]:
+        return self.window[-1].timestamp if self.window else None
+
+
+class EscalationStateCache:
+    """Bounded LRU of per-session escalation state"""
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self.states: "OrderedDict[Tuple[str, str], SessionEscalationState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, session_id: str) -> Optional[SessionEscalationState]:
+        with self._lock:
+            state = self.states.get((user_id, session_id))
+            if state is not None:
+                self.states.move_to_end((user_id, session_id))
+            return state
+
+    def put(self, user_id: str, session_id: str, state: SessionEscalationState):
+        with self._lock:
+            self.states[(user_id, session_id)] = state
+            self.states.move_to_end((user_id, session_id))
+            while len(self.states) > self.max_sessions:
+                self.states.popitem(last=False)
+
+    def discard(self, user_id: str, session_id: str):
+        with self._lock:
+            self.states.pop((user_id, session_id), None)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+
+@dataclass(frozen=True)
+class CompiledDetector:
+    """Immutable copy of an active EscalationDetector row"""
+    detector_id: str
+    detector_name: str
+    detector_type: str
+    priority_level: int
+    escalation_threshold: float
+    failure_count_threshold: int
+    sentiment_threshold: float
+    duration_threshold_minutes: int
+    complexity_threshold: float
+
+    @classmethod
+    def from_model(cls, detector: EscalationDetector) -> "CompiledDetector":
+        return cls(
+            detector_id=detector.detector_id,
+            detector_name=detector.detector_name,
+            detector_type=detector.detector_type,
+            priority_level=detector.priority_level,
+            escalation_threshold=detector.escalation_threshold,
+            failure_count_threshold=detector.failure_count_threshold,
+            sentiment_threshold=detector.sentiment_threshold,
+            duration_threshold_minutes=detector.duration_threshold_minutes,
+            complexity_threshold=detector.complexity_threshold
+        )
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Immutable copy of an active EscalationBusinessRule row"""
+    rule_id: str
+    rule_name: str
+    escalation_threshold: float
+    primary_detector: Optional[str]
+    service_type_filter: Optional[str]
+    zone_filter: Optional[str]
+    exception_conditions: Optional[Dict[str, Any]]
+    cooldown_minutes: int
+    escalation_action: Optional[str]
+    escalation_target: Optional[str]
+    notification_channels: Optional[List[str]]
+
+    @classmethod
+    def from_model(cls, rule: EscalationBusinessRule) -> "CompiledRule":
+        return cls(
+            rule_id=rule.rule_id,
+            rule_name=rule.rule_name,
+            escalation_threshold=rule.escalation_threshold,
+            primary_detector=rule.primary_detector,
+            service_type_filter=rule.service_type_filter,
+            zone_filter=rule.zone_filter,
+            exception_conditions=rule.exception_conditions,
+            cooldown_minutes=rule.cooldown_minutes or 0,
+            escalation_action=rule.escalation_action,
+            escalation_target=rule.escalation_target,
+            notification_channels=rule.notification_channels
+        )
+
+
+@dataclass(frozen=True)
+class EscalationSnapshot:
+    """Active detectors and rules, in evaluation order"""
+    detectors: Tuple[CompiledDetector, ...]
+    rules: Tuple[CompiledRule, ...]
+    version: Tuple = field(default=())
+
+    @classmethod
+    def load(cls, db: Session) -> "EscalationSnapshot":
+        # Read the version first so an edit made meanwhile triggers another reload
+        version = escalation_config_version(db)
+        detectors = db.query(EscalationDetector).filter(
+            EscalationDetector.is_active == True
+        ).order_by(EscalationDetector.priority_level.desc()).all()
+        rules = db.query(EscalationBusinessRule).filter(
+            EscalationBusinessRule.is_active == True
+        ).order_by(EscalationBusinessRule.priority_order).all()
+        return cls(
+            tuple(CompiledDetector.from_model(detector) for detector in detectors),
+            tuple(CompiledRule.from_model(rule) for rule in rules),
+            version
+        )
+
+
+def escalation_config_version(db: Session) -> Tuple:
+    """Cheap change signature of the detector and rule tables"""
+    detectors = db.query(func.count(EscalationDetector.id), func.max(EscalationDetector.updated_at)).one()
+    rules = db.query(func.count(EscalationBusinessRule.id), func.max(EscalationBusinessRule.updated_at)).one()
+    return (detectors[0], str(detectors[1]), rules[0], str(rules[1]))
+
+
+# Process-wide snapshot and state shared by every EscalationDetectionService
+_snapshot: Optional[EscalationSnapshot] = None
+_snapshot_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+_state_cache = EscalationStateCache()
+
+
+def get_escalation_snapshot(db: Session) -> EscalationSnapshot:
+    """Get the compiled detectors and rules, reloading them after edits"""
+    global _snapshot, _snapshot_checked_at
+    with _snapshot_lock:
+        now = time.monotonic()
+        if _snapshot is not None and now - _snapshot_checked_at < SNAPSHOT_CHECK_SECONDS:
+            return _snapshot
+
+        if _snapshot is None or escalation_config_version(db) != _snapshot.version:
+            _snapshot = EscalationSnapshot.load(db)
+        _snapshot_checked_at = now
+        return _snapshot
+
+
+def invalidate_escalation_snapshot():
+    """Force a reload on the next detection (called when detectors or rules are edited)"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def get_escalation_state_cache() -> EscalationStateCache:
+    """Get the process-wide per-session state cache"""
+    return _state_cache
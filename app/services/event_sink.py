@@ -0,0 +1,175 @@
+"""
+Event Sink
+Write-behind buffer for the conversation logs and analytics rows written on
+every message: services hand over ORM objects instead of committing inline,
+rows are grouped by table and bulk-inserted every flush interval or
+batch_size rows. A full buffer makes the emitting caller flush itself
+(backpressure) instead of dropping events; the lifespan flushes on shutdown.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import SingletonThreadPool
+from sqlalchemy.sql.schema import Table
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class EventSink:
+    """
+    Process-wide write-behind buffer
+
+    Rows are keyed by the engine of the emitting session and their table, so
+    each flush is one transaction per database with one executemany INSERT
+    per table and column set. Thread-safe: sync services, async handlers and
+    worker threads all emit into the same buffer.
+    """
+
+    def __init__(
+        self,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        max_buffer: Optional[int] = None
+    ):
+        self.flush_interval = flush_interval or settings.event_sink_flush_interval_seconds
+        self.batch_size = batch_size or settings.event_sink_batch_size
+        self.max_buffer = max(max_buffer or settings.event_sink_max_buffer, self.batch_size)
+
+        self._buffer: Dict[Tuple[Engine, Table], List[Dict[str, Any]]] = defaultdict(list)
+        self._size = 0
+        self._lock = threading.Lock()
+        # Flushes run one at a time so rows reach each table in emission order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"emitted": 0, "written": 0, "failed": 0, "flushes": 0, "backpressure_flushes": 0}
+
+    def emit(self, db: Session, instance: Any):
+        """Queue an ORM object for insertion into its table through the session's database"""
+        mapper = inspect(instance).mapper
+        row = {}
+        for attr in mapper.column_attrs:
+            value = getattr(instance, attr.key)
+            # Unset columns keep their Python or server defaults
+            if value is not None:
+                row[attr.columns[0].name] = value
+
+        with self._lock:
+            self._buffer[(db.get_bind(), mapper.local_table)].append(row)
+            self._size += 1
+            self._stats["emitted"] += 1
+            size = self._size
+
+        if size >= self.max_buffer:
+            self._stats["backpressure_flushes"] += 1
+            self.flush()
+        elif size >= self.batch_size:
+            if self._flushes_inline(db.get_bind()):
+                self.flush()
+            else:
+                self._wake.set()
+        self._ensure_started()
+
+    def flush(self) -> int:
+        """Insert every buffered row now; returns the number of rows written"""
+        return self._flush(lambda engine: True)
+
+    def _flush(self, include) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch = {key: rows for key, rows in self._buffer.items() if include(key[0])}
+                for key in batch:
+                    del self._buffer[key]
+                self._size -= sum(len(rows) for rows in batch.values())
+            if not batch:
+                return 0
+
+            by_engine: Dict[Engine, List[Tuple[Table, List[Dict[str, Any]]]]] = defaultdict(list)
+            for (engine, table), rows in batch.items():
+                by_engine[engine].append((table, rows))
+
+            written = 0
+            for engine, tables in by_engine.items():
+                count = sum(len(rows) for _, rows in tables)
+                try:
+                    with engine.begin() as connection:
+                        for table, rows in tables:
+                            # executemany needs the same columns in every row
+                            by_columns: Dict[frozenset, List[Dict[str, Any]]] = defaultdict(list)
+                            for row in rows:
+                                by_columns[frozenset(row)].append(row)
+                            for group in by_columns.values():
+                                connection.execute(table.insert(), group)
+                    written += count
+                except Exception as e:
+                    self._stats["failed"] += count
+                    logger.error(f"Event sink dropped {count} rows for {engine.url.render_as_string()}: {e}")
+
+            self._stats["written"] += written
+            self._stats["flushes"] += 1
+            return written
+
+    def close(self):
+        """Stop the flusher thread and write what is left"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Write counters and current buffer depth"""
+        return {**self._stats, "buffered": self._size}
+
+    @staticmethod
+    def _flushes_inline(engine: Engine) -> bool:
+        # A thread-local pool (SQLite :memory:) is a different database on the flusher thread
+        return isinstance(engine.pool, SingletonThreadPool)
+
+    def _ensure_started(self):
+        if self._thread is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._size and not self._stopped.is_set():
+                self._flush(lambda engine: not self._flushes_inline(engine))
+
+
+# Process-wide sink shared by every service
+_sink: Optional[EventSink] = None
+_sink_lock = threading.Lock()
+
+
+def get_event_sink() -> EventSink:
+    """Get the shared event sink"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = EventSink()
+        return _sink
+
+
+async def close_event_sink():
+    """Flush and stop the shared sink (application shutdown)"""
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
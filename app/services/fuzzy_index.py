@@ -0,0 +1,260 @@
+"""
+Fuzzy Index
+In-memory trigram inverted index over the service and zone catalogs (codes
+and names) for typo-tolerant lookups: unknown LLM codes, zone search and
+suggestions score only the entries sharing a trigram with the query instead
+of scanning every row. On PostgreSQL the same columns also get pg_trgm GIN
+indexes for ad-hoc SQL similarity queries.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from unidecode import unidecode
+
+from app.models.dynamic_services import Service, ServiceStatus, Zone
+
+logger = logging.getLogger(__name__)
+
+# How often a cached index re-checks its table for changes
+INDEX_CHECK_SECONDS = 30
+
+SIMILARITY = "similarity"
+# Share of the query's trigrams found in the field (pg_trgm word_similarity
+# flavour), so short queries match inside long names
+CONTAINMENT = "containment"
+
+SERVICE_FIELDS = ("code", "name", "name_fr", "name_en")
+ZONE_FIELDS = ("code", "name", "name_fr", "name_en")
+
+
+def normalize(value: Optional[str]) -> str:
+    """Lowercase, strip accents and collapse everything but letters and digits to single spaces"""
+    if not value:
+        return ""
+    return re.sub(r"[^a-z0-9]+", " ", unidecode(value.lower())).strip()
+
+
+def trigrams(value: Optional[str]) -> Set[str]:
+    """pg_trgm style trigrams: each word padded with two spaces before and one after"""
+    grams: Set[str] = set()
+    for word in normalize(value).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass
+class FuzzyMatch:
+    """One candidate for a fuzzy lookup"""
+    key: str
+    score: float
+    field: str
+    value: str
+    attrs: Dict[str, Any]
+
+
+class TrigramIndex:
+    """
+    Immutable trigram inverted index
+
+    Each entry has a key (the catalog code), searchable fields and free-form
+    attributes for filtering. A lookup counts shared trigrams through the
+    postings of the query's trigrams only, then keeps the best field per key.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[str, Dict[str, Optional[str]], Dict[str, Any]]],
+        version: Tuple = ()
+    ):
+        self.version = version
+        self._keys: List[str] = []
+        self._attrs: List[Dict[str, Any]] = []
+        # Indexed (entry, field name, original value, trigram count) documents
+        self._documents: List[Tuple[int, str, str, int]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+        for key, fields, attrs in entries:
+            entry = len(self._keys)
+            self._keys.append(key)
+            self._attrs.append(attrs)
+            for field_name, value in fields.items():
+                grams = trigrams(value)
+                if not grams:
+                    continue
+                document = len(self._documents)
+                self._documents.append((entry, field_name, value, len(grams)))
+                for gram in grams:
+                    self._postings[gram].append(document)
+        self._postings = dict(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        threshold: float = 0.3,
+        metric: str = SIMILARITY,
+        fields: Optional[Sequence[str]] = None,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[FuzzyMatch]:
+        """Top-k entries scoring at least `threshold`, best first"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for document in self._postings.get(gram, ()):
+                shared[document] += 1
+
+        best: Dict[int, Tuple[float, int]] = {}
+        for document, count in shared.items():
+            entry, field_name, _, size = self._documents[document]
+            if fields is not None and field_name not in fields:
+                continue
+            if metric == CONTAINMENT:
+                score = count / len(query_grams)
+            else:
+                score = count / (len(query_grams) + size - count)
+            if score < threshold:
+                continue
+            if entry not in best or score > best[entry][0]:
+                best[entry] = (score, document)
+
+        if where is not None:
+            best = {entry: match for entry, match in best.items() if where(self._attrs[entry])}
+
+        top = heapq.nlargest(k, best.items(), key=lambda item: (item[1][0], -item[0]))
+        return [
+            FuzzyMatch(
+                key=self._keys[entry],
+                score=round(score, 4),
+                field=self._documents[document][1],
+                value=self._documents[document][2],
+                attrs=self._attrs[entry]
+            )
+            for entry, (score, document) in top
+        ]
+
+
+def table_version(db: Session, model) -> Tuple:
+    """Cheap change signature of a catalog table"""
+    count, last_created, last_updated = db.query(
+        func.count(model.id), func.max(model.created_at), func.max(model.updated_at)
+    ).one()
+    return (count, str(last_created), str(last_updated))
+
+
+def build_service_index(db: Session) -> TrigramIndex:
+    """Index available services by code and names"""
+    version = table_version(db, Service)
+    rows = db.query(Service.id, Service.code, Service.name, Service.name_fr, Service.name_en).filter(
+        Service.status == ServiceStatus.AVAILABLE
+    ).all()
+    return TrigramIndex(
+        ((row.code, {name: getattr(row, name) for name in SERVICE_FIELDS}, {"id": row.id, "name": row.name})
+         for row in rows),
+        version=version
+    )
+
+
+def build_zone_index(db: Session) -> TrigramIndex:
+    """Index active zones by code and names"""
+    version = table_version(db, Zone)
+    rows = db.query(
+        Zone.id, Zone.code, Zone.name, Zone.name_fr, Zone.name_en, Zone.zone_type, Zone.parent_id
+    ).filter(Zone.is_active == True).all()
+    return TrigramIndex(
+        ((row.code, {name: getattr(row, name) for name in ZONE_FIELDS},
+          {"id": row.id, "name": row.name, "zone_type": row.zone_type, "parent_id": row.parent_id})
+         for row in rows),
+        version=version
+    )
+
+
+class _CachedIndex:
+    """Process-wide index rebuilt when its table's version changes"""
+
+    def __init__(self, name: str, model, builder: Callable[[Session], TrigramIndex]):
+        self.name = name
+        self.model = model
+        self.builder = builder
+        self.index: Optional[TrigramIndex] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, db: Session) -> TrigramIndex:
+        with self.lock:
+            now = time.monotonic()
+            if self.index is not None and now - self.checked_at < INDEX_CHECK_SECONDS:
+                return self.index
+            if self.index is None or table_version(db, self.model) != self.index.version:
+                self.index = self.builder(db)
+                logger.info(f"Built {self.name} fuzzy index with {len(self.index)} entries")
+            self.checked_at = now
+            return self.index
+
+    def invalidate(self):
+        with self.lock:
+            self.index = None
+
+
+_service_index = _CachedIndex("service", Service, build_service_index)
+_zone_index = _CachedIndex("zone", Zone, build_zone_index)
+
+
+def get_service_fuzzy_index(db: Session) -> TrigramIndex:
+    """Get the cached service index, rebuilding it when the services table changed"""
+    return _service_index.get(db)
+
+
+def get_zone_fuzzy_index(db: Session) -> TrigramIndex:
+    """Get the cached zone index, rebuilding it when the zones table changed"""
+    return _zone_index.get(db)
+
+
+def invalidate_service_fuzzy_index():
+    """Force a rebuild on the next lookup (called when services are written)"""
+    _service_index.invalidate()
+
+
+def invalidate_zone_fuzzy_index():
+    """Force a rebuild on the next lookup (called when zones are written)"""
+    _zone_index.invalidate()
+
+
+# (index name, table, column) pairs covered by pg_trgm GIN indexes
+TRIGRAM_INDEXES = [
+    (f"idx_{table}_{column}_trgm", table, column)
+    for table, columns in (("services", SERVICE_FIELDS), ("zones", ZONE_FIELDS))
+    for column in columns
+]
+
+
+def ensure_trigram_indexes(engine) -> bool:
+    """Create pg_trgm GIN indexes on catalog codes and names (PostgreSQL only, best effort)"""
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for name, table, column in TRIGRAM_INDEXES:
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (lower({column}) gin_trgm_ops)"
+                ))
+        return True
+    except Exception as e:
+        logger.warning(f"Could not create pg_trgm indexes: {e}")
+        return False
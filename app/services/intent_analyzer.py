@@ -7,10 +7,12 @@ import re
 import json
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
-from anthropic import Anthropic
 
 from app.config import get_settings
-from app.services.ai_service import AIService
+from app.services.ai_service import ai_service
+from app.services.text_classifier import INTENT, classify
+from app.services.text_features import TextFeatures, ensure_text_features, register_lexicon, timed_stage
+from app.services.landmark_gazetteer import AREA, DEFAULT_AREA, HOME, LANDMARK, REFERENCE, ZONE, get_landmark_gazetteer
 from loguru import logger
 
 settings = get_settings()
@@ -22,8 +24,18 @@ class IntentAnalyzer:
     Provides context-aware intent detection for seamless conversations
     """
     
-    def __init__(self):
-        self.ai_service = AIService()
+    # Intents the pattern tier may answer alone: they need no entity extraction
+    PATTERN_ONLY_INTENTS = {
+        "status_inquiry", "view_my_requests", "view_request_details",
+        "cancel_request", "info_request", "human_contact"
+    }
+    
+    # Pattern tier vs LLM tier counters, shared by all analyzer instances
+    tier_stats = {"pattern_hits": 0, "classifier_hits": 0, "llm_fallbacks": 0}
+    
+    def __init__(self, confidence_threshold: Optional[float] = None):
+        # Shared AI service: LLM calls go through the pooled async client layer
+        self.ai_service = ai_service
         
         # Cameroon-specific patterns and expressions
         self.cameroon_patterns = {
@@ -111,12 +123,44 @@ class IntentAnalyzer:
                 "service client", "real person", "vraie personne"
             ]
         }
+        
+        self.confidence_threshold = (
+            confidence_threshold if confidence_threshold is not None
+            else settings.intent_pattern_confidence_threshold
+        )
+        self._compile_patterns()
+    
+    def _compile_patterns(self):
+        """Register the keyword tables with the shared feature extractor"""
+        
+        lexicon = {
+            f"intent.{category}": patterns
+            for category, patterns in self.cameroon_patterns.items()
+            if category not in ("service_types", "request_reference_patterns")
+        }
+        lexicon.update({
+            f"intent.service.{service_type}": patterns
+            for service_type, patterns in self.cameroon_patterns["service_types"].items()
+        })
+        register_lexicon(lexicon)
+        self.compiled_reference_pattern = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.cameroon_patterns["request_reference_patterns"])
+        )
+        self.intent_categories = {
+            "status_inquiry": "status_requests",
+            "view_my_requests": "request_management",
+            "modify_request": "modification_requests",
+            "cancel_request": "cancellation_requests",
+            "info_request": "info_requests",
+            "human_contact": "human_contact_requests"
+        }
     
     async def analyze_intent(
         self, 
         message: str, 
         conversation_history: List[Dict[str, Any]] = None,
-        current_phase: str = None
+        current_phase: str = None,
+        features: Optional[TextFeatures] = None
     ) -> Dict[str, Any]:
         """
         Analyze user message to determine intent and extract relevant information
@@ -124,11 +168,41 @@ class IntentAnalyzer:
         """
         
         try:
+            features = ensure_text_features(message, features)
+            
             # Quick pattern-based analysis for common intents
-            quick_analysis = self._quick_pattern_analysis(message)
+            with timed_stage("intent.patterns"):
+                quick_analysis = self._quick_pattern_analysis(message, features)
+                calibrated_confidence = self._calibrate_pattern_confidence(quick_analysis, message, features)
+            
+            # Confident pattern matches are answered without an LLM round-trip
+            if (quick_analysis["primary_intent"] in self.PATTERN_ONLY_INTENTS and
+                    calibrated_confidence >= self.confidence_threshold):
+                IntentAnalyzer.tier_stats["pattern_hits"] += 1
+                pattern_result = self._pattern_only_analysis(
+                    quick_analysis, calibrated_confidence, message, features
+                )
+                logger.info(f"Intent analysis result (pattern tier): {pattern_result}")
+                return pattern_result
+            
+            # Then the local classifier, for the same intents that need no entity extraction
+            local = classify(INTENT, message)
+            if local is not None and local.label in self.PATTERN_ONLY_INTENTS:
+                IntentAnalyzer.tier_stats["classifier_hits"] += 1
+                local_result = self._pattern_only_analysis(
+                    {"primary_intent": local.label}, local.confidence, message, features
+                )
+                local_result["method"] = "local_classifier"
+                local_result["analysis_methods"] = ["local_classifier"]
+                logger.info(f"Intent analysis result (classifier tier): {local_result}")
+                return local_result
+            
+            IntentAnalyzer.tier_stats["llm_fallbacks"] += 1
             
             # AI-powered deep analysis for complex cases
-            ai_analysis = await self._ai_intent_analysis(message, conversation_history, current_phase)
+            ai_analysis = await self._ai_intent_analysis(
+                message, conversation_history, current_phase, intent=quick_analysis["primary_intent"]
+            )
             
             # Combine results
             combined_analysis = self._combine_analyses(quick_analysis, ai_analysis, message)
@@ -145,13 +219,13 @@ class IntentAnalyzer:
             logger.error(f"Error in intent analysis: {e}")
             return self._fallback_analysis(message)
     
-    def _quick_pattern_analysis(self, message: str) -> Dict[str, Any]:
+    def _quick_pattern_analysis(self, message: str, features: Optional[TextFeatures] = None) -> Dict[str, Any]:
         """Fast pattern-based intent detection for common cases"""
         
-        message_lower = message.lower()
+        features = ensure_text_features(message, features)
         
         # Check for status requests
-        if any(pattern in message_lower for pattern in self.cameroon_patterns["status_requests"]):
+        if features.has("intent.status_requests"):
             return {
                 "primary_intent": "status_inquiry",
                 "confidence": 0.9,
@@ -159,7 +233,7 @@ class IntentAnalyzer:
             }
         
         # Check for request management
-        if any(pattern in message_lower for pattern in self.cameroon_patterns["request_management"]):
+        if features.has("intent.request_management"):
             return {
                 "primary_intent": "view_my_requests",
                 "confidence": 0.9,
@@ -177,7 +251,7 @@ class IntentAnalyzer:
             }
         
         # Check for modification requests
-        if any(pattern in message_lower for pattern in self.cameroon_patterns["modification_requests"]):
+        if features.has("intent.modification_requests"):
             return {
                 "primary_intent": "modify_request",
                 "confidence": 0.9,
@@ -185,7 +259,7 @@ class IntentAnalyzer:
             }
         
         # Check for cancellation requests
-        if any(pattern in message_lower for pattern in self.cameroon_patterns["cancellation_requests"]):
+        if features.has("intent.cancellation_requests"):
             return {
                 "primary_intent": "cancel_request",
                 "confidence": 0.9,
@@ -193,10 +267,7 @@ class IntentAnalyzer:
             }
         
         # Check for emergency indicators
-        urgency_score = sum(
-            1 for pattern in self.cameroon_patterns["urgency_indicators"]
-            if pattern in message_lower
-        )
+        urgency_score = features.count("intent.urgency_indicators")
         
         if urgency_score >= 2:  # Multiple urgency indicators
             return {
@@ -207,7 +278,7 @@ class IntentAnalyzer:
             }
         
         # Check for information requests (FAQ, help, etc.)
-        if any(pattern in message_lower for pattern in self.cameroon_patterns["info_requests"]):
+        if features.has("intent.info_requests"):
             return {
                 "primary_intent": "info_request",
                 "confidence": 0.9,
@@ -215,7 +286,7 @@ class IntentAnalyzer:
             }
         
         # Check for human contact requests
-        if any(pattern in message_lower for pattern in self.cameroon_patterns["human_contact_requests"]):
+        if features.has("intent.human_contact_requests"):
             return {
                 "primary_intent": "human_contact",
                 "confidence": 0.9,
@@ -223,10 +294,10 @@ class IntentAnalyzer:
             }
         
         # Check for service type mentions
-        detected_services = []
-        for service_type, patterns in self.cameroon_patterns["service_types"].items():
-            if any(pattern in message_lower for pattern in patterns):
-                detected_services.append(service_type)
+        detected_services = [
+            service_type for service_type in self.cameroon_patterns["service_types"]
+            if features.has(f"intent.service.{service_type}")
+        ]
         
         if detected_services:
             return {
@@ -246,7 +317,8 @@ class IntentAnalyzer:
         self, 
         message: str, 
         conversation_history: List[Dict[str, Any]] = None,
-        current_phase: str = None
+        current_phase: str = None,
+        intent: Optional[str] = None
     ) -> Dict[str, Any]:
         """AI-powered intent analysis for complex understanding"""
         
@@ -317,11 +389,14 @@ class IntentAnalyzer:
                 {"role": "user", "content": user_prompt}
             ]
             
+            # Exact-match caching only: the analysis extracts entities from this very message,
+            # and the pattern-tier intent keeps urgent and complaint messages out of the cache
             response = await self.ai_service.generate_response(
                 messages=ai_messages,
                 system_prompt=system_prompt,
                 max_tokens=800,
-                temperature=0.3
+                temperature=0.3,
+                intent=intent
             )
             
             # Extract JSON from response
@@ -392,20 +467,17 @@ class IntentAnalyzer:
         
         return combined
     
-    def _detect_service_type_enhanced(self, message: str) -> Optional[str]:
+    def _detect_service_type_enhanced(self, message: str, features: Optional[TextFeatures] = None) -> Optional[str]:
         """Enhanced service type detection with Cameroon context"""
         
-        message_lower = message.lower()
+        features = ensure_text_features(message, features)
         
         # Score each service type
         service_scores = {}
         
-        for service_type, patterns in self.cameroon_patterns["service_types"].items():
-            score = 0
-            for pattern in patterns:
-                if pattern in message_lower:
-                    # Weight longer patterns higher
-                    score += len(pattern.split())
+        for service_type in self.cameroon_patterns["service_types"]:
+            # Weight longer patterns higher
+            score = sum(len(pattern.split()) for pattern in features.terms(f"intent.service.{service_type}"))
             
             if score > 0:
                 service_scores[service_type] = score
@@ -419,49 +491,112 @@ class IntentAnalyzer:
     def _detect_location_enhanced(self, message: str) -> Optional[str]:
         """Enhanced location detection for Bonamoussadi area"""
         
-        message_lower = message.lower()
-        
-        # Check for explicit location mentions
-        location_indicators = [
-            "bonamoussadi", "bonassama", "douala",
-            "chez moi", "à la maison", "at home", "for house"
-        ]
+        matches = get_landmark_gazetteer().resolve(message, limit=10)
         
-        for indicator in location_indicators:
-            if indicator in message_lower:
-                if indicator in ["chez moi", "à la maison", "at home", "for house"]:
-                    return "Bonamoussadi"  # Default area
-                return indicator.title()
+        # Explicit neighborhood or zone first, "chez moi" means the default area
+        areas = [match.place for match in matches if match.place.kind in (AREA, ZONE)]
+        homes = [match.place for match in matches if match.place.kind == HOME]
+        area = areas[0].name if areas else homes[0].name if homes else None
         
-        # Check for landmark references
-        landmarks = [
-            "carrefour", "marché", "market", "école", "school",
-            "église", "church", "hôpital", "hospital"
-        ]
+        # Landmark references are anchored to the area they belong to
+        nearby = [match.place for match in matches if match.place.kind in (LANDMARK, REFERENCE)]
+        if nearby:
+            return f"Près de {nearby[0].name}, {area or nearby[0].area or DEFAULT_AREA}"
         
-        for landmark in landmarks:
-            if landmark in message_lower:
-                return f"Près de {landmark}, Bonamoussadi"
-        
-        return None
+        return area
     
     def _extract_request_reference(self, message: str) -> Optional[str]:
         """Extract request reference from message (e.g., '4' -> 'DJB-004')"""
         
         message_clean = message.strip().lower()
         
-        # Check each pattern
-        for pattern in self.cameroon_patterns["request_reference_patterns"]:
-            if re.match(pattern, message_clean):
-                # Extract the number
-                number_match = re.search(r'\d+', message_clean)
-                if number_match:
-                    number = int(number_match.group())
-                    # Format as DJB-XXX
-                    return f"DJB-{number:03d}"
+        if self.compiled_reference_pattern.match(message_clean):
+            # Extract the number
+            number_match = re.search(r'\d+', message_clean)
+            if number_match:
+                number = int(number_match.group())
+                # Format as DJB-XXX
+                return f"DJB-{number:03d}"
         
         return None
     
+    def _calibrate_pattern_confidence(
+        self,
+        quick_analysis: Dict[str, Any],
+        message: str,
+        features: Optional[TextFeatures] = None
+    ) -> float:
+        """
+        Calibrate the pattern tier confidence for the short-circuit decision
+        
+        The table confidence is scaled by how much of the message the matched
+        keywords cover, and lowered for every other intent table that also
+        matches (the message is then ambiguous).
+        """
+        intent = quick_analysis.get("primary_intent")
+        base_confidence = quick_analysis.get("confidence", 0.0)
+        
+        if intent == "view_request_details":
+            return base_confidence  # Whole-message reference match
+        
+        category = self.intent_categories.get(intent)
+        if not category:
+            return base_confidence
+        
+        features = ensure_text_features(message, features)
+        coverage = features.coverage(f"intent.{category}")
+        
+        conflicts = sum(
+            1 for other_intent, other_category in self.intent_categories.items()
+            if other_intent != intent and features.has(f"intent.{other_category}")
+        )
+        
+        calibrated = base_confidence * (0.8 + 0.2 * coverage) - 0.2 * conflicts
+        return round(max(0.0, min(calibrated, 1.0)), 3)
+    
+    def _pattern_only_analysis(
+        self,
+        quick_analysis: Dict[str, Any],
+        calibrated_confidence: float,
+        message: str,
+        features: Optional[TextFeatures] = None
+    ) -> Dict[str, Any]:
+        """Build a full analysis result from the pattern tier alone"""
+        
+        analysis = quick_analysis.copy()
+        analysis["confidence"] = calibrated_confidence
+        analysis["method"] = "pattern_matching"
+        analysis["analysis_methods"] = ["pattern_matching"]
+        analysis["missing_info"] = []
+        analysis["requires_follow_up"] = False
+        
+        extracted_info = {}
+        detected_service = self._detect_service_type_enhanced(message, features)
+        if detected_service:
+            extracted_info["service_type"] = detected_service
+        detected_location = self._detect_location_enhanced(message)
+        if detected_location:
+            extracted_info["location"] = detected_location
+        analysis["extracted_info"] = extracted_info
+        
+        return analysis
+    
+    def get_tier_stats(self) -> Dict[str, Any]:
+        """Get pattern and classifier tier hit/miss counters"""
+        hits = self.tier_stats["pattern_hits"]
+        classifier_hits = self.tier_stats["classifier_hits"]
+        fallbacks = self.tier_stats["llm_fallbacks"]
+        total = hits + classifier_hits + fallbacks
+        return {
+            "pattern_hits": hits,
+            "classifier_hits": classifier_hits,
+            "llm_fallbacks": fallbacks,
+            "total": total,
+            "hit_rate": hits / total if total else 0.0,
+            "classifier_hit_rate": classifier_hits / total if total else 0.0,
+            "confidence_threshold": self.confidence_threshold
+        }
+    
     def _calculate_confidence(
         self, 
         pattern_analysis: Dict[str, Any], 
@@ -11,6 +11,8 @@ import json
 
 from app.services.dialogue_flow_manager import DialogueState, DialogueContext
 from app.services.ai_service import AIService
+from app.services.text_classifier import INTERRUPTION, NO_INTERRUPTION, classify
+from app.services.text_features import TextFeatures, ensure_text_features, register_lexicon, timed_stage
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -66,8 +68,9 @@ class InterruptionManager:
     def __init__(self):
         self.ai_service = AIService()
         
-        # Interruption detection patterns
+        # Interruption detection patterns, matched through the shared feature extractor
         self.interruption_patterns = self._initialize_interruption_patterns()
+        register_lexicon(self._interruption_lexicon())
         
         # Recovery strategies
         self.recovery_strategies = self._initialize_recovery_strategies()
@@ -82,7 +85,13 @@ class InterruptionManager:
         }
     
     def _initialize_interruption_patterns(self) -> Dict[InterruptionType, Dict[str, Any]]:
-        """Initialize interruption detection patterns"""
+        """
+        Initialize interruption detection patterns
+
+        Each entry of "patterns" is a set of alternatives (matched like the
+        keywords, on accent-folded text with collapsed whitespace) that
+        counts once when any of them occurs.
+        """
         return {
             InterruptionType.CANCELLATION: {
                 "keywords": [
@@ -98,9 +107,9 @@ class InterruptionManager:
                     "annule tout"
                 ],
                 "patterns": [
-                    r"(annul|cancel|stop|arrêt)",
-                    r"(ne\s+veux\s+plus|ne\s+veux\s+pas)",
-                    r"(laisse\s+tomber|oublie\s+ça)"
+                    ("annul", "cancel", "stop", "arrêt"),
+                    ("ne veux plus", "ne veux pas"),
+                    ("laisse tomber", "oublie ça")
                 ],
                 "confidence_threshold": 0.8
             },
@@ -119,9 +128,9 @@ class InterruptionManager:
                     "pas ça"
                 ],
                 "patterns": [
-                    r"(plutôt|finalement|en\s+fait)",
-                    r"(non\s+c'est|pas\s+ça|autre\s+chose)",
-                    r"(nouveau|différent|changer)"
+                    ("plutôt", "finalement", "en fait"),
+                    ("non c'est", "pas ça", "autre chose"),
+                    ("nouveau", "différent", "changer")
                 ],
                 "confidence_threshold": 0.7
             },
@@ -140,9 +149,9 @@ class InterruptionManager:
                     "modifier ma réponse"
                 ],
                 "patterns": [
-                    r"(modifi|chang|corrig|rectifi)",
-                    r"(erreur|faux|mauvais|pas\s+correct)",
-                    r"(me\s+trompe|pas\s+ça)"
+                    ("modifi", "chang", "corrig", "rectifi"),
+                    ("erreur", "faux", "mauvais", "pas correct"),
+                    ("me trompe", "pas ça")
                 ],
                 "confidence_threshold": 0.7
             },
@@ -161,9 +170,9 @@ class InterruptionManager:
                     "précise"
                 ],
                 "patterns": [
-                    r"(comprends?\s+pas|comprends?\s+rien)",
-                    r"(expliqu|clarifi|précis)",
-                    r"(comment|pourquoi|qu'est-ce)"
+                    ("comprend pas", "comprends pas", "comprend rien", "comprends rien"),
+                    ("expliqu", "clarifi", "précis"),
+                    ("comment", "pourquoi", "qu'est-ce")
                 ],
                 "confidence_threshold": 0.8
             },
@@ -181,9 +190,9 @@ class InterruptionManager:
                     "retour à"
                 ],
                 "patterns": [
-                    r"(retour|revenir|avant|précédent)",
-                    r"(recommenc|reprend|arrière)",
-                    r"(étape\s+d'avant|étape\s+précédente)"
+                    ("retour", "revenir", "avant", "précédent"),
+                    ("recommenc", "reprend", "arrière"),
+                    ("étape d'avant", "étape précédente")
                 ],
                 "confidence_threshold": 0.7
             },
@@ -202,9 +211,9 @@ class InterruptionManager:
                     "commencer nouveau"
                 ],
                 "patterns": [
-                    r"(nouvelle?\s+demande|nouveau\s+service)",
-                    r"(autre\s+service|autre\s+problème)",
-                    r"(différent|pas\s+le\s+même)"
+                    ("nouvelle demande", "nouvell demande", "nouveau service"),
+                    ("autre service", "autre problème"),
+                    ("différent", "pas le même")
                 ],
                 "confidence_threshold": 0.8
             },
@@ -223,9 +232,9 @@ class InterruptionManager:
                     "pas satisfait"
                 ],
                 "patterns": [
-                    r"(parler\s+à|humain|personne|responsable)",
-                    r"(service\s+client|pas\s+satisfait)",
-                    r"(n'aide\s+pas|pas\s+bon)"
+                    ("parler à", "humain", "personne", "responsable"),
+                    ("service client", "pas satisfait"),
+                    ("n'aide pas", "pas bon")
                 ],
                 "confidence_threshold": 0.9
             },
@@ -244,14 +253,25 @@ class InterruptionManager:
                     "ne marche pas bien"
                 ],
                 "patterns": [
-                    r"(plainte|problème\s+avec|pas\s+content)",
-                    r"(mal\s+fait|lent|pas\s+efficace)",
-                    r"(ne\s+marche\s+pas|mécontent)"
+                    ("plainte", "problème avec", "pas content"),
+                    ("mal fait", "lent", "pas efficace"),
+                    ("ne marche pas", "mécontent")
                 ],
                 "confidence_threshold": 0.8
             }
         }
     
+    def _interruption_lexicon(self) -> Dict[str, List[str]]:
+        """Feature extractor groups: keywords, phrases and each pattern per interruption type"""
+        lexicon = {}
+        for interruption_type, patterns in self.interruption_patterns.items():
+            prefix = f"interruption.{interruption_type.value}"
+            lexicon[f"{prefix}.keywords"] = patterns["keywords"]
+            lexicon[f"{prefix}.phrases"] = patterns["phrases"]
+            for index, alternatives in enumerate(patterns["patterns"]):
+                lexicon[f"{prefix}.pattern{index}"] = alternatives
+        return lexicon
+    
     def _initialize_recovery_strategies(self) -> Dict[InterruptionType, Dict[str, Any]]:
         """Initialize recovery strategies for each interruption type"""
         return {
@@ -348,48 +368,49 @@ class InterruptionManager:
         self,
         message: str,
         dialogue_context: DialogueContext,
-        interruption_state: InterruptionState
+        interruption_state: InterruptionState,
+        features: Optional[TextFeatures] = None
     ) -> Optional[InterruptionEvent]:
         """
         Detect interruption in user message
         """
-        message_lower = message.lower()
+        features = ensure_text_features(message, features)
         detected_interruptions = []
         
         # Check each interruption type
-        for interruption_type, patterns in self.interruption_patterns.items():
-            confidence = 0.0
-            
-            # Check keywords
-            for keyword in patterns["keywords"]:
-                if keyword in message_lower:
-                    confidence += 0.3
-            
-            # Check phrases
-            for phrase in patterns["phrases"]:
-                if phrase in message_lower:
-                    confidence += 0.5
-            
-            # Check regex patterns
-            import re
-            for pattern in patterns["patterns"]:
-                if re.search(pattern, message_lower):
-                    confidence += 0.4
-            
-            # Normalize confidence
-            confidence = min(confidence, 1.0)
-            
-            # Check if confidence meets threshold
-            if confidence >= patterns["confidence_threshold"]:
-                detected_interruptions.append((interruption_type, confidence))
-        
-        # If no pattern-based detection, use AI
+        with timed_stage("interruption.patterns"):
+            for interruption_type, patterns in self.interruption_patterns.items():
+                prefix = f"interruption.{interruption_type.value}"
+                
+                # Keywords, phrases and patterns found in the message
+                confidence = (
+                    0.3 * features.count(f"{prefix}.keywords") +
+                    0.5 * features.count(f"{prefix}.phrases") +
+                    0.4 * sum(
+                        1 for index in range(len(patterns["patterns"]))
+                        if features.has(f"{prefix}.pattern{index}")
+                    )
+                )
+                
+                # Normalize confidence
+                confidence = min(confidence, 1.0)
+                
+                # Check if confidence meets threshold
+                if confidence >= patterns["confidence_threshold"]:
+                    detected_interruptions.append((interruption_type, confidence))
+        
+        # If no pattern-based detection, ask the local classifier, then AI
         if not detected_interruptions:
-            ai_detection = await self._ai_based_interruption_detection(
-                message, dialogue_context
-            )
-            if ai_detection:
-                detected_interruptions.append(ai_detection)
+            local = classify(INTERRUPTION, message)
+            if local is not None:
+                if local.label != NO_INTERRUPTION:
+                    detected_interruptions.append((InterruptionType(local.label), local.confidence))
+            else:
+                ai_detection = await self._ai_based_interruption_detection(
+                    message, dialogue_context
+                )
+                if ai_detection:
+                    detected_interruptions.append(ai_detection)
         
         # Select best interruption
         if detected_interruptions:
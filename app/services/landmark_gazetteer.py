@@ -0,0 +1,280 @@
+"""
+Landmark Gazetteer
+One resolver for free-text locations: landmark names, aliases and common
+references, zone names and the built-in Douala neighbourhoods are compiled
+into an Aho–Corasick automaton over accent-folded text, so a WhatsApp
+location is matched against every known place in a single pass. Phrases
+users confirmed (LocationMatch rows) are learned as extra aliases.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Landmark, LocationMatch
+from app.models.dynamic_services import Zone
+from app.services.fuzzy_index import normalize
+from app.services.text_features import AhoCorasick
+
+# How often a cached gazetteer re-checks its tables for changes
+GAZETTEER_CHECK_SECONDS = 30
+
+DEFAULT_AREA = "Bonamoussadi"
+
+# Place kinds
+LANDMARK = "landmark"
+ZONE = "zone"
+AREA = "area"
+REFERENCE = "reference"  # generic landmark words (carrefour, marché...)
+HOME = "home"  # "chez moi": the user's default area
+
+# Confidence of a hit by what matched
+NAME_WEIGHT = 0.9
+LEARNED_WEIGHT = 0.85
+ALIAS_WEIGHT = 0.8
+REFERENCE_WEIGHT = 0.7
+NAME_WORD_WEIGHT = 0.6
+
+# Learned phrases longer than this are full sentences, not aliases
+MAX_LEARNED_WORDS = 8
+
+# Words too common to identify a landmark on their own
+STOPWORDS = {
+    "pres", "du", "de", "des", "la", "le", "les", "au", "aux", "a", "et", "en", "chez",
+    "derriere", "devant", "cote", "face", "entre", "rue", "quartier", "the", "near", "of"
+}
+
+# Douala neighbourhoods and generic references known without any DB data:
+# (name, kind, aliases, provider coverage keyword)
+BUILTIN_PLACES: List[Tuple[str, str, Sequence[str], str]] = [
+    ("Bonamoussadi", AREA, (), "bonamoussadi"),
+    ("Makepe", AREA, (), "makepe"),
+    ("Bonapriso", AREA, (), "bonapriso"),
+    ("Akwa", AREA, (), "akwa"),
+    ("Deido", AREA, (), "deido"),
+    ("Bonanjo", AREA, (), "bonanjo"),
+    ("Bonassama", AREA, (), "bonassama"),
+    ("Douala", AREA, (), "douala"),
+    ("Station Shell", REFERENCE, ("shell",), "station_shell"),
+    ("Station Total", REFERENCE, ("total",), "station_total"),
+    ("carrefour", REFERENCE, (), "carrefour"),
+    ("marché", REFERENCE, ("market",), "marché"),
+    ("école", REFERENCE, ("school",), "école"),
+    ("église", REFERENCE, ("church",), "église"),
+    ("hôpital", REFERENCE, ("hospital",), "hôpital"),
+    (DEFAULT_AREA, HOME, ("chez moi", "à la maison", "at home", "for house"), "bonamoussadi"),
+]
+
+
+@dataclass
+class Place:
+    """One resolvable place"""
+    kind: str
+    name: str
+    area: Optional[str] = None
+    id: Optional[int] = None
+    place_type: Optional[str] = None
+    coordinates: Optional[Tuple[float, float]] = None
+    keyword: Optional[str] = None
+    aliases: List[str] = field(default_factory=list)
+    common_references: List[str] = field(default_factory=list)
+    # Confirmed user matches, a small ranking prior
+    confirmations: int = 0
+
+
+@dataclass
+class PlaceMatch:
+    """A place found in a location text"""
+    place: Place
+    confidence: float
+    matched: str
+
+
+def parse_coordinates(value: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(lat, lng) from a "lat,lng" string"""
+    if not value:
+        return None
+    try:
+        latitude, longitude = (float(part) for part in value.split(","))
+        return latitude, longitude
+    except ValueError:
+        return None
+
+
+class LandmarkGazetteer:
+    """
+    Immutable automaton over every known place
+
+    Patterns are accent-folded, space-padded phrases so they only match
+    whole words; each hit carries the place and how it matched (name, alias,
+    common reference, learned phrase or a distinctive word of the name).
+    """
+
+    def __init__(self, places: Iterable[Place], learned: Iterable[Tuple[int, str]] = (), version: Tuple = ()):
+        self.places: List[Place] = list(places)
+        self.version = version
+        self._automaton = AhoCorasick()
+        landmarks = {place.id: index for index, place in enumerate(self.places) if place.kind == LANDMARK}
+
+        for index, place in enumerate(self.places):
+            # A home place is named after the default area, only its phrases point to it
+            if place.kind != HOME:
+                self._add(place.name, index, NAME_WEIGHT)
+            for alias in place.aliases:
+                self._add(alias, index, ALIAS_WEIGHT)
+            for reference in place.common_references:
+                self._add(reference, index, REFERENCE_WEIGHT)
+            if place.kind == LANDMARK:
+                for word in normalize(place.name).split():
+                    if len(word) >= 4 and word not in STOPWORDS:
+                        self._add(word, index, NAME_WORD_WEIGHT)
+        for landmark_id, phrase in learned:
+            if landmark_id in landmarks and len(normalize(phrase).split()) <= MAX_LEARNED_WORDS:
+                self._add(phrase, landmarks[landmark_id], LEARNED_WEIGHT)
+        self._automaton.build()
+
+    @classmethod
+    def builtin(cls) -> "LandmarkGazetteer":
+        """Gazetteer of the built-in neighbourhoods and references only"""
+        return cls(_builtin_places())
+
+    @classmethod
+    def from_db(cls, db: Session) -> "LandmarkGazetteer":
+        """Load landmarks, active zones and confirmed matches"""
+        # Read the version first so a concurrent write triggers another rebuild
+        version = gazetteer_version(db)
+        places = _builtin_places()
+
+        for landmark in db.query(Landmark).filter(Landmark.is_active == True).all():
+            places.append(Place(
+                kind=LANDMARK, name=landmark.name, area=landmark.area, id=landmark.id,
+                place_type=landmark.landmark_type, coordinates=parse_coordinates(landmark.coordinates),
+                keyword=normalize(landmark.area) or None,
+                aliases=list(landmark.aliases or []), common_references=list(landmark.common_references or [])
+            ))
+
+        for zone in db.query(Zone).filter(Zone.is_active == True).all():
+            aliases = [name for name in (zone.name_fr, zone.name_en) if name]
+            aliases += [keyword for keyword in (zone.search_keywords or []) if isinstance(keyword, str)]
+            coordinates = (zone.latitude, zone.longitude) if zone.latitude is not None and zone.longitude is not None else None
+            places.append(Place(
+                kind=ZONE, name=zone.name, area=zone.name, id=zone.id, place_type=zone.zone_type,
+                coordinates=coordinates, keyword=normalize(zone.name), aliases=aliases
+            ))
+
+        confirmed = db.query(LocationMatch.landmark_id, LocationMatch.user_input, func.count(LocationMatch.id)).filter(
+            LocationMatch.user_confirmed == True,
+            LocationMatch.landmark_id.isnot(None)
+        ).group_by(LocationMatch.landmark_id, LocationMatch.user_input).all()
+        by_id = {place.id: place for place in places if place.kind == LANDMARK}
+        for landmark_id, _, count in confirmed:
+            if landmark_id in by_id:
+                by_id[landmark_id].confirmations += count
+
+        return cls(places, [(landmark_id, phrase) for landmark_id, phrase, _ in confirmed], version=version)
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def resolve(
+        self,
+        text: str,
+        kinds: Optional[Sequence[str]] = None,
+        area: Optional[str] = None,
+        limit: int = 5
+    ) -> List[PlaceMatch]:
+        """Places mentioned in the text, best first"""
+        normalized = normalize(text)
+        if not normalized:
+            return []
+        area_filter = normalize(area) if area else None
+
+        best: Dict[int, Tuple[float, str]] = {}
+        for index, weight, pattern in self._automaton.iter(f" {normalized} "):
+            place = self.places[index]
+            if kinds is not None and place.kind not in kinds:
+                continue
+            if area_filter and place.kind == LANDMARK and area_filter not in normalize(place.area):
+                continue
+            # A pattern covering the whole text is a stronger match
+            score = weight + 0.05 * len(pattern) / len(normalized)
+            if index not in best or score > best[index][0]:
+                best[index] = (score, pattern)
+
+        matches = []
+        for index, (score, pattern) in best.items():
+            place = self.places[index]
+            score += min(0.05, 0.01 * place.confirmations)
+            matches.append(PlaceMatch(place=place, confidence=round(min(score, 1.0), 3), matched=pattern))
+        matches.sort(key=lambda match: (match.confidence, len(match.matched)), reverse=True)
+        return matches[:limit]
+
+    def _add(self, phrase: Optional[str], index: int, weight: float):
+        pattern = normalize(phrase)
+        if pattern:
+            self._automaton.add(f" {pattern} ", (index, weight, pattern))
+
+
+def _builtin_places() -> List[Place]:
+    return [
+        Place(kind=kind, name=name, area=name if kind in (AREA, HOME) else None, keyword=keyword, aliases=list(aliases))
+        for name, kind, aliases, keyword in BUILTIN_PLACES
+    ]
+
+
+def gazetteer_version(db: Session) -> Tuple:
+    """Cheap change signature of the landmark, zone and location match tables"""
+    landmarks = db.query(func.count(Landmark.id), func.max(Landmark.created_at), func.max(Landmark.updated_at)).one()
+    zones = db.query(func.count(Zone.id), func.max(Zone.created_at), func.max(Zone.updated_at)).one()
+    matches = db.query(func.count(LocationMatch.id), func.max(LocationMatch.created_at)).one()
+    return tuple(str(value) for value in (*landmarks, *zones, *matches))
+
+
+# Process-wide gazetteer shared by scheduling, matching and intent analysis
+_gazetteer: Optional[LandmarkGazetteer] = None
+_gazetteer_checked_at = 0.0
+_gazetteer_lock = threading.Lock()
+
+
+def get_landmark_gazetteer(db: Optional[Session] = None) -> LandmarkGazetteer:
+    """
+    Get the cached gazetteer, rebuilding it when its tables changed
+
+    Without a session the last loaded gazetteer is returned, or the
+    built-in places when nothing was loaded yet.
+    """
+    global _gazetteer, _gazetteer_checked_at
+    with _gazetteer_lock:
+        if db is None:
+            if _gazetteer is None:
+                return LandmarkGazetteer.builtin()
+            return _gazetteer
+
+        now = time.monotonic()
+        if _gazetteer is not None and now - _gazetteer_checked_at < GAZETTEER_CHECK_SECONDS:
+            return _gazetteer
+        try:
+            # Savepoint so a failed load leaves the caller's transaction usable
+            with db.begin_nested():
+                if _gazetteer is None or gazetteer_version(db) != _gazetteer.version:
+                    _gazetteer = LandmarkGazetteer.from_db(db)
+                    logger.info(f"Built landmark gazetteer with {len(_gazetteer)} places")
+        except SQLAlchemyError as e:
+            # Location tables unavailable: keep resolving the built-in places
+            logger.warning(f"Could not load landmark gazetteer: {e}")
+            _gazetteer = LandmarkGazetteer.builtin()
+        _gazetteer_checked_at = now
+        return _gazetteer
+
+
+def invalidate_landmark_gazetteer():
+    """Force a rebuild on the next lookup (called when landmarks or confirmed matches are written)"""
+    global _gazetteer
+    with _gazetteer_lock:
+        _gazetteer = None
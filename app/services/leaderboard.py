@@ -0,0 +1,280 @@
+"""
+Leaderboard
+Top-k providers, services and regions for the analytics leaderboard. Request
+figures come from one grouped rollup query per category; only the top-k
+entries are built (bounded heap, or ORDER BY ... LIMIT for provider
+ratings) and each (category, period, metric) board is cached briefly so
+dashboards polling with different limits share one computation.
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.database_models import Provider
+from app.services.analytics_aggregates import RequestAggregate
+from app.services.analytics_rollups import summarize_rollups
+
+settings = get_settings()
+
+# Largest limit the endpoint accepts; cached boards hold this many entries
+MAX_LIMIT = 50
+
+PERIODS = {
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+    "90d": timedelta(days=90),
+    "1y": timedelta(days=365),
+}
+
+# XAF credited per completed request until real revenue is tracked
+REVENUE_PER_COMPLETED_REQUEST = 15000
+
+SERVICE_NAMES = {
+    "plomberie": "Plomberie",
+    "electricite": "Électricité",
+    "electromenager": "Électroménager",
+    "menage": "Ménage",
+    "jardinage": "Jardinage"
+}
+
+EMPTY = RequestAggregate()
+
+
+def period_range(period: str, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """[start, end] of a leaderboard period ending now"""
+    end = now or datetime.now()
+    if period in PERIODS:
+        return end - PERIODS[period], end
+    return datetime(2020, 1, 1), end
+
+
+def _figures(stats: RequestAggregate) -> Tuple[int, int, float, float]:
+    completed = stats.count("completed")
+    return stats.total, completed, stats.rate("completed"), completed * REVENUE_PER_COMPLETED_REQUEST
+
+
+def _provider_score(metric: str, stats: RequestAggregate, rating: float) -> float:
+    total_requests, _, _, revenue = _figures(stats)
+    if metric == "requests":
+        return total_requests
+    if metric == "revenue":
+        return revenue
+    if metric == "responseTime":
+        # Negative so faster providers rank higher (mock 4.5 min until tracked)
+        return -4.5 if total_requests > 0 else 0
+    return rating
+
+
+def _group_score(metric: str, stats: RequestAggregate, avg_rating: float) -> float:
+    total_requests, _, _, revenue = _figures(stats)
+    if metric == "rating":
+        return avg_rating
+    if metric == "revenue":
+        return revenue
+    return total_requests
+
+
+def _provider_entry(row, stats: RequestAggregate, score: float) -> Dict[str, Any]:
+    total_requests, _, completion_rate, total_revenue = _figures(stats)
+    rating = float(row.rating or 0)
+    avg_response_time = 4.5 if total_requests > 0 else 0
+
+    badges = []
+    if completion_rate >= 95:
+        badges.append("Top Performer")
+    if avg_response_time <= 2:
+        badges.append("Quick Response")
+    if rating >= 4.5:
+        badges.append("Customer Favorite")
+    if total_requests >= 50:
+        badges.append("Experienced")
+    if total_revenue >= 50000:
+        badges.append("High Earner")
+
+    change = 0
+    if total_requests > 10:
+        change = 1 if rating > 4.0 else -1
+
+    return {
+        "id": str(row.id),
+        "name": row.name or "Prestataire",
+        "avatar": f"https://ui-avatars.com/api/?name={row.name or 'Provider'}&size=64&background=0D8ABC&color=fff",
+        "score": round(score, 1),
+        "missions": total_requests,
+        "rating": round(rating, 1),
+        "responseTime": round(avg_response_time, 1),
+        "completionRate": round(completion_rate, 1),
+        "revenue": round(total_revenue, 2),
+        "change": change,
+        "category": row.service_type or "Service",
+        "location": row.location or "Douala",
+        "joinDate": row.created_at.strftime("%Y-%m-%d") if row.created_at else "2024-01-01",
+        "badges": badges
+    }
+
+
+def top_providers(db: Session, start: datetime, end: datetime, metric: str, k: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Top-k providers and the number of ranked providers"""
+    stats = summarize_rollups(
+        db, start, end, statuses=("completed",), group_by="provider_id",
+        filters=lambda source: [source.provider_id.isnot(None)]
+    )
+    columns = (Provider.id, Provider.name, Provider.rating, Provider.service_type, Provider.location, Provider.created_at)
+
+    if metric == "rating":
+        # The score is a Provider column: rank in SQL
+        rating = func.coalesce(Provider.rating, 0)
+        rows = db.query(*columns).order_by(rating.desc(), Provider.id).limit(k).all()
+        total = db.query(func.count(Provider.id)).scalar() or 0
+        ranked = [(float(row.rating or 0), row) for row in rows]
+    else:
+        # Providers without requests in the period all share the same score,
+        # so only the first k of them by id can reach the board
+        provider_ids = [provider_id for (provider_id,) in db.query(Provider.id).order_by(Provider.id).all()]
+        total = len(provider_ids)
+        idle_score = _provider_score(metric, EMPTY, 0.0)
+        candidates = [
+            (_provider_score(metric, stats[provider_id], 0.0), provider_id)
+            for provider_id in provider_ids if provider_id in stats
+        ]
+        candidates += [(idle_score, provider_id) for provider_id in provider_ids if provider_id not in stats][:k]
+        top = heapq.nlargest(k, candidates, key=lambda candidate: (candidate[0], -candidate[1]))
+        rows_by_id = {row.id: row for row in db.query(*columns).filter(Provider.id.in_([i for _, i in top])).all()}
+        ranked = [(score, rows_by_id[provider_id]) for score, provider_id in top if provider_id in rows_by_id]
+
+    return [_provider_entry(row, stats.get(row.id, EMPTY), score) for score, row in ranked], total
+
+
+def top_services(db: Session, start: datetime, end: datetime, metric: str, k: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Top-k service types and the number of ranked services"""
+    stats = summarize_rollups(db, start, end, statuses=("completed",), group_by="service_type")
+
+    def avg_rating(service_stats):
+        # Mock average rating until reviews are aggregated per service
+        return 4.5 if service_stats.total > 0 else 0
+
+    top = heapq.nlargest(k, stats.items(), key=lambda item: _group_score(metric, item[1], avg_rating(item[1])))
+    entries = []
+    for service_type, service_stats in top:
+        total_requests, _, completion_rate, total_revenue = _figures(service_stats)
+        service_name = SERVICE_NAMES.get(service_type, service_type.title())
+        entries.append({
+            "id": f"service_{service_type}",
+            "name": service_name,
+            "avatar": f"https://ui-avatars.com/api/?name={service_name}&size=64&background=28A745&color=fff",
+            "score": round(_group_score(metric, service_stats, avg_rating(service_stats)), 1),
+            "missions": total_requests,
+            "rating": round(avg_rating(service_stats), 1),
+            "responseTime": 0,  # Not applicable for services
+            "completionRate": round(completion_rate, 1),
+            "revenue": round(total_revenue, 2),
+            "change": 0,
+            "category": service_name,
+            "location": "Douala",
+            "joinDate": "2024-01-01",
+            "badges": ["Service populaire" if total_requests > 20 else "Service"]
+        })
+    return entries, len(stats)
+
+
+def top_regions(db: Session, start: datetime, end: datetime, metric: str, k: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Top-k regions and the number of ranked regions"""
+    stats = summarize_rollups(
+        db, start, end, statuses=("completed",), group_by="location",
+        filters=lambda source: [source.location.isnot(None)]
+    )
+
+    def avg_rating(region_stats):
+        # Mock average rating until reviews are aggregated per region
+        return 4.3 if region_stats.total > 0 else 0
+
+    top = heapq.nlargest(k, stats.items(), key=lambda item: _group_score(metric, item[1], avg_rating(item[1])))
+    entries = []
+    for region_name, region_stats in top:
+        total_requests, _, completion_rate, total_revenue = _figures(region_stats)
+        entries.append({
+            "id": f"region_{region_name.lower().replace(' ', '_')}",
+            "name": region_name,
+            "avatar": f"https://ui-avatars.com/api/?name={region_name}&size=64&background=DC3545&color=fff",
+            "score": round(_group_score(metric, region_stats, avg_rating(region_stats)), 1),
+            "missions": total_requests,
+            "rating": round(avg_rating(region_stats), 1),
+            "responseTime": 0,  # Not applicable for regions
+            "completionRate": round(completion_rate, 1),
+            "revenue": round(total_revenue, 2),
+            "change": 0,
+            "category": "Région",
+            "location": region_name,
+            "joinDate": "2024-01-01",
+            "badges": ["Zone active" if total_requests > 15 else "Zone"]
+        })
+    return entries, len(stats)
+
+
+BUILDERS = {
+    "providers": top_providers,
+    "services": top_services,
+    "regions": top_regions,
+}
+
+
+class LeaderboardCache:
+    """Boards of MAX_LIMIT entries per (category, period, metric) kept for a short TTL"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.leaderboard_cache_ttl_seconds
+        self._boards: Dict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, db: Session, category: str, period: str, metric: str, limit: int) -> Dict[str, Any]:
+        """Ranked top-`limit` entries with the total entry count and when the board was computed"""
+        key = (category, period, metric)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._boards.get(key)
+            if cached is not None and now - cached[0] < self.ttl_seconds:
+                self._stats["hits"] += 1
+                board = cached[1]
+            else:
+                board = None
+                self._stats["misses"] += 1
+
+        if board is None:
+            start, end = period_range(period)
+            entries, total = BUILDERS[category](db, start, end, metric, MAX_LIMIT)
+            board = {"entries": entries, "total": total, "computed_at": datetime.now()}
+            with self._lock:
+                self._boards[key] = (now, board)
+
+        entries = [{**entry, "rank": rank} for rank, entry in enumerate(board["entries"][:limit], start=1)]
+        return {"entries": entries, "total": board["total"], "computed_at": board["computed_at"]}
+
+    def invalidate(self):
+        with self._lock:
+            self._boards.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self._stats["hits"] + self._stats["misses"]
+        return {**self._stats, "boards": len(self._boards), "hit_rate": self._stats["hits"] / total if total else 0.0}
+
+
+# Process-wide cache shared by the leaderboard endpoint
+_leaderboard_cache = LeaderboardCache()
+
+
+def get_leaderboard(db: Session, category: str, period: str, metric: str, limit: int) -> Dict[str, Any]:
+    """Cached leaderboard for the analytics endpoint"""
+    return _leaderboard_cache.get(db, category, period, metric, limit)
+
+
+def get_leaderboard_cache() -> LeaderboardCache:
+    return _leaderboard_cache
@@ -0,0 +1,198 @@
+"""
+Shared async LLM client layer
+Pooled async SDK clients for Claude, Gemini and OpenAI with per-provider
+concurrency limits and cancellation on client disconnect
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Dict, Optional
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient as AnthropicHttpxClient
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient as OpenAIHttpxClient
+from google import genai
+from loguru import logger
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client went away before the LLM call finished"""
+
+
+class LLMClientPool:
+    """
+    Process-wide async LLM clients
+    
+    Every service shares the same connection pools, so one worker can keep
+    hundreds of LLM calls in flight without blocking the event loop.
+    """
+    
+    PROVIDERS = ("claude", "gemini", "openai")
+    
+    def __init__(self):
+        self._claude: Optional[AsyncAnthropic] = None
+        self._openai: Optional[AsyncOpenAI] = None
+        self._gemini: Optional[genai.Client] = None
+        
+        self._limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections
+        )
+        self._timeout = httpx.Timeout(settings.llm_request_timeout_seconds, connect=10.0)
+        
+        self._semaphores = {
+            "claude": asyncio.Semaphore(settings.llm_claude_max_concurrency),
+            "gemini": asyncio.Semaphore(settings.llm_gemini_max_concurrency),
+            "openai": asyncio.Semaphore(settings.llm_openai_max_concurrency)
+        }
+        self._in_flight = {provider: 0 for provider in self.PROVIDERS}
+        self._completed = {provider: 0 for provider in self.PROVIDERS}
+        self._failed = {provider: 0 for provider in self.PROVIDERS}
+        self._cancelled = {provider: 0 for provider in self.PROVIDERS}
+    
+    @property
+    def claude(self) -> Optional[AsyncAnthropic]:
+        """Async Anthropic client, or None when no API key is configured"""
+        if self._claude is None and settings.anthropic_api_key:
+            self._claude = AsyncAnthropic(
+                api_key=settings.anthropic_api_key,
+                http_client=AnthropicHttpxClient(limits=self._limits, timeout=self._timeout)
+            )
+            logger.info("Async Claude client initialized")
+        return self._claude
+    
+    @property
+    def openai(self) -> Optional[AsyncOpenAI]:
+        """Async OpenAI client, or None when no API key is configured"""
+        if self._openai is None and settings.openai_api_key:
+            self._openai = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                http_client=OpenAIHttpxClient(limits=self._limits, timeout=self._timeout)
+            )
+            logger.info("Async OpenAI client initialized")
+        return self._openai
+    
+    @property
+    def gemini(self):
+        """Async Gemini client (``genai.Client.aio``), or None when no API key is configured"""
+        if self._gemini is None and settings.gemini_api_key:
+            self._gemini = genai.Client(api_key=settings.gemini_api_key)
+            logger.info("Async Gemini client initialized")
+        return self._gemini.aio if self._gemini else None
+    
+    def is_available(self, provider: str) -> bool:
+        """Check whether a provider has credentials configured"""
+        return getattr(self, provider) is not None
+    
+    @asynccontextmanager
+    async def limit(self, provider: str):
+        """Hold one of the provider's concurrency slots for the duration of a call"""
+        async with self._semaphores[provider]:
+            self._in_flight[provider] += 1
+            try:
+                yield
+                self._completed[provider] += 1
+            except asyncio.CancelledError:
+                self._cancelled[provider] += 1
+                raise
+            except Exception:
+                self._failed[provider] += 1
+                raise
+            finally:
+                self._in_flight[provider] -= 1
+    
+    async def claude_messages(self, **kwargs) -> Any:
+        """Call ``messages.create`` on the shared async Claude client"""
+        client = self.claude
+        if client is None:
+            raise RuntimeError("Claude client not configured")
+        async with self.limit("claude"):
+            return await client.messages.create(**kwargs)
+    
+    async def openai_chat(self, **kwargs) -> Any:
+        """Call ``chat.completions.create`` on the shared async OpenAI client"""
+        client = self.openai
+        if client is None:
+            raise RuntimeError("OpenAI client not configured")
+        async with self.limit("openai"):
+            return await client.chat.completions.create(**kwargs)
+    
+    async def gemini_generate(self, **kwargs) -> Any:
+        """Call ``models.generate_content`` on the shared async Gemini client"""
+        client = self.gemini
+        if client is None:
+            raise RuntimeError("Gemini client not configured")
+        async with self.limit("gemini"):
+            return await client.models.generate_content(**kwargs)
+    
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get per-provider call counters"""
+        return {
+            provider: {
+                "in_flight": self._in_flight[provider],
+                "completed": self._completed[provider],
+                "failed": self._failed[provider],
+                "cancelled": self._cancelled[provider]
+            }
+            for provider in self.PROVIDERS
+        }
+    
+    async def aclose(self):
+        """Close all pooled HTTP connections"""
+        if self._claude is not None:
+            await self._claude.close()
+            self._claude = None
+        if self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+        if self._gemini is not None:
+            await self._gemini.aio.aclose()
+            self._gemini = None
+        logger.info("LLM client pool closed")
+
+
+async def cancel_on_disconnect(request, awaitable: Awaitable, poll_interval: float = 0.5) -> Any:
+    """
+    Await an LLM-bound coroutine, cancelling it if the HTTP client disconnects
+    
+    Args:
+        request: Starlette/FastAPI request to watch
+        awaitable: Coroutine doing the LLM work
+        poll_interval: Seconds between disconnect checks
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("Client disconnected, cancelling in-flight LLM work")
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+_llm_client_pool: Optional[LLMClientPool] = None
+
+
+def get_llm_client_pool() -> LLMClientPool:
+    """Get the process-wide LLM client pool"""
+    global _llm_client_pool
+    if _llm_client_pool is None:
+        _llm_client_pool = LLMClientPool()
+    return _llm_client_pool
+
+
+async def close_llm_client_pool():
+    """Close the process-wide LLM client pool (called on application shutdown)"""
+    global _llm_client_pool
+    if _llm_client_pool is not None:
+        await _llm_client_pool.aclose()
+        _llm_client_pool = None
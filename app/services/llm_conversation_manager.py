@@ -12,8 +12,9 @@ from datetime import datetime
 
 from app.services.ai_service import AIService
 from app.models.database_models import Conversation, User, ServiceRequest
-from app.models.dynamic_services import Zone, Service, ServiceZone
 from app.utils.conversation_state import ConversationState, ConversationPhase
+from app.services.system_state import get_system_state
+from app.services.prompt_assembly import PromptCatalog, get_prompt_assembler
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +48,83 @@ class ActionCode(Enum):
     HANDLE_ERROR = "handle_error"
     REQUEST_CLARIFICATION = "request_clarification"
 
+# Fixed reference answers: a reworded question may reuse the cached analysis
+REFERENCE_ACTIONS = {
+    ActionCode.PROVIDE_FAQ.value,
+    ActionCode.PROVIDE_SERVICES_LIST.value,
+    ActionCode.PROVIDE_PRICING.value
+}
+
+
+def _parse_analysis(response: str) -> Dict[str, Any]:
+    """Extract the JSON analysis from an LLM response"""
+    if '```json' in response:
+        json_start = response.find('```json') + 7
+        json_end = response.find('```', json_start)
+        response = response[json_start:json_end].strip()
+    elif '{' in response:
+        json_start = response.find('{')
+        json_end = response.rfind('}') + 1
+        response = response[json_start:json_end]
+    return json.loads(response)
+
+
+def _is_reference_answer(response: str) -> bool:
+    """True when the analysis routes to the FAQ, pricing or services list"""
+    try:
+        return _parse_analysis(response).get("action_code") in REFERENCE_ACTIONS
+    except (ValueError, AttributeError):
+        return False
+
+
+def _render_analysis_rules(catalog: PromptCatalog) -> str:
+    """Static part of the analysis prompt: role, service catalog, zones and action codes"""
+    services_text = "\n".join([
+        f"- {service['name']}: {service['description']}" +
+        (f" (Prix: {service['min_price']}-{service['max_price']} XAF)" if service['min_price'] and service['max_price'] else "")
+        for service in catalog.services
+    ])
+    zones_text = ", ".join([zone['name'] for zone in catalog.zones])
+    
+    return f"""
+        Tu es l'IA conversationnelle de Djobea AI, service camerounais de mise en relation pour services à domicile.
+        
+        SERVICES DISPONIBLES:
+        {services_text}
+        
+        ZONES DE COUVERTURE: {zones_text}
+        
+        ACTION CODES DISPONIBLES:
+        
+        INFORMATIONS:
+        - "provide_faq" - Pour FAQ, aide générale
+        - "provide_services_list" - Pour liste des services
+        - "provide_pricing" - Pour tarifs et prix
+        - "provide_help" - Pour aide et support
+        
+        CONTACT HUMAIN:
+        - "connect_human" - Pour parler à quelqu'un
+        - "escalate_support" - Pour support avancé
+        
+        DEMANDES DE SERVICE:
+        - "create_service_request" - Créer nouvelle demande (si service_type ET location présents)
+        - "gather_service_info" - Collecter informations manquantes
+        - "continue_conversation" - Continuer conversation existante
+        
+        GESTION DEMANDES:
+        - "show_user_requests" - Voir demandes existantes
+        - "show_request_details" - Détails d'une demande
+        
+        GÉNÉRAL:
+        - "provide_greeting" - Salutation
+        - "handle_general_inquiry" - Conversation générale
+        
+        ERREUR:
+        - "handle_error" - Gestion d'erreur
+        - "request_clarification" - Demander clarification
+        """
+
+
 class LLMConversationManager:
     """
     Simplified conversation manager that leverages LLM natural capabilities
@@ -59,55 +137,19 @@ class LLMConversationManager:
         self.conversation_cache = {}
     
     async def _get_dynamic_services(self) -> List[Dict[str, Any]]:
-        """Get available services from database"""
-        try:
-            services = self.db.query(Service).filter(Service.status == "available").all()
-            return [
-                {
-                    "code": service.code,
-                    "name": service.name_fr or service.name,
-                    "description": service.description_fr or service.description,
-                    "category": service.category.name_fr if hasattr(service, 'category') and service.category else None,
-                    "min_price": getattr(service, 'min_price_xaf', None),
-                    "max_price": getattr(service, 'max_price_xaf', None)
-                }
-                for service in services
-            ]
-        except Exception as e:
-            logger.error(f"Error getting dynamic services: {e}")
-            # Fallback to static services
-            return [
-                {"code": "plomberie", "name": "Plomberie", "description": "fuites, robinets, WC, tuyaux", "min_price": 5000, "max_price": 15000},
-                {"code": "electricite", "name": "Électricité", "description": "pannes, prises, interrupteurs", "min_price": 3000, "max_price": 10000},
-                {"code": "electromenager", "name": "Électroménager", "description": "frigo, machine à laver, four", "min_price": 2000, "max_price": 8000}
-            ]
+        """Get available services from the shared prompt catalog"""
+        return get_prompt_assembler().get_catalog(self.db).services
     
     async def _get_dynamic_zones(self) -> List[Dict[str, Any]]:
-        """Get available zones from database"""
-        try:
-            zones = self.db.query(Zone).filter(Zone.is_active == True).all()
-            return [
-                {
-                    "code": zone.code,
-                    "name": zone.name_fr or zone.name,
-                    "type": zone.zone_type,
-                    "full_path": zone.full_path
-                }
-                for zone in zones
-            ]
-        except Exception as e:
-            logger.error(f"Error getting dynamic zones: {e}")
-            # Fallback to static zones
-            return [
-                {"code": "bonamoussadi", "name": "Bonamoussadi", "type": "district", "full_path": "/cameroun/littoral/douala/bonamoussadi"},
-                {"code": "douala", "name": "Douala", "type": "city", "full_path": "/cameroun/littoral/douala"}
-            ]
+        """Get available zones from the shared prompt catalog"""
+        return get_prompt_assembler().get_catalog(self.db).zones
     
     async def process_message(
         self, 
         user_identifier: str, 
         message: str,
-        session_id: str = None
+        session_id: str = None,
+        intent: Optional[str] = None
     ) -> Dict[str, Any]:
         """Process user message using LLM-driven approach with action codes"""
         
@@ -117,7 +159,7 @@ class LLMConversationManager:
             conversation_history = await self._get_conversation_history(user_identifier)
             
             # Let LLM analyze and determine action
-            analysis = await self._analyze_with_llm(message, conversation_history, user_identifier)
+            analysis = await self._analyze_with_llm(message, conversation_history, user_identifier, intent)
             
             # Execute the determined action
             result = await self._execute_action(analysis, user_identifier, message)
@@ -159,7 +201,8 @@ class LLMConversationManager:
         self, 
         message: str, 
         conversation_history: List[Dict], 
-        user_identifier: str
+        user_identifier: str,
+        intent: Optional[str] = None
     ) -> Dict[str, Any]:
         """Use LLM to analyze message and determine appropriate action"""
         
@@ -175,56 +218,19 @@ class LLMConversationManager:
         # Get cached conversation state
         cached_state = self.conversation_cache.get(user_identifier, {})
         
-        # Get dynamic services and zones
-        dynamic_services = await self._get_dynamic_services()
-        dynamic_zones = await self._get_dynamic_zones()
-        
-        # Format services for prompt
-        services_text = "\n".join([
-            f"- {service['name']}: {service['description']}" + 
-            (f" (Prix: {service['min_price']}-{service['max_price']} XAF)" if service['min_price'] and service['max_price'] else "")
-            for service in dynamic_services
-        ])
+        # Shared availability snapshot, refreshed in the background of all conversations
+        system_state = get_system_state(self.db)
+        availability_text = (
+            f"{system_state.available_providers} prestataires disponibles, "
+            f"{system_state.pending_requests} demandes en attente"
+        )
         
-        # Format zones for prompt
-        zones_text = ", ".join([zone['name'] for zone in dynamic_zones])
-        
-        system_prompt = f"""
-        Tu es l'IA conversationnelle de Djobea AI, service camerounais de mise en relation pour services à domicile.
-        
-        SERVICES DISPONIBLES:
-        {services_text}
-        
-        ZONES DE COUVERTURE: {zones_text}
-        
-        ACTION CODES DISPONIBLES:
-        
-        INFORMATIONS:
-        - "provide_faq" - Pour FAQ, aide générale
-        - "provide_services_list" - Pour liste des services
-        - "provide_pricing" - Pour tarifs et prix
-        - "provide_help" - Pour aide et support
-        
-        CONTACT HUMAIN:
-        - "connect_human" - Pour parler à quelqu'un
-        - "escalate_support" - Pour support avancé
-        
-        DEMANDES DE SERVICE:
-        - "create_service_request" - Créer nouvelle demande (si service_type ET location présents)
-        - "gather_service_info" - Collecter informations manquantes
-        - "continue_conversation" - Continuer conversation existante
-        
-        GESTION DEMANDES:
-        - "show_user_requests" - Voir demandes existantes
-        - "show_request_details" - Détails d'une demande
-        
-        GÉNÉRAL:
-        - "provide_greeting" - Salutation
-        - "handle_general_inquiry" - Conversation générale
-        
-        ERREUR:
-        - "handle_error" - Gestion d'erreur
-        - "request_clarification" - Demander clarification
+        # Rules, catalog and zones form the cached prefix; only this turn's state follows it
+        system_prompt = get_prompt_assembler().build(
+            "llm_conversation_analysis",
+            _render_analysis_rules,
+            dynamic=f"""
+        DISPONIBILITÉ ACTUELLE: {availability_text}
         
         CONTEXTE CONVERSATION:
         {context}
@@ -237,7 +243,9 @@ class LLMConversationManager:
         Pour les demandes de service, vérifie si service_type ET location sont présents.
         
         Réponds en JSON strict.
-        """
+        """,
+            db=self.db
+        )
         
         user_prompt = f"""
         Message utilisateur: "{message}"
@@ -266,24 +274,20 @@ class LLMConversationManager:
         try:
             ai_messages = [{"role": "user", "content": user_prompt}]
             
+            # Never cached for the caller's urgent or complaint intents. Only FAQ, pricing and
+            # services-list analyses are matched on the raw message for reworded questions;
+            # anything carrying entities from the message stays exact-match only.
             response = await self.ai_service.generate_response(
                 messages=ai_messages,
                 system_prompt=system_prompt,
                 max_tokens=1000,
-                temperature=0.3
+                temperature=0.3,
+                intent=intent,
+                match_text=message,
+                match_if=_is_reference_answer
             )
             
-            # Extract JSON from response
-            if '```json' in response:
-                json_start = response.find('```json') + 7
-                json_end = response.find('```', json_start)
-                response = response[json_start:json_end].strip()
-            elif '{' in response:
-                json_start = response.find('{')
-                json_end = response.rfind('}') + 1
-                response = response[json_start:json_end]
-            
-            analysis = json.loads(response)
+            analysis = _parse_analysis(response)
             logger.info(f"LLM Analysis: {analysis}")
             
             return analysis
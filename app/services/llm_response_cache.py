@@ -0,0 +1,285 @@
+"""
+LLM Response Cache
+TTL/LRU cache in front of multi-LLM generation, keyed on the normalized
+system prompt and message history, with an optional Redis backend and
+opt-in near-duplicate lookup for rephrased questions
+"""
+
+import re
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from loguru import logger
+from unidecode import unidecode
+
+from app.config import get_settings
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+settings = get_settings()
+
+# Filler words that do not change what an FAQ-style question is asking
+STOPWORDS = {
+    "le", "la", "les", "l", "de", "du", "des", "d", "un", "une", "pour", "a", "au", "aux",
+    "en", "et", "est", "c", "ce", "svp", "stp", "plait", "s", "il", "vous", "tu", "je", "j",
+    "me", "m", "moi", "please", "the", "for", "of", "is", "what", "quel", "quels", "quelle",
+    "quelles", "bonjour", "salut", "hello"
+}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, fold accents, drop punctuation and collapse whitespace"""
+    text = unidecode(text or "").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _content_tokens(text: str) -> FrozenSet[str]:
+    """Meaningful tokens of a normalized text, used for near-duplicate matching"""
+    return frozenset(token for token in text.split() if token not in STOPWORDS)
+
+
+class LLMResponseCache:
+    """
+    Two-tier response cache for LLM generation
+    
+    The in-process LRU is always used; when a Redis URL is configured the
+    entries are also shared across workers through Redis.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: int = None,
+        max_entries: int = None,
+        redis_url: Optional[str] = None,
+        near_duplicate: bool = None,
+        similarity_threshold: float = None,
+        excluded_intents: Optional[List[str]] = None
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.llm_cache_ttl_seconds
+        self.max_entries = max_entries if max_entries is not None else settings.llm_cache_max_entries
+        self.near_duplicate = near_duplicate if near_duplicate is not None else settings.llm_cache_near_duplicate
+        self.similarity_threshold = (
+            similarity_threshold if similarity_threshold is not None
+            else settings.llm_cache_similarity_threshold
+        )
+        if excluded_intents is None:
+            excluded_intents = settings.llm_cache_excluded_intents.split(",")
+        self.excluded_intents = {intent.strip().lower() for intent in excluded_intents if intent.strip()}
+        
+        # key -> (expires_at, response, context_key, tokens)
+        self.entries: "OrderedDict[str, Tuple[float, str, str, FrozenSet[str]]]" = OrderedDict()
+        # context_key -> {key: tokens} for near-duplicate lookup
+        self.context_index: Dict[str, Dict[str, FrozenSet[str]]] = {}
+        
+        self.cache_stats = {
+            "hits": 0,
+            "near_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "evictions": 0,
+            "redis_errors": 0
+        }
+        
+        self.redis_client = None
+        redis_url = redis_url if redis_url is not None else settings.llm_cache_redis_url
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self.redis_client = aioredis.from_url(redis_url, decode_responses=True)
+                logger.info("LLM response cache using Redis backend")
+            except Exception as e:
+                logger.warning(f"Redis not available for LLM cache, using memory only: {e}")
+                self.redis_client = None
+    
+    def is_cacheable(self, messages: List[Dict[str, Any]], intent: Optional[str] = None) -> bool:
+        """Check whether a generation request may be served from / stored in the cache"""
+        if intent and intent.lower() in self.excluded_intents:
+            return False
+        if not messages:
+            return False
+        # Multimodal content (images) is never cached
+        return all(isinstance(message.get("content"), str) for message in messages)
+    
+    def build_keys(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        match_text: Optional[str] = None
+    ) -> Tuple[str, str, FrozenSet[str]]:
+        """
+        Build (exact_key, context_key, match_tokens)
+        
+        The context key covers everything except the last user message, so
+        near-duplicate lookups only ever match within an identical context.
+        Match tokens come from the raw user text only, never from the templated
+        prompt around it; without match_text the entry is exact-match only.
+        """
+        normalized_history = [
+            [message.get("role", "user"), normalize_text(message["content"])]
+            for message in messages
+        ]
+        context = {
+            "system": re.sub(r"\s+", " ", system_prompt or "").strip(),
+            "history": normalized_history[:-1],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        context_key = hashlib.sha256(json.dumps(context, ensure_ascii=False).encode()).hexdigest()
+        last_text = normalized_history[-1][1]
+        exact_key = hashlib.sha256(f"{context_key}:{last_text}".encode()).hexdigest()
+        tokens = _content_tokens(normalize_text(match_text)) if match_text else frozenset()
+        return f"llm_cache:{exact_key}", context_key, tokens
+    
+    async def get(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        match_text: Optional[str] = None
+    ) -> Optional[str]:
+        """Get a cached response for an exact or near-duplicate prompt"""
+        key, context_key, tokens = self.build_keys(messages, system_prompt, max_tokens, temperature, match_text)
+        
+        response = await self._lookup(key)
+        if response is not None:
+            self.cache_stats["hits"] += 1
+            return response
+        
+        if self.near_duplicate and tokens:
+            similar_key = self._find_near_duplicate(context_key, tokens)
+            if similar_key:
+                response = await self._lookup(similar_key)
+                if response is not None:
+                    self.cache_stats["near_hits"] += 1
+                    return response
+        
+        self.cache_stats["misses"] += 1
+        return None
+    
+    async def set(
+        self,
+        messages: List[Dict[str, Any]],
+        response: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        match_text: Optional[str] = None
+    ):
+        """Store a generated response"""
+        if not response:
+            return
+        
+        key, context_key, tokens = self.build_keys(messages, system_prompt, max_tokens, temperature, match_text)
+        self._store_local(key, response, context_key, tokens)
+        
+        if self.redis_client:
+            try:
+                await self.redis_client.setex(key, self.ttl_seconds, response)
+            except Exception as e:
+                logger.error(f"Redis LLM cache set error: {e}")
+                self.cache_stats["redis_errors"] += 1
+    
+    def record_bypass(self):
+        """Count a request that skipped the cache (opt-out intent or uncacheable content)"""
+        self.cache_stats["bypassed"] += 1
+    
+    def clear(self):
+        """Clear the in-process tier"""
+        self.entries.clear()
+        self.context_index.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit-rate statistics"""
+        lookups = self.cache_stats["hits"] + self.cache_stats["near_hits"] + self.cache_stats["misses"]
+        hit_rate = (self.cache_stats["hits"] + self.cache_stats["near_hits"]) / lookups if lookups else 0.0
+        
+        return {
+            **self.cache_stats,
+            "lookups": lookups,
+            "hit_rate": hit_rate,
+            "memory_cache_size": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "redis_available": self.redis_client is not None,
+            "excluded_intents": sorted(self.excluded_intents)
+        }
+    
+    async def _lookup(self, key: str) -> Optional[str]:
+        """Look a key up in memory, then Redis"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, response, _, _ = entry
+            if time.monotonic() < expires_at:
+                self.entries.move_to_end(key)
+                return response
+            self._evict(key)
+        
+        if self.redis_client:
+            try:
+                return await self.redis_client.get(key)
+            except Exception as e:
+                logger.error(f"Redis LLM cache get error: {e}")
+                self.cache_stats["redis_errors"] += 1
+        
+        return None
+    
+    def _find_near_duplicate(self, context_key: str, tokens: FrozenSet[str]) -> Optional[str]:
+        """Find the most similar cached message (token Jaccard) within the same context"""
+        candidates = self.context_index.get(context_key)
+        if not candidates:
+            return None
+        
+        best_key, best_score = None, 0.0
+        for key, cached_tokens in candidates.items():
+            union = len(tokens | cached_tokens)
+            score = len(tokens & cached_tokens) / union if union else 0.0
+            if score > best_score:
+                best_key, best_score = key, score
+        
+        return best_key if best_score >= self.similarity_threshold else None
+    
+    def _store_local(self, key: str, response: str, context_key: str, tokens: FrozenSet[str]):
+        """Insert into the in-process LRU, evicting the least recently used entries"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, response, context_key, tokens)
+        if tokens:
+            self.context_index.setdefault(context_key, {})[key] = tokens
+        
+        while len(self.entries) > self.max_entries:
+            oldest_key = next(iter(self.entries))
+            self._evict(oldest_key)
+            self.cache_stats["evictions"] += 1
+    
+    def _evict(self, key: str):
+        """Remove a key from the LRU and the near-duplicate index"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        context_key = entry[2]
+        bucket = self.context_index.get(context_key)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.context_index[context_key]
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get the process-wide LLM response cache"""
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        _llm_response_cache = LLMResponseCache()
+    return _llm_response_cache
@@ -0,0 +1,462 @@
+"""
+Message Ingestion
+Acknowledge-first pipeline for inbound WhatsApp messages: the webhook only
+inserts the message (deduplicated by MessageSid) and returns, and a pool of
+async workers afterwards hands provider replies to the provider-response
+handler and everything else to the conversation engine. Messages from one
+phone number are processed strictly in arrival order while different users
+are processed in parallel.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import exists, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from app.config import get_settings
+from app.models.ingestion_models import InboundMessage
+
+settings = get_settings()
+
+RECEIVED = "received"
+PROCESSING = "processing"
+PROCESSED = "processed"
+FAILED = "failed"
+
+# Processing times kept for the latency percentiles
+TIMING_WINDOW = 1000
+
+
+@dataclass
+class InboundJob:
+    """A persisted message waiting for its worker"""
+    id: int
+    phone_number: str
+    body: str
+    received_at: datetime
+    media_url: Optional[str] = None
+    media_content_type: Optional[str] = None
+
+
+Handler = Callable[[Session, InboundJob], Awaitable[Any]]
+
+
+async def converse(db: Session, job: InboundJob) -> Optional[str]:
+    """
+    Default worker stage: provider replies go to the provider-response
+    handler, every other sender to the conversation engine; the reply is sent
+    back to the sender
+    """
+    if not job.body.strip():
+        return None
+
+    from app.services.notification_dispatcher import OutboundNotification, get_notification_dispatcher
+    from app.services.provider_response_service import get_provider_by_whatsapp_id, handle_provider_response
+
+    provider = get_provider_by_whatsapp_id(db, job.phone_number)
+    if provider is not None:
+        reply = await handle_provider_response(provider, job.body, db)
+        notification_type = "provider_reply"
+    else:
+        from app.services.natural_conversation_engine import NaturalConversationEngine
+        result = await NaturalConversationEngine(db).process_natural_conversation(
+            job.phone_number, job.body, whatsapp_id=job.phone_number
+        )
+        reply = result.response_message if result else None
+        notification_type = "conversation_reply"
+
+    if reply:
+        # Awaited so consecutive replies to one sender keep their order
+        await get_notification_dispatcher().send(OutboundNotification(
+            to=job.phone_number,
+            message=reply,
+            notification_type=notification_type,
+            user_id=job.phone_number
+        ))
+    return reply
+
+
+class MessageIngestionQueue:
+    """
+    Process-wide inbound message queue
+
+    Pending messages are kept in one FIFO lane per phone number. A lane is
+    on the ready queue at most once, and the worker that takes it handles
+    its next message and re-queues the lane behind the others if more are
+    waiting, so a phone number never has two messages in flight and a busy
+    user cannot starve the rest. A worker claims a row by moving it from
+    `received` to `processing` in one conditional update, so a message queued
+    twice (overlapping workers, recovery) is still handled once. The claim
+    also fails while an older message from the same number is still pending
+    anywhere, which keeps per-number order across processes: the worker then
+    adopts the older rows nobody is handling, or waits for the process that
+    is. Rows left `received`, or `processing` for longer than
+    `stale_seconds`, are picked up again by `recover`.
+    """
+
+    def __init__(
+        self,
+        handler: Optional[Handler] = None,
+        workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        session_factory: Optional[Callable] = None,
+        stale_seconds: Optional[int] = None,
+        claim_retry_seconds: Optional[float] = None
+    ):
+        self.handler = handler or converse
+        self.workers = workers or settings.message_ingestion_workers
+        self.max_attempts = max_attempts or settings.message_ingestion_max_attempts
+        self.session_factory = session_factory
+        self.stale_seconds = stale_seconds if stale_seconds is not None else settings.message_ingestion_stale_seconds
+        self.claim_retry_seconds = (
+            claim_retry_seconds if claim_retry_seconds is not None
+            else settings.message_ingestion_claim_retry_seconds
+        )
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lanes: Dict[str, Deque[InboundJob]] = {}
+        self._in_flight: Dict[str, InboundJob] = {}
+        self._idle: Optional[asyncio.Event] = None
+        self._timings: Deque[float] = deque(maxlen=TIMING_WINDOW)
+        self._stats = {
+            "received": 0, "duplicates": 0, "claim_conflicts": 0, "ordering_waits": 0,
+            "processed": 0, "failed": 0, "recovered": 0
+        }
+
+    async def ingest(
+        self,
+        db: Session,
+        message_sid: str,
+        phone_number: str,
+        body: str = "",
+        media_url: Optional[str] = None,
+        media_content_type: Optional[str] = None
+    ) -> bool:
+        """Persist and enqueue an inbound message; False if this MessageSid was already received"""
+        message = InboundMessage(
+            message_sid=message_sid,
+            phone_number=phone_number,
+            body=body or "",
+            media_url=media_url,
+            media_content_type=media_content_type,
+            status=RECEIVED,
+            received_at=datetime.utcnow()
+        )
+        db.add(message)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Twilio retried a message we already hold
+            db.rollback()
+            self._stats["duplicates"] += 1
+            return False
+
+        self._stats["received"] += 1
+        self._enqueue(InboundJob(
+            id=message.id,
+            phone_number=phone_number,
+            body=message.body,
+            received_at=message.received_at,
+            media_url=media_url,
+            media_content_type=media_content_type
+        ))
+        return True
+
+    async def recover(self) -> int:
+        """Re-enqueue received messages and ones whose worker stopped before finishing them"""
+        db = self._session()
+        try:
+            self._release_stale(db)
+            rows = (
+                db.query(InboundMessage)
+                .filter(InboundMessage.status == RECEIVED)
+                .order_by(InboundMessage.id)
+                .all()
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error recovering inbound messages: {e}")
+            return 0
+        finally:
+            db.close()
+
+        queued = {job.id for lane in self._lanes.values() for job in lane} | {job.id for job in self._in_flight.values()}
+        recovered = 0
+        for row in rows:
+            if row.id in queued:
+                continue
+            self._enqueue(self._job_from_row(row))
+            recovered += 1
+        self._stats["recovered"] += recovered
+        if recovered:
+            logger.info(f"Recovered {recovered} unprocessed inbound messages")
+        return recovered
+
+    async def join(self):
+        """Wait until every queued message has been processed"""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self, timeout: float = 10.0):
+        """Finish queued messages (up to `timeout`) and stop the workers"""
+        if self._idle is not None:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Leaving {self.depth} inbound messages for recovery on shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._ready = None
+        self._idle = None
+        self._loop = None
+        self._lanes.clear()
+        self._in_flight.clear()
+
+    @property
+    def depth(self) -> int:
+        """Messages waiting for a worker"""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters, queue depth, lag of the oldest waiting message and processing-time percentiles"""
+        now = datetime.utcnow()
+        waiting = [lane[0].received_at for lane in self._lanes.values() if lane]
+        timings = sorted(self._timings)
+
+        def percentile(p: float) -> float:
+            if not timings:
+                return 0.0
+            return round(timings[min(len(timings) - 1, int(p * len(timings)))] * 1000, 1)
+
+        return {
+            **self._stats,
+            "queue_depth": self.depth,
+            "in_flight": len(self._in_flight),
+            "active_users": len(set(self._lanes) | set(self._in_flight)),
+            "lag_seconds": round((now - min(waiting)).total_seconds(), 3) if waiting else 0.0,
+            "processing_ms": {
+                "avg": round(sum(timings) / len(timings) * 1000, 1) if timings else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(timings[-1] * 1000, 1) if timings else 0.0
+            },
+            "workers": self.workers
+        }
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # First use, or the previous loop is gone (e.g. a new event loop per test)
+        self._loop = loop
+        self._ready = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._lanes.clear()
+        self._in_flight.clear()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Message ingestion started with {self.workers} workers")
+
+    def _enqueue(self, job: InboundJob):
+        self._ensure_started()
+        self._idle.clear()
+        lane = self._lanes.get(job.phone_number)
+        if lane is None:
+            lane = self._lanes[job.phone_number] = deque()
+            # A lane whose message is in flight is re-queued by its worker
+            if job.phone_number not in self._in_flight:
+                self._ready.put_nowait(job.phone_number)
+        if lane and lane[-1].id > job.id:
+            # Recovered, adopted or retried rows can be older than what is already waiting
+            if any(queued.id == job.id for queued in lane):
+                return
+            lane.insert(next(i for i, queued in enumerate(lane) if queued.id > job.id), job)
+        else:
+            lane.append(job)
+
+    async def _worker(self):
+        while True:
+            phone_number = await self._ready.get()
+            lane = self._lanes.get(phone_number)
+            if not lane:
+                self._lanes.pop(phone_number, None)
+                continue
+            job = lane.popleft()
+            if not lane:
+                del self._lanes[phone_number]
+
+            self._in_flight[phone_number] = job
+            retry = False
+            try:
+                retry = await self._process(job)
+            finally:
+                if retry:
+                    # Still in flight here, so this does not put the lane on the ready queue twice
+                    self._enqueue(job)
+                del self._in_flight[phone_number]
+                if phone_number in self._lanes:
+                    self._ready.put_nowait(phone_number)
+                elif not self._lanes and not self._in_flight:
+                    self._idle.set()
+
+    async def _process(self, job: InboundJob) -> bool:
+        """Handle one message; True when it has to wait behind an older message of its sender"""
+        start = time.perf_counter()
+        db = self._session()
+        try:
+            if not self._claim(db, job):
+                return await self._defer(db, job)
+            try:
+                await self.handler(db, job)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error processing inbound message {job.id} from {job.phone_number}: {e}")
+                self._set_status(db, job.id, FAILED, error=str(e)[:1000], processed_at=datetime.utcnow())
+                self._stats["failed"] += 1
+            else:
+                self._set_status(db, job.id, PROCESSED, processed_at=datetime.utcnow())
+                self._stats["processed"] += 1
+        except Exception as e:
+            # Status write failed: the row is replayed by `recover` once its claim goes stale
+            db.rollback()
+            logger.error(f"Error updating inbound message {job.id}: {e}")
+        finally:
+            db.close()
+        self._timings.append(time.perf_counter() - start)
+        return False
+
+    async def _defer(self, db: Session, job: InboundJob) -> bool:
+        """After a failed claim: drop the job if it is not ours, else make room for older messages"""
+        status = db.query(InboundMessage.status).filter(InboundMessage.id == job.id).scalar()
+        if status != RECEIVED:
+            # Already taken by another worker or process, or finished meanwhile
+            self._stats["claim_conflicts"] += 1
+            return False
+
+        self._stats["ordering_waits"] += 1
+        self._release_stale(db, InboundMessage.phone_number == job.phone_number, InboundMessage.id < job.id)
+        older = (
+            db.query(InboundMessage)
+            .filter(
+                InboundMessage.phone_number == job.phone_number,
+                InboundMessage.id < job.id,
+                InboundMessage.status.in_((RECEIVED, PROCESSING))
+            )
+            .order_by(InboundMessage.id)
+            .all()
+        )
+        unclaimed = [row for row in older if row.status == RECEIVED]
+        if unclaimed:
+            # Older messages nobody here had queued go first; the claim settles any overlap
+            for row in unclaimed:
+                self._enqueue(self._job_from_row(row))
+        elif older:
+            # Another process is handling an older message from this number
+            await asyncio.sleep(self.claim_retry_seconds)
+        return True
+
+    @staticmethod
+    def _claim(db: Session, job: InboundJob) -> bool:
+        """
+        Atomically move a received row to processing; False if it was not
+        ours to take or an older message from the same number is still pending
+        """
+        older = aliased(InboundMessage)
+        older_pending = exists().where(
+            older.phone_number == job.phone_number,
+            older.id < job.id,
+            older.status.in_((RECEIVED, PROCESSING))
+        )
+        result = db.execute(
+            update(InboundMessage)
+            .where(InboundMessage.id == job.id, InboundMessage.status == RECEIVED, ~older_pending)
+            .values(status=PROCESSING, attempts=InboundMessage.attempts + 1, claimed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def _release_stale(self, db: Session, *criteria):
+        """Fail or reset rows whose worker stopped without finishing them"""
+        now = datetime.utcnow()
+        stale = (
+            InboundMessage.status == PROCESSING,
+            or_(
+                InboundMessage.claimed_at.is_(None),
+                InboundMessage.claimed_at < now - timedelta(seconds=self.stale_seconds)
+            ),
+            *criteria
+        )
+        # Messages interrupted too often are given up on rather than replayed forever
+        db.execute(
+            update(InboundMessage)
+            .where(*stale, InboundMessage.attempts >= self.max_attempts)
+            .values(status=FAILED, error="Max attempts exceeded", processed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        # Rows still processing within the stale window belong to a live worker
+        db.execute(
+            update(InboundMessage)
+            .where(*stale)
+            .values(status=RECEIVED, claimed_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    @staticmethod
+    def _job_from_row(row: InboundMessage) -> InboundJob:
+        return InboundJob(
+            id=row.id,
+            phone_number=row.phone_number,
+            body=row.body or "",
+            received_at=row.received_at,
+            media_url=row.media_url,
+            media_content_type=row.media_content_type
+        )
+
+    @staticmethod
+    def _set_status(db: Session, message_id: int, status: str, **values):
+        db.execute(
+            update(InboundMessage)
+            .where(InboundMessage.id == message_id)
+            .values(status=status, **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+# Process-wide queue shared by the webhook
+_ingestion_queue: Optional[MessageIngestionQueue] = None
+
+
+def get_message_ingestion_queue() -> MessageIngestionQueue:
+    """Get the shared inbound message queue"""
+    global _ingestion_queue
+    if _ingestion_queue is None:
+        _ingestion_queue = MessageIngestionQueue()
+    return _ingestion_queue
+
+
+async def close_message_ingestion_queue():
+    """Finish queued messages and stop the workers (application shutdown)"""
+    global _ingestion_queue
+    if _ingestion_queue is not None:
+        await _ingestion_queue.close()
+        _ingestion_queue = None
@@ -13,14 +13,10 @@ from datetime import datetime
 import logging
 
 # AI Service Imports
-import anthropic
-from anthropic import Anthropic
-from google import genai
 from google.genai import types
-import openai
-from openai import OpenAI
 
 from app.config import get_settings
+from app.services.llm_client_pool import get_llm_client_pool
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -81,16 +77,18 @@ class MultiLLMOrchestrator:
         self.setup_conversation_states()
         
     def setup_llm_clients(self):
-        """Initialize all LLM clients"""
+        """Initialize all LLM clients from the shared async client pool"""
         try:
+            self.client_pool = get_llm_client_pool()
+            
             # Claude client
-            self.claude_client = Anthropic(api_key=settings.anthropic_api_key)
+            self.claude_client = self.client_pool.claude
             
             # Gemini client
-            self.gemini_client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+            self.gemini_client = self.client_pool.gemini
             
             # OpenAI client
-            self.openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+            self.openai_client = self.client_pool.openai
             
             logger.info("Multi-LLM clients initialized successfully")
             
@@ -224,7 +222,7 @@ class MultiLLMOrchestrator:
             }}
             """
             
-            response = self.claude_client.messages.create(
+            response = await self.client_pool.claude_messages(
                 model=settings.claude_model,
                 max_tokens=1000,
                 messages=[{"role": "user", "content": analysis_prompt}]
@@ -301,7 +299,7 @@ class MultiLLMOrchestrator:
             }}
             """
             
-            response = self.gemini_client.models.generate_content(
+            response = await self.client_pool.gemini_generate(
                 model="gemini-2.5-flash",
                 contents=enhancement_prompt
             )
@@ -345,7 +343,7 @@ class MultiLLMOrchestrator:
             }}
             """
             
-            response = self.openai_client.chat.completions.create(
+            response = await self.client_pool.openai_chat(
                 model="gpt-4o",
                 messages=[{"role": "user", "content": generation_prompt}],
                 response_format={"type": "json_object"},
@@ -411,7 +409,7 @@ class MultiLLMOrchestrator:
             Réponse en français naturel:
             """
             
-            response = self.claude_client.messages.create(
+            response = await self.client_pool.claude_messages(
                 model=settings.claude_model,
                 max_tokens=800,
                 messages=[{"role": "user", "content": final_prompt}]
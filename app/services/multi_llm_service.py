@@ -5,17 +5,18 @@ Supports Claude, Gemini, and OpenAI with intelligent switching
 
 import os
 import json
-import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
 from loguru import logger
 from enum import Enum
 
 # Import AI services
-from anthropic import Anthropic
-from openai import OpenAI
-from google import genai
 from google.genai import types
 
+from app.services.llm_client_pool import get_llm_client_pool
+from app.services.llm_response_cache import get_llm_response_cache
+from app.services.prompt_assembly import SystemPrompt, get_prompt_assembler, record_prompt_usage
+from app.config import get_settings
+
 class LLMProvider(Enum):
     """Available LLM providers"""
     CLAUDE = "claude"
@@ -42,35 +43,36 @@ class MultiLLMService:
         self.success_counts = {provider: 0 for provider in LLMProvider}
         self.failure_counts = {provider: 0 for provider in LLMProvider}
         
+        # Process-wide response cache for repeated FAQ-style prompts
+        self.response_cache = get_llm_response_cache() if get_settings().llm_cache_enabled else None
+        
         # Initialize available providers
         self._initialize_providers()
         
     def _initialize_providers(self):
-        """Initialize all available LLM providers"""
+        """Initialize all available LLM providers from the shared async client pool"""
+        self.client_pool = get_llm_client_pool()
         
         # Initialize Claude (Anthropic)
         try:
-            anthropic_key = os.environ.get('ANTHROPIC_API_KEY')
-            if anthropic_key:
-                self.providers[LLMProvider.CLAUDE] = Anthropic(api_key=anthropic_key)
+            if self.client_pool.claude is not None:
+                self.providers[LLMProvider.CLAUDE] = self.client_pool.claude
                 logger.info("Claude (Anthropic) initialized successfully")
         except Exception as e:
             logger.warning(f"Failed to initialize Claude: {e}")
             
         # Initialize Gemini (Google)
         try:
-            gemini_key = os.environ.get('GEMINI_API_KEY')
-            if gemini_key:
-                self.providers[LLMProvider.GEMINI] = genai.Client(api_key=gemini_key)
+            if self.client_pool.gemini is not None:
+                self.providers[LLMProvider.GEMINI] = self.client_pool.gemini
                 logger.info("Gemini (Google) initialized successfully")
         except Exception as e:
             logger.warning(f"Failed to initialize Gemini: {e}")
             
         # Initialize OpenAI
         try:
-            openai_key = os.environ.get('OPENAI_API_KEY')
-            if openai_key:
-                self.providers[LLMProvider.OPENAI] = OpenAI(api_key=openai_key)
+            if self.client_pool.openai is not None:
+                self.providers[LLMProvider.OPENAI] = self.client_pool.openai
                 logger.info("OpenAI initialized successfully")
         except Exception as e:
             logger.warning(f"Failed to initialize OpenAI: {e}")
@@ -83,7 +85,11 @@ class MultiLLMService:
         system_prompt: Optional[str] = None,
         max_tokens: int = 1000,
         temperature: float = 0.7,
-        preferred_provider: Optional[LLMProvider] = None
+        preferred_provider: Optional[LLMProvider] = None,
+        intent: Optional[str] = None,
+        use_cache: bool = True,
+        match_text: Optional[str] = None,
+        match_if: Optional[Callable[[str], bool]] = None
     ) -> str:
         """
         Generate response using the best available LLM provider
@@ -94,11 +100,28 @@ class MultiLLMService:
             max_tokens: Maximum tokens to generate
             temperature: Response randomness
             preferred_provider: Preferred LLM provider (optional)
+            intent: Detected intent; excluded intents (urgence, plainte) are never cached
+            use_cache: Set to False to always call a provider
+            match_text: Raw user text for near-duplicate lookup; omit for exact-match only
+            match_if: Only responses it accepts are stored for near-duplicate lookup
             
         Returns:
             Generated response text
         """
         
+        cacheable = False
+        if self.response_cache is not None and use_cache:
+            cacheable = self.response_cache.is_cacheable(messages, intent)
+            if cacheable:
+                cached_response = await self.response_cache.get(
+                    messages, system_prompt, max_tokens, temperature, match_text
+                )
+                if cached_response is not None:
+                    logger.info("Served LLM response from cache")
+                    return cached_response
+            else:
+                self.response_cache.record_bypass()
+        
         # Determine provider order
         provider_order = self._get_provider_order(preferred_provider)
         
@@ -127,6 +150,12 @@ class MultiLLMService:
                     logger.info(f"Provider {provider.value} recovered from failure")
                 
                 logger.info(f"Successfully generated response using {provider.value}")
+                
+                if cacheable:
+                    shared_text = match_text if match_if is None or match_if(response) else None
+                    await self.response_cache.set(
+                        messages, response, system_prompt, max_tokens, temperature, shared_text
+                    )
                 return response
                 
             except Exception as e:
@@ -177,8 +206,6 @@ class MultiLLMService:
     ) -> str:
         """Generate response using Claude (Anthropic)"""
         
-        client = self.providers[LLMProvider.CLAUDE]
-        
         # Prepare messages for Claude
         claude_messages = []
         for msg in messages:
@@ -187,16 +214,31 @@ class MultiLLMService:
                 "content": msg["content"]
             })
         
+        # Assembled prompts send their static prefix as a separate, cached block
+        if isinstance(system_prompt, SystemPrompt):
+            system = system_prompt.to_anthropic_blocks()
+        else:
+            system = system_prompt if system_prompt else "You are a helpful assistant."
+        
         # Make the API call
-        response = await asyncio.to_thread(
-            client.messages.create,
+        response = await self.client_pool.claude_messages(
             model="claude-3-5-sonnet-20241022",  # Latest stable model
             max_tokens=max_tokens,
             temperature=temperature,
-            system=system_prompt if system_prompt else "You are a helpful assistant.",
+            system=system,
             messages=claude_messages
         )
         
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            record_prompt_usage(
+                system_prompt, "claude",
+                input_tokens=usage.input_tokens or 0,
+                output_tokens=usage.output_tokens or 0,
+                cache_read_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+                cache_write_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0
+            )
+        
         return response.content[0].text
     
     async def _generate_gemini(
@@ -208,8 +250,6 @@ class MultiLLMService:
     ) -> str:
         """Generate response using Gemini (Google)"""
         
-        client = self.providers[LLMProvider.GEMINI]
-        
         # Prepare content for Gemini
         contents = []
         if system_prompt:
@@ -226,8 +266,7 @@ class MultiLLMService:
             ))
         
         # Make the API call
-        response = await asyncio.to_thread(
-            client.models.generate_content,
+        response = await self.client_pool.gemini_generate(
             model="gemini-2.0-flash-exp",
             contents=contents,
             config=types.GenerateContentConfig(
@@ -236,6 +275,16 @@ class MultiLLMService:
             )
         )
         
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            cached = usage.cached_content_token_count or 0
+            record_prompt_usage(
+                system_prompt, "gemini",
+                input_tokens=(usage.prompt_token_count or 0) - cached,
+                output_tokens=usage.candidates_token_count or 0,
+                cache_read_tokens=cached
+            )
+        
         return response.text or ""
     
     async def _generate_openai(
@@ -247,8 +296,6 @@ class MultiLLMService:
     ) -> str:
         """Generate response using OpenAI"""
         
-        client = self.providers[LLMProvider.OPENAI]
-        
         # Prepare messages for OpenAI
         openai_messages = []
         if system_prompt:
@@ -264,14 +311,25 @@ class MultiLLMService:
             })
         
         # Make the API call
-        response = await asyncio.to_thread(
-            client.chat.completions.create,
+        response = await self.client_pool.openai_chat(
             model="gpt-4o",  # Latest GPT-4 model
             messages=openai_messages,
             max_tokens=max_tokens,
             temperature=temperature
         )
         
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+            # OpenAI caches long prompt prefixes automatically; the static prefix comes first
+            record_prompt_usage(
+                system_prompt, "openai",
+                input_tokens=(usage.prompt_tokens or 0) - cached,
+                output_tokens=usage.completion_tokens or 0,
+                cache_read_tokens=cached
+            )
+        
         return response.choices[0].message.content
     
     def _get_provider_order(self, preferred_provider: Optional[LLMProvider] = None) -> List[LLMProvider]:
@@ -350,6 +408,20 @@ class MultiLLMService:
         
         return status
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit-rate statistics"""
+        if self.response_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.response_cache.get_stats()}
+    
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """Get prompt prefix renders and per-prompt token / cache-hit usage"""
+        return get_prompt_assembler().get_stats()
+    
+    def get_client_pool_stats(self) -> Dict[str, Any]:
+        """Get in-flight and completed call counts from the shared async client pool"""
+        return self.client_pool.get_stats()
+    
     def reset_failed_providers(self):
         """Reset failed providers list (for recovery attempts)"""
         self.failed_providers.clear()
@@ -22,7 +22,11 @@ from app.utils.conversation_state import ConversationState, ConversationPhase
 from app.models.database_models import User, ServiceRequest, Conversation, RequestStatus
 from app.services.provider_service import ProviderService
 from app.services.whatsapp_service import WhatsAppService
+from app.services.notification_dispatcher import OutboundNotification, get_notification_dispatcher
+from app.services.event_sink import get_event_sink
+from app.services.system_state import get_system_state
 from app.services.communication_service import CommunicationService
+from app.services.text_features import TextFeatures, ensure_text_features, extract_text_features, register_lexicon
 from loguru import logger
 
 settings = get_settings()
@@ -31,6 +35,11 @@ settings = get_settings()
 CONVERSATION_CACHE = {}
 CONVERSATION_DATA_CACHE = {}
 
+# Urgency keywords, matched through the shared feature extractor
+URGENT_KEYWORDS = ["urgent", "urgence", "vite", "rapidement", "emergency", "emergencecy", "inmediatement", "maintenant"]
+EMERGENCY_KEYWORDS = ["feu", "flood", "inondation", "danger", "risque", "eau partout", "électrocution"]
+register_lexicon({"urgency.urgent": URGENT_KEYWORDS, "urgency.emergency": EMERGENCY_KEYWORDS})
+
 
 class ConversationIntent(Enum):
     """User conversation intentions"""
@@ -97,9 +106,12 @@ class NaturalConversationEngine:
             # Get or create conversation context
             conversation_state = await self._get_conversation_context(user_identifier)
             
+            # Normalize and match the message once for every analyzer of this turn
+            features = extract_text_features(message)
+            
             # Use enhanced communication system
             enhanced_response = await self._process_with_enhanced_communication(
-                user_identifier, message, conversation_state
+                user_identifier, message, conversation_state, features
             )
             
             if enhanced_response:
@@ -107,7 +119,7 @@ class NaturalConversationEngine:
             
             # Fallback to original system if enhanced fails
             return await self._process_with_original_system(
-                user_identifier, message, conversation_state
+                user_identifier, message, conversation_state, features
             )
             
         except Exception as e:
@@ -119,7 +131,8 @@ class NaturalConversationEngine:
         self, 
         user_identifier: str, 
         message: str,
-        conversation_state: ConversationState
+        conversation_state: ConversationState,
+        features: Optional[TextFeatures] = None
     ) -> Optional[ConversationResult]:
         """Process conversation using enhanced Agent-LLM communication"""
         
@@ -136,7 +149,7 @@ class NaturalConversationEngine:
                 conversation_context=conversation_state.get_history(),
                 user_data=user_data,
                 system_state=system_state,
-                urgency_level=self._detect_urgency_level(message),
+                urgency_level=self._detect_urgency_level(message, features),
                 language="french",
                 cultural_context="cameroon"
             )
@@ -203,13 +216,14 @@ class NaturalConversationEngine:
         self, 
         user_identifier: str, 
         message: str,
-        conversation_state: ConversationState
+        conversation_state: ConversationState,
+        features: Optional[TextFeatures] = None
     ) -> ConversationResult:
         """Fallback to original conversation processing system"""
         
         # Analyze user intent naturally
         intent_analysis = await self.intent_analyzer.analyze_intent(
-            message, conversation_state.get_history(), conversation_state.current_phase
+            message, conversation_state.get_history(), conversation_state.current_phase, features=features
         )
         
         # Update conversation context with new message
@@ -368,37 +382,15 @@ class NaturalConversationEngine:
     
     async def _get_system_state(self) -> Dict[str, Any]:
         """Get current system state"""
-        try:
-            # Get provider availability
-            from app.models.database_models import Provider
-            active_providers = self.db.query(Provider).filter(Provider.is_active == True).count()
-            
-            # Get current request stats
-            pending_requests = self.db.query(ServiceRequest).filter(
-                ServiceRequest.status == RequestStatus.PENDING
-            ).count()
-            
-            return {
-                "active_providers": active_providers,
-                "pending_requests": pending_requests,
-                "current_request_status": "processing",
-                "provider_availability": "normal" if active_providers > 0 else "limited",
-                "system_load": "normal"
-            }
-        except Exception as e:
-            logger.error(f"Error getting system state: {e}")
-            return {"system_load": "unknown", "provider_availability": "unknown"}
+        return get_system_state(self.db).to_dict()
     
-    def _detect_urgency_level(self, message: str) -> str:
+    def _detect_urgency_level(self, message: str, features: Optional[TextFeatures] = None) -> str:
         """Detect urgency level from message"""
-        urgent_keywords = ["urgent", "urgence", "vite", "rapidement", "emergency", "emergencecy", "inmediatement", "maintenant"]
-        emergency_keywords = ["feu", "flood", "inondation", "danger", "risque", "eau partout", "électrocution"]
-        
-        message_lower = message.lower()
+        features = ensure_text_features(message, features)
         
-        if any(keyword in message_lower for keyword in emergency_keywords):
+        if features.has("urgency.emergency"):
             return "emergency"
-        elif any(keyword in message_lower for keyword in urgent_keywords):
+        elif features.has("urgency.urgent"):
             return "urgent"
         else:
             return "normal"
@@ -521,7 +513,7 @@ class NaturalConversationEngine:
             conversation_state.pending_request_data = None
             if user_identifier in self.conversation_data:
                 self.conversation_data[user_identifier]['collected_info'] = {}
-            return await self._handle_info_request(user_identifier, message, conversation_state)
+            return await self._handle_info_request(user_identifier, message, conversation_state, intent.value)
         
         # Check if we're in an ongoing conversation and should continue gathering information
         # BUT allow specific intents to override this behavior
@@ -1051,7 +1043,8 @@ class NaturalConversationEngine:
         self, 
         user_identifier: str, 
         message: str,
-        conversation_state: ConversationState
+        conversation_state: ConversationState,
+        intent: Optional[str] = None
     ) -> Dict[str, Any]:
         """Handle information requests (FAQ, help, service info) using LLM system"""
         
@@ -1072,7 +1065,8 @@ class NaturalConversationEngine:
             llm_result = await llm_manager.process_message(
                 user_identifier=user_identifier,
                 message=message,
-                session_id=f"info_request_{user_identifier}"
+                session_id=f"info_request_{user_identifier}",
+                intent=intent
             )
             
             # Extract the response from LLM result
@@ -1251,19 +1245,15 @@ class NaturalConversationEngine:
                 # service_request.status remains PENDING
                 logger.info(f"Providers notified for request {service_request.id}, keeping status as PENDING")
                 
-                # Notify providers using WhatsApp service
-                notification_errors = 0
-                for provider_score in best_providers:
-                    provider = provider_score.provider
-                    try:
-                        await self._notify_provider(provider, service_request)
-                    except Exception as e:
-                        notification_errors += 1
-                        logger.error(f"Provider notification failed for {provider.id}: {e}")
+                # Notify all providers concurrently through the dispatcher
+                providers = [provider_score.provider for provider_score in best_providers]
+                notification_errors = await self._notify_providers(providers, service_request)
                 
-                # If all provider notifications failed, notify user about delays
-                if notification_errors == len(best_providers):
+                if notification_errors == len(providers):
+                    # If all provider notifications failed, notify user about delays
                     await self._notify_user_about_internal_error(service_request, all_providers_failed=True)
+                elif notification_errors:
+                    await self._notify_user_about_internal_error(service_request)
             else:
                 logger.warning(f"No providers found for request {service_request.id}")
                 # Send no providers message immediately
@@ -1276,17 +1266,34 @@ class NaturalConversationEngine:
             logger.error(f"Error initiating provider matching: {e}")
             # Continue without failing the conversation
 
+    async def _notify_providers(self, providers: List[Any], service_request: ServiceRequest) -> int:
+        """Fan a new service request out to providers in parallel, returning the number of failed sends"""
+        results = await get_notification_dispatcher().fan_out(
+            self._build_provider_notification(provider, service_request) for provider in providers
+        )
+        
+        for provider, success in zip(providers, results):
+            if success:
+                logger.info(f"Provider {provider.id} notified successfully for request {service_request.id}")
+            else:
+                logger.error(f"Failed to notify provider {provider.id} for request {service_request.id}")
+        return results.count(False)
+    
     async def _notify_provider(self, provider, service_request: ServiceRequest):
         """Notify a provider about a new service request"""
-        try:
-            # Generate provider notification message
-            service_emoji = {
-                "plomberie": "🔧",
-                "électricité": "⚡",
-                "réparation électroménager": "🏠"
-            }.get(service_request.service_type.lower(), "🛠")
-            
-            message = f"""🚨 *NOUVELLE DEMANDE DE SERVICE*
+        if await self._notify_providers([provider], service_request):
+            # Notify user about internal service error causing delays
+            await self._notify_user_about_internal_error(service_request)
+    
+    def _build_provider_notification(self, provider, service_request: ServiceRequest) -> OutboundNotification:
+        """Provider notification message for a new service request"""
+        service_emoji = {
+            "plomberie": "🔧",
+            "électricité": "⚡",
+            "réparation électroménager": "🏠"
+        }.get(service_request.service_type.lower(), "🛠")
+        
+        message = f"""🚨 *NOUVELLE DEMANDE DE SERVICE*
 
 {service_emoji} *Service* : {service_request.service_type.title()}
 📍 *Localisation* : {service_request.location}
@@ -1304,20 +1311,14 @@ class NaturalConversationEngine:
 
 📞 *Djobea AI* - Service de mise en relation"""
 
-            # Send notification via WhatsApp
-            success = self.whatsapp_service.send_message(provider.whatsapp_id, message)
-            
-            if success:
-                logger.info(f"Provider {provider.id} notified successfully for request {service_request.id}")
-            else:
-                logger.error(f"Failed to notify provider {provider.id} for request {service_request.id}")
-                # Notify user about internal service error causing delays
-                await self._notify_user_about_internal_error(service_request)
-                
-        except Exception as e:
-            logger.error(f"Error notifying provider {provider.id}: {e}")
-            # Notify user about internal service error causing delays
-            await self._notify_user_about_internal_error(service_request)
+        return OutboundNotification(
+            to=provider.whatsapp_id,
+            message=message,
+            notification_type="provider_request",
+            user_id=str(provider.id),
+            request_id=str(service_request.id),
+            log=True
+        )
     
     def _get_price_estimate(self, service_type: str) -> str:
         """Get price estimate for a service type"""
@@ -1511,8 +1512,7 @@ Je vous tiendrai informé dès qu'un professionnel accepte votre demande.
                 created_at=datetime.utcnow()
             )
             
-            self.db.add(conversation)
-            self.db.commit()
+            get_event_sink().emit(self.db, conversation)
             
         except Exception as e:
             logger.error(f"Error logging conversation analytics: {e}")
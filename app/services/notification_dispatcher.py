@@ -0,0 +1,333 @@
+"""
+Notification Dispatcher
+Async outbound queue for WhatsApp (and other channel) notifications: a
+bounded worker pool, a token bucket per channel and batched status
+write-back to NotificationQueue / NotificationLog
+"""
+
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import case, insert, update
+
+from app.config import get_settings
+from app.models.notification import NotificationQueue
+from app.models.tracking_models import NotificationLog
+
+settings = get_settings()
+
+
+@dataclass
+class OutboundNotification:
+    """One message to deliver"""
+    to: str
+    message: str
+    channel: str = "whatsapp"
+    notification_type: Optional[str] = None
+    user_id: Optional[str] = None
+    request_id: Optional[str] = None
+    # NotificationQueue row whose retry status is written back after the send
+    queue_id: Optional[int] = None
+    # Record the send in NotificationLog
+    log: bool = False
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of one send"""
+    success: bool
+    send_delay_ms: int = 0
+    error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+
+
+class TokenBucket:
+    """Async token bucket: `rate` sends per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, waiting for a refill if needed; returns the seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+Sender = Callable[[str, str], Any]
+
+
+class NotificationDispatcher:
+    """
+    Process-wide outbound notification queue
+
+    Senders are plain `send(to, message) -> bool` callables; blocking ones
+    (the Twilio client) run on a dedicated thread pool sized to the worker
+    count, so N notifications go out in one round-trip time while each
+    channel stays under its configured rate.
+    """
+
+    def __init__(
+        self,
+        senders: Optional[Dict[str, Sender]] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        session_factory: Optional[Callable] = None,
+        writeback_interval: Optional[float] = None,
+        writeback_batch_size: Optional[int] = None
+    ):
+        self.senders: Dict[str, Sender] = dict(senders or {})
+        self.workers = workers or settings.notification_workers
+        self.queue_size = queue_size or settings.notification_queue_size
+        self.session_factory = session_factory
+        self.writeback_interval = writeback_interval or settings.notification_writeback_interval_seconds
+        self.writeback_batch_size = writeback_batch_size or settings.notification_writeback_batch_size
+
+        rates = rates or {"whatsapp": (settings.notification_whatsapp_rate, settings.notification_whatsapp_burst)}
+        self._buckets = {channel: TokenBucket(rate, burst) for channel, (rate, burst) in rates.items()}
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="notify")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._pending_writes: List[Tuple[OutboundNotification, DeliveryResult]] = []
+        self._stats = {"sent": 0, "failed": 0, "throttled_seconds": 0.0, "written_back": 0}
+
+    def register_sender(self, channel: str, sender: Sender, rate: float = 0, burst: int = 1):
+        """Add a delivery channel; rate 0 means unthrottled"""
+        self.senders[channel] = sender
+        self._buckets[channel] = TokenBucket(rate, burst)
+
+    async def submit(self, notification: OutboundNotification) -> "asyncio.Future[bool]":
+        """Queue a notification; the returned future resolves to whether it was sent"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((notification, future))
+        return future
+
+    async def send(self, notification: OutboundNotification) -> bool:
+        """Queue a notification and wait for its delivery"""
+        return await (await self.submit(notification))
+
+    async def fan_out(self, notifications: Iterable[OutboundNotification]) -> List[bool]:
+        """Send many notifications concurrently, results in input order"""
+        futures = [await self.submit(notification) for notification in notifications]
+        return list(await asyncio.gather(*futures))
+
+    async def flush(self) -> int:
+        """Write pending delivery statuses back to the database now"""
+        if not self._pending_writes:
+            return 0
+        batch, self._pending_writes = self._pending_writes, []
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write_back, batch)
+        except Exception as e:
+            logger.error(f"Notification status write-back failed for {len(batch)} sends: {e}")
+            return 0
+        self._stats["written_back"] += len(batch)
+        return len(batch)
+
+    async def close(self, timeout: float = 10.0):
+        """Drain the queue, stop the workers and write back remaining statuses"""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._queue.qsize()} undelivered notifications on shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+        await self.flush()
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Delivery counters and current queue depth"""
+        return {
+            **self._stats,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "pending_writes": len(self._pending_writes),
+            "workers": self.workers
+        }
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # First use, or the previous loop is gone (e.g. a new event loop per test)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._flush_requested = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._writer()))
+        logger.info(f"Notification dispatcher started with {self.workers} workers")
+
+    async def _worker(self):
+        while True:
+            notification, future = await self._queue.get()
+            try:
+                result = await self._deliver(notification)
+                if not future.done():
+                    future.set_result(result.success)
+            except Exception as e:
+                logger.error(f"Notification worker error for {notification.to}: {e}")
+                if not future.done():
+                    future.set_result(False)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, notification: OutboundNotification) -> DeliveryResult:
+        bucket = self._buckets.get(notification.channel)
+        if bucket is not None:
+            self._stats["throttled_seconds"] += await bucket.acquire()
+
+        start = time.perf_counter()
+        try:
+            sender = self._sender_for(notification.channel)
+            if asyncio.iscoroutinefunction(sender):
+                success = bool(await sender(notification.to, notification.message))
+            else:
+                success = bool(await self._loop.run_in_executor(
+                    self._executor, sender, notification.to, notification.message
+                ))
+            error = None if success else f"{notification.channel} send failed"
+        except Exception as e:
+            success, error = False, str(e)
+
+        result = DeliveryResult(
+            success=success,
+            send_delay_ms=int((time.perf_counter() - start) * 1000),
+            error=error,
+            sent_at=datetime.utcnow()
+        )
+        self._stats["sent" if success else "failed"] += 1
+
+        if notification.queue_id is not None or notification.log:
+            self._pending_writes.append((notification, result))
+            if len(self._pending_writes) >= self.writeback_batch_size:
+                self._flush_requested.set()
+        return result
+
+    def _sender_for(self, channel: str) -> Sender:
+        if channel not in self.senders:
+            if channel != "whatsapp":
+                raise ValueError(f"No sender registered for channel '{channel}'")
+            from app.services.whatsapp_service import whatsapp_service
+            self.senders[channel] = whatsapp_service.send_message
+        return self.senders[channel]
+
+    async def _writer(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.writeback_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    def _write_back(self, batch: List[Tuple[OutboundNotification, DeliveryResult]]):
+        """One UPDATE per outcome for queue rows and one multi-row INSERT for logs"""
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+
+        now = datetime.utcnow()
+        sent_ids = [n.queue_id for n, result in batch if n.queue_id is not None and result.success]
+        failed_ids = [n.queue_id for n, result in batch if n.queue_id is not None and not result.success]
+        logs = [
+            {
+                "log_id": f"notif_{uuid.uuid4().hex[:12]}",
+                "request_id": str(n.request_id) if n.request_id is not None else "",
+                "user_id": str(n.user_id) if n.user_id is not None else n.to,
+                "notification_type": n.notification_type,
+                "channel": n.channel,
+                "message_content": n.message,
+                "sent_timestamp": result.sent_at,
+                "delivery_status": "sent" if result.success else "failed",
+                "send_delay": result.send_delay_ms,
+                "error_message": result.error
+            }
+            for n, result in batch if n.log
+        ]
+
+        db = self.session_factory()
+        try:
+            if sent_ids:
+                db.execute(
+                    update(NotificationQueue)
+                    .where(NotificationQueue.id.in_(sent_ids))
+                    .values(
+                        status="sent",
+                        sent_at=now,
+                        last_retry_at=now,
+                        retry_count=NotificationQueue.retry_count + 1
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            if failed_ids:
+                exhausted = NotificationQueue.retry_count + 1 >= NotificationQueue.max_retries
+                db.execute(
+                    update(NotificationQueue)
+                    .where(NotificationQueue.id.in_(failed_ids))
+                    .values(
+                        status=case((exhausted, "failed"), else_="pending"),
+                        error_message=case((exhausted, "Max retries exceeded"), else_=NotificationQueue.error_message),
+                        last_retry_at=now,
+                        retry_count=NotificationQueue.retry_count + 1
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            if logs:
+                db.execute(insert(NotificationLog), logs)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Process-wide dispatcher shared by every service
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Get the shared notification dispatcher"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher()
+    return _dispatcher
+
+
+async def close_notification_dispatcher():
+    """Drain and stop the shared dispatcher (application shutdown)"""
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.close()
+        _dispatcher = None
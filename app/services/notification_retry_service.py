@@ -1,13 +1,14 @@
 """
 Notification Retry Service for handling failed WhatsApp messages
 """
-import asyncio
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 from app.models.notification import NotificationQueue
-from app.services.whatsapp_service import WhatsAppService
+from app.services.notification_dispatcher import (
+    NotificationDispatcher, OutboundNotification, get_notification_dispatcher
+)
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -15,9 +16,12 @@ logger = setup_logger(__name__)
 class NotificationRetryService:
     """Service for retrying failed notifications"""
     
-    def __init__(self, db: Session):
+    # Notifications picked up per retry cycle
+    RETRY_BATCH_SIZE = 100
+    
+    def __init__(self, db: Session, dispatcher: Optional[NotificationDispatcher] = None):
         self.db = db
-        self.whatsapp_service = WhatsAppService()
+        self.dispatcher = dispatcher or get_notification_dispatcher()
     
     async def process_failed_notifications(self) -> int:
         """Process all failed notifications that need retry"""
@@ -26,15 +30,42 @@ class NotificationRetryService:
             notifications = self._get_notifications_for_retry()
             
             logger.info(f"Found {len(notifications)} notifications to retry")
+            if not notifications:
+                return 0
             
-            successful_retries = 0
+            phones = self._get_user_phones({notification.user_id for notification in notifications})
+            deliverable = []
             for notification in notifications:
-                if await self._retry_notification(notification):
-                    successful_retries += 1
-                    
-                # Small delay between retries to avoid overwhelming the API
-                await asyncio.sleep(0.5)
+                if phones.get(notification.user_id):
+                    deliverable.append(notification)
+                else:
+                    logger.warning(f"No phone found for user {notification.user_id}")
+                    notification.status = "failed"
+                    notification.error_message = "User phone not found"
+            if len(deliverable) < len(notifications):
+                try:
+                    self.db.commit()
+                except Exception:
+                    self.db.rollback()
+            
+            # Sends are paced by the dispatcher's per-channel rate limit, and
+            # retry counts / statuses are written back in one batch
+            results = await self.dispatcher.fan_out(
+                OutboundNotification(
+                    to=phones[notification.user_id],
+                    message=notification.message,
+                    notification_type=notification.notification_type,
+                    user_id=notification.user_id,
+                    request_id=notification.request_id,
+                    queue_id=notification.id
+                )
+                for notification in deliverable
+            )
+            await self.dispatcher.flush()
+            for notification in deliverable:
+                self.db.expire(notification)
             
+            successful_retries = results.count(True)
             logger.info(f"Successfully retried {successful_retries}/{len(notifications)} notifications")
             return successful_retries
             
@@ -61,7 +92,7 @@ class NotificationRetryService:
                         NotificationQueue.last_retry_at < five_minutes_ago
                     )
                 )
-            ).order_by(NotificationQueue.created_at.asc()).limit(20).all()
+            ).order_by(NotificationQueue.created_at.asc()).limit(self.RETRY_BATCH_SIZE).all()
             
             return notifications
             
@@ -69,73 +100,16 @@ class NotificationRetryService:
             logger.error(f"Error getting notifications for retry: {e}")
             return []
     
-    async def _retry_notification(self, notification: NotificationQueue) -> bool:
-        """Retry a single notification"""
-        try:
-            # Get user phone number from user_id
-            user_phone = self._get_user_phone(notification.user_id)
-            if not user_phone:
-                logger.warning(f"No phone found for user {notification.user_id}")
-                notification.status = "failed"
-                notification.error_message = "User phone not found"
-                try:
-                    self.db.commit()
-                except Exception:
-                    self.db.rollback()
-                return False
-            
-            # Attempt to send the message
-            success = self.whatsapp_service.send_message(user_phone, notification.message)
-            
-            # Update notification status
-            notification.retry_count += 1
-            notification.last_retry_at = datetime.utcnow()
-            
-            if success:
-                notification.status = "sent"
-                notification.sent_at = datetime.utcnow()
-                logger.info(f"Successfully retried notification {notification.id}")
-            else:
-                if notification.retry_count >= notification.max_retries:
-                    notification.status = "failed"
-                    notification.error_message = "Max retries exceeded"
-                    logger.warning(f"Notification {notification.id} failed after {notification.retry_count} retries")
-                else:
-                    notification.status = "pending"
-                    logger.info(f"Notification {notification.id} retry {notification.retry_count} failed, will retry later")
-            
-            try:
-                self.db.commit()
-            except Exception:
-                self.db.rollback()
-                raise
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Error retrying notification {notification.id}: {e}")
-            
-            try:
-                notification.retry_count += 1
-                notification.last_retry_at = datetime.utcnow()
-                notification.status = "failed"
-                notification.error_message = str(e)
-                self.db.commit()
-            except Exception:
-                self.db.rollback()
-            
-            return False
-    
-    def _get_user_phone(self, user_id: str) -> Optional[str]:
-        """Get user phone number from database"""
+    def _get_user_phones(self, user_ids: Set[str]) -> Dict[str, str]:
+        """Map user ids to WhatsApp numbers in one query"""
         try:
             from app.models.database_models import User
-            user = self.db.query(User).filter(User.id == user_id).first()
-            return user.whatsapp_id if user else None
+            rows = self.db.query(User.id, User.whatsapp_id).filter(User.id.in_(user_ids)).all()
+            return {str(row.id): row.whatsapp_id for row in rows}
             
         except Exception as e:
-            logger.error(f"Error getting user phone: {e}")
-            return None
+            logger.error(f"Error getting user phones: {e}")
+            return {}
     
     def get_retry_statistics(self) -> dict:
         """Get statistics about notification retries"""
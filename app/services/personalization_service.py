@@ -15,6 +15,7 @@ from app.models.personalization_models import (
 )
 from app.models.database_models import User, ServiceRequest, Conversation
 from app.services.ai_service import AIService
+from app.services.event_sink import get_event_sink
 
 
 class PersonalizationService:
@@ -699,12 +700,10 @@ class PersonalizationService:
                 confidence_level=0.7,
                 processed=True
             )
-            db.add(learning_data)
-            db.commit()
+            get_event_sink().emit(db, learning_data)
             
         except Exception as e:
             logger.error(f"Error tracking personalization usage: {e}")
-            db.rollback()
     
     async def get_smart_suggestions(
         self, 
@@ -0,0 +1,232 @@
+"""
+Prompt Assembly
+Splits LLM prompts into a static prefix (rules, service catalog, zone list)
+and a per-turn suffix. Prefixes are rendered once per catalog version and
+sent first, marked for Anthropic prompt caching, so each turn only pays for
+the suffix; token and cache-hit counts are recorded per prompt.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session, joinedload
+
+from app.config import get_settings
+from app.models.dynamic_services import Service, ServiceCategory, ServiceStatus, Zone
+from app.utils.cache_invalidation import invalidate_on_commit
+
+settings = get_settings()
+
+# Catalog used until the dynamic services tables can be read
+FALLBACK_SERVICES = [
+    {"code": "plomberie", "name": "Plomberie", "description": "fuites, robinets, WC, tuyaux", "category": None, "min_price": 5000, "max_price": 15000},
+    {"code": "electricite", "name": "Électricité", "description": "pannes, prises, interrupteurs", "category": None, "min_price": 3000, "max_price": 10000},
+    {"code": "electromenager", "name": "Électroménager", "description": "frigo, machine à laver, four", "category": None, "min_price": 2000, "max_price": 8000}
+]
+FALLBACK_ZONES = [
+    {"code": "bonamoussadi", "name": "Bonamoussadi", "type": "district", "full_path": "/cameroun/littoral/douala/bonamoussadi"},
+    {"code": "douala", "name": "Douala", "type": "city", "full_path": "/cameroun/littoral/douala"}
+]
+
+
+@dataclass
+class PromptCatalog:
+    """Service and zone lists shared by every static prompt prefix"""
+    services: List[Dict[str, Any]] = field(default_factory=lambda: [dict(s) for s in FALLBACK_SERVICES])
+    zones: List[Dict[str, Any]] = field(default_factory=lambda: [dict(z) for z in FALLBACK_ZONES])
+
+    @property
+    def version(self) -> str:
+        """Content hash: prefixes are only re-rendered when this changes"""
+        payload = json.dumps([self.services, self.zones], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+class SystemPrompt(str):
+    """
+    A system prompt made of a cacheable static prefix and a per-turn suffix
+
+    It is a plain string (prefix, blank line, suffix) for every consumer
+    that expects one; the Claude call sends the two parts as separate
+    blocks with the prefix marked for prompt caching.
+    """
+
+    def __new__(cls, static: str, dynamic: str = "", name: str = "default", version: str = ""):
+        text = f"{static}\n\n{dynamic}" if dynamic else static
+        prompt = super().__new__(cls, text)
+        prompt.static = static
+        prompt.dynamic = dynamic
+        prompt.name = name
+        prompt.version = version
+        return prompt
+
+    def to_anthropic_blocks(self) -> List[Dict[str, Any]]:
+        """`system` content blocks with the static prefix as the cache breakpoint"""
+        static_block: Dict[str, Any] = {"type": "text", "text": self.static}
+        if settings.prompt_caching_enabled:
+            static_block["cache_control"] = {"type": "ephemeral"}
+        blocks = [static_block]
+        if self.dynamic:
+            blocks.append({"type": "text", "text": self.dynamic})
+        return blocks
+
+
+def load_prompt_catalog(db: Session) -> PromptCatalog:
+    """Available services (with their category in one query) and active zones"""
+    services = (
+        db.query(Service)
+        .options(joinedload(Service.category))
+        .filter(Service.status == ServiceStatus.AVAILABLE.value)
+        .order_by(Service.code)
+        .all()
+    )
+    zones = db.query(Zone).filter(Zone.is_active == True).order_by(Zone.code).all()
+    return PromptCatalog(
+        services=[
+            {
+                "code": service.code,
+                "name": service.name_fr or service.name,
+                "description": service.description_fr or service.description,
+                "category": service.category.name_fr if service.category else None,
+                "min_price": service.min_price_xaf,
+                "max_price": service.max_price_xaf
+            }
+            for service in services
+        ],
+        zones=[
+            {
+                "code": zone.code,
+                "name": zone.name_fr or zone.name,
+                "type": zone.zone_type,
+                "full_path": zone.full_path
+            }
+            for zone in zones
+        ]
+    )
+
+
+class PromptAssembler:
+    """
+    Holds the current catalog and the rendered static prefixes
+
+    The catalog is reloaded after the TTL, or on the next read after a
+    service or zone write; prefixes are cached per (name, catalog version).
+    """
+
+    def __init__(self, catalog_ttl_seconds: Optional[float] = None):
+        self.catalog_ttl_seconds = catalog_ttl_seconds if catalog_ttl_seconds is not None else settings.prompt_catalog_ttl_seconds
+        self.catalog = PromptCatalog()
+        self._loaded_at: Optional[float] = None
+        self._stale = True
+        self._prefixes: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._stats = {"catalog_loads": 0, "prefix_renders": 0, "prefix_hits": 0}
+
+    def get_catalog(self, db: Optional[Session] = None) -> PromptCatalog:
+        """Current catalog, reloaded through `db` when due"""
+        if db is not None and self._due():
+            self._stale = False
+            self._loaded_at = time.monotonic()
+            try:
+                # Savepoint so a missing table does not poison the caller's transaction
+                with db.begin_nested():
+                    self.catalog = load_prompt_catalog(db)
+                self._stats["catalog_loads"] += 1
+            except Exception as e:
+                logger.error(f"Error loading prompt catalog, keeping version {self.catalog.version}: {e}")
+        return self.catalog
+
+    def static_prefix(self, name: str, render: Callable[[PromptCatalog], str], db: Optional[Session] = None) -> Tuple[str, str]:
+        """(prefix, catalog version) for a prompt, rendered once per catalog version"""
+        catalog = self.get_catalog(db)
+        version = catalog.version
+        with self._lock:
+            cached = self._prefixes.get(name)
+            if cached is not None and cached[1] == version:
+                self._stats["prefix_hits"] += 1
+                return cached
+        prefix = (render(catalog), version)
+        with self._lock:
+            self._prefixes[name] = prefix
+            self._stats["prefix_renders"] += 1
+        return prefix
+
+    def build(
+        self,
+        name: str,
+        render_static: Callable[[PromptCatalog], str],
+        dynamic: str = "",
+        db: Optional[Session] = None
+    ) -> SystemPrompt:
+        """System prompt made of the cached prefix for `name` and this turn's suffix"""
+        static, version = self.static_prefix(name, render_static, db)
+        return SystemPrompt(static, dynamic, name=name, version=version)
+
+    def mark_stale(self):
+        """Reload the catalog on the next read (called after service and zone writes)"""
+        self._stale = True
+
+    def record_usage(
+        self,
+        name: str,
+        provider: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ):
+        """Token counts of one LLM call, aggregated per prompt name"""
+        usage = self._usage[name]
+        usage["calls"] += 1
+        usage[f"{provider}_calls"] += 1
+        usage["input_tokens"] += input_tokens
+        usage["output_tokens"] += output_tokens
+        usage["cache_read_tokens"] += cache_read_tokens
+        usage["cache_write_tokens"] += cache_write_tokens
+        logger.debug(
+            f"Prompt '{name}' via {provider}: {input_tokens} input tokens "
+            f"({cache_read_tokens} cached, {cache_write_tokens} written), {output_tokens} output"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        usage = {}
+        for name, counts in self._usage.items():
+            prompt_tokens = counts["input_tokens"] + counts["cache_read_tokens"] + counts["cache_write_tokens"]
+            usage[name] = {
+                **counts,
+                "cache_hit_rate": counts["cache_read_tokens"] / prompt_tokens if prompt_tokens else 0.0
+            }
+        return {**self._stats, "catalog_version": self.catalog.version, "usage": usage}
+
+    def _due(self) -> bool:
+        if self._loaded_at is None or self._stale:
+            return True
+        return time.monotonic() - self._loaded_at >= self.catalog_ttl_seconds
+
+
+# Process-wide assembler shared by the conversation managers and the LLM service
+_prompt_assembler = PromptAssembler()
+
+
+def get_prompt_assembler() -> PromptAssembler:
+    return _prompt_assembler
+
+
+def record_prompt_usage(system_prompt: Optional[str], provider: str, **counts):
+    """Record token usage for a call made with `system_prompt` (named prompts or 'default')"""
+    _prompt_assembler.record_usage(getattr(system_prompt, "name", "default"), provider, **counts)
+
+
+def invalidate_prompt_catalog():
+    """Reload the catalog and re-render prefixes on the next read"""
+    _prompt_assembler.mark_stale()
+
+
+invalidate_on_commit([Service, ServiceCategory, Zone], "prompt_catalog_dirty", invalidate_prompt_catalog)
@@ -8,7 +8,7 @@ import hashlib
 from datetime import datetime, timedelta, timezone, date
 from typing import Dict, List, Optional, Tuple, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, case, func, desc
 from loguru import logger
 
 from app.models.database_models import Provider, ServiceRequest, User, ProviderReview, ProviderPhoto, ProviderCertification, ProviderSpecialization
@@ -17,6 +17,7 @@ from app.models.provider_models import (
     ProviderNotification, ProviderAvailability, ProviderDashboardWidget
 )
 from app.services.whatsapp_service import WhatsAppService
+from app.services.provider_stats import get_provider_stats, provider_activity
 from app.config import get_settings
 
 settings = get_settings()
@@ -297,53 +298,26 @@ class ProviderDashboardService:
             # Refresh provider object to ensure we have current data
             db.refresh(provider)
             
-            today = date.today()
-            week_start = today - timedelta(days=today.weekday())
-            month_start = today.replace(day=1)
-            
             provider_id = provider.id
             
-            # Today's requests
-            today_requests = db.query(ServiceRequest).filter(
-                and_(
-                    ServiceRequest.provider_id == provider_id,
-                    func.date(ServiceRequest.created_at) == today
-                )
-            ).all()
-            
-            # Week's requests
-            week_requests = db.query(ServiceRequest).filter(
-                and_(
-                    ServiceRequest.provider_id == provider_id,
-                    func.date(ServiceRequest.created_at) >= week_start
-                )
-            ).all()
-            
-            # Month's requests
-            month_requests = db.query(ServiceRequest).filter(
-                and_(
-                    ServiceRequest.provider_id == provider_id,
-                    func.date(ServiceRequest.created_at) >= month_start
-                )
-            ).all()
-            
-            # Calculate metrics
-            today_stats = self._calculate_request_stats(today_requests)
-            week_stats = self._calculate_request_stats(week_requests)
-            month_stats = self._calculate_request_stats(month_requests)
+            # Today / week / month counts, earnings and response time in one query (cached per provider)
+            stats = get_provider_stats(db, provider_id)
             
             # Earnings calculation (15% commission)
             commission_rate = 0.15
-            week_earnings = sum(float(r.final_price or 0) for r in week_requests if r.status == 'COMPLETED')
+            week_earnings = stats.week.earnings
             week_net_earnings = week_earnings * (1 - commission_rate)
             
-            # Notifications count
-            unread_notifications = db.query(ProviderNotification).filter(
+            # Unread and urgent notification counts in one query
+            unread_notifications, urgent_notifications = db.query(
+                func.count(ProviderNotification.id),
+                func.sum(case((ProviderNotification.is_urgent == True, 1), else_=0))
+            ).filter(
                 and_(
                     ProviderNotification.provider_id == provider_id,
                     ProviderNotification.is_read == False
                 )
-            ).count()
+            ).one()
             
             # Get provider attributes safely
             provider_rating = getattr(provider, 'rating', 0.0) or 0.0
@@ -364,14 +338,14 @@ class ProviderDashboardService:
                         "trust_score": float(provider_trust_score)
                     },
                     "today": {
-                        "new_requests": today_stats["new"],
-                        "in_progress": today_stats["in_progress"],
-                        "completed": today_stats["completed"]
+                        "new_requests": stats.today.new,
+                        "in_progress": stats.today.in_progress,
+                        "completed": stats.today.completed
                     },
                     "week": {
-                        "total_requests": len(week_requests),
-                        "completed_requests": week_stats["completed"],
-                        "acceptance_rate": week_stats["acceptance_rate"],
+                        "total_requests": stats.week.total,
+                        "completed_requests": stats.week.completed,
+                        "acceptance_rate": stats.week.acceptance_rate,
                         "gross_earnings": week_earnings,
                         "net_earnings": week_net_earnings,
                         "commission_paid": week_earnings * commission_rate
@@ -379,18 +353,12 @@ class ProviderDashboardService:
                     "performance": {
                         "average_rating": float(provider_rating),
                         "total_jobs": int(provider_total_jobs),
-                        "response_time_avg": self._calculate_avg_response_time(db, provider),
+                        "response_time_avg": self._calculate_avg_response_time(provider, stats.response_time_minutes),
                         "trust_score": float(provider_trust_score)
                     },
                     "notifications": {
                         "unread_count": unread_notifications,
-                        "urgent_count": db.query(ProviderNotification).filter(
-                            and_(
-                                ProviderNotification.provider_id == provider_id,
-                                ProviderNotification.is_read == False,
-                                ProviderNotification.is_urgent == True
-                            )
-                        ).count()
+                        "urgent_count": int(urgent_notifications or 0)
                     }
                 }
             }
@@ -502,63 +470,33 @@ class ProviderDashboardService:
                 start_date = today - timedelta(days=364)  # Last 365 days
                 date_format = "%b"  # Jan, Feb, Mar
             
+            # Revenue, service breakdown and heatmap from one range query
+            activity = provider_activity(db, provider.id, start_date, today)
+            
             # Revenue chart data
             revenue_data = []
-            current_date = start_date
-            
-            while current_date <= today:
-                daily_requests = db.query(ServiceRequest).filter(
-                    and_(
-                        ServiceRequest.provider_id == provider.id,
-                        func.date(ServiceRequest.created_at) == current_date,
-                        ServiceRequest.status == 'COMPLETED'
-                    )
-                ).all()
-                
-                daily_revenue = sum(r.final_price or 0 for r in daily_requests)
+            for current_date, totals in activity["daily"].items():
+                daily_revenue = totals["gross"]
                 daily_net = daily_revenue * 0.85  # After 15% commission
                 
                 revenue_data.append({
                     "date": current_date.strftime(date_format),
                     "gross": float(daily_revenue),
                     "net": float(daily_net),
-                    "requests": len(daily_requests)
+                    "requests": totals["requests"]
                 })
-                
-                current_date += timedelta(days=1)
             
             # Service type breakdown
-            service_requests = db.query(ServiceRequest).filter(
-                and_(
-                    ServiceRequest.provider_id == provider.id,
-                    func.date(ServiceRequest.created_at) >= start_date
-                )
-            ).all()
-            
-            service_breakdown = {}
-            for request in service_requests:
-                service = request.service_type
-                if service not in service_breakdown:
-                    service_breakdown[service] = 0
-                service_breakdown[service] += 1
+            service_breakdown = activity["service_breakdown"]
             
             # Activity heatmap (hours of day vs days of week)
             activity_data = []
             for hour in range(24):
                 for day in range(7):
-                    count = db.query(ServiceRequest).filter(
-                        and_(
-                            ServiceRequest.provider_id == provider.id,
-                            func.extract('hour', ServiceRequest.created_at) == hour,
-                            func.extract('dow', ServiceRequest.created_at) == day,
-                            func.date(ServiceRequest.created_at) >= start_date
-                        )
-                    ).count()
-                    
                     activity_data.append({
                         "hour": hour,
                         "day": day,
-                        "count": count
+                        "count": activity["heatmap"].get((hour, day), 0)
                     })
             
             # Transform revenue data for API format (List of dictionaries)
@@ -598,29 +536,12 @@ class ProviderDashboardService:
                 "error": "Failed to load chart data"
             }
     
-    def _calculate_request_stats(self, requests: List[ServiceRequest]) -> Dict[str, Any]:
-        """Calculate statistics for a list of requests"""
-        total = len(requests)
-        new = len([r for r in requests if r.status in ['PENDING', 'PROVIDER_NOTIFIED']])
-        in_progress = len([r for r in requests if r.status in ['ASSIGNED', 'IN_PROGRESS']])
-        completed = len([r for r in requests if r.status == 'COMPLETED'])
-        declined = len([r for r in requests if r.status == 'CANCELLED'])
-        
-        acceptance_rate = ((total - declined) / total * 100) if total > 0 else 0
-        
-        return {
-            "total": total,
-            "new": new,
-            "in_progress": in_progress,
-            "completed": completed,
-            "declined": declined,
-            "acceptance_rate": round(acceptance_rate, 1)
-        }
-    
-    def _calculate_avg_response_time(self, db: Session, provider: Provider) -> int:
+    def _calculate_avg_response_time(self, provider: Provider, measured_minutes: Optional[float] = None) -> int:
         """Calculate average response time in minutes"""
-        # This would need more detailed tracking in practice
-        # For now, return a reasonable default based on provider performance
+        if measured_minutes is not None:
+            return int(round(measured_minutes))
+        
+        # Without accepted requests this month, estimate from provider performance
         if provider.acceptance_rate and provider.acceptance_rate > 80:
             return 12  # Fast responder
         elif provider.acceptance_rate and provider.acceptance_rate > 60:
@@ -7,11 +7,13 @@ import logging
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, String
+from sqlalchemy import and_, or_, func, case, extract, String, Float
 
 from app.models.database_models import Provider, ServiceRequest, User
 from app.config import get_settings
+from app.services.landmark_gazetteer import get_landmark_gazetteer
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -33,10 +35,14 @@ class ProviderScore:
 class ProviderMatcher:
     """Advanced provider matching algorithm with scoring system"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, batch_scoring: bool = True):
         self.db = db
         self.min_rating_threshold = 0.0  # Allow new providers with 0 rating
         self.max_providers_to_notify = 3
+        # Score all candidates from one aggregate query instead of 2 queries per provider
+        self.batch_scoring = batch_scoring
+        self.response_time_window_days = 30
+        self.active_job_statuses = ['assigned', 'in_progress']
         
         # Scoring weights
         self.weights = {
@@ -180,6 +186,12 @@ class ProviderMatcher:
         - Service specialization
         - Current availability
         """
+        if self.batch_scoring and providers:
+            try:
+                return self._rank_providers_batch(providers, request)
+            except Exception as e:
+                logger.error(f"Batch ranking failed, falling back to per-provider scoring: {e}")
+        
         try:
             scored_providers = []
             
@@ -222,6 +234,100 @@ class ProviderMatcher:
             logger.error(f"Error ranking providers: {e}")
             return []
     
+    def _rank_providers_batch(self, providers: List[Provider], request: ServiceRequest) -> List[ProviderScore]:
+        """
+        Rank providers with a single aggregate query for all candidates.
+        
+        Produces exactly the same scores and ordering as the per-provider path.
+        """
+        metrics = self._load_provider_metrics([provider.id for provider in providers])
+        
+        scores = np.array([
+            [
+                self._calculate_proximity_score(provider, request.location),
+                self._calculate_rating_score(provider),
+                self._response_time_bucket(metrics.get(provider.id, {}).get('avg_response_minutes')),
+                self._calculate_specialization_score(provider, request.service_type),
+                self._workload_bucket(metrics.get(provider.id, {}).get('active_jobs', 0))
+                if provider.is_available else 0.0
+            ]
+            for provider in providers
+        ], dtype=float)
+        
+        # Accumulate column by column in the same order as the scalar path so
+        # the floating point totals (and therefore tie ordering) are identical
+        total_scores = (
+            scores[:, 0] * self.weights['proximity'] +
+            scores[:, 1] * self.weights['rating'] +
+            scores[:, 2] * self.weights['response_time'] +
+            scores[:, 3] * self.weights['specialization'] +
+            scores[:, 4] * self.weights['availability']
+        )
+        
+        scored_providers = [
+            ProviderScore(
+                provider_id=provider.id,
+                provider=provider,
+                total_score=float(total_scores[i]),
+                proximity_score=float(scores[i, 0]),
+                rating_score=float(scores[i, 1]),
+                response_time_score=float(scores[i, 2]),
+                specialization_score=float(scores[i, 3]),
+                availability_score=float(scores[i, 4])
+            )
+            for i, provider in enumerate(providers)
+        ]
+        
+        scored_providers.sort(key=lambda x: x.total_score, reverse=True)
+        
+        logger.info(f"Batch ranked {len(scored_providers)} providers by score")
+        return scored_providers
+    
+    def _load_provider_metrics(self, provider_ids: List[int]) -> Dict[int, Dict[str, Optional[float]]]:
+        """
+        Load response time and workload metrics for many providers at once.
+        
+        Returns {provider_id: {'avg_response_minutes': float | None, 'active_jobs': int}}
+        computed by one GROUP BY query over ServiceRequest.
+        """
+        if not provider_ids:
+            return {}
+        
+        cutoff = datetime.now() - timedelta(days=self.response_time_window_days)
+        in_window = and_(
+            ServiceRequest.accepted_at.isnot(None),
+            ServiceRequest.created_at.isnot(None),
+            ServiceRequest.created_at >= cutoff
+        )
+        is_active_job = ServiceRequest.status.in_(self.active_job_statuses)
+        response_minutes = self._response_minutes_expression()
+        
+        rows = self.db.query(
+            ServiceRequest.provider_id,
+            func.avg(case((in_window, response_minutes), else_=None)).label('avg_response_minutes'),
+            func.sum(case((is_active_job, 1), else_=0)).label('active_jobs')
+        ).filter(
+            ServiceRequest.provider_id.in_(provider_ids),
+            or_(in_window, is_active_job)
+        ).group_by(ServiceRequest.provider_id).all()
+        
+        return {
+            row.provider_id: {
+                'avg_response_minutes': float(row.avg_response_minutes) if row.avg_response_minutes is not None else None,
+                'active_jobs': int(row.active_jobs or 0)
+            }
+            for row in rows
+        }
+    
+    def _response_minutes_expression(self):
+        """Dialect-aware SQL expression for (accepted_at - created_at) in minutes"""
+        dialect = self.db.get_bind().dialect.name
+        
+        if dialect == 'sqlite':
+            return (func.julianday(ServiceRequest.accepted_at) - func.julianday(ServiceRequest.created_at)) * 1440.0
+        
+        return extract('epoch', ServiceRequest.accepted_at - ServiceRequest.created_at).cast(Float) / 60.0
+    
     def get_best_providers(self, request: ServiceRequest, limit: int = None) -> List[ProviderScore]:
         """Get best matched providers for a service request"""
         if limit is None:
@@ -240,25 +346,11 @@ class ProviderMatcher:
         if not location:
             return []
         
-        location_lower = location.lower()
+        # Neighborhoods, zones and landmarks found in the text, best match first
         keywords = []
-        
-        # Check for specific neighborhoods and landmarks
-        location_mappings = {
-            'bonamoussadi': 'bonamoussadi',
-            'makepe': 'makepe',
-            'bonapriso': 'bonapriso', 
-            'akwa': 'akwa',
-            'deido': 'deido',
-            'bonanjo': 'bonanjo',
-            'shell': 'station_shell',
-            'total': 'station_total',
-            'carrefour': 'carrefour',
-            'marché': 'marché'
-        }
-        
-        for term, keyword in location_mappings.items():
-            if term in location_lower:
+        for match in get_landmark_gazetteer(self.db).resolve(location, limit=10):
+            keyword = match.place.keyword
+            if keyword and keyword not in keywords:
                 keywords.append(keyword)
         
         # Default to bonamoussadi if no specific location found
@@ -318,7 +410,7 @@ class ProviderMatcher:
             recent_requests = self.db.query(ServiceRequest).filter(
                 ServiceRequest.provider_id == provider.id,
                 ServiceRequest.accepted_at.isnot(None),
-                ServiceRequest.created_at >= datetime.now() - timedelta(days=30)
+                ServiceRequest.created_at >= datetime.now() - timedelta(days=self.response_time_window_days)
             ).all()
             
             if not recent_requests:
@@ -334,24 +426,33 @@ class ProviderMatcher:
                 return 0.5
             
             avg_response_time = sum(response_times) / len(response_times)
-            
-            # Score based on response time (faster = better)
-            # Perfect score for responses under 5 minutes
-            if avg_response_time <= 5:
-                return 1.0
-            elif avg_response_time <= 10:
-                return 0.8
-            elif avg_response_time <= 20:
-                return 0.6
-            elif avg_response_time <= 30:
-                return 0.4
-            else:
-                return 0.2
+            return self._response_time_bucket(avg_response_time)
             
         except Exception as e:
             logger.error(f"Error calculating response time score: {e}")
             return 0.5
     
+    def _response_time_bucket(self, avg_response_time: Optional[float]) -> float:
+        """Map an average response time in minutes to a score (0-1)"""
+        if avg_response_time is None:
+            return 0.5  # Neutral score for new providers
+        
+        # Round away sub-second noise so SQL and Python averages bucket identically
+        avg_response_time = round(avg_response_time, 4)
+        
+        # Score based on response time (faster = better)
+        # Perfect score for responses under 5 minutes
+        if avg_response_time <= 5:
+            return 1.0
+        elif avg_response_time <= 10:
+            return 0.8
+        elif avg_response_time <= 20:
+            return 0.6
+        elif avg_response_time <= 30:
+            return 0.4
+        else:
+            return 0.2
+    
     def _calculate_specialization_score(self, provider: Provider, service_type: str) -> float:
         """Calculate service specialization score (0-1)"""
         try:
@@ -385,19 +486,22 @@ class ProviderMatcher:
             # Check current workload
             current_jobs = self.db.query(ServiceRequest).filter(
                 ServiceRequest.provider_id == provider.id,
-                ServiceRequest.status.in_(['assigned', 'in_progress'])
+                ServiceRequest.status.in_(self.active_job_statuses)
             ).count()
             
-            # Score based on current workload
-            if current_jobs == 0:
-                return 1.0  # Fully available
-            elif current_jobs == 1:
-                return 0.8  # Slightly busy
-            elif current_jobs == 2:
-                return 0.6  # Moderately busy
-            else:
-                return 0.2  # Very busy
+            return self._workload_bucket(current_jobs)
             
         except Exception as e:
             logger.error(f"Error calculating availability score: {e}")
-            return 0.5
\ No newline at end of file
+            return 0.5
+    
+    def _workload_bucket(self, current_jobs: int) -> float:
+        """Map the number of active jobs to an availability score (0-1)"""
+        if current_jobs == 0:
+            return 1.0  # Fully available
+        elif current_jobs == 1:
+            return 0.8  # Slightly busy
+        elif current_jobs == 2:
+            return 0.6  # Moderately busy
+        else:
+            return 0.2  # Very busy
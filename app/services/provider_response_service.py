@@ -0,0 +1,79 @@
+"""
+Provider Response Service
+Handles WhatsApp replies from registered providers to the missions they
+were sent (OUI to accept, NON to decline), ported from the legacy webhook's
+provider branch so the ingestion workers keep the same contract
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Provider, RequestStatus, ServiceRequest
+
+ACCEPT_REPLIES = {"oui", "yes", "ok", "d'accord", "accepte"}
+DECLINE_REPLIES = {"non", "no", "refuse", "pas disponible"}
+
+REFUSAL_MESSAGE = "Message reçu. Nous comprenons que vous n'êtes pas disponible pour cette mission."
+
+HELP_MESSAGE = """
+Pour répondre à une demande de mission:
+• Tapez "OUI" pour accepter
+• Tapez "NON" pour refuser
+
+Pour toute autre question, contactez le support Djobea AI.
+""".strip()
+
+
+def get_provider_by_whatsapp_id(db: Session, whatsapp_id: str) -> Optional[Provider]:
+    """Registered provider writing from this WhatsApp number, if any"""
+    return db.query(Provider).filter(Provider.whatsapp_id == whatsapp_id).first()
+
+
+async def handle_provider_response(provider: Provider, message: str, db: Session) -> Optional[str]:
+    """Apply a provider's reply and return the confirmation to send back to them"""
+    reply = message.lower().strip()
+
+    if reply in ACCEPT_REPLIES:
+        # Missions are not tracked per provider yet: the latest pending request is the one accepted
+        request = (
+            db.query(ServiceRequest)
+            .filter(ServiceRequest.status == RequestStatus.PENDING)
+            .order_by(ServiceRequest.created_at.desc())
+            .first()
+        )
+        if request is None:
+            logger.info(f"Provider {provider.id} accepted but no request is pending")
+            return None
+
+        request.provider_id = provider.id
+        request.status = RequestStatus.ASSIGNED
+        request.accepted_at = datetime.utcnow()
+        provider.total_jobs = (provider.total_jobs or 0) + 1
+        db.commit()
+
+        from app.services.communication_service import CommunicationService
+        await CommunicationService().send_provider_acceptance(request.id, provider.id, db)
+
+        logger.info(f"Provider {provider.id} accepted request {request.id}")
+        client = request.user
+        return f"""
+✅ Mission acceptée avec succès !
+
+📋 Détails de la mission:
+- Service: {request.service_type}
+- Description: {request.description}
+- Adresse: {request.location}
+- Client: {(client.name if client else None) or 'Non spécifié'}
+- Téléphone client: {client.phone_number if client else 'Non spécifié'}
+
+Veuillez contacter le client pour organiser l'intervention.
+        """.strip()
+
+    if reply in DECLINE_REPLIES:
+        logger.info(f"Provider {provider.id} refused a request")
+        return REFUSAL_MESSAGE
+
+    return HELP_MESSAGE
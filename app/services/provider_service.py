@@ -1,14 +1,19 @@
 """
 Provider service for managing service providers in the Djobea AI platform
 """
+import base64
+import json
+import threading
+import time
 import uuid
 import math
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from datetime import datetime, date
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc, asc
+from sqlalchemy import func, and_, or_, desc, asc, case
 from loguru import logger
 
+from app.config import get_settings
 from app.models.auth_models import User
 from app.models.database_models import Provider as ProviderModel
 from app.models.provider_models import (
@@ -18,6 +23,74 @@ from app.models.provider_models import (
 )
 from app.services.communication_service import CommunicationService
 
+settings = get_settings()
+
+# Sort keys whose cursor values are datetimes
+_DATETIME_SORTS = (SortBy.JOIN_DATE.value, SortBy.LAST_ACTIVITY.value)
+
+
+def encode_cursor(sort_key: str, value: Any, last_id: int) -> str:
+    """Opaque cursor for the row after (value, last_id) under `sort_key`"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_key, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str) -> Tuple[Any, int]:
+    """(sort value, id) of a cursor; ValueError if it is malformed or from another sort"""
+    try:
+        key, value, last_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = int(last_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if key != sort_key:
+        raise ValueError("Pagination cursor does not match the requested sort")
+    if value is not None and key.split(":")[0] in _DATETIME_SORTS:
+        value = datetime.fromisoformat(value)
+    return value, last_id
+
+
+# Providers list stats block, shared across requests and refreshed every
+# provider_list_stats_ttl_seconds or when a provider is written here
+_stats_lock = threading.Lock()
+_cached_stats: Optional[Tuple[float, ProvidersStats]] = None
+
+
+def invalidate_providers_list_stats():
+    """Drop the cached providers list stats"""
+    global _cached_stats
+    with _stats_lock:
+        _cached_stats = None
+
+
+def aggregate_provider_counts(db: Session, month_start: datetime) -> Dict[str, Any]:
+    """Provider counts by status and availability, average rating and new providers in one query"""
+    rows = db.query(
+        ProviderModel.status,
+        ProviderModel.is_available,
+        func.count(ProviderModel.id),
+        func.count(ProviderModel.rating),
+        func.sum(ProviderModel.rating),
+        func.sum(case((ProviderModel.created_at >= month_start, 1), else_=0))
+    ).group_by(ProviderModel.status, ProviderModel.is_available).all()
+
+    counts = {"total": 0, "active": 0, "inactive": 0, "suspended": 0, "available": 0, "newThisMonth": 0}
+    rated = 0
+    rating_sum = 0.0
+    for status, is_available, total, rated_count, ratings, new in rows:
+        counts["total"] += total
+        if status in ("active", "inactive", "suspended"):
+            counts[status] += total
+        if is_available:
+            counts["available"] += total
+        counts["newThisMonth"] += int(new or 0)
+        rated += rated_count
+        rating_sum += float(ratings or 0.0)
+    counts["avgRating"] = rating_sum / rated if rated else 0.0
+    return counts
+
+
 class ProviderService:
     def __init__(self, db: Session):
         self.db = db
@@ -27,85 +100,164 @@ class ProviderService:
         self, 
         filters: Optional[ProvidersFilters] = None,
         page: int = 1,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        estimate_total: bool = False
     ) -> Tuple[List[Provider], Pagination, ProvidersStats]:
-        """Get paginated list of providers with filtering and sorting"""
-        
-        query = self.db.query(ProviderModel)
-        
-        # Apply filters
-        if filters:
-            if filters.search:
-                search_term = f"%{filters.search}%"
-                query = query.filter(
-                    or_(
-                        ProviderModel.name.ilike(search_term),
-                        ProviderModel.email.ilike(search_term),
-                        ProviderModel.service_type.ilike(search_term),
-                        ProviderModel.specialty.ilike(search_term)
-                    )
-                )
-            
-            if filters.status:
-                query = query.filter(ProviderModel.status == filters.status.value)
-            
-            if filters.specialty:
-                query = query.filter(ProviderModel.specialty.ilike(f"%{filters.specialty}%"))
-            
-            if filters.zone:
-                query = query.filter(ProviderModel.coverage_zone.ilike(f"%{filters.zone}%"))
-            
-            if filters.minRating:
-                query = query.filter(ProviderModel.rating >= filters.minRating)
-            
-            if filters.services:
-                # Filter by services (assuming service_type contains the services)
-                service_filters = [
-                    ProviderModel.service_type.ilike(f"%{service}%") 
-                    for service in filters.services
-                ]
-                query = query.filter(or_(*service_filters))
-            
-            if filters.availability:
-                query = query.filter(ProviderModel.availability == filters.availability.value)
-            
-            # Apply sorting
-            if filters.sortBy:
-                sort_column = self._get_sort_column(filters.sortBy)
-                if sort_column is not None:
-                    if filters.sortOrder == SortOrder.DESC:
-                        query = query.order_by(desc(sort_column))
-                    else:
-                        query = query.order_by(asc(sort_column))
-        
-        # Get total count
-        total = query.count()
-        
-        # Calculate pagination
+        """
+        Get a page of providers with filtering and sorting
+
+        Pages are read by keyset on (sort value, id): pass the previous page's
+        nextCursor to continue. Without a cursor, page > 1 falls back to an
+        offset for older clients. With estimate_total the exact count is
+        replaced by the cached total (unfiltered) or a capped count.
+        """
+        query = self._apply_filters(self.db.query(ProviderModel), filters)
+        rows, next_cursor = self._keyset_rows(
+            query, filters, limit, cursor=cursor, offset=0 if cursor else (page - 1) * limit
+        )
+        providers = [self._convert_to_provider(provider) for provider, _ in rows]
+
+        stats = self._get_provider_stats()
+        if estimate_total:
+            total, estimated = self._estimate_total(query, filters, stats)
+        else:
+            total, estimated = query.count(), False
         total_pages = math.ceil(total / limit)
-        offset = (page - 1) * limit
-        
-        # Get paginated results
-        providers_data = query.offset(offset).limit(limit).all()
-        
-        # Convert to Pydantic models
-        providers = [self._convert_to_provider(provider) for provider in providers_data]
-        
-        # Create pagination
+
         pagination = Pagination(
             page=page,
             limit=limit,
             total=total,
             totalPages=total_pages,
-            hasNext=page < total_pages,
-            hasPrev=page > 1
+            hasNext=next_cursor is not None,
+            hasPrev=cursor is not None or page > 1,
+            nextCursor=next_cursor,
+            estimatedTotal=estimated
         )
         
-        # Get stats
-        stats = self._get_provider_stats()
-        
         return providers, pagination, stats
 
+    def iter_providers(
+        self,
+        filters: Optional[ProvidersFilters] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[Provider]:
+        """Every provider matching the filters, read chunk by chunk along the keyset cursor"""
+        chunk_size = chunk_size or settings.provider_export_chunk_size
+        query = self._apply_filters(self.db.query(ProviderModel), filters)
+        cursor = None
+        while True:
+            rows, cursor = self._keyset_rows(query, filters, chunk_size, cursor=cursor)
+            for provider, _ in rows:
+                yield self._convert_to_provider(provider)
+            if cursor is None:
+                return
+
+    def _apply_filters(self, query, filters: Optional[ProvidersFilters]):
+        """Apply list filters to a providers query"""
+        if not filters:
+            return query
+
+        if filters.search:
+            search_term = f"%{filters.search}%"
+            query = query.filter(
+                or_(
+                    ProviderModel.name.ilike(search_term),
+                    ProviderModel.email.ilike(search_term),
+                    ProviderModel.service_type.ilike(search_term),
+                    ProviderModel.specialty.ilike(search_term)
+                )
+            )
+        
+        if filters.status:
+            query = query.filter(ProviderModel.status == filters.status.value)
+        
+        if filters.specialty:
+            query = query.filter(ProviderModel.specialty.ilike(f"%{filters.specialty}%"))
+        
+        if filters.zone:
+            query = query.filter(ProviderModel.coverage_zone.ilike(f"%{filters.zone}%"))
+        
+        if filters.minRating:
+            query = query.filter(ProviderModel.rating >= filters.minRating)
+        
+        if filters.services:
+            # Filter by services (assuming service_type contains the services)
+            service_filters = [
+                ProviderModel.service_type.ilike(f"%{service}%") 
+                for service in filters.services
+            ]
+            query = query.filter(or_(*service_filters))
+        
+        if filters.availability:
+            query = query.filter(ProviderModel.availability == filters.availability.value)
+
+        return query
+
+    def _sort_spec(self, filters: Optional[ProvidersFilters]) -> Tuple[str, Any, bool]:
+        """Cursor sort key, sort expression and direction; id alone when no sort is requested"""
+        descending = bool(filters and filters.sortOrder == SortOrder.DESC)
+        sort_column = self._get_sort_column(filters.sortBy) if filters and filters.sortBy else None
+        if sort_column is None:
+            return f"id:{'desc' if descending else 'asc'}", ProviderModel.id, descending
+        return f"{filters.sortBy.value}:{'desc' if descending else 'asc'}", sort_column, descending
+
+    def _keyset_rows(
+        self,
+        query,
+        filters: Optional[ProvidersFilters],
+        limit: int,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Tuple[ProviderModel, Any]], Optional[str]]:
+        """
+        (provider, sort value) rows after `cursor` and the cursor of the next page
+
+        Rows are ordered by the sort expression with id as tiebreaker, both in
+        the requested direction, so the page boundary is a single row comparison.
+        """
+        sort_key, expression, descending = self._sort_spec(filters)
+        direction = desc if descending else asc
+        query = query.add_columns(expression.label("sort_value"))
+        if expression is ProviderModel.id:
+            query = query.order_by(direction(ProviderModel.id))
+        else:
+            query = query.order_by(direction(expression), direction(ProviderModel.id))
+
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_key)
+            after = ProviderModel.id < last_id if descending else ProviderModel.id > last_id
+            if expression is not ProviderModel.id:
+                beyond = expression < value if descending else expression > value
+                after = or_(beyond, and_(expression == value, after))
+            query = query.filter(after)
+        elif offset:
+            query = query.offset(offset)
+
+        rows = query.limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        provider, sort_value = rows[-1]
+        return rows, encode_cursor(sort_key, sort_value, provider.id)
+
+    def _has_filters(self, filters: Optional[ProvidersFilters]) -> bool:
+        return bool(filters and (
+            filters.search or filters.status or filters.specialty or filters.zone
+            or filters.minRating or filters.services or filters.availability
+        ))
+
+    def _estimate_total(self, query, filters: Optional[ProvidersFilters], stats: ProvidersStats) -> Tuple[int, bool]:
+        """Total without a full count: the cached stats total, or a count capped at provider_list_count_cap"""
+        if not self._has_filters(filters):
+            return stats.total, True
+        cap = settings.provider_list_count_cap
+        total = self.db.query(func.count()).select_from(
+            query.with_entities(ProviderModel.id).limit(cap).subquery()
+        ).scalar()
+        return total, total >= cap
+
     def get_provider_by_id(self, provider_id: str) -> Optional[Provider]:
         """Get a provider by ID"""
         provider = self.db.query(ProviderModel).filter(ProviderModel.id == provider_id).first()
@@ -143,6 +295,7 @@ class ProviderService:
         provider = ProviderModel(**provider_data)
         self.db.add(provider)
         self.db.commit()
+        invalidate_providers_list_stats()
         self.db.refresh(provider)
         
         logger.info(f"Created new provider: {provider.name} (ID: {provider.id})")
@@ -186,6 +339,7 @@ class ProviderService:
         
         provider.updated_at = datetime.utcnow()
         self.db.commit()
+        invalidate_providers_list_stats()
         self.db.refresh(provider)
         
         logger.info(f"Updated provider: {provider.name} (ID: {provider.id})")
@@ -199,6 +353,7 @@ class ProviderService:
         
         self.db.delete(provider)
         self.db.commit()
+        invalidate_providers_list_stats()
         
         logger.info(f"Deleted provider: {provider.name} (ID: {provider.id})")
         return True
@@ -212,6 +367,7 @@ class ProviderService:
         provider.status = status.value
         provider.updated_at = datetime.utcnow()
         self.db.commit()
+        invalidate_providers_list_stats()
         self.db.refresh(provider)
         
         logger.info(f"Updated provider status: {provider.name} -> {status.value}")
@@ -355,36 +511,30 @@ class ProviderService:
             return "poor"
 
     def _get_sort_column(self, sort_by: SortBy):
-        """Get SQLAlchemy column for sorting"""
+        """Get SQLAlchemy expression for sorting (never NULL, so it can bound a keyset page)"""
         if sort_by == SortBy.NAME:
             return ProviderModel.name
         elif sort_by == SortBy.RATING:
-            return ProviderModel.rating
+            return func.coalesce(ProviderModel.rating, 0.0)
         elif sort_by == SortBy.MISSIONS:
-            return ProviderModel.total_missions
+            return func.coalesce(ProviderModel.total_jobs, 0)
         elif sort_by == SortBy.JOIN_DATE:
             return ProviderModel.created_at
         elif sort_by == SortBy.LAST_ACTIVITY:
-            return ProviderModel.updated_at
+            return func.coalesce(ProviderModel.updated_at, ProviderModel.created_at)
         return None
 
     def _get_provider_stats(self) -> ProvidersStats:
-        """Get provider statistics"""
-        total = self.db.query(ProviderModel).count()
-        active = self.db.query(ProviderModel).filter(ProviderModel.status == "active").count()
-        inactive = self.db.query(ProviderModel).filter(ProviderModel.status == "inactive").count()
-        suspended = self.db.query(ProviderModel).filter(ProviderModel.status == "suspended").count()
-        available = self.db.query(ProviderModel).filter(ProviderModel.availability == "available").count()
-        
-        # Calculate average rating
-        avg_rating_result = self.db.query(func.avg(ProviderModel.rating)).scalar()
-        avg_rating = float(avg_rating_result or 0.0)
-        
-        # Get new providers this month
-        current_month = datetime.now().replace(day=1)
-        new_this_month = self.db.query(ProviderModel).filter(
-            ProviderModel.created_at >= current_month
-        ).count()
+        """Get provider statistics, cached for provider_list_stats_ttl_seconds"""
+        global _cached_stats
+        now = time.monotonic()
+        with _stats_lock:
+            cached = _cached_stats
+        if cached is not None and now - cached[0] < settings.provider_list_stats_ttl_seconds:
+            return cached[1]
+
+        current_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        counts = aggregate_provider_counts(self.db, current_month)
         
         # Get top performers
         top_performers_data = self.db.query(ProviderModel).filter(
@@ -393,13 +543,7 @@ class ProviderService:
         
         top_performers = [self._convert_to_provider(provider) for provider in top_performers_data]
         
-        return ProvidersStats(
-            total=total,
-            active=active,
-            inactive=inactive,
-            suspended=suspended,
-            available=available,
-            avgRating=avg_rating,
-            newThisMonth=new_this_month,
-            topPerformers=top_performers
-        )
\ No newline at end of file
+        stats = ProvidersStats(**counts, topPerformers=top_performers)
+        with _stats_lock:
+            _cached_stats = (now, stats)
+        return stats
\ No newline at end of file
@@ -0,0 +1,269 @@
+"""
+Provider Stats
+Per-provider dashboard figures (today / week / month counts, earnings and
+response time) from one conditional-aggregate query over half-open
+created_at ranges, served from a per-provider cache that is invalidated
+whenever one of the provider's requests is written.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, inspect
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.database_models import RequestStatus, ServiceRequest
+from app.utils.cache_invalidation import invalidate_on_commit
+
+settings = get_settings()
+
+# Both the RequestStatus values and the legacy uppercase names still found in
+# older rows and callers
+NEW_STATUSES = (RequestStatus.PENDING.value, "PENDING", "PROVIDER_NOTIFIED")
+IN_PROGRESS_STATUSES = (RequestStatus.ASSIGNED.value, RequestStatus.IN_PROGRESS.value, "ASSIGNED", "IN_PROGRESS")
+COMPLETED_STATUSES = (RequestStatus.COMPLETED.value, "COMPLETED")
+DECLINED_STATUSES = (RequestStatus.CANCELLED.value, "CANCELLED")
+
+
+@dataclass
+class ProviderPeriodStats:
+    """Request counts and earnings for one period"""
+    total: int = 0
+    new: int = 0
+    in_progress: int = 0
+    completed: int = 0
+    declined: int = 0
+    earnings: float = 0.0
+
+    @property
+    def acceptance_rate(self) -> float:
+        """Share of requests not declined, as a percentage"""
+        return round((self.total - self.declined) / self.total * 100, 1) if self.total else 0.0
+
+
+@dataclass
+class ProviderStats:
+    """Dashboard figures for one provider on one day"""
+    provider_id: int
+    day: date
+    today: ProviderPeriodStats = field(default_factory=ProviderPeriodStats)
+    week: ProviderPeriodStats = field(default_factory=ProviderPeriodStats)
+    month: ProviderPeriodStats = field(default_factory=ProviderPeriodStats)
+    # Average minutes from request creation to acceptance this month, None without data
+    response_time_minutes: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for period in ("today", "week", "month"):
+            data[period]["acceptance_rate"] = getattr(self, period).acceptance_rate
+        return data
+
+
+def day_range(start: date, end: date) -> Tuple[datetime, datetime]:
+    """Half-open [start 00:00, day after end 00:00) range, so created_at stays index-searchable"""
+    return datetime.combine(start, dt_time.min), datetime.combine(end + timedelta(days=1), dt_time.min)
+
+
+def period_starts(day: date) -> Dict[str, date]:
+    """First day of the today / week (Monday) / month periods"""
+    return {
+        "today": day,
+        "week": day - timedelta(days=day.weekday()),
+        "month": day.replace(day=1),
+    }
+
+
+def _seconds_between(start, end, dialect: str):
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    return (func.julianday(end) - func.julianday(start)) * 86400.0
+
+
+def _period_columns(name: str, since: datetime) -> List:
+    in_period = ServiceRequest.created_at >= since
+
+    def count(statuses=None):
+        condition = in_period if statuses is None else and_(in_period, ServiceRequest.status.in_(statuses))
+        return func.sum(case((condition, 1), else_=0))
+
+    completed = and_(in_period, ServiceRequest.status.in_(COMPLETED_STATUSES))
+    return [
+        count().label(f"{name}_total"),
+        count(NEW_STATUSES).label(f"{name}_new"),
+        count(IN_PROGRESS_STATUSES).label(f"{name}_in_progress"),
+        count(COMPLETED_STATUSES).label(f"{name}_completed"),
+        count(DECLINED_STATUSES).label(f"{name}_declined"),
+        func.sum(case((completed, func.coalesce(ServiceRequest.final_cost, 0)), else_=0)).label(f"{name}_earnings"),
+    ]
+
+
+def compute_provider_stats(db: Session, provider_id: int, day: Optional[date] = None) -> ProviderStats:
+    """Today / week / month figures for a provider in a single query"""
+    day = day or date.today()
+    starts = period_starts(day)
+    lower, upper = day_range(min(starts.values()), day)
+    since = {name: datetime.combine(start, dt_time.min) for name, start in starts.items()}
+
+    dialect = db.get_bind().dialect.name
+    accepted = and_(ServiceRequest.created_at >= since["month"], ServiceRequest.accepted_at.isnot(None))
+    response_seconds = _seconds_between(ServiceRequest.created_at, ServiceRequest.accepted_at, dialect)
+
+    columns = []
+    for name in ("today", "week", "month"):
+        columns += _period_columns(name, since[name])
+    columns += [
+        func.sum(case((accepted, response_seconds), else_=0)).label("response_seconds"),
+        func.sum(case((accepted, 1), else_=0)).label("response_count"),
+    ]
+
+    row = db.query(*columns).filter(
+        ServiceRequest.provider_id == provider_id,
+        ServiceRequest.created_at >= lower,
+        ServiceRequest.created_at < upper
+    ).one()._mapping
+
+    stats = ProviderStats(provider_id=provider_id, day=day)
+    for name in ("today", "week", "month"):
+        setattr(stats, name, ProviderPeriodStats(
+            total=int(row[f"{name}_total"] or 0),
+            new=int(row[f"{name}_new"] or 0),
+            in_progress=int(row[f"{name}_in_progress"] or 0),
+            completed=int(row[f"{name}_completed"] or 0),
+            declined=int(row[f"{name}_declined"] or 0),
+            earnings=float(row[f"{name}_earnings"] or 0),
+        ))
+    if row["response_count"]:
+        stats.response_time_minutes = round(float(row["response_seconds"]) / int(row["response_count"]) / 60, 1)
+    return stats
+
+
+def _local_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def provider_activity(db: Session, provider_id: int, start: date, end: date) -> Dict[str, Any]:
+    """
+    Chart inputs for a provider over [start, end] from one range query
+
+    Returns per-day completed revenue/counts, a service type breakdown and an
+    (hour, day of week) heatmap with Sunday as day 0.
+    """
+    lower, upper = day_range(start, end)
+    rows = db.query(
+        ServiceRequest.created_at, ServiceRequest.status, ServiceRequest.final_cost, ServiceRequest.service_type
+    ).filter(
+        ServiceRequest.provider_id == provider_id,
+        ServiceRequest.created_at >= lower,
+        ServiceRequest.created_at < upper
+    ).all()
+
+    daily = {start + timedelta(days=i): {"gross": 0.0, "requests": 0} for i in range((end - start).days + 1)}
+    service_breakdown: Dict[str, int] = {}
+    heatmap: Dict[Tuple[int, int], int] = {}
+    for created_at, status, final_cost, service_type in rows:
+        created_at = _local_naive(created_at)
+        if status in COMPLETED_STATUSES and created_at.date() in daily:
+            daily[created_at.date()]["gross"] += float(final_cost or 0)
+            daily[created_at.date()]["requests"] += 1
+        service_breakdown[service_type] = service_breakdown.get(service_type, 0) + 1
+        key = (created_at.hour, (created_at.weekday() + 1) % 7)
+        heatmap[key] = heatmap.get(key, 0) + 1
+
+    return {"daily": daily, "service_breakdown": service_breakdown, "heatmap": heatmap}
+
+
+class ProviderStatsCache:
+    """
+    Per-provider LRU of computed stats
+
+    Entries are keyed by provider and day so they roll over at midnight, and
+    dropped as soon as one of the provider's requests is inserted, updated
+    or deleted; the TTL only bounds staleness from writes made elsewhere.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.provider_stats_cache_ttl_seconds
+        self.max_entries = max_entries or settings.provider_stats_cache_max_entries
+        self._entries: "OrderedDict[int, Tuple[float, ProviderStats]]" = OrderedDict()
+        # Bumped on invalidation so a computation racing a write is not cached
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, provider_id: int, day: Optional[date] = None) -> ProviderStats:
+        day = day or date.today()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(provider_id)
+            if entry and entry[1].day == day and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(provider_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generations.get(provider_id, 0)
+
+        stats = compute_provider_stats(db, provider_id, day)
+        with self._lock:
+            if self._generations.get(provider_id, 0) != generation:
+                return stats
+            self._entries[provider_id] = (now, stats)
+            self._entries.move_to_end(provider_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return stats
+
+    def invalidate(self, *provider_ids: Optional[int]):
+        with self._lock:
+            for provider_id in provider_ids:
+                self._entries.pop(provider_id, None)
+                self._generations[provider_id] = self._generations.get(provider_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0
+        }
+
+
+# Process-wide cache shared by the dashboard endpoints
+_provider_stats_cache = ProviderStatsCache()
+
+
+def get_provider_stats(db: Session, provider_id: int, day: Optional[date] = None) -> ProviderStats:
+    """Cached dashboard figures for a provider"""
+    return _provider_stats_cache.get(db, provider_id, day)
+
+
+def get_provider_stats_cache() -> ProviderStatsCache:
+    return _provider_stats_cache
+
+
+def invalidate_provider_stats(*provider_ids: Optional[int]):
+    """Drop cached figures for providers whose requests changed"""
+    _provider_stats_cache.invalidate(*provider_ids)
+
+
+def _written_provider_ids(target: ServiceRequest):
+    # The previous provider of a reassigned request loses it, so both are stale
+    history = inspect(target).attrs.provider_id.history
+    return {target.provider_id, *(history.deleted or ())}
+
+
+invalidate_on_commit(
+    [ServiceRequest], "provider_stats_dirty", invalidate_provider_stats, collect=_written_provider_ids
+)
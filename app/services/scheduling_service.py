@@ -15,6 +15,7 @@ from app.models.database_models import (
     ServiceRequest, Provider, ProviderAvailability, AppointmentSlot, 
     Landmark, LocationMatch
 )
+from app.services.landmark_gazetteer import LANDMARK, get_landmark_gazetteer, invalidate_landmark_gazetteer
 
 # West Africa Time (Cameroon timezone)
 WAT = pytz.timezone('Africa/Douala')
@@ -185,75 +186,27 @@ class SchedulingService:
         """Find matching landmarks based on user location description"""
         
         try:
-            # Normalize input text
-            location_lower = location_text.lower().strip()
+            gazetteer = get_landmark_gazetteer(self.db)
+            landmarks = gazetteer.resolve(location_text, kinds=[LANDMARK], area=area)
             
-            # Search for landmarks
-            landmarks = self.db.query(Landmark).filter(
-                and_(
-                    Landmark.is_active == True,
-                    Landmark.area.ilike(f"%{area}%"),
-                    or_(
-                        Landmark.name.ilike(f"%{location_lower}%"),
-                        func.json_extract(Landmark.aliases, '$').contains(location_lower),
-                        func.json_extract(Landmark.common_references, '$').contains(location_lower)
-                    )
-                )
-            ).limit(5).all()
-            
-            matches = []
-            for landmark in landmarks:
-                confidence = self._calculate_location_confidence(location_text, landmark)
-                
-                matches.append({
-                    'landmark_id': landmark.id,
-                    'name': landmark.name,
-                    'type': landmark.landmark_type,
-                    'area': landmark.area,
-                    'coordinates': landmark.coordinates,
-                    'confidence': confidence,
-                    'aliases': landmark.aliases or [],
-                    'common_references': landmark.common_references or []
-                })
-            
-            # Sort by confidence score
-            matches.sort(key=lambda x: x['confidence'], reverse=True)
-            
-            return matches
+            return [
+                {
+                    'landmark_id': match.place.id,
+                    'name': match.place.name,
+                    'type': match.place.place_type,
+                    'area': match.place.area,
+                    'coordinates': ",".join(str(value) for value in match.place.coordinates) if match.place.coordinates else None,
+                    'confidence': match.confidence,
+                    'aliases': match.place.aliases,
+                    'common_references': match.place.common_references
+                }
+                for match in landmarks
+            ]
             
         except Exception as e:
             logger.error(f"Error finding landmark matches: {e}")
             return []
     
-    def _calculate_location_confidence(self, user_input: str, landmark: Landmark) -> float:
-        """Calculate confidence score for location match"""
-        
-        user_lower = user_input.lower()
-        landmark_name = landmark.name.lower()
-        
-        # Direct name match
-        if landmark_name in user_lower or user_lower in landmark_name:
-            return 0.9
-        
-        # Check aliases
-        if landmark.aliases:
-            for alias in landmark.aliases:
-                if alias.lower() in user_lower:
-                    return 0.8
-        
-        # Check common references
-        if landmark.common_references:
-            for ref in landmark.common_references:
-                if ref.lower() in user_lower:
-                    return 0.7
-        
-        # Fuzzy matching for partial matches
-        common_words = set(user_lower.split()) & set(landmark_name.split())
-        if common_words:
-            return 0.6
-        
-        return 0.1
-    
     def confirm_location_match(self, request: ServiceRequest, landmark_id: int, 
                               user_confirmed: bool = True) -> None:
         """Confirm and store successful location match"""
@@ -282,6 +235,8 @@ class SchedulingService:
             
             self.db.add(location_match)
             self.db.commit()
+            if user_confirmed:
+                invalidate_landmark_gazetteer()
             
             logger.info(f"Confirmed location match for request {request.id}: {landmark.name}")
             
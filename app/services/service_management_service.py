@@ -14,6 +14,7 @@ from datetime import datetime, timedelta
 
 from app.models.dynamic_services import Service, ServiceCategory, ServiceZone, ServiceSearchLog, ServiceStatus
 from app.services.zone_service import ZoneService
+from app.services.fuzzy_index import invalidate_service_fuzzy_index
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +63,7 @@ class ServiceManagementService:
             
             # Update cache
             self.service_cache[code] = service
+            invalidate_service_fuzzy_index()
             
             logger.info(f"Created service: {code} ({name})")
             return service
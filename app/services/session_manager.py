@@ -2,9 +2,10 @@
 Session Manager Service
 Manages conversation sessions with state persistence and Redis caching
 """
-import json
+import time
 import asyncio
 import logging
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
@@ -15,66 +16,150 @@ from app.models.conversation_session import (
     ConversationSession, ConversationState, SessionPhase, ConversationMessage,
     CollectedData, SessionMetrics, TransitionRule
 )
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.config import get_settings
-
-try:
-    import redis
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
+from app.services.session_store import SessionStore, get_session_store
+from app.services.event_sink import get_event_sink
 
 logger = logging.getLogger(__name__)
 
+
+class ActiveSessionTier:
+    """
+    Bounded LRU of resident sessions with a user_id -> session_id index
+    
+    Only bookkeeping lives here; the SessionManager decides what to evict
+    and writes evicted sessions back before dropping them.
+    """
+    
+    def __init__(self, max_sessions: int, idle_seconds: int):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self.last_access: Dict[str, float] = {}
+        self.user_index: Dict[Any, str] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "idle_evictions": 0}
+    
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.sessions
+    
+    def __len__(self) -> int:
+        return len(self.sessions)
+    
+    def __iter__(self):
+        return iter(list(self.sessions))
+    
+    def items(self) -> List[Tuple[str, ConversationSession]]:
+        return list(self.sessions.items())
+    
+    def values(self) -> List[ConversationSession]:
+        return list(self.sessions.values())
+    
+    def get(self, session_id: str) -> Optional[ConversationSession]:
+        """Resident session, marked as most recently used"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self._touch(session_id)
+        return session
+    
+    def get_for_user(self, user_id: Any) -> Optional[ConversationSession]:
+        """Resident session most recently activated for a user"""
+        session_id = self.user_index.get(user_id)
+        return self.get(session_id) if session_id else None
+    
+    def put(self, session: ConversationSession):
+        """Insert or refresh a session and point its user at it"""
+        self.sessions[session.session_id] = session
+        self.user_index[session.user_id] = session.session_id
+        self._touch(session.session_id)
+    
+    def pop(self, session_id: str) -> Optional[ConversationSession]:
+        session = self.sessions.pop(session_id, None)
+        self.last_access.pop(session_id, None)
+        if session is not None and self.user_index.get(session.user_id) == session_id:
+            del self.user_index[session.user_id]
+        return session
+    
+    def clear(self):
+        self.sessions.clear()
+        self.last_access.clear()
+        self.user_index.clear()
+    
+    def overflow(self, pinned: set) -> List[str]:
+        """Least recently used sessions beyond the size bound, skipping pinned ones"""
+        excess = len(self.sessions) - self.max_sessions
+        if excess <= 0:
+            return []
+        victims = []
+        for session_id in self.sessions:
+            if session_id not in pinned:
+                victims.append(session_id)
+                if len(victims) == excess:
+                    break
+        return victims
+    
+    def idle(self, pinned: set, now: Optional[float] = None) -> List[str]:
+        """Sessions not accessed for longer than the idle timeout"""
+        cutoff = (now if now is not None else time.monotonic()) - self.idle_seconds
+        victims = []
+        # Iteration order is least recently used first, so stop at the first fresh entry
+        for session_id in self.sessions:
+            if self.last_access[session_id] > cutoff:
+                break
+            if session_id not in pinned:
+                victims.append(session_id)
+        return victims
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "resident": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "indexed_users": len(self.user_index),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "evictions": self.stats["evictions"],
+            "idle_evictions": self.stats["idle_evictions"]
+        }
+    
+    def _touch(self, session_id: str):
+        self.sessions.move_to_end(session_id)
+        self.last_access[session_id] = time.monotonic()
+
+
 class SessionManager:
     """
     Manages conversation sessions with state persistence and caching
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        store: Optional[SessionStore] = None,
+        max_sessions_in_memory: Optional[int] = None,
+        idle_eviction_seconds: Optional[int] = None
+    ):
         self.settings = get_settings()
-        self.redis_client = None
-        self.cache_enabled = False
-        self.active_sessions: Dict[str, ConversationSession] = {}
+        self.store = store or get_session_store()
+        self.max_sessions_in_memory = max_sessions_in_memory or self.settings.max_active_sessions
+        self.active_sessions = ActiveSessionTier(
+            self.max_sessions_in_memory,
+            idle_eviction_seconds or self.settings.session_idle_eviction_seconds
+        )
         self.session_locks: Dict[str, asyncio.Lock] = {}
+        # Sessions changed since they were last written to the database
+        self.unsaved_sessions: set = set()
         self.cleanup_interval = 300  # 5 minutes
-        self.max_sessions_in_memory = 100
         self.cleanup_task = None
-        
-        # Initialize Redis if available
-        self._initialize_redis()
     
     async def start_cleanup_task(self):
         """Start the cleanup task"""
         if self.cleanup_task is None:
             self.cleanup_task = asyncio.create_task(self._cleanup_expired_sessions())
     
-    def _initialize_redis(self):
-        """Initialize Redis connection if available"""
-        if not REDIS_AVAILABLE:
-            logger.warning("Redis not available, using in-memory session storage")
-            return
-        
-        try:
-            self.redis_client = redis.Redis(
-                host=self.settings.redis_host,
-                port=self.settings.redis_port,
-                db=self.settings.redis_db,
-                password=self.settings.redis_password,
-                decode_responses=True,
-                socket_timeout=5
-            )
-            
-            # Test connection
-            self.redis_client.ping()
-            self.cache_enabled = True
-            logger.info("Redis session cache initialized successfully")
-            
-        except Exception as e:
-            logger.warning(f"Redis initialization failed: {e}, using in-memory storage")
-            self.redis_client = None
-            self.cache_enabled = False
-    
     async def create_session(
         self, 
         user_id: str, 
@@ -98,13 +183,14 @@ class SessionManager:
         # Store in database
         if db:
             await self._save_session_to_db(session, db)
+        else:
+            self.unsaved_sessions.add(session_id)
         
         # Cache in Redis/memory
         await self._cache_session(session)
         
         # Add to active sessions
-        self.active_sessions[session_id] = session
-        self.session_locks[session_id] = asyncio.Lock()
+        await self._activate_session(session, db)
         
         logger.info(f"Created new session: {session_id} for user {user_id}")
         return session
@@ -114,8 +200,8 @@ class SessionManager:
         Get session by ID from cache or database
         """
         # Check active sessions first
-        if session_id in self.active_sessions:
-            session = self.active_sessions[session_id]
+        session = self.active_sessions.get(session_id)
+        if session:
             if not session.is_expired():
                 return session
             else:
@@ -127,8 +213,7 @@ class SessionManager:
         session = await self._get_cached_session(session_id)
         if session:
             if not session.is_expired():
-                self.active_sessions[session_id] = session
-                self.session_locks[session_id] = asyncio.Lock()
+                await self._activate_session(session, db)
                 return session
             else:
                 await self._remove_session(session_id)
@@ -139,8 +224,7 @@ class SessionManager:
             session = await self._load_session_from_db(session_id, db)
             if session and not session.is_expired():
                 await self._cache_session(session)
-                self.active_sessions[session_id] = session
-                self.session_locks[session_id] = asyncio.Lock()
+                await self._activate_session(session, db)
                 return session
             elif session:
                 # Mark as expired in database
@@ -152,10 +236,12 @@ class SessionManager:
         """
         Get active session for user
         """
-        # Check active sessions
-        for session in self.active_sessions.values():
-            if session.user_id == user_id and not session.is_expired():
+        # Check active sessions through the user index
+        session = self.active_sessions.get_for_user(user_id)
+        if session:
+            if not session.is_expired():
                 return session
+            await self._remove_session(session.session_id)
         
         # Check database
         if db:
@@ -170,8 +256,7 @@ class SessionManager:
                 session = await self._convert_db_to_session(db_session, db)
                 if session:
                     await self._cache_session(session)
-                    self.active_sessions[session.session_id] = session
-                    self.session_locks[session.session_id] = asyncio.Lock()
+                    await self._activate_session(session, db)
                     return session
         
         return None
@@ -191,7 +276,7 @@ class SessionManager:
             session.updated_at = datetime.now()
             
             # Update in active sessions
-            self.active_sessions[session_id] = session
+            self.active_sessions.put(session)
             
             # Update cache
             await self._cache_session(session)
@@ -199,9 +284,14 @@ class SessionManager:
             # Update database
             if db:
                 await self._save_session_to_db(session, db)
+                self.unsaved_sessions.discard(session_id)
+            else:
+                self.unsaved_sessions.add(session_id)
             
             logger.debug(f"Updated session: {session_id}")
-            return True
+        
+        await self._evict_sessions(self.active_sessions.overflow(self._pinned_sessions()), db)
+        return True
     
     async def transition_session_state(
         self, 
@@ -344,6 +434,23 @@ class SessionManager:
         """
         return len(self.active_sessions)
     
+    def get_session_tier_stats(self) -> Dict[str, Any]:
+        """
+        Get resident-count, hit-rate and eviction metrics of the in-memory tier
+        """
+        stats = self.active_sessions.get_stats()
+        stats["locks"] = len(self.session_locks)
+        stats["unsaved"] = len(self.unsaved_sessions)
+        return stats
+    
+    async def evict_idle_sessions(self, db: Session = None) -> int:
+        """
+        Write back and drop sessions idle for longer than the eviction timeout
+        """
+        idle_sessions = self.active_sessions.idle(self._pinned_sessions())
+        await self._evict_sessions(idle_sessions, db, idle=True)
+        return len(idle_sessions)
+    
     async def get_session_summary(self, session_id: str, db: Session = None) -> Optional[Dict[str, Any]]:
         """
         Get comprehensive session summary
@@ -366,9 +473,8 @@ class SessionManager:
             if session.is_expired():
                 expired_sessions.append(session_id)
         
-        for session_id in expired_sessions:
-            await self._remove_session(session_id)
-            cleaned_count += 1
+        await self._remove_sessions(expired_sessions)
+        cleaned_count += len(expired_sessions)
         
         # Clean database sessions
         if db:
@@ -390,51 +496,94 @@ class SessionManager:
         return cleaned_count
     
     async def _cache_session(self, session: ConversationSession):
-        """Cache session in Redis or memory"""
-        if self.cache_enabled and self.redis_client:
-            try:
-                session_data = session.to_dict()
-                cache_key = f"session:{session.session_id}"
-                self.redis_client.setex(
-                    cache_key,
-                    int(self.settings.session_cache_ttl),
-                    json.dumps(session_data, default=str)
-                )
-            except Exception as e:
-                logger.warning(f"Failed to cache session in Redis: {e}")
+        """Cache session in the shared session store"""
+        try:
+            await self.store.set(
+                f"session:{session.session_id}",
+                session.to_dict(),
+                int(self.settings.session_cache_ttl)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache session: {e}")
     
     async def _get_cached_session(self, session_id: str) -> Optional[ConversationSession]:
-        """Get session from cache"""
-        if self.cache_enabled and self.redis_client:
-            try:
-                cache_key = f"session:{session_id}"
-                cached_data = self.redis_client.get(cache_key)
-                
-                if cached_data:
-                    session_data = json.loads(cached_data)
-                    return ConversationSession.from_dict(session_data)
-                    
-            except Exception as e:
-                logger.warning(f"Failed to get cached session: {e}")
+        """Get session from the shared session store"""
+        try:
+            session_data = await self.store.get(f"session:{session_id}")
+            if session_data:
+                return ConversationSession.from_dict(session_data)
+        except Exception as e:
+            logger.warning(f"Failed to get cached session: {e}")
         
         return None
     
+    async def _activate_session(self, session: ConversationSession, db: Session = None):
+        """Make a session resident, evicting least recently used ones past the bound"""
+        self.active_sessions.put(session)
+        self.session_locks.setdefault(session.session_id, asyncio.Lock())
+        await self._evict_sessions(self.active_sessions.overflow(self._pinned_sessions()), db)
+    
+    def _pinned_sessions(self) -> set:
+        """Sessions with an update in flight, which must not be evicted"""
+        return {session_id for session_id, lock in self.session_locks.items() if lock.locked()}
+    
+    async def _evict_sessions(self, session_ids: List[str], db: Session = None, idle: bool = False):
+        """Drop sessions from memory after writing them back to the store (and database)"""
+        if not session_ids:
+            return
+        
+        evicted = []
+        for session_id in session_ids:
+            session = self.active_sessions.pop(session_id)
+            self.session_locks.pop(session_id, None)
+            if session is not None:
+                evicted.append(session)
+        
+        live = [session for session in evicted if not session.is_expired()]
+        try:
+            await self.store.set_many(
+                {f"session:{session.session_id}": session.to_dict() for session in live},
+                int(self.settings.session_cache_ttl)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write back evicted sessions: {e}")
+        
+        if db:
+            for session in evicted:
+                if session.session_id in self.unsaved_sessions:
+                    await self._save_session_to_db(session, db)
+                    self.unsaved_sessions.discard(session.session_id)
+        
+        self.active_sessions.stats["idle_evictions" if idle else "evictions"] += len(evicted)
+        logger.debug(f"Evicted {len(evicted)} sessions from memory ({'idle' if idle else 'size'})")
+    
     async def _remove_session(self, session_id: str):
         """Remove session from cache and memory"""
         # Remove from active sessions
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
-        
-        if session_id in self.session_locks:
-            del self.session_locks[session_id]
+        self.active_sessions.pop(session_id)
+        self.session_locks.pop(session_id, None)
+        self.unsaved_sessions.discard(session_id)
         
         # Remove from cache
-        if self.cache_enabled and self.redis_client:
-            try:
-                cache_key = f"session:{session_id}"
-                self.redis_client.delete(cache_key)
-            except Exception as e:
-                logger.warning(f"Failed to remove session from cache: {e}")
+        try:
+            await self.store.delete(f"session:{session_id}")
+        except Exception as e:
+            logger.warning(f"Failed to remove session from cache: {e}")
+    
+    async def _remove_sessions(self, session_ids: List[str]):
+        """Remove several sessions with a single store round trip"""
+        if not session_ids:
+            return
+        
+        for session_id in session_ids:
+            self.active_sessions.pop(session_id)
+            self.session_locks.pop(session_id, None)
+            self.unsaved_sessions.discard(session_id)
+        
+        try:
+            await self.store.delete(*[f"session:{session_id}" for session_id in session_ids])
+        except Exception as e:
+            logger.warning(f"Failed to remove sessions from cache: {e}")
     
     async def _save_session_to_db(self, session: ConversationSession, db: Session):
         """Save session to database"""
@@ -527,7 +676,8 @@ class SessionManager:
             if db_session.metrics:
                 session.metrics = SessionMetrics.from_dict(db_session.metrics)
             
-            # Load recent conversation history
+            # Load recent conversation history, including messages still buffered
+            get_event_sink().flush()
             recent_messages = db.query(Conversation).filter(
                 Conversation.session_id == session.session_id
             ).order_by(Conversation.created_at.desc()).limit(10).all()
@@ -571,12 +721,10 @@ class SessionManager:
                     action_metadata=message.metadata
                 )
                 
-                db.add(db_message)
-                db.commit()
+                get_event_sink().emit(db, db_message)
                 
         except Exception as e:
             logger.error(f"Failed to save message to database: {e}")
-            db.rollback()
     
     async def _mark_session_completed(self, session_id: str, db: Session):
         """Mark session as completed in database"""
@@ -617,15 +765,9 @@ class SessionManager:
                 await asyncio.sleep(self.cleanup_interval)
                 await self.cleanup_expired_sessions()
                 
-                # Clean up memory if too many sessions
-                if len(self.active_sessions) > self.max_sessions_in_memory:
-                    oldest_sessions = sorted(
-                        self.active_sessions.items(),
-                        key=lambda x: x[1].updated_at
-                    )[:len(self.active_sessions) - self.max_sessions_in_memory]
-                    
-                    for session_id, _ in oldest_sessions:
-                        await self._remove_session(session_id)
+                # Write back and release sessions nobody has touched recently
+                with SessionLocal() as db:
+                    await self.evict_idle_sessions(db)
                         
             except Exception as e:
                 logger.error(f"Error in cleanup task: {e}")
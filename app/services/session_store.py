@@ -0,0 +1,385 @@
+"""
+Session Store
+Async key/value backend shared by the session manager, the dynamic service
+cache and the rate limiter: Redis over one connection pool in production,
+an in-process stand-in for tests and single-worker development
+"""
+
+import json
+import time
+import zlib
+import fnmatch
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import get_settings
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Payloads above this size are zlib-compressed before being stored
+COMPRESS_THRESHOLD = 1024
+
+# One-byte prefix telling decode_value how the payload was written
+_PLAIN = b"j"
+_COMPRESSED = b"z"
+
+# Keys deleted per UNLINK call when invalidating a pattern
+DELETE_BATCH_SIZE = 500
+
+# Minimum seconds between sweeps of expired rate-limit windows in the local store
+WINDOW_PURGE_INTERVAL = 60
+
+
+class SessionStoreUnavailable(Exception):
+    """Raised while the store backend is unreachable"""
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a value to compact JSON, compressing large payloads"""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(
+            value, default=_json_default, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+    if len(payload) > COMPRESS_THRESHOLD:
+        return _COMPRESSED + zlib.compress(payload, 1)
+    return _PLAIN + payload
+
+
+def decode_value(data: Optional[bytes]) -> Optional[Any]:
+    """Inverse of encode_value; None stays None"""
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    marker, payload = data[:1], data[1:]
+    if marker == _COMPRESSED:
+        payload = zlib.decompress(payload)
+    elif marker != _PLAIN:
+        # Written by the old json.dumps path, before the marker byte existed
+        payload = data
+    return orjson.loads(payload) if ORJSON_AVAILABLE else json.loads(payload)
+
+
+class SessionStore(ABC):
+    """Interface of the shared async key/value store"""
+
+    backend = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values for the keys that exist, fetched in one round trip"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int):
+        ...
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, Any], ttl: int):
+        """Store several values with the same TTL in one round trip"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> int:
+        ...
+
+    @abstractmethod
+    async def delete_pattern(self, pattern: str) -> int:
+        """Delete every key matching a glob-style pattern"""
+
+    @abstractmethod
+    async def incr_window(self, key: str, window: str, ttl: int) -> int:
+        """Increment a rate-limit window counter and return its new value"""
+
+    @abstractmethod
+    async def get_window(self, key: str, window: str) -> int:
+        ...
+
+    @abstractmethod
+    async def flush(self):
+        ...
+
+    async def info(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    async def close(self):
+        pass
+
+
+class LocalSessionStore(SessionStore):
+    """
+    In-process store with the same semantics as the Redis backend
+
+    Values go through the same encoding so tests exercise the real
+    serialization path; expired keys are dropped lazily on access, and
+    expired rate-limit windows are also swept from incr_window so counters
+    for one-off callers do not accumulate.
+    """
+
+    backend = "local"
+
+    def __init__(self, purge_interval: float = WINDOW_PURGE_INTERVAL):
+        self.values: Dict[str, Tuple[float, bytes]] = {}
+        self.windows: Dict[str, Tuple[float, Dict[str, int]]] = {}
+        self.purge_interval = purge_interval
+        self._next_window_purge = time.monotonic() + purge_interval
+
+    def _live(self, table: Dict[str, Tuple[float, Any]], key: str) -> Optional[Any]:
+        entry = table.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del table[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        return decode_value(self._live(self.values, key))
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            data = self._live(self.values, key)
+            if data is not None:
+                found[key] = decode_value(data)
+        return found
+
+    async def set(self, key: str, value: Any, ttl: int):
+        self.values[key] = (time.monotonic() + ttl, encode_value(value))
+
+    async def set_many(self, items: Dict[str, Any], ttl: int):
+        expires_at = time.monotonic() + ttl
+        for key, value in items.items():
+            self.values[key] = (expires_at, encode_value(value))
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self.values.pop(key, None) is not None or self.windows.pop(key, None) is not None:
+                deleted += 1
+        return deleted
+
+    async def delete_pattern(self, pattern: str) -> int:
+        keys = [key for key in list(self.values) + list(self.windows) if fnmatch.fnmatchcase(key, pattern)]
+        return await self.delete(*keys)
+
+    def _purge_expired_windows(self, now: float):
+        expired = [key for key, (expires_at, _) in self.windows.items() if now >= expires_at]
+        for key in expired:
+            del self.windows[key]
+        self._next_window_purge = now + self.purge_interval
+
+    async def incr_window(self, key: str, window: str, ttl: int) -> int:
+        now = time.monotonic()
+        if now >= self._next_window_purge:
+            self._purge_expired_windows(now)
+        counters = self._live(self.windows, key)
+        if counters is None:
+            counters = {}
+        counters[window] = counters.get(window, 0) + 1
+        self.windows[key] = (now + ttl, counters)
+        return counters[window]
+
+    async def get_window(self, key: str, window: str) -> int:
+        counters = self._live(self.windows, key) or {}
+        return counters.get(window, 0)
+
+    async def flush(self):
+        self.values.clear()
+        self.windows.clear()
+
+    async def info(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "keys": len(self.values) + len(self.windows)}
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Redis backend on a single shared `redis.asyncio` connection pool
+
+    Multi-key operations are pipelined. After a connection failure the store
+    reports itself unavailable for `retry_seconds` instead of paying the
+    socket timeout on every call.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 50,
+        socket_timeout: float = 1.0,
+        retry_seconds: int = 30
+    ):
+        self.pool = aioredis.ConnectionPool.from_url(
+            url,
+            max_connections=max_connections,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        )
+        self.client = aioredis.Redis(connection_pool=self.pool)
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    @asynccontextmanager
+    async def _guard(self):
+        if not self.available:
+            raise SessionStoreUnavailable("Redis session store is unavailable")
+        try:
+            yield
+        except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+            self._down_until = time.monotonic() + self.retry_seconds
+            logger.warning(f"Redis session store unreachable, retrying in {self.retry_seconds}s: {e}")
+            raise SessionStoreUnavailable(str(e)) from e
+
+    async def get(self, key: str) -> Optional[Any]:
+        async with self._guard():
+            return decode_value(await self.client.get(key))
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        async with self._guard():
+            values = await self.client.mget(keys)
+        return {key: decode_value(data) for key, data in zip(keys, values) if data is not None}
+
+    async def set(self, key: str, value: Any, ttl: int):
+        async with self._guard():
+            await self.client.set(key, encode_value(value), ex=ttl)
+
+    async def set_many(self, items: Dict[str, Any], ttl: int):
+        if not items:
+            return
+        async with self._guard():
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, encode_value(value), ex=ttl)
+                await pipe.execute()
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        async with self._guard():
+            return await self.client.unlink(*keys)
+
+    async def delete_pattern(self, pattern: str) -> int:
+        deleted = 0
+        batch: List[bytes] = []
+        async with self._guard():
+            # SCAN rather than KEYS so a large keyspace never blocks the server
+            async for key in self.client.scan_iter(match=pattern, count=DELETE_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    deleted += await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.client.unlink(*batch)
+        return deleted
+
+    async def incr_window(self, key: str, window: str, ttl: int) -> int:
+        async with self._guard():
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hincrby(key, window, 1)
+                pipe.expire(key, ttl)
+                count, _ = await pipe.execute()
+        return int(count)
+
+    async def get_window(self, key: str, window: str) -> int:
+        async with self._guard():
+            return int(await self.client.hget(key, window) or 0)
+
+    async def flush(self):
+        async with self._guard():
+            await self.client.flushdb()
+
+    async def info(self) -> Dict[str, Any]:
+        stats = {"backend": self.backend, "available": self.available}
+        try:
+            async with self._guard():
+                redis_info = await self.client.info()
+            stats["redis_memory_used"] = redis_info.get("used_memory_human", "N/A")
+            stats["redis_connected_clients"] = redis_info.get("connected_clients", 0)
+        except Exception as e:
+            logger.error(f"Error getting Redis stats: {e}")
+        return stats
+
+    async def close(self):
+        await self.client.aclose()
+        await self.pool.disconnect()
+
+
+def build_redis_url(settings=None) -> str:
+    """Redis URL from the REDIS_* settings"""
+    settings = settings or get_settings()
+    auth = f":{settings.redis_password}@" if settings.redis_password else ""
+    return f"redis://{auth}{settings.redis_host}:{settings.redis_port}/{settings.redis_db}"
+
+
+# Global store shared by every consumer in the process
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Get the process-wide session store, creating it on first use"""
+    global _session_store
+    if _session_store is None:
+        settings = get_settings()
+        if settings.session_store_backend == "redis" and REDIS_AVAILABLE:
+            _session_store = RedisSessionStore(
+                build_redis_url(settings),
+                max_connections=settings.session_store_max_connections,
+                socket_timeout=settings.session_store_socket_timeout,
+                retry_seconds=settings.session_store_retry_seconds
+            )
+        else:
+            if settings.session_store_backend == "redis":
+                logger.warning("redis package not installed, using in-process session store")
+            _session_store = LocalSessionStore()
+        logger.info(f"Session store backend: {_session_store.backend}")
+    return _session_store
+
+
+async def close_session_store():
+    """Close the process-wide session store (called on application shutdown)"""
+    global _session_store
+    if _session_store is not None:
+        await _session_store.close()
+        _session_store = None
+
+
+def set_session_store(store: Optional[SessionStore]):
+    """Replace the process-wide store (tests, or a custom backend)"""
+    global _session_store
+    _session_store = store
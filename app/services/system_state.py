@@ -0,0 +1,172 @@
+"""
+System State
+Process-wide snapshot of provider availability, pending requests and
+per-service capacity used to build every conversation prompt. It is
+refreshed from three grouped queries on a short interval, or sooner after a
+provider or request write, so concurrent conversations read the same
+in-memory figures instead of counting the tables on each message.
+"""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.database_models import Provider, ServiceRequest
+from app.services.provider_stats import NEW_STATUSES
+from app.utils.cache_invalidation import invalidate_on_commit
+
+settings = get_settings()
+
+
+@dataclass
+class SystemStateSnapshot:
+    """Figures shared by every prompt builder"""
+    active_providers: int = 0
+    available_providers: int = 0
+    pending_requests: int = 0
+    # service type -> {"available_providers": n, "pending_requests": n}
+    service_capacity: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    refreshed_at: Optional[datetime] = None
+
+    @property
+    def provider_availability(self) -> str:
+        return "normal" if self.available_providers > 0 else "limited"
+
+    @property
+    def system_load(self) -> str:
+        if self.refreshed_at is None:
+            return "unknown"
+        return "high" if self.pending_requests > self.available_providers else "normal"
+
+    def capacity_for(self, service_type: str) -> Dict[str, int]:
+        return self.service_capacity.get(service_type.lower(), {"available_providers": 0, "pending_requests": 0})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "active_providers": self.active_providers,
+            "available_providers": self.available_providers,
+            "pending_requests": self.pending_requests,
+            "current_request_status": "processing",
+            "provider_availability": self.provider_availability if self.refreshed_at else "unknown",
+            "system_load": self.system_load,
+            "service_capacity": self.service_capacity,
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+
+
+def load_system_state(db: Session) -> SystemStateSnapshot:
+    """Compute the snapshot: provider counts, available providers' services and pending requests by service"""
+    providers = dict(
+        db.query(Provider.is_available, func.count(Provider.id))
+        .filter(Provider.is_active == True)
+        .group_by(Provider.is_available)
+        .all()
+    )
+
+    available = Counter()
+    for (services,) in db.query(Provider.services).filter(
+        Provider.is_active == True, Provider.is_available == True
+    ).all():
+        available.update({str(service).lower() for service in services or []})
+
+    pending = Counter()
+    for service_type, count in db.query(ServiceRequest.service_type, func.count(ServiceRequest.id)).filter(
+        ServiceRequest.status.in_(NEW_STATUSES)
+    ).group_by(ServiceRequest.service_type).all():
+        pending[(service_type or "").lower()] += count
+
+    return SystemStateSnapshot(
+        active_providers=sum(providers.values()),
+        available_providers=providers.get(True, 0),
+        pending_requests=sum(pending.values()),
+        service_capacity={
+            service: {"available_providers": available[service], "pending_requests": pending[service]}
+            for service in sorted(set(available) | set(pending)) if service
+        },
+        refreshed_at=datetime.utcnow()
+    )
+
+
+class SystemStateService:
+    """
+    Holds the current snapshot
+
+    `get` is O(1) while the snapshot is fresh. Once it is older than the
+    refresh interval, or was marked stale by a write, one caller reloads it
+    while concurrent callers keep reading the previous snapshot.
+    """
+
+    def __init__(self, refresh_seconds: Optional[float] = None, min_refresh_seconds: Optional[float] = None):
+        self.refresh_seconds = refresh_seconds or settings.system_state_refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds if min_refresh_seconds is not None else settings.system_state_min_refresh_seconds
+        self.snapshot = SystemStateSnapshot()
+        self._loaded_at = 0.0
+        self._stale = True
+        self._refresh_lock = threading.Lock()
+        self._stats = {"hits": 0, "refreshes": 0, "errors": 0}
+
+    def get(self, db: Optional[Session] = None) -> SystemStateSnapshot:
+        """Current snapshot, reloaded through `db` when due"""
+        if db is not None and self._due() and self._refresh_lock.acquire(blocking=False):
+            try:
+                if self._due():
+                    self.refresh(db)
+            finally:
+                self._refresh_lock.release()
+        else:
+            self._stats["hits"] += 1
+        return self.snapshot
+
+    def refresh(self, db: Session) -> SystemStateSnapshot:
+        """Reload the snapshot now"""
+        # Cleared first so a write during the load marks the new snapshot stale again
+        self._stale = False
+        self._loaded_at = time.monotonic()
+        try:
+            self.snapshot = load_system_state(db)
+            self._stats["refreshes"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Error refreshing system state: {e}")
+        return self.snapshot
+
+    def mark_stale(self):
+        """Reload on the next read (called after provider and request writes)"""
+        self._stale = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self._stats["hits"] + self._stats["refreshes"]
+        return {**self._stats, "hit_rate": self._stats["hits"] / total if total else 0.0}
+
+    def _due(self) -> bool:
+        age = time.monotonic() - self._loaded_at
+        return age >= self.refresh_seconds or (self._stale and age >= self.min_refresh_seconds)
+
+
+# Process-wide snapshot shared by the conversation engines and prompt builders
+_system_state = SystemStateService()
+
+
+def get_system_state(db: Optional[Session] = None) -> SystemStateSnapshot:
+    """Current system state; without a session the last loaded snapshot is returned"""
+    return _system_state.get(db)
+
+
+def get_system_state_service() -> SystemStateService:
+    return _system_state
+
+
+def invalidate_system_state():
+    """Reload the snapshot on the next read"""
+    _system_state.mark_stale()
+
+
+invalidate_on_commit([Provider, ServiceRequest], "system_state_dirty", invalidate_system_state)
@@ -0,0 +1,323 @@
+"""
+Text Classifier
+Local TF-IDF (word and character n-gram) + logistic regression models for
+coarse labels the conversation services used to ask an LLM for: interruption
+type, intent and emotion. Models are trained offline, saved as versioned
+artifacts, loaded once per process and only answer when confident; callers
+fall back to the LLM otherwise.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+
+try:
+    import joblib
+    import sklearn
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import FeatureUnion, Pipeline
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+settings = get_settings()
+
+INTERRUPTION = "interruption"
+INTENT = "intent"
+EMOTION = "emotion"
+TASKS = (INTERRUPTION, INTENT, EMOTION)
+
+# Interruption label for ordinary messages
+NO_INTERRUPTION = "none"
+
+ARTIFACT_SUFFIX = ".joblib"
+
+
+@dataclass
+class Prediction:
+    """A confident local label"""
+    label: str
+    confidence: float
+    model_version: str
+
+
+@dataclass
+class TrainingReport:
+    """Outcome of one training run"""
+    task: str
+    samples: int
+    labels: Dict[str, int]
+    holdout_samples: int = 0
+    holdout_accuracy: Optional[float] = None
+    errors: List[Tuple[str, str, str]] = field(default_factory=list)  # (text, expected, predicted)
+
+
+def _build_pipeline() -> "Pipeline":
+    return Pipeline([
+        ("features", FeatureUnion([
+            ("words", TfidfVectorizer(strip_accents="unicode", ngram_range=(1, 2), sublinear_tf=True)),
+            ("chars", TfidfVectorizer(strip_accents="unicode", analyzer="char_wb", ngram_range=(2, 5), sublinear_tf=True)),
+        ])),
+        ("model", LogisticRegression(max_iter=2000, C=10.0, class_weight="balanced")),
+    ])
+
+
+class LocalTextClassifier:
+    """One task's fitted pipeline and its artifact metadata"""
+
+    def __init__(self, task: str, pipeline: Any, metadata: Optional[Dict[str, Any]] = None):
+        self.task = task
+        self.pipeline = pipeline
+        self.metadata = metadata or {}
+
+    @property
+    def version(self) -> str:
+        return self.metadata.get("version", "unversioned")
+
+    @property
+    def labels(self) -> List[str]:
+        return [str(label) for label in self.pipeline.classes_]
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Most likely label and its probability"""
+        probabilities = self.pipeline.predict_proba([text])[0]
+        best = int(probabilities.argmax())
+        return str(self.pipeline.classes_[best]), float(probabilities[best])
+
+    def save(self, directory: str) -> str:
+        """Write `<task>-<version>.joblib` and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.task}-{self.version}{ARTIFACT_SUFFIX}")
+        joblib.dump({"task": self.task, "pipeline": self.pipeline, "metadata": self.metadata}, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "LocalTextClassifier":
+        artifact = joblib.load(path)
+        metadata = artifact.get("metadata", {})
+        if metadata.get("sklearn_version") not in (None, sklearn.__version__):
+            logger.warning(
+                f"Classifier {path} was trained with scikit-learn {metadata['sklearn_version']}, "
+                f"running {sklearn.__version__}"
+            )
+        return cls(artifact["task"], artifact["pipeline"], metadata)
+
+
+def train_classifier(
+    task: str,
+    texts: Sequence[str],
+    labels: Sequence[str],
+    holdout: float = 0.2,
+    seed: int = 0
+) -> Tuple[LocalTextClassifier, TrainingReport]:
+    """
+    Fit a classifier for `task`
+
+    Accuracy is measured on a stratified holdout when every label has
+    enough examples; the returned model is then refitted on all examples.
+    """
+    if not SKLEARN_AVAILABLE:
+        raise RuntimeError("scikit-learn is required to train text classifiers")
+    if len(set(labels)) < 2:
+        raise ValueError(f"Need at least two labels to train the {task} classifier")
+
+    counts: Dict[str, int] = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    report = TrainingReport(task=task, samples=len(texts), labels=dict(sorted(counts.items())))
+
+    holdout_size = int(len(texts) * holdout)
+    if holdout_size >= len(counts) and min(counts.values()) >= 2:
+        train_texts, test_texts, train_labels, test_labels = train_test_split(
+            list(texts), list(labels), test_size=holdout_size, stratify=list(labels), random_state=seed
+        )
+        pipeline = _build_pipeline().fit(train_texts, train_labels)
+        predicted = pipeline.predict(test_texts)
+        report.holdout_samples = len(test_texts)
+        report.holdout_accuracy = float(sum(p == t for p, t in zip(predicted, test_labels)) / len(test_labels))
+        report.errors = [(text, t, str(p)) for text, t, p in zip(test_texts, test_labels, predicted) if p != t]
+
+    pipeline = _build_pipeline().fit(list(texts), list(labels))
+    digest = hashlib.sha1(json.dumps([list(texts), list(labels)], ensure_ascii=False).encode()).hexdigest()[:8]
+    metadata = {
+        "version": f"{datetime.utcnow():%Y%m%d%H%M%S}-{digest}",
+        "trained_at": datetime.utcnow().isoformat(),
+        "samples": report.samples,
+        "labels": report.labels,
+        "holdout_accuracy": report.holdout_accuracy,
+        "sklearn_version": sklearn.__version__,
+    }
+    return LocalTextClassifier(task, pipeline, metadata), report
+
+
+def latest_artifact(directory: str, task: str) -> Optional[str]:
+    """Path of the newest `<task>-<version>` artifact (versions sort by training time)"""
+    if not os.path.isdir(directory):
+        return None
+    candidates = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(f"{task}-") and name.endswith(ARTIFACT_SUFFIX)
+    )
+    return os.path.join(directory, candidates[-1]) if candidates else None
+
+
+class TextClassifierRegistry:
+    """
+    Loaded classifiers shared by the conversation services
+
+    `predict` returns None when the task has no model, scikit-learn is
+    missing or the best label is below the confidence threshold, which is
+    the caller's signal to use its LLM path.
+    """
+
+    def __init__(self, directory: Optional[str] = None, min_confidence: Optional[float] = None):
+        self.directory = directory or settings.text_classifier_dir
+        self.min_confidence = min_confidence if min_confidence is not None else settings.text_classifier_min_confidence
+        self.classifiers: Dict[str, LocalTextClassifier] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._stats = {task: {"local": 0, "fallbacks": 0, "latency_ms": 0.0} for task in TASKS}
+
+    def load(self) -> Dict[str, str]:
+        """Load the newest artifact of every task; returns the loaded versions"""
+        with self._lock:
+            classifiers = {}
+            if settings.text_classifier_enabled and SKLEARN_AVAILABLE:
+                for task in TASKS:
+                    path = latest_artifact(self.directory, task)
+                    if path is None:
+                        continue
+                    try:
+                        classifiers[task] = LocalTextClassifier.load(path)
+                    except Exception as e:
+                        logger.error(f"Error loading {task} classifier from {path}: {e}")
+            self.classifiers = classifiers
+            self._loaded = True
+        versions = {task: classifier.version for task, classifier in classifiers.items()}
+        if versions:
+            logger.info(f"Loaded local text classifiers: {versions}")
+        return versions
+
+    def register(self, classifier: LocalTextClassifier):
+        """Use an in-memory classifier for its task"""
+        self.classifiers[classifier.task] = classifier
+        self._loaded = True
+
+    def predict(self, task: str, text: str) -> Optional[Prediction]:
+        """Confident local label for `text`, or None to fall back to the LLM"""
+        if not self._loaded:
+            self.load()
+        classifier = self.classifiers.get(task)
+        stats = self._stats[task]
+        if classifier is None or not text or not text.strip():
+            stats["fallbacks"] += 1
+            return None
+
+        start = time.perf_counter()
+        try:
+            label, confidence = classifier.predict(text)
+        except Exception as e:
+            logger.error(f"Local {task} classification failed: {e}")
+            stats["fallbacks"] += 1
+            return None
+        stats["latency_ms"] += (time.perf_counter() - start) * 1000
+
+        if confidence < self.min_confidence:
+            stats["fallbacks"] += 1
+            return None
+        stats["local"] += 1
+        return Prediction(label=label, confidence=round(confidence, 3), model_version=classifier.version)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for task, counts in self._stats.items():
+            total = counts["local"] + counts["fallbacks"]
+            classifier = self.classifiers.get(task)
+            stats[task] = {
+                "version": classifier.version if classifier else None,
+                "local": counts["local"],
+                "fallbacks": counts["fallbacks"],
+                "local_rate": counts["local"] / total if total else 0.0,
+                "avg_latency_ms": round(counts["latency_ms"] / total, 3) if total else 0.0,
+            }
+        return {"min_confidence": self.min_confidence, "tasks": stats}
+
+
+# Process-wide registry, loaded at startup
+_registry = TextClassifierRegistry()
+
+
+def get_text_classifiers() -> TextClassifierRegistry:
+    return _registry
+
+
+def classify(task: str, text: str) -> Optional[Prediction]:
+    """Confident local label, or None to use the LLM"""
+    return _registry.predict(task, text)
+
+
+def collect_logged_examples(db: Session, task: str, min_confidence: float = 0.6) -> List[Tuple[str, str]]:
+    """
+    (text, label) pairs from logged conversations
+
+    Intent labels come from the primary_intent recorded in incoming
+    conversation rows and emotion labels from the LLM emotion analyses;
+    interruptions are not logged and come from labelled files only.
+    """
+    from app.models.cultural_models import ConversationEmotion
+    from app.models.database_models import Conversation
+
+    examples: List[Tuple[str, str]] = []
+    if task == INTENT:
+        rows = db.query(Conversation.message_content, Conversation.extracted_data).filter(
+            Conversation.message_type == "incoming", Conversation.extracted_data.isnot(None)
+        ).yield_per(1000)
+        for text, extracted in rows:
+            if isinstance(extracted, str):
+                try:
+                    extracted = json.loads(extracted)
+                except ValueError:
+                    continue
+            label = extracted.get("primary_intent") if isinstance(extracted, dict) else None
+            if text and label:
+                examples.append((text, label))
+    elif task == EMOTION:
+        rows = db.query(Conversation.message_content, ConversationEmotion.primary_emotion).join(
+            ConversationEmotion, ConversationEmotion.conversation_id == Conversation.id
+        ).filter(ConversationEmotion.confidence_level >= min_confidence).yield_per(1000)
+        examples = [(text, label) for text, label in rows if text and label]
+    return examples
+
+
+def read_labelled_file(path: str, task: str) -> List[Tuple[str, str]]:
+    """(text, label) pairs for `task` from a JSONL file of {"task", "text", "label"} rows"""
+    examples = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if row.get("task", task) == task and row.get("text") and row.get("label"):
+                examples.append((row["text"], row["label"]))
+    return examples
+
+
+def deduplicate(examples: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """One example per normalized text; the last label wins (files are read after the logs)"""
+    labelled: Dict[str, Tuple[str, str]] = {}
+    for text, label in examples:
+        labelled[" ".join(text.lower().split())] = (text, label)
+    return list(labelled.values())
@@ -0,0 +1,350 @@
+"""
+Text Features
+One extraction pass per inbound message shared by the conversation
+analyzers. The text is normalized once (WhatsApp abbreviations and pidgin
+expressions expanded for display; accents folded and pidgin spelling
+variants unified for matching) and every keyword, phrase and pattern group
+the analyzers registered is matched in a single Aho–Corasick scan. The
+resulting TextFeatures are immutable and handed to each analyzer instead of
+every analyzer lowercasing and rescanning the message with its own lists.
+"""
+
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from loguru import logger
+from unidecode import unidecode
+
+# Extracted messages kept for the other analyzers of the same turn
+FEATURE_CACHE_SIZE = 512
+
+# Pidgin and local expressions, rewritten to standard French for display
+PIDGIN_EXPRESSIONS = {
+    # Electrical issues
+    "courant a jump": "panne électrique",
+    "light don go": "coupure électricité",
+    "no current": "pas d'électricité",
+    "current no dey": "pas d'électricité",
+
+    # Water issues
+    "coule-coule": "fuite d'eau",
+    "wata no dey comot": "pas d'eau",
+    "pipe don burst": "canalisation cassée",
+    "water no dey flow": "pas d'eau",
+
+    # General expressions
+    "don spoil": "cassé",
+    "no dey work": "ne marche pas",
+    "i want make": "je veux que"
+}
+
+# Common WhatsApp abbreviations
+ABBREVIATIONS = {
+    "slt": "salut",
+    "bjr": "bonjour",
+    "stp": "s'il te plaît",
+    "svp": "s'il vous plaît",
+    "pb": "problème",
+    "qd": "quand",
+    "tt": "tout",
+    "pr": "pour"
+}
+
+# Pidgin spelling variants unified before matching (lexicon terms get the same treatment)
+PIDGIN_VARIANTS = {
+    "wata": "water",
+    "watta": "water",
+    "commot": "comot",
+    "komot": "comot",
+    "deh": "dey",
+    "lite": "light",
+    "curent": "current",
+    "spoyl": "spoil"
+}
+
+PUNCTUATION = ".,!?;:"
+
+_WHITESPACE = re.compile(r"\s+")
+_WORD = re.compile(r"[a-z0-9]+")
+_EXPRESSIONS = re.compile("|".join(
+    re.escape(expression) for expression in sorted(PIDGIN_EXPRESSIONS, key=len, reverse=True)
+))
+_ABBREVIATIONS = re.compile(r"\b(" + "|".join(ABBREVIATIONS) + r")\b")
+
+
+def fold(text: Optional[str]) -> str:
+    """Matching form: lowercase, accents folded, whitespace collapsed, pidgin variants unified"""
+    folded = _WHITESPACE.sub(" ", unidecode((text or "").lower())).strip()
+    return _WORD.sub(lambda match: PIDGIN_VARIANTS.get(match.group(), match.group()), folded)
+
+
+def normalize_expressions(lowered: str) -> str:
+    """Display form: pidgin expressions and abbreviations rewritten, accents kept"""
+    normalized = _EXPRESSIONS.sub(lambda match: PIDGIN_EXPRESSIONS[match.group()], lowered)
+    return _ABBREVIATIONS.sub(lambda match: ABBREVIATIONS[match.group()], normalized)
+
+
+class AhoCorasick:
+    """Minimal Aho–Corasick automaton over strings"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Any]] = [[]]
+
+    def add(self, pattern: str, value: Any):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(value)
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                # Children of the root fall back to the root itself
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """(end index, value) of every pattern occurring in the text"""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for value in self._out[state]:
+                yield index, value
+
+    def iter(self, text: str) -> Iterator[Any]:
+        """Values of every pattern occurring in the text"""
+        for _, value in self.iter_matches(text):
+            yield value
+
+
+# Per-stage timings of the analyzers, process-wide
+_stage_lock = threading.Lock()
+_stage_stats: Dict[str, Dict[str, float]] = {}
+
+
+@contextmanager
+def timed_stage(stage: str):
+    """Time one analyzer stage; logged at debug level and aggregated for get_stage_timings"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with _stage_lock:
+            stats = _stage_stats.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        logger.debug(f"Stage {stage}: {elapsed_ms:.3f} ms")
+
+
+def get_stage_timings() -> Dict[str, Dict[str, float]]:
+    with _stage_lock:
+        return {
+            stage: {
+                "count": int(stats["count"]),
+                "avg_ms": round(stats["total_ms"] / stats["count"], 4),
+                "max_ms": round(stats["max_ms"], 4)
+            }
+            for stage, stats in sorted(_stage_stats.items())
+        }
+
+
+@dataclass(frozen=True)
+class TextFeatures:
+    """Everything the analyzers read from one message, computed once"""
+    text: str
+    lowered: str
+    normalized: str
+    folded: str
+    tokens: Tuple[str, ...]
+    punctuation: Mapping[str, int]
+    # Registered group -> distinct matched (folded) terms, and their spans in `folded`
+    matches: Mapping[str, FrozenSet[str]]
+    spans: Mapping[str, Tuple[Tuple[int, int], ...]]
+    version: int
+
+    @property
+    def word_count(self) -> int:
+        return len(self.tokens)
+
+    def has(self, group: str) -> bool:
+        return group in self.matches
+
+    def count(self, group: str) -> int:
+        """Number of distinct terms of the group found in the message"""
+        return len(self.matches.get(group, ()))
+
+    def terms(self, group: str) -> FrozenSet[str]:
+        return self.matches.get(group, frozenset())
+
+    def coverage(self, group: str) -> float:
+        """Share of the message's letters and digits covered by the group's matches"""
+        spans = self.spans.get(group)
+        if not spans:
+            return 0.0
+        covered = set()
+        for start, end in spans:
+            covered.update(range(start, end))
+        total = sum(1 for char in self.folded if char.isalnum()) or 1
+        return min(sum(1 for index in covered if self.folded[index].isalnum()) / total, 1.0)
+
+
+class TextFeatureExtractor:
+    """
+    Registered lexicons compiled into one automaton, plus a small cache
+
+    Analyzers register named term groups (idempotent, so registering from
+    a constructor is cheap); any change bumps `version`, rebuilds the
+    automaton on the next extraction and makes older TextFeatures stale.
+    Extracted messages are cached so every analyzer of a turn shares the
+    same pass even where the features are not threaded explicitly.
+    """
+
+    def __init__(self, cache_size: int = FEATURE_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.version = 0
+        self._groups: Dict[str, Tuple[str, ...]] = {}
+        self._automaton: Optional[AhoCorasick] = None
+        self._cache: "OrderedDict[str, TextFeatures]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def register(self, groups: Mapping[str, Iterable[str]]):
+        """Add or replace term groups; terms are matched as substrings of the folded text"""
+        with self._lock:
+            changed = False
+            for name, terms in groups.items():
+                terms = tuple(terms)
+                if self._groups.get(name) != terms:
+                    self._groups[name] = terms
+                    changed = True
+            if changed:
+                self.version += 1
+                self._automaton = None
+                self._cache.clear()
+
+    def _build(self) -> AhoCorasick:
+        term_groups: Dict[str, List[str]] = defaultdict(list)
+        for name, terms in self._groups.items():
+            for term in terms:
+                folded = fold(term)
+                if folded and name not in term_groups[folded]:
+                    term_groups[folded].append(name)
+        automaton = AhoCorasick()
+        for term, names in term_groups.items():
+            automaton.add(term, (term, tuple(names)))
+        automaton.build()
+        return automaton
+
+    def extract(self, message: Optional[str]) -> TextFeatures:
+        text = message or ""
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self._stats["hits"] += 1
+                return cached
+            self._stats["misses"] += 1
+            if self._automaton is None:
+                self._automaton = self._build()
+            automaton, version = self._automaton, self.version
+
+        with timed_stage("features.extract"):
+            features = self._scan(text, automaton, version)
+
+        with self._lock:
+            if version == self.version and self.cache_size:
+                self._cache[text] = features
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return features
+
+    def ensure(self, message: Optional[str], features: Optional[TextFeatures] = None) -> TextFeatures:
+        """`features` when they are current, otherwise a (cached) extraction of the message"""
+        if features is not None and features.version == self.version:
+            return features
+        return self.extract(features.text if features is not None else message)
+
+    @staticmethod
+    def _scan(text: str, automaton: AhoCorasick, version: int) -> TextFeatures:
+        lowered = text.lower().strip()
+        folded = fold(text)
+        matches: Dict[str, set] = defaultdict(set)
+        spans: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for end, (term, names) in automaton.iter_matches(folded):
+            span = (end - len(term) + 1, end + 1)
+            for name in names:
+                matches[name].add(term)
+                spans[name].append(span)
+
+        return TextFeatures(
+            text=text,
+            lowered=lowered,
+            normalized=normalize_expressions(lowered),
+            folded=folded,
+            tokens=tuple(folded.split()),
+            punctuation=MappingProxyType(Counter(char for char in text if char in PUNCTUATION)),
+            matches=MappingProxyType({name: frozenset(terms) for name, terms in matches.items()}),
+            spans=MappingProxyType({name: tuple(group_spans) for name, group_spans in spans.items()}),
+            version=version
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "version": self.version,
+            "groups": len(self._groups),
+            "terms": sum(len(terms) for terms in self._groups.values()),
+            "cached_messages": len(self._cache),
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            "stages": get_stage_timings()
+        }
+
+
+# Process-wide extractor shared by all analyzers
+_extractor = TextFeatureExtractor()
+
+
+def get_text_feature_extractor() -> TextFeatureExtractor:
+    return _extractor
+
+
+def register_lexicon(groups: Mapping[str, Iterable[str]]):
+    _extractor.register(groups)
+
+
+def extract_text_features(message: Optional[str]) -> TextFeatures:
+    """Features of a message, extracted once and shared by the turn's analyzers"""
+    return _extractor.extract(message)
+
+
+def ensure_text_features(message: Optional[str], features: Optional[TextFeatures] = None) -> TextFeatures:
+    return _extractor.ensure(message, features)
@@ -10,14 +10,17 @@ import logging
 import json
 from datetime import datetime
 import re
-from difflib import SequenceMatcher
 
 from app.models.dynamic_services import Service, Zone, ServiceCategory, ValidationLog, ValidationError
 from app.services.zone_service import ZoneService
 from app.services.service_management_service import ServiceManagementService
+from app.services.fuzzy_index import get_service_fuzzy_index, get_zone_fuzzy_index
 
 logger = logging.getLogger(__name__)
 
+# Candidates returned by the similar service / zone lookups
+SIMILAR_CANDIDATES = 5
+
 class ValidationErrorType(Enum):
     """Types of validation errors"""
     INVALID_SERVICE_CODE = "invalid_service_code"
@@ -68,6 +71,7 @@ class ValidationService:
             'min_confidence_score': 0.6,
             'max_price_variance': 0.5,  # 50% variance allowed
             'similarity_threshold': 0.7,
+            'code_similarity_threshold': 0.3,  # trigram similarity for unknown service/zone codes
             'max_retry_attempts': 3,
             'auto_correction_threshold': 0.8
         }
@@ -378,40 +382,28 @@ class ValidationService:
         db: Session,
         service_code: str
     ) -> List[Dict[str, Any]]:
-        """Find similar services based on code similarity"""
-        services = db.query(Service).filter(Service.status == 'available').all()
-        similar_services = []
-        
-        for service in services:
-            similarity = SequenceMatcher(None, service_code.lower(), service.code.lower()).ratio()
-            if similarity > 0.6:
-                similar_services.append({
-                    'code': service.code,
-                    'name': service.name,
-                    'similarity': similarity
-                })
-        
-        return sorted(similar_services, key=lambda x: x['similarity'], reverse=True)
+        """Find similar available services by trigram similarity to their codes and names"""
+        matches = get_service_fuzzy_index(db).search(
+            service_code, k=SIMILAR_CANDIDATES, threshold=self.validation_rules['code_similarity_threshold']
+        )
+        return [
+            {'code': match.key, 'name': match.attrs['name'], 'similarity': match.score}
+            for match in matches
+        ]
     
     async def _find_similar_zones(
         self,
         db: Session,
         zone_code: str
     ) -> List[Dict[str, Any]]:
-        """Find similar zones based on code similarity"""
-        zones = db.query(Zone).filter(Zone.is_active == True).all()
-        similar_zones = []
-        
-        for zone in zones:
-            similarity = SequenceMatcher(None, zone_code.lower(), zone.code.lower()).ratio()
-            if similarity > 0.6:
-                similar_zones.append({
-                    'code': zone.code,
-                    'name': zone.name,
-                    'similarity': similarity
-                })
-        
-        return sorted(similar_zones, key=lambda x: x['similarity'], reverse=True)
+        """Find similar active zones by trigram similarity to their codes and names"""
+        matches = get_zone_fuzzy_index(db).search(
+            zone_code, k=SIMILAR_CANDIDATES, threshold=self.validation_rules['code_similarity_threshold']
+        )
+        return [
+            {'code': match.key, 'name': match.attrs['name'], 'similarity': match.score}
+            for match in matches
+        ]
     
     async def _generate_suggestions(
         self,
@@ -12,9 +12,14 @@ from unidecode import unidecode
 import json
 
 from app.models.dynamic_services import Zone, ZoneType
+from app.services.zone_spatial_index import get_zone_spatial_index, invalidate_zone_spatial_index
+from app.services.fuzzy_index import CONTAINMENT, get_zone_fuzzy_index, invalidate_zone_fuzzy_index
 
 logger = logging.getLogger(__name__)
 
+# Minimum share of the query's trigrams a zone code or name must contain
+SEARCH_MATCH_THRESHOLD = 0.5
+
 class ZoneService:
     """Service for managing geographic zones with hierarchical structure"""
     
@@ -59,6 +64,8 @@ class ZoneService:
             # Update cache
             self.zone_cache[code] = zone
             self._update_hierarchy_cache(db)
+            invalidate_zone_spatial_index()
+            invalidate_zone_fuzzy_index()
             
             logger.info(f"Created zone: {code} ({name})")
             return zone
@@ -92,52 +99,33 @@ class ZoneService:
             # Normalize query
             normalized_query = self._normalize_text(query)
             
-            # Build search filters
-            filters = [Zone.is_active == True]
-            
-            if zone_type:
-                filters.append(Zone.zone_type == zone_type.value)
-            
-            if parent_id:
-                filters.append(Zone.parent_id == parent_id)
-            
-            # Search in multiple fields
-            search_conditions = []
-            
-            # Direct name match
-            search_conditions.append(
-                func.lower(Zone.name).ilike(f"%{normalized_query}%")
-            )
-            
-            # French name match
-            search_conditions.append(
-                func.lower(Zone.name_fr).ilike(f"%{normalized_query}%")
-            )
-            
-            # English name match
-            search_conditions.append(
-                func.lower(Zone.name_en).ilike(f"%{normalized_query}%")
-            )
+            # Trigram candidates from the in-memory index instead of
+            # unindexable ilike '%q%' scans over every name column
+            def in_scope(attrs: Dict[str, Any]) -> bool:
+                if zone_type and attrs["zone_type"] != zone_type.value:
+                    return False
+                return not parent_id or attrs["parent_id"] == parent_id
             
-            # Code match
-            search_conditions.append(
-                func.lower(Zone.code).ilike(f"%{normalized_query}%")
+            matches = get_zone_fuzzy_index(db).search(
+                normalized_query, k=limit, threshold=SEARCH_MATCH_THRESHOLD, metric=CONTAINMENT, where=in_scope
             )
-            
-            # Execute search
-            zones = db.query(Zone).filter(
-                and_(*filters),
-                or_(*search_conditions)
-            ).limit(limit).all()
+            zones = {
+                zone.id: zone
+                for zone in db.query(Zone).filter(Zone.id.in_([match.attrs["id"] for match in matches])).all()
+            }
             
             # Calculate relevance scores
             results = []
-            for zone in zones:
+            for match in matches:
+                zone = zones.get(match.attrs["id"])
+                if zone is None:
+                    continue
                 score = self._calculate_relevance_score(zone, normalized_query)
                 results.append({
                     "zone": zone,
-                    "relevance_score": score,
-                    "match_type": self._get_match_type(zone, normalized_query)
+                    # The trigram score breaks ties and ranks typo matches
+                    "relevance_score": score + match.score,
+                    "match_type": self._get_match_type(zone, normalized_query) if score else "fuzzy"
                 })
             
             # Sort by relevance score
@@ -205,34 +193,22 @@ class ZoneService:
     ) -> List[Dict[str, Any]]:
         """Find zones within specified radius"""
         try:
-            filters = [
-                Zone.is_active == True,
-                Zone.latitude.isnot(None),
-                Zone.longitude.isnot(None)
-            ]
-            
-            if zone_type:
-                filters.append(Zone.zone_type == zone_type.value)
-            
-            zones = db.query(Zone).filter(and_(*filters)).all()
+            index = get_zone_spatial_index(db)
+            hits = index.within_radius(
+                latitude, longitude, radius_km, zone_type.value if zone_type else None
+            )
+            zones = self._load_zones(db, [zone_id for zone_id, _ in hits])
             
             results = []
-            for zone in zones:
-                distance = geodesic(
-                    (latitude, longitude),
-                    (zone.latitude, zone.longitude)
-                ).kilometers
-                
-                if distance <= radius_km:
+            for zone_id, distance in hits:
+                zone = zones.get(zone_id)
+                if zone:
                     results.append({
                         "zone": zone,
                         "distance_km": distance,
                         "within_radius": distance <= (zone.radius_km or 0)
                     })
             
-            # Sort by distance
-            results.sort(key=lambda x: x["distance_km"])
-            
             logger.info(f"Found {len(results)} zones within {radius_km}km")
             return results
             
@@ -240,6 +216,56 @@ class ZoneService:
             logger.error(f"Error finding nearest zones: {e}")
             return []
     
+    async def find_nearby_zones(
+        self, 
+        db: Session, 
+        latitude: Optional[float], 
+        longitude: Optional[float], 
+        radius_km: float = 10,
+        zone_type: Optional[ZoneType] = None
+    ) -> List[Zone]:
+        """Zones within the radius, nearest first"""
+        if latitude is None or longitude is None:
+            return []
+        results = await self.find_nearest_zones(db, latitude, longitude, radius_km, zone_type)
+        return [result["zone"] for result in results]
+    
+    async def find_nearest_zone_for_points(
+        self, 
+        db: Session, 
+        points: List[Tuple[float, float]], 
+        zone_type: Optional[ZoneType] = None,
+        max_distance_km: Optional[float] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Nearest zone for each (latitude, longitude) point in one pass
+        
+        Used by seeding and analytics scripts; points farther than
+        max_distance_km from every zone get None.
+        """
+        if not points:
+            return []
+        
+        index = get_zone_spatial_index(db)
+        ids, distances = index.nearest_many(points, k=1, zone_type=zone_type.value if zone_type else None)
+        zones = self._load_zones(db, {int(zone_id) for zone_id in ids[:, 0] if zone_id >= 0})
+        
+        results = []
+        for zone_id, distance in zip(ids[:, 0], distances[:, 0]):
+            zone = zones.get(int(zone_id))
+            if zone is None or (max_distance_km is not None and distance > max_distance_km):
+                results.append(None)
+            else:
+                results.append({"zone": zone, "distance_km": float(distance)})
+        return results
+    
+    def _load_zones(self, db: Session, zone_ids) -> Dict[int, Zone]:
+        """Fetch zones by primary key in a single query"""
+        zone_ids = list(zone_ids)
+        if not zone_ids:
+            return {}
+        return {zone.id: zone for zone in db.query(Zone).filter(Zone.id.in_(zone_ids)).all()}
+    
     async def validate_zone_coverage(
         self, 
         db: Session, 
@@ -0,0 +1,222 @@
+"""
+Zone Spatial Index
+In-memory spatial index over active zone centroids: latitude-sorted NumPy
+arrays for bounding-box pre-filtering, vectorized haversine distances and a
+ball tree for nearest-zone lookups (single and bulk)
+"""
+
+import time
+import threading
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.dynamic_services import Zone
+
+try:
+    from sklearn.neighbors import BallTree
+    BALLTREE_AVAILABLE = True
+except ImportError:
+    BALLTREE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# How often a cached index re-checks the zones table for changes
+INDEX_CHECK_SECONDS = 30
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points"""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - np.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class ZoneSpatialIndex:
+    """
+    Immutable index over zone centroids
+
+    Radius queries slice the latitude-sorted arrays with a bounding box and
+    only compute haversine distances for the candidates; nearest queries go
+    through a haversine ball tree built lazily per zone type.
+    """
+
+    def __init__(
+        self,
+        zone_ids: Sequence[int],
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        zone_types: Sequence[str],
+        version: Tuple = ()
+    ):
+        order = np.argsort(np.asarray(latitudes, dtype=float), kind="stable")
+        self.zone_ids = np.asarray(zone_ids, dtype=np.int64)[order]
+        self.latitudes = np.asarray(latitudes, dtype=float)[order]
+        self.longitudes = np.asarray(longitudes, dtype=float)[order]
+        self.zone_types = np.asarray(zone_types, dtype=object)[order]
+        self.version = version
+        self._trees: Dict[Optional[str], Tuple[Optional["BallTree"], np.ndarray]] = {}
+        self._tree_lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, db: Session) -> "ZoneSpatialIndex":
+        """Build the index from active zones that have coordinates"""
+        # Read the version first so a concurrent write triggers another rebuild
+        version = zone_table_version(db)
+        rows = db.query(Zone.id, Zone.latitude, Zone.longitude, Zone.zone_type).filter(
+            Zone.is_active == True,
+            Zone.latitude.isnot(None),
+            Zone.longitude.isnot(None)
+        ).all()
+        return cls(
+            [row.id for row in rows],
+            [row.latitude for row in rows],
+            [row.longitude for row in rows],
+            [row.zone_type for row in rows],
+            version=version
+        )
+
+    def __len__(self) -> int:
+        return len(self.zone_ids)
+
+    def within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        zone_type: Optional[str] = None
+    ) -> List[Tuple[int, float]]:
+        """(zone_id, distance_km) pairs within the radius, nearest first"""
+        candidates = self._bounding_box(latitude, longitude, radius_km)
+        if zone_type is not None:
+            candidates = candidates[self.zone_types[candidates] == zone_type]
+        if len(candidates) == 0:
+            return []
+
+        distances = haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return [(int(self.zone_ids[candidates[i]]), float(distances[i])) for i in order]
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        zone_type: Optional[str] = None
+    ) -> List[Tuple[int, float]]:
+        """The k nearest zones as (zone_id, distance_km), nearest first"""
+        ids, distances = self.nearest_many([(latitude, longitude)], k=k, zone_type=zone_type)
+        return [(int(zone_id), float(distance)) for zone_id, distance in zip(ids[0], distances[0]) if zone_id >= 0]
+
+    def nearest_many(
+        self,
+        points: Sequence[Tuple[float, float]],
+        k: int = 1,
+        zone_type: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest zones for many (latitude, longitude) points at once
+
+        Returns (zone_ids, distances_km) arrays of shape (len(points), k);
+        slots beyond the number of indexed zones hold -1 / inf.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        tree, positions = self._tree_for(zone_type)
+        ids = np.full((len(points), k), -1, dtype=np.int64)
+        distances = np.full((len(points), k), np.inf)
+        found = min(k, len(positions))
+        if found == 0 or len(points) == 0:
+            return ids, distances
+
+        if tree is not None:
+            radians, slots = tree.query(np.radians(points), k=found)
+            distances[:, :found] = radians * EARTH_RADIUS_KM
+        else:
+            # Brute force fallback without scikit-learn, one point at a time
+            slots = np.empty((len(points), found), dtype=np.int64)
+            for row, (latitude, longitude) in enumerate(points):
+                row_distances = haversine_km(
+                    latitude, longitude, self.latitudes[positions], self.longitudes[positions]
+                )
+                slots[row] = np.argsort(row_distances, kind="stable")[:found]
+                distances[row, :found] = row_distances[slots[row]]
+        ids[:, :found] = self.zone_ids[positions[slots]]
+        return ids, distances
+
+    def _bounding_box(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        """Positions of zones inside the lat/lon box enclosing the radius"""
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        low = np.searchsorted(self.latitudes, latitude - dlat, side="left")
+        high = np.searchsorted(self.latitudes, latitude + dlat, side="right")
+        positions = np.arange(low, high)
+
+        cos_lat = np.cos(np.radians(min(abs(latitude) + dlat, 90.0)))
+        if cos_lat < 1e-6:
+            return positions  # the box reaches a pole, every longitude qualifies
+        dlon = np.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+        if dlon >= 180:
+            return positions
+        offset = (self.longitudes[positions] - longitude + 180.0) % 360.0 - 180.0
+        return positions[np.abs(offset) <= dlon]
+
+    def _tree_for(self, zone_type: Optional[str]) -> Tuple[Optional["BallTree"], np.ndarray]:
+        with self._tree_lock:
+            if zone_type not in self._trees:
+                if zone_type is None:
+                    positions = np.arange(len(self.zone_ids))
+                else:
+                    positions = np.flatnonzero(self.zone_types == zone_type)
+                tree = None
+                if BALLTREE_AVAILABLE and len(positions):
+                    coordinates = np.radians(np.column_stack(
+                        (self.latitudes[positions], self.longitudes[positions])
+                    ))
+                    tree = BallTree(coordinates, metric="haversine")
+                self._trees[zone_type] = (tree, positions)
+            return self._trees[zone_type]
+
+
+def zone_table_version(db: Session) -> Tuple:
+    """Cheap change signature of the zones table"""
+    count, last_created, last_updated = db.query(
+        func.count(Zone.id), func.max(Zone.created_at), func.max(Zone.updated_at)
+    ).one()
+    return (count, str(last_created), str(last_updated))
+
+
+# Process-wide index shared by every ZoneService instance
+_zone_index: Optional[ZoneSpatialIndex] = None
+_zone_index_checked_at = 0.0
+_zone_index_lock = threading.Lock()
+
+
+def get_zone_spatial_index(db: Session) -> ZoneSpatialIndex:
+    """Get the cached zone index, rebuilding it when the zones table changed"""
+    global _zone_index, _zone_index_checked_at
+    with _zone_index_lock:
+        now = time.monotonic()
+        if _zone_index is not None and now - _zone_index_checked_at < INDEX_CHECK_SECONDS:
+            return _zone_index
+
+        if _zone_index is None or zone_table_version(db) != _zone_index.version:
+            _zone_index = ZoneSpatialIndex.from_db(db)
+            logger.info(f"Built zone spatial index with {len(_zone_index)} zones")
+        _zone_index_checked_at = now
+        return _zone_index
+
+
+def invalidate_zone_spatial_index():
+    """Force a rebuild on the next lookup (called when zones are written)"""
+    global _zone_index
+    with _zone_index_lock:
+        _zone_index = None
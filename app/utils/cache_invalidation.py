@@ -0,0 +1,61 @@
+"""
+Cache Invalidation
+Drop process-wide caches when the rows they are built from change, once the
+writing transaction has committed
+"""
+
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+WRITE_EVENTS = ("after_insert", "after_update", "after_delete")
+
+
+def invalidate_on_commit(
+    models: Iterable[type],
+    key: str,
+    callback: Callable[..., Any],
+    collect: Optional[Callable[[Any], Iterable[Any]]] = None
+):
+    """
+    Call `callback` after a session that wrote one of `models` commits
+
+    Writes only mark the session (under `session.info[key]`), so rolled back
+    transactions never invalidate anything. With `collect`, each written row
+    contributes the values it returns; the callback then receives them as
+    arguments, both right away (so a read racing the commit cannot keep stale
+    entries until their TTL) and again after commit.
+    """
+
+    def _written(mapper, connection, target):
+        session = object_session(target)
+        if collect is None:
+            if session is not None:
+                session.info[key] = True
+            return
+
+        values = {value for value in collect(target) if value is not None}
+        if not values:
+            return
+        callback(*values)
+        if session is not None:
+            session.info.setdefault(key, set()).update(values)
+
+    def _after_commit(session: Session):
+        marked = session.info.pop(key, None)
+        if not marked:
+            return
+        if collect is None:
+            callback()
+        else:
+            callback(*marked)
+
+    def _after_rollback(session: Session):
+        session.info.pop(key, None)
+
+    for model in models:
+        for event_name in WRITE_EVENTS:
+            event.listen(model, event_name, _written)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
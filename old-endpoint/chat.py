@@ -3,7 +3,7 @@ Chat API Endpoint for Web Chat Widget
 Handles web chat requests and integrates with the conversation manager
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
@@ -13,6 +13,7 @@ from datetime import datetime
 from app.database import get_db
 from app.services.natural_conversation_engine import NaturalConversationEngine
 from app.services.llm_conversation_manager import LLMConversationManager
+from app.services.llm_client_pool import cancel_on_disconnect, ClientDisconnected
 from app.models.database_models import User, Conversation
 from app.config import get_settings
 
@@ -46,6 +47,7 @@ class ChatResponse(BaseModel):
 @router.post("/webhook/chat", response_model=ChatResponse)
 async def handle_web_chat(
     chat_message: ChatMessage,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -81,9 +83,13 @@ async def handle_web_chat(
             user_identifier = chat_message.phone_number or f"web_{chat_message.session_id}"
             
             # Process message naturally - all database operations are hidden
-            conversation_result = await conversation_engine.process_natural_conversation(
-                user_identifier, 
-                chat_message.message
+            # LLM work is cancelled if the widget disconnects mid-turn
+            conversation_result = await cancel_on_disconnect(
+                request,
+                conversation_engine.process_natural_conversation(
+                    user_identifier, 
+                    chat_message.message
+                )
             )
             
             # Convert natural conversation result to expected format
@@ -98,6 +104,8 @@ async def handle_web_chat(
                 "system_action": None,
                 "next_step": None
             }
+        except ClientDisconnected:
+            raise
         except Exception as e:
             # Fallback to simple response if conversation manager fails
             print(f"Conversation manager error: {str(e)}")
@@ -186,6 +194,7 @@ async def handle_web_chat(
 @router.post("/chat-llm", response_model=ChatResponse)
 async def chat_llm_endpoint(
     chat_message: ChatMessage,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -221,10 +230,13 @@ async def chat_llm_endpoint(
             user_identifier = chat_message.phone_number or f"web_{chat_message.session_id}"
             
             # Process message with LLM-driven approach
-            result = await llm_manager.process_message(
-                user_identifier, 
-                chat_message.message,
-                chat_message.session_id
+            result = await cancel_on_disconnect(
+                request,
+                llm_manager.process_message(
+                    user_identifier, 
+                    chat_message.message,
+                    chat_message.session_id
+                )
             )
             
             # Format response for web chat
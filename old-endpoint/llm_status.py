@@ -11,6 +11,7 @@ from datetime import datetime
 
 from app.database import get_db
 from app.services.multi_llm_service import MultiLLMService, LLMProvider
+from app.services.intent_analyzer import IntentAnalyzer
 from app.models.database_models import AdminUser
 from app.api.auth import get_current_admin_user
 
@@ -46,6 +47,9 @@ class TestLLMResponse(BaseModel):
 # Global multi-LLM instance
 multi_llm_service = MultiLLMService()
 
+# Analyzer with the configured threshold; tier counters are shared by all instances
+intent_analyzer = IntentAnalyzer()
+
 @router.get("/status", response_model=LLMStatusResponse)
 async def get_llm_status(
     db: Session = Depends(get_db)
@@ -193,6 +197,34 @@ async def get_llm_analytics(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting analytics: {str(e)}")
 
+@router.get("/cache")
+async def get_llm_cache_stats(
+    current_user: AdminUser = Depends(get_current_admin_user)
+):
+    """Get LLM response cache hit-rate statistics (admin only)"""
+    try:
+        return {
+            "success": True,
+            "cache": multi_llm_service.get_cache_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting cache stats: {str(e)}")
+
+@router.get("/intent-tiers")
+async def get_intent_tier_stats(
+    current_user: AdminUser = Depends(get_current_admin_user)
+):
+    """Get how many intents the pattern tier answered without an LLM call (admin only)"""
+    try:
+        return {
+            "success": True,
+            "intent_tiers": intent_analyzer.get_tier_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting intent tier stats: {str(e)}")
+
 @router.get("/providers")
 async def list_available_providers():
     """List all available LLM providers"""
@@ -580,7 +580,7 @@ async def notify_providers(service_request, providers: list, db: Session):
             "urgency": service_request.urgency
         }
         
-        notification_message = ai_service.generate_provider_notification(notification_data)
+        notification_message = await ai_service.generate_provider_notification(notification_data)
         
         # Send notifications to providers
         for provider in providers:
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Escalation detection benchmark
+Replays long conversations through EscalationDetectionService and reports
+per-message latency and query count as the conversation grows
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base
+from app.models.escalation_detection_models import (
+    EscalationDetector, EscalationDetectionLog, EscalationBusinessRule, EscalationExecution
+)
+from app.services.escalation_detection_service import EscalationDetectionService
+from app.services.escalation_pipeline import (
+    EscalationStateCache, SessionEscalationState, analyze_message, invalidate_escalation_snapshot
+)
+
+CONVERSATION_LENGTH = 10000
+CONVERSATIONS = 3
+CHECKPOINTS = [100, 1000, 5000, 10000]
+
+MESSAGES = [
+    "J'ai une fuite d'eau sous l'évier depuis ce matin",
+    "Je ne comprends pas, pouvez-vous préciser le prix ?",
+    "Pourquoi c'est si lent, c'est inacceptable",
+    "Le courant est coupé dans toute la maison",
+    "Merci, parfait, à demain",
+    "La machine à laver fait un bruit bizarre",
+    "C'est compliqué, il y a plusieurs problèmes techniques",
+    "Comment ça marche exactement ?",
+    "Bonamoussadi, derrière la pharmacie",
+]
+
+
+def build_service():
+    """In-memory database with one detector of each type and a rule"""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[
+        EscalationDetector.__table__, EscalationDetectionLog.__table__,
+        EscalationBusinessRule.__table__, EscalationExecution.__table__
+    ])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    invalidate_escalation_snapshot()
+
+    service = EscalationDetectionService(db, state_cache=EscalationStateCache())
+    for detector_type in ("failure_counter", "sentiment_analysis", "duration_based", "complexity_scoring"):
+        service.create_detector({"detector_name": detector_type, "detector_type": detector_type})
+    db.add(EscalationBusinessRule(
+        rule_id="frustration", rule_name="Frustration", escalation_threshold=0.99,
+        escalation_action="human_handoff", cooldown_minutes=0, is_active=True
+    ))
+    db.commit()
+    return engine, service
+
+
+def replay(engine, service, conversation: int):
+    """Replay one conversation, returning {checkpoint: (ms per message, queries per message)}"""
+    rng = random.Random(conversation)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    results = {}
+    window_start, window_queries = time.perf_counter(), 0
+    previous = 0
+    for i in range(1, CONVERSATION_LENGTH + 1):
+        service.detect_escalation(f"user_{conversation}", f"session_{conversation}", rng.choice(MESSAGES),
+                                  {"service_type": "plomberie"})
+        if i in CHECKPOINTS:
+            elapsed = time.perf_counter() - window_start
+            count = i - previous
+            results[i] = (elapsed * 1000 / count, (len(statements) - window_queries) / count)
+            window_start, window_queries, previous = time.perf_counter(), len(statements), i
+    return results
+
+
+def state_only(conversation: int) -> float:
+    """Microseconds per message for analysis + rolling-state update alone"""
+    rng = random.Random(conversation)
+    state = SessionEscalationState()
+    start = time.perf_counter()
+    for _ in range(CONVERSATION_LENGTH):
+        state.observe(analyze_message(rng.choice(MESSAGES)))
+    return (time.perf_counter() - start) * 1e6 / CONVERSATION_LENGTH
+
+
+def main():
+    engine, service = build_service()
+    print(f"{'conversation':>12} | {'up to msg':>9} | {'ms/msg':>7} | {'queries/msg':>11}")
+    print("-" * 50)
+    for conversation in range(CONVERSATIONS):
+        for checkpoint, (ms, queries) in replay(engine, service, conversation).items():
+            print(f"{conversation:>12} | {checkpoint:>9} | {ms:>7.3f} | {queries:>11.2f}")
+
+    print()
+    print(f"Rolling state only: {state_only(0):.1f} µs/message over {CONVERSATION_LENGTH} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Provider ranking benchmark
+Compares query count and latency of per-provider vs batch scoring as the
+number of candidate providers grows
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, User, Provider, ServiceRequest
+from app.services.provider_matcher import ProviderMatcher
+
+CANDIDATE_COUNTS = [5, 10, 25, 50, 100, 200]
+REQUESTS_PER_PROVIDER = 20
+REPEATS = 5
+
+
+def build_database(provider_count: int):
+    """Create an in-memory database with providers and request history"""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[User.__table__, Provider.__table__, ServiceRequest.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+
+    rng = random.Random(42)
+    user = User(whatsapp_id="237690000000", name="Benchmark")
+    db.add(user)
+    db.flush()
+
+    now = datetime.now()
+    providers = []
+    for i in range(provider_count):
+        provider = Provider(
+            name=f"Prestataire {i}", whatsapp_id=f"2376{i:08d}", phone_number=f"2376{i:08d}",
+            services=["plomberie"], coverage_areas=["bonamoussadi", "makepe"],
+            is_active=True, is_available=True, rating=rng.uniform(3.0, 5.0), total_jobs=rng.randint(0, 50)
+        )
+        db.add(provider)
+        providers.append(provider)
+    db.flush()
+
+    for provider in providers:
+        for _ in range(REQUESTS_PER_PROVIDER):
+            created = now - timedelta(days=rng.randint(0, 45), minutes=rng.randint(0, 600))
+            db.add(ServiceRequest(
+                user_id=user.id, provider_id=provider.id, service_type="plomberie",
+                description="Fuite d'eau", location="Bonamoussadi",
+                status=rng.choice(["completed", "assigned", "in_progress"]),
+                created_at=created, accepted_at=created + timedelta(minutes=rng.randint(1, 40))
+            ))
+    db.commit()
+    return engine, db, providers
+
+
+def measure(engine, db, providers, batch_scoring: bool):
+    """Return (queries per ranking, mean latency in ms) for one scoring mode"""
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    request = ServiceRequest(service_type="plomberie", location="Bonamoussadi carrefour")
+    matcher = ProviderMatcher(db, batch_scoring=batch_scoring)
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        matcher.rank_providers(providers, request)
+    elapsed = (time.perf_counter() - start) / REPEATS
+
+    event.remove(engine, "before_cursor_execute", count_statement)
+    return len(statements) // REPEATS, elapsed * 1000
+
+
+def main():
+    print(f"{'candidates':>10} | {'per-provider q':>14} | {'per-provider ms':>15} | {'batch q':>7} | {'batch ms':>8}")
+    print("-" * 68)
+    for count in CANDIDATE_COUNTS:
+        engine, db, providers = build_database(count)
+        scalar_queries, scalar_ms = measure(engine, db, providers, batch_scoring=False)
+        batch_queries, batch_ms = measure(engine, db, providers, batch_scoring=True)
+        print(f"{count:>10} | {scalar_queries:>14} | {scalar_ms:>15.2f} | {batch_queries:>7} | {batch_ms:>8.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Text classifier benchmark
+Runs the local classifiers over a labelled holdout JSONL ({"task", "text",
+"label"} rows, not used for training) and reports accuracy, coverage above
+the confidence threshold and per-message latency; with --llm the current
+LLM paths label the same messages for comparison.
+
+    python scripts/benchmarks/benchmark_text_classifier.py --data holdout.jsonl --llm
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.services.text_classifier import (
+    INTENT, INTERRUPTION, NO_INTERRUPTION, TASKS, TextClassifierRegistry, read_labelled_file
+)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+def local_run(registry, task, examples):
+    """(accuracy, coverage, accuracy when confident, latencies ms) of the local model"""
+    classifier = registry.classifiers[task]
+    latencies, correct, covered, covered_correct = [], 0, 0, 0
+    for text, label in examples:
+        start = time.perf_counter()
+        predicted, confidence = classifier.predict(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += predicted == label
+        if confidence >= registry.min_confidence:
+            covered += 1
+            covered_correct += predicted == label
+    return (
+        correct / len(examples),
+        covered / len(examples),
+        covered_correct / covered if covered else 0.0,
+        latencies
+    )
+
+
+async def llm_label(task, text):
+    """Label from the LLM path the classifier replaces"""
+    if task == INTERRUPTION:
+        from app.services.dialogue_flow_manager import DialogueContext, DialogueState
+        from app.services.interruption_manager import InterruptionManager
+        detection = await InterruptionManager()._ai_based_interruption_detection(
+            text, DialogueContext(current_state=DialogueState.COLLECTING)
+        )
+        return detection[0].value if detection else NO_INTERRUPTION
+    if task == INTENT:
+        from app.services.intent_analyzer import IntentAnalyzer
+        return (await IntentAnalyzer()._ai_intent_analysis(text)).get("primary_intent")
+    from app.services.ai_service import AIService
+    from app.services.emotional_intelligence_service import EmotionalIntelligenceService
+    return (await EmotionalIntelligenceService(AIService())._llm_emotion_analysis(text)).get("primary_emotion")
+
+
+async def llm_run(task, examples):
+    latencies, correct = [], 0
+    for text, label in examples:
+        start = time.perf_counter()
+        predicted = await llm_label(task, text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += predicted == label
+    return correct / len(examples), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local classifier vs LLM accuracy and latency")
+    parser.add_argument("--data", required=True, help="Labelled holdout JSONL")
+    parser.add_argument("--task", choices=TASKS + ("all",), default="all")
+    parser.add_argument("--model-dir", default=None)
+    parser.add_argument("--llm", action="store_true", help="Also run the current LLM path (needs API keys)")
+    args = parser.parse_args()
+
+    registry = TextClassifierRegistry(directory=args.model_dir)
+    registry.load()
+    tasks = TASKS if args.task == "all" else (args.task,)
+
+    print(f"{'task':>12} | {'path':>6} | {'n':>5} | {'accuracy':>8} | {'coverage':>8} | {'acc@conf':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+    print("-" * 86)
+    for task in tasks:
+        examples = read_labelled_file(args.data, task)
+        if not examples:
+            continue
+        if task in registry.classifiers:
+            accuracy, coverage, confident_accuracy, latencies = local_run(registry, task, examples)
+            print(f"{task:>12} | {'local':>6} | {len(examples):>5} | {accuracy:>8.1%} | {coverage:>8.1%} | "
+                  f"{confident_accuracy:>8.1%} | {percentile(latencies, 0.5):>8.3f} | {percentile(latencies, 0.95):>8.3f}")
+        else:
+            print(f"{task:>12} | {'local':>6} | no model in {registry.directory}")
+        if args.llm:
+            accuracy, latencies = asyncio.run(llm_run(task, examples))
+            print(f"{task:>12} | {'llm':>6} | {len(examples):>5} | {accuracy:>8.1%} | {1:>8.1%} | "
+                  f"{accuracy:>8.1%} | {statistics.median(latencies):>8.1f} | {percentile(latencies, 0.95):>8.1f}")
+
+    print()
+    print(f"Confidence threshold: {registry.min_confidence} (below it the services call the LLM)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Text feature extraction benchmark
+Compares the per-analyzer keyword scans (every registered table checked
+with substring tests on the lowered message, normalization by sequential
+replaces and uncompiled regexes) with the single shared extraction, and
+prints the per-stage timings the analyzers record
+
+    LOGURU_LEVEL=INFO python scripts/benchmarks/benchmark_text_features.py
+"""
+
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.services.complexity_scoring_service import ComplexityScoringService
+from app.services.escalation_pipeline import analyze_message
+from app.services.intent_analyzer import IntentAnalyzer
+from app.services.interruption_manager import InterruptionManager
+import app.services.natural_conversation_engine  # noqa: F401  (registers the urgency keywords)
+from app.services.text_features import (
+    ABBREVIATIONS, PIDGIN_EXPRESSIONS, TextFeatureExtractor, get_stage_timings, get_text_feature_extractor
+)
+
+ROUNDS = 2000
+
+MESSAGES = [
+    "Bjr, j'ai une fuite d'eau sous l'évier depuis ce matin, c'est urgent",
+    "Le courant a jump dans toute la maison, light don go",
+    "Je ne comprends pas, pouvez-vous préciser le prix ?",
+    "Laisse tomber, je ne veux plus, annule tout",
+    "Wata no dey comot for kitchen, pipe don burst",
+    "Statut de ma demande DJB-004 svp",
+    "C'est compliqué parce que le disjoncteur saute et le différentiel aussi",
+    "Je veux parler à quelqu'un du service client, pas satisfait",
+    "Merci, parfait, à demain",
+    "Mon frigo don spoil, machine no dey work",
+]
+
+
+def legacy_pass(groups, message):
+    """What the analyzers did before: each table scanned on its own"""
+    lowered = message.lower()
+    hits = {name: [term for term in terms if term in lowered] for name, terms in groups.items()}
+    normalized = lowered.strip()
+    for expression, standard in PIDGIN_EXPRESSIONS.items():
+        normalized = normalized.replace(expression, standard)
+    for abbreviation, expansion in ABBREVIATIONS.items():
+        normalized = re.sub(rf"\b{abbreviation}\b", expansion, normalized)
+    return hits, normalized
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1_000_000
+
+
+def main():
+    # Constructing the analyzers registers their tables
+    intent_analyzer = IntentAnalyzer()
+    InterruptionManager()
+    complexity = ComplexityScoringService(db=None)
+
+    shared = get_text_feature_extractor()
+    groups = dict(shared._groups)
+    uncached = TextFeatureExtractor(cache_size=0)
+    uncached.register(groups)
+    stats = shared.get_stats()
+    print(f"Registered lexicon: {stats['groups']} groups, {stats['terms']} terms")
+    print()
+
+    legacy = [timed(legacy_pass, groups, message) for _ in range(ROUNDS) for message in MESSAGES]
+    single = [timed(uncached.extract, message) for _ in range(ROUNDS) for message in MESSAGES]
+    print(f"{'path':>22} | {'p50 µs':>8} | {'p95 µs':>8}")
+    print("-" * 44)
+    for name, samples in (("per-analyzer scans", legacy), ("single extraction", single)):
+        samples.sort()
+        print(f"{name:>22} | {statistics.median(samples):>8.1f} | {samples[int(len(samples) * 0.95)]:>8.1f}")
+
+    # The analyzers reading one shared extraction
+    analyzers = {
+        "intent.patterns": lambda message, features: intent_analyzer._quick_pattern_analysis(message, features),
+        "escalation.features": lambda message, features: analyze_message(message, text_features=features),
+        "complexity.linguistic": complexity._calculate_linguistic_complexity,
+    }
+    samples = {stage: [] for stage in analyzers}
+    for _ in range(ROUNDS // 10):
+        for message in MESSAGES:
+            features = shared.extract(message)
+            for stage, analyzer in analyzers.items():
+                samples[stage].append(timed(analyzer, message, features))
+
+    print()
+    print(f"{'stage':>22} | {'p50 µs':>8} | {'p95 µs':>8}")
+    print("-" * 44)
+    for stage, stage_samples in samples.items():
+        stage_samples.sort()
+        print(f"{stage:>22} | {statistics.median(stage_samples):>8.1f} | {stage_samples[int(len(stage_samples) * 0.95)]:>8.1f}")
+
+    print()
+    for stage, timing in get_stage_timings().items():
+        print(f"Recorded {stage}: {timing['count']} calls, avg {timing['avg_ms']:.4f} ms, max {timing['max_ms']:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
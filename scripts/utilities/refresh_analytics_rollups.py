@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Script to create the analytics rollup tables and run a rollup refresh
+The first run backfills every request; later runs only process changes.
+"""
+import os
+import sys
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base
+from app.models.analytics_rollup_models import RequestRollupDaily, RequestRollupHourly, RollupWatermark
+from app.services.analytics_rollups import AnalyticsRollupService
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+if not DATABASE_URL:
+    print("❌ DATABASE_URL environment variable not set")
+    sys.exit(1)
+
+
+def main():
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(engine, tables=[
+        RequestRollupHourly.__table__, RequestRollupDaily.__table__, RollupWatermark.__table__
+    ])
+
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        result = AnalyticsRollupService(session).refresh()
+
+    print("✅ Analytics rollups refreshed")
+    print(f"   Requests processed: {result['rows_processed']}")
+    print(f"   Hours refreshed:    {result['hours_refreshed']}")
+    print(f"   Days refreshed:     {result['days_refreshed']}")
+    print(f"   Watermark:          {result['last_changed_at']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Train the local interruption, intent and emotion classifiers
+Examples come from logged conversations (DATABASE_URL) and labelled JSONL
+files of {"task", "text", "label"} rows; --label-with-llm first labels up to
+N logged user messages through the current LLM paths and appends them to
+--labelled-out so they can be reviewed and reused. Each trained model is
+written as a new versioned artifact in the classifier directory.
+
+    python scripts/utilities/train_text_classifiers.py --from-db --data labelled.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.config import get_settings
+from app.services.text_classifier import (
+    INTENT, INTERRUPTION, NO_INTERRUPTION, TASKS,
+    collect_logged_examples, deduplicate, read_labelled_file, train_classifier
+)
+
+
+def allowed_labels(task):
+    """Labels the consuming services understand (None: any)"""
+    if task == INTERRUPTION:
+        from app.services.interruption_manager import InterruptionType
+        return {interruption.value for interruption in InterruptionType} | {NO_INTERRUPTION}
+    return None
+
+
+def open_session():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        print("❌ DATABASE_URL environment variable not set")
+        sys.exit(1)
+    return sessionmaker(bind=create_engine(database_url))()
+
+
+async def label_with_llm(db, tasks, limit, output_path):
+    """Label recent logged user messages with the LLM paths the classifiers replace"""
+    from app.models.database_models import Conversation
+    from app.services.dialogue_flow_manager import DialogueContext, DialogueState
+    from app.services.intent_analyzer import IntentAnalyzer
+    from app.services.interruption_manager import InterruptionManager
+
+    texts = [
+        text for (text,) in db.query(Conversation.message_content)
+        .filter(Conversation.message_type == "incoming")
+        .order_by(Conversation.id.desc())
+        .limit(limit)
+        .all() if text
+    ]
+    interruption_manager = InterruptionManager() if INTERRUPTION in tasks else None
+    intent_analyzer = IntentAnalyzer() if INTENT in tasks else None
+
+    labelled = 0
+    with open(output_path, "a", encoding="utf-8") as handle:
+        for text in texts:
+            rows = []
+            if interruption_manager is not None:
+                detection = await interruption_manager._ai_based_interruption_detection(
+                    text, DialogueContext(current_state=DialogueState.COLLECTING)
+                )
+                rows.append({"task": INTERRUPTION, "text": text, "label": detection[0].value if detection else NO_INTERRUPTION})
+            if intent_analyzer is not None:
+                analysis = await intent_analyzer._ai_intent_analysis(text)
+                if analysis.get("primary_intent"):
+                    rows.append({"task": INTENT, "text": text, "label": analysis["primary_intent"]})
+            for row in rows:
+                handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+            labelled += len(rows)
+    print(f"🏷️  {labelled} LLM labels appended to {output_path}")
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--task", choices=TASKS + ("all",), default="all")
+    parser.add_argument("--data", action="append", default=[], help="Labelled JSONL file (repeatable)")
+    parser.add_argument("--from-db", action="store_true", help="Use logged conversations from DATABASE_URL")
+    parser.add_argument("--label-with-llm", type=int, default=0, metavar="N",
+                        help="Label the N most recent logged user messages with the LLM first")
+    parser.add_argument("--labelled-out", default="classifier_labels.jsonl")
+    parser.add_argument("--output", default=settings.text_classifier_dir)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--min-samples", type=int, default=30)
+    args = parser.parse_args()
+
+    tasks = TASKS if args.task == "all" else (args.task,)
+    db = open_session() if args.from_db or args.label_with_llm else None
+
+    if args.label_with_llm:
+        asyncio.run(label_with_llm(db, tasks, args.label_with_llm, args.labelled_out))
+        args.data.append(args.labelled_out)
+
+    for task in tasks:
+        examples = collect_logged_examples(db, task) if args.from_db else []
+        for path in args.data:
+            examples += read_labelled_file(path, task)
+        examples = deduplicate(examples)
+
+        allowed = allowed_labels(task)
+        if allowed is not None:
+            unknown = [label for _, label in examples if label not in allowed]
+            if unknown:
+                print(f"⚠️  {task}: skipping {len(unknown)} examples with unknown labels {sorted(set(unknown))}")
+            examples = [(text, label) for text, label in examples if label in allowed]
+
+        if len(examples) < args.min_samples:
+            print(f"⏭️  {task}: {len(examples)} examples, need {args.min_samples}")
+            continue
+
+        classifier, report = train_classifier(
+            task, [text for text, _ in examples], [label for _, label in examples], holdout=args.holdout
+        )
+        path = classifier.save(args.output)
+        accuracy = f"{report.holdout_accuracy:.1%} on {report.holdout_samples}" if report.holdout_accuracy is not None else "n/a"
+        print(f"✅ {task} classifier {classifier.version}")
+        print(f"   Examples:         {report.samples} {report.labels}")
+        print(f"   Holdout accuracy: {accuracy}")
+        print(f"   Artifact:         {path}")
+
+    if db is not None:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -234,24 +234,24 @@ class TestEnhancedCommunication:
     
     @pytest.mark.asyncio
     async def test_proactive_updates_task_management(self, communication_service):
-        """Test proactive updates task creation and cancellation"""
+        """Test proactive updates scheduling and cancellation"""
         request_id = 123
         
         # Mock database
         mock_db = MagicMock()
         
-        # Start proactive updates
-        await communication_service.start_proactive_updates(request_id, mock_db)
-        
-        # Verify task was created
-        assert request_id in communication_service.active_tasks
-        assert communication_service.active_tasks[request_id] is not None
-        
-        # Stop proactive updates
-        communication_service.stop_proactive_updates(request_id)
-        
-        # Verify task was removed
-        assert request_id not in communication_service.active_tasks
+        with patch('app.services.communication_service.get_deadline_scheduler') as mock_scheduler:
+            # Start proactive updates
+            await communication_service.start_proactive_updates(request_id, mock_db)
+            
+            # Verify the request was scheduled
+            mock_scheduler.return_value.schedule.assert_called_once()
+            
+            # Stop proactive updates
+            communication_service.stop_proactive_updates(request_id, mock_db)
+            
+            # Verify the schedule was cancelled
+            mock_scheduler.return_value.cancel.assert_called_once_with(mock_db, request_id)
     
     def test_countdown_warning_generation(self, communication_service, mock_whatsapp_service):
         """Test countdown warning message generation"""
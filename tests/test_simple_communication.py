@@ -130,10 +130,6 @@ class TestCommunicationBasics:
         assert hasattr(service, 'send_instant_confirmation')
         assert hasattr(service, 'send_provider_acceptance')
         assert hasattr(service, 'send_error_message')
-        
-        # Verify active_tasks dict exists
-        assert hasattr(service, 'active_tasks')
-        assert isinstance(service.active_tasks, dict)
 
 
 if __name__ == "__main__":
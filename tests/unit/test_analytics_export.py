@@ -0,0 +1,138 @@
+"""
+Analytics export tests
+Checks that each writer produces a complete file from streamed request rows
+and that jobs run through the queue and can be cancelled mid-stream
+"""
+
+import asyncio
+import csv
+import json
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database_models import Base, User, ServiceRequest
+from app.services.analytics_export import (
+    CANCELLED, COMPLETED, REQUEST_COLUMNS, AnalyticsExportQueue, ExportJob
+)
+
+START = datetime(2026, 1, 1)
+ROWS = 2500
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[User.__table__, ServiceRequest.__table__])
+    factory = sessionmaker(bind=engine, expire_on_commit=False)
+    with factory() as db:
+        user = User(whatsapp_id="237690000000", name="Client")
+        db.add(user)
+        db.flush()
+        db.add_all([
+            ServiceRequest(
+                user_id=user.id, service_type=["plomberie", "électricité"][i % 2], description="Panne",
+                location="Akwa", status="terminée" if i % 3 else "en attente", final_cost=5000.0,
+                created_at=START + timedelta(minutes=10 * i)
+            )
+            for i in range(ROWS)
+        ])
+        db.commit()
+    return factory
+
+
+@pytest.fixture
+def queue(session_factory, tmp_path):
+    return AnalyticsExportQueue(export_dir=str(tmp_path), workers=1, session_factory=session_factory)
+
+
+def make_job(format, **kwargs):
+    return ExportJob(
+        format=format, period="1y", start=START, end=START + timedelta(days=365),
+        build_summary=lambda db: {"kpis": {"totalRequests": db.query(ServiceRequest).count()}},
+        include_requests=True, **kwargs
+    )
+
+
+@pytest.mark.parametrize("format", ["csv", "json", "jsonl", "xlsx", "pdf"])
+def test_every_format_writes_all_rows(queue, format):
+    job = make_job(format)
+    queue.run_job(job)
+
+    assert job.status == COMPLETED and job.progress == 100
+    assert job.rows_written == job.rows_total == ROWS
+    assert job.path.stat().st_size == job.file_size > 0
+    assert not list(job.path.parent.glob("*.part"))
+
+    if format == "csv":
+        with open(job.path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        header = rows.index([name for name, _ in REQUEST_COLUMNS])
+        assert rows[1] == ["kpis", "totalRequests", str(ROWS), "1y"]
+        assert len(rows) - header - 1 == ROWS
+    elif format == "json":
+        data = json.loads(job.path.read_text(encoding="utf-8"))
+        assert data["kpis"]["totalRequests"] == ROWS
+        assert len(data["requests"]) == ROWS
+    elif format == "jsonl":
+        lines = job.path.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[0])["type"] == "kpis"
+        assert sum(1 for line in lines if json.loads(line)["type"] == "request") == ROWS
+    elif format == "xlsx":
+        from openpyxl import load_workbook
+        workbook = load_workbook(job.path, read_only=True)
+        assert sum(1 for _ in workbook["Requests"].iter_rows()) == ROWS + 1
+    else:
+        assert job.path.read_bytes().startswith(b"%PDF")
+
+
+def test_cancelled_job_stops_and_leaves_no_file(queue):
+    job = make_job("csv")
+    job.cancel_requested = True
+    queue.run_job(job)
+
+    assert job.status == CANCELLED
+    assert job.rows_written < ROWS
+    assert not list(queue.export_dir.iterdir())
+    assert job.expires_at is not None
+
+
+def test_cancelled_queued_jobs_are_purged(queue):
+    job = make_job("csv")
+    queue.jobs[job.id] = job
+    queue.cancel(job.id)
+
+    assert job.status == CANCELLED
+    assert queue.purge_expired() == 0
+    assert queue.purge_expired(job.expires_at) == 1
+    assert queue.get(job.id) is None
+
+
+@pytest.mark.asyncio
+async def test_queue_runs_jobs_off_the_event_loop(queue):
+    completed = []
+
+    async def on_complete(job):
+        completed.append(job.id)
+
+    job = await queue.submit(make_job("jsonl", on_complete=on_complete))
+    for _ in range(200):
+        if completed:
+            break
+        await asyncio.sleep(0.05)
+
+    assert completed == [job.id]
+    assert queue.get(job.id).status == COMPLETED
+    assert queue.get_stats()["jobs"] == {COMPLETED: 1}
+
+    # Deleting a finished export removes its file; expired jobs are forgotten
+    path = job.path
+    queue.cancel(job.id)
+    assert not path.exists()
+    assert queue.purge_expired(job.expires_at) == 1
+    await queue.close()
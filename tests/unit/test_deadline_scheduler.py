@@ -0,0 +1,137 @@
+"""
+Deadline scheduler tests
+Checks that proactive actions fire from the persisted schedule with batched
+reads, retire when a request leaves PENDING and run in one leader only
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, User, ServiceRequest, RequestStatus
+from app.models.scheduler_models import ScheduledRequestAction, SchedulerLease
+from app.services.deadline_scheduler import (
+    COUNTDOWN_WARNING, STATUS_UPDATE, TIMEOUT, DeadlineScheduler
+)
+
+
+class RecordingCommunication:
+    """Stands in for CommunicationService"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def _send_status_update(self, request, db):
+        self.calls.append((STATUS_UPDATE, request.id))
+
+    async def _send_countdown_warning(self, request, minutes_remaining, db):
+        self.calls.append((COUNTDOWN_WARNING, request.id))
+
+    async def _handle_timeout(self, request, db):
+        self.calls.append((TIMEOUT, request.id))
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[
+        User.__table__, ServiceRequest.__table__, ScheduledRequestAction.__table__, SchedulerLease.__table__
+    ])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def created():
+    return datetime(2026, 1, 5, 9, 0)
+
+
+@pytest.fixture
+def requests(db, created):
+    user = User(whatsapp_id="237690000000", name="Client")
+    db.add(user)
+    db.flush()
+    requests = [
+        ServiceRequest(user_id=user.id, service_type="plomberie", description="Fuite", location="Akwa",
+                       status=RequestStatus.PENDING, urgency="urgent" if i == 0 else "normal", created_at=created)
+        for i in range(50)
+    ]
+    db.add_all(requests)
+    db.commit()
+    return requests
+
+
+def counts_of(communication, action):
+    return sum(1 for name, _ in communication.calls if name == action)
+
+
+@pytest.mark.asyncio
+async def test_schedule_fires_updates_countdown_and_timeout(db, requests, created):
+    communication = RecordingCommunication()
+    scheduler = DeadlineScheduler(communication=communication, holder_id="a")
+    for request in requests:
+        scheduler.schedule(db, request)
+    scheduler.acquire_lease(db, created)
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    counts = await scheduler.run_due(db, created + timedelta(minutes=2))
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+    # All 50 status updates from one due-actions query and one requests query (the lease renewal is an UPDATE)
+    assert counts[STATUS_UPDATE] == 50
+    assert len(selects) == 2
+
+    await scheduler.run_due(db, created + timedelta(minutes=7))
+    assert counts_of(communication, COUNTDOWN_WARNING) == 50
+
+    await scheduler.run_due(db, created + timedelta(minutes=10))
+    assert counts_of(communication, TIMEOUT) == 50
+    assert db.query(ScheduledRequestAction).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_urgent_requests_update_more_often(db, requests, created):
+    scheduler = DeadlineScheduler(communication=RecordingCommunication(), holder_id="a")
+    scheduler.schedule(db, requests[0])
+    scheduler.schedule(db, requests[1])
+
+    counts = await scheduler.run_due(db, created + timedelta(minutes=1))
+    assert counts[STATUS_UPDATE] == 1
+    action = db.query(ScheduledRequestAction).filter_by(request_id=requests[0].id, action=STATUS_UPDATE).one()
+    assert action.runs == 1
+    assert action.due_at == created + timedelta(minutes=2)
+
+
+@pytest.mark.asyncio
+async def test_non_pending_requests_are_retired(db, requests, created):
+    communication = RecordingCommunication()
+    scheduler = DeadlineScheduler(communication=communication, holder_id="a")
+    scheduler.schedule(db, requests[0])
+    scheduler.schedule(db, requests[1])
+    requests[0].status = RequestStatus.ASSIGNED
+    db.commit()
+
+    counts = await scheduler.run_due(db, created + timedelta(minutes=2))
+    assert counts["retired"] == 1
+    assert communication.calls == [(STATUS_UPDATE, requests[1].id)]
+    assert db.query(ScheduledRequestAction).filter_by(request_id=requests[0].id).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_only_the_lease_holder_dispatches(db, requests, created):
+    leader = DeadlineScheduler(communication=RecordingCommunication(), holder_id="a", lease_seconds=60)
+    follower = DeadlineScheduler(communication=RecordingCommunication(), holder_id="b", lease_seconds=60)
+    leader.schedule(db, requests[0])
+    now = created + timedelta(minutes=2)
+
+    assert leader.acquire_lease(db, now)
+    assert not follower.acquire_lease(db, now)
+    assert (await follower.run_due(db, now))[STATUS_UPDATE] == 0
+
+    # The follower takes over once the leader stops renewing
+    later = now + timedelta(seconds=61)
+    assert (await follower.run_due(db, later))[STATUS_UPDATE] == 1
+    assert not leader.acquire_lease(db, later)
@@ -0,0 +1,161 @@
+"""
+Escalation pipeline tests
+Checks the rolling per-session state against a full history recomputation
+and that detection stops reloading detectors, rules and history
+"""
+
+import random
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base
+from app.models.escalation_detection_models import (
+    EscalationDetector, EscalationDetectionLog, EscalationBusinessRule, EscalationExecution
+)
+from app.services.escalation_pipeline import (
+    CLARIFICATION_PHRASES, FAILURE_PHRASES, FRUSTRATION_KEYWORDS, NEGATIVE_WORDS, TOPIC_KEYWORDS,
+    EscalationStateCache, SessionEscalationState, analyze_message, invalidate_escalation_snapshot
+)
+from app.services.escalation_detection_service import EscalationDetectionService
+
+MESSAGES = [
+    "J'ai une fuite d'eau sous l'évier",
+    "j'ai une fuite d'eau sous l'évier",
+    "Je ne comprends pas, pouvez-vous préciser ?",
+    "Pourquoi c'est si lent, c'est inacceptable",
+    "Le courant est coupé dans la cuisine",
+    "Merci, parfait",
+    "La machine à laver ne marche pas non plus",
+    "C'est compliqué, il y a plusieurs problèmes techniques",
+    "",
+    "Comment ça marche exactement ?",
+]
+
+
+def _expected(history):
+    """The history-replay computation the rolling state replaces"""
+    recent = history[-20:]
+    texts = [message.lower() for message in recent]
+    failures = sum(1 for text in texts[-10:] if any(phrase in text for phrase in FAILURE_PHRASES))
+    clarifications = sum(1 for text in texts[-10:] if any(phrase in text for phrase in CLARIFICATION_PHRASES))
+
+    sentiments = []
+    for text in texts[-5:]:
+        words = len(text.split())
+        if words:
+            negative = sum(1 for word in NEGATIVE_WORDS if word in text)
+            frustration = sum(1 for word in FRUSTRATION_KEYWORDS if word in text)
+            sentiments.append(-(negative + frustration * 2) / words)
+
+    topics = []
+    for text in texts:
+        topic = next((name for name, keywords in TOPIC_KEYWORDS if any(k in text for k in keywords)), None)
+        if topic:
+            topics.append(topic)
+    switches = sum(1 for i in range(1, len(topics)) if topics[i] != topics[i - 1])
+
+    pairs = 0
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            words1, words2 = set(texts[i].split()), set(texts[j].split())
+            if words1 and words2 and len(words1 & words2) / len(words1 | words2) > 0.7:
+                pairs += 1
+
+    return {
+        "failures": failures,
+        "clarifications": clarifications,
+        "sentiment": sum(sentiments) / len(sentiments) if sentiments else 0,
+        "topic_switches": min(switches / 3, 1.0),
+        "repetition": min(pairs / 5, 1.0),
+        "count": len(recent),
+    }
+
+
+def test_rolling_state_matches_history_replay():
+    rng = random.Random(3)
+    state = SessionEscalationState()
+    history = []
+
+    for _ in range(300):
+        message = rng.choice(MESSAGES)
+        state.observe(analyze_message(message))
+        history.append(message)
+
+        expected = _expected(history)
+        assert state.failure_count == expected["failures"]
+        assert state.clarification_requests == expected["clarifications"]
+        assert state.recent_sentiment == pytest.approx(expected["sentiment"])
+        assert state.topic_switches == expected["topic_switches"]
+        assert state.repetition_level == expected["repetition"]
+        assert state.message_count == expected["count"]
+
+
+def test_state_cache_is_bounded():
+    cache = EscalationStateCache(max_sessions=2)
+    for session in ("a", "b", "c"):
+        cache.put("user", session, SessionEscalationState())
+
+    assert len(cache) == 2
+    assert cache.get("user", "a") is None
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[
+        EscalationDetector.__table__, EscalationDetectionLog.__table__,
+        EscalationBusinessRule.__table__, EscalationExecution.__table__
+    ])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    invalidate_escalation_snapshot()
+    yield session
+    session.close()
+    invalidate_escalation_snapshot()
+
+
+@pytest.fixture
+def service(db):
+    service = EscalationDetectionService(db, state_cache=EscalationStateCache())
+    for detector_type in ("failure_counter", "sentiment_analysis", "duration_based", "complexity_scoring"):
+        service.create_detector({"detector_name": detector_type, "detector_type": detector_type})
+    db.add(EscalationBusinessRule(
+        rule_id="frustration", rule_name="Frustration", escalation_threshold=0.95,
+        escalation_action="human_handoff", cooldown_minutes=0, is_active=True
+    ))
+    db.commit()
+    return service
+
+
+def test_detection_reads_no_configuration_or_history_per_message(db, service):
+    service.detect_escalation("u1", "s1", "J'ai une fuite d'eau", {"service_type": "plomberie"})
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for message in MESSAGES:
+        result = service.detect_escalation("u1", "s1", message, {"service_type": "plomberie"})
+        assert result["success"]
+
+    reads = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+    assert reads == []
+    assert len(result["detection_results"]) == 4
+
+
+def test_state_is_rebuilt_from_logs_for_unknown_sessions(db, service):
+    for message in MESSAGES[:4]:
+        service.detect_escalation("u1", "s1", message)
+
+    # A fresh cache (e.g. after a restart) warms up from the detection logs
+    restarted = EscalationDetectionService(db, state_cache=EscalationStateCache())
+    state = restarted._get_session_state("u1", "s1")
+
+    assert state.message_count == 4
+    assert state.failure_count == service.state_cache.get("u1", "s1").failure_count == 1
+
+
+def test_new_detector_is_picked_up_after_create(db, service):
+    before = service.detect_escalation("u1", "s1", "Bonjour")
+    service.create_detector({"detector_name": "extra", "detector_type": "sentiment_analysis"})
+    after = service.detect_escalation("u1", "s1", "Bonjour")
+
+    assert len(after["detection_results"]) == len(before["detection_results"]) + 1
@@ -0,0 +1,107 @@
+"""
+Event sink tests
+Checks that emitted rows are bulk-inserted per table, flushed by the
+background thread on the batch threshold, flushed by the caller when the
+buffer is full and written on close
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.escalation_detection_models import Base, ComplexityScoring, EscalationDetectionLog
+from app.services.complexity_scoring_service import ComplexityScoringService
+from app.services.event_sink import EventSink
+
+
+def make_session(engine):
+    Base.metadata.create_all(engine, tables=[EscalationDetectionLog.__table__, ComplexityScoring.__table__])
+    return sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    session = make_session(engine)
+    yield session
+    session.close()
+
+
+def detection_log(i, **kwargs):
+    return EscalationDetectionLog(log_id=f"log_{i}", user_id="u1", session_id="s1", message_content=f"m{i}", **kwargs)
+
+
+def test_rows_are_bulk_inserted_per_table_and_column_set(db):
+    sink = EventSink(flush_interval=60, batch_size=1000)
+    for i in range(30):
+        sink.emit(db, detection_log(i, zone="akwa") if i % 2 else detection_log(i))
+    for i in range(10):
+        sink.emit(db, ComplexityScoring(score_id=f"c{i}", user_id="u1", session_id="s1", overall_complexity=0.5))
+    assert db.query(EscalationDetectionLog).count() == 0
+
+    inserts = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: inserts.append(args[2]))
+    assert sink.flush() == 40
+
+    assert len(inserts) == 3
+    assert db.query(EscalationDetectionLog).filter(EscalationDetectionLog.zone == "akwa").count() == 15
+    assert db.query(ComplexityScoring).count() == 10
+    # Column defaults still apply to buffered rows
+    assert db.query(EscalationDetectionLog).first().timestamp is not None
+    assert sink.get_stats()["written"] == 40
+    sink.close()
+
+
+def test_batch_threshold_wakes_the_background_flusher(db):
+    sink = EventSink(flush_interval=60, batch_size=5)
+    for i in range(5):
+        sink.emit(db, detection_log(i))
+
+    for _ in range(100):
+        if sink.get_stats()["written"] == 5:
+            break
+        time.sleep(0.02)
+    assert db.query(EscalationDetectionLog).count() == 5
+    sink.close()
+
+
+def test_full_buffer_makes_the_caller_flush(db):
+    sink = EventSink(flush_interval=60, batch_size=1000, max_buffer=1000)
+    for i in range(1000):
+        sink.emit(db, detection_log(i))
+
+    assert sink.get_stats()["backpressure_flushes"] == 1
+    assert sink.get_stats()["buffered"] == 0
+    assert db.query(EscalationDetectionLog).count() == 1000
+    sink.close()
+
+
+def test_thread_local_database_flushes_inline_and_on_close():
+    session = make_session(create_engine("sqlite:///:memory:"))
+    sink = EventSink(flush_interval=0.01, batch_size=3)
+    for i in range(4):
+        sink.emit(session, detection_log(i))
+    time.sleep(0.05)
+
+    # The flusher thread would see another (empty) database: only the caller's batch was written
+    assert session.query(EscalationDetectionLog).count() == 3
+    sink.close()
+    assert session.query(EscalationDetectionLog).count() == 4
+    assert sink.get_stats()["failed"] == 0
+
+
+def test_complexity_scoring_no_longer_commits_inline(db, monkeypatch):
+    sink = EventSink(flush_interval=60)
+    monkeypatch.setattr("app.services.complexity_scoring_service.get_event_sink", lambda: sink)
+    service = ComplexityScoringService(db)
+
+    record = service._store_complexity_scoring(
+        {"user_id": "u1", "session_id": "s1", "message_content": "Fuite"}, {"technical": 0.4}, 0.4, 0.1, {}
+    )
+    assert record.score_id
+    assert db.query(ComplexityScoring).count() == 0
+    sink.close()
+    assert db.query(ComplexityScoring).one().score_id == record.score_id
@@ -0,0 +1,115 @@
+"""
+Fuzzy index tests
+Checks trigram ranking against difflib on typo'd catalog codes, containment
+search inside names and that catalog writes reach the cached indexes
+"""
+
+import pytest
+from difflib import SequenceMatcher
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base
+from app.models.dynamic_services import Service, ServiceCategory, Zone, ZoneType
+from app.services.fuzzy_index import (
+    CONTAINMENT, TrigramIndex, invalidate_service_fuzzy_index, invalidate_zone_fuzzy_index, trigrams
+)
+from app.services.validation_service import ValidationService
+from app.services.zone_service import ZoneService
+
+SERVICE_CODES = [
+    "plumbing_leak_repair", "plumbing_installation", "electrical_repair", "electrical_installation",
+    "appliance_repair", "air_conditioning_repair", "painting_interior", "carpentry_furniture",
+    "cleaning_home", "gardening_maintenance",
+]
+
+
+def code_index(codes):
+    return TrigramIndex((code, {"code": code}, {}) for code in codes)
+
+
+def test_trigrams_follow_pg_trgm_padding():
+    assert trigrams("Akwa") == {"  a", " ak", "akw", "kwa", "wa "}
+    assert trigrams("Électricité") == trigrams("electricite")
+
+
+@pytest.mark.parametrize("typo, expected", [
+    ("plumbing_leak_repiar", "plumbing_leak_repair"),
+    ("electrical_reapir", "electrical_repair"),
+    ("air_condition_repair", "air_conditioning_repair"),
+    ("cleanning_home", "cleaning_home"),
+])
+def test_typo_ranks_like_difflib(typo, expected):
+    matches = code_index(SERVICE_CODES).search(typo, k=3)
+
+    best_difflib = max(SERVICE_CODES, key=lambda code: SequenceMatcher(None, typo, code).ratio())
+    assert matches[0].key == expected == best_difflib
+    assert [m.score for m in matches] == sorted((m.score for m in matches), reverse=True)
+
+
+def test_only_entries_sharing_trigrams_are_scored():
+    index = code_index([f"zone_{i:05d}" for i in range(5000)] + ["bonamoussadi"])
+    matches = index.search("bonamousadi", k=5, threshold=0.3)
+    assert [m.key for m in matches] == ["bonamoussadi"]
+    assert index.search("xyzw", k=5) == []
+
+
+def test_containment_matches_inside_long_names_and_filters():
+    index = TrigramIndex([
+        ("bonamoussadi", {"code": "bonamoussadi", "name": "Bonamoussadi"}, {"zone_type": "district"}),
+        ("bonaberi", {"code": "bonaberi", "name": "Bonabéri"}, {"zone_type": "district"}),
+        ("bonapriso", {"code": "bonapriso", "name": "Bonapriso"}, {"zone_type": "neighborhood"}),
+    ])
+    matches = index.search("bona", k=5, threshold=0.5, metric=CONTAINMENT)
+    assert {m.key for m in matches} == {"bonamoussadi", "bonaberi", "bonapriso"}
+
+    districts = index.search("bona", k=5, threshold=0.5, metric=CONTAINMENT,
+                             where=lambda attrs: attrs["zone_type"] == "district")
+    assert {m.key for m in districts} == {"bonamoussadi", "bonaberi"}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[Zone.__table__, ServiceCategory.__table__, Service.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    invalidate_service_fuzzy_index()
+    invalidate_zone_fuzzy_index()
+    yield session
+    session.close()
+    invalidate_service_fuzzy_index()
+    invalidate_zone_fuzzy_index()
+
+
+@pytest.mark.asyncio
+async def test_validation_and_zone_search_use_the_catalog_indexes(db):
+    category = ServiceCategory(code="home", name="Maison")
+    db.add(category)
+    db.flush()
+    db.add_all([Service(code=code, name=code.replace("_", " ").title(), category_id=category.id)
+                for code in SERVICE_CODES])
+    db.commit()
+
+    zones = ZoneService()
+    await zones.create_zone(db, "akwa", "Akwa", ZoneType.DISTRICT)
+    await zones.create_zone(db, "bonamoussadi", "Bonamoussadi", ZoneType.DISTRICT)
+
+    validation = ValidationService()
+    similar = await validation._find_similar_services(db, "electrical_reapir")
+    assert similar[0]["code"] == "electrical_repair"
+    assert similar[0]["name"] == "Electrical Repair"
+
+    similar_zones = await validation._find_similar_zones(db, "bonamousadi")
+    assert [zone["code"] for zone in similar_zones] == ["bonamoussadi"]
+
+    # A zone created after the index was built is found straight away
+    await zones.create_zone(db, "bonaberi", "Bonabéri", ZoneType.NEIGHBORHOOD)
+    results = await zones.search_zones(db, "bona")
+    assert {result["zone"].code for result in results} == {"bonamoussadi", "bonaberi"}
+    assert results[0]["match_type"] != "fuzzy"
+
+    districts = await zones.search_zones(db, "bona", zone_type=ZoneType.DISTRICT)
+    assert [result["zone"].code for result in districts] == ["bonamoussadi"]
+
+    typo = await zones.search_zones(db, "bonamousadi")
+    assert typo[0]["zone"].code == "bonamoussadi"
@@ -0,0 +1,79 @@
+"""
+Intent analyzer pattern tier tests
+Confident pattern matches must skip the LLM, ambiguous ones must not
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.intent_analyzer import IntentAnalyzer
+from app.services.text_features import extract_text_features
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = IntentAnalyzer(confidence_threshold=0.85)
+    analyzer.ai_service = AsyncMock()
+    analyzer.ai_service.generate_response.return_value = (
+        '{"primary_intent": "new_service_request", "confidence": 0.8, "extracted_info": {}}'
+    )
+    return analyzer
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("message,intent", [
+    ("statut", "status_inquiry"),
+    ("annuler", "cancel_request"),
+    ("DJB-001", "view_request_details"),
+    ("quels services", "info_request"),
+])
+async def test_confident_patterns_skip_llm(analyzer, message, intent):
+    hits_before = IntentAnalyzer.tier_stats["pattern_hits"]
+
+    result = await analyzer.analyze_intent(message)
+
+    assert result["primary_intent"] == intent
+    assert result["confidence"] >= 0.85
+    assert result["analysis_methods"] == ["pattern_matching"]
+    analyzer.ai_service.generate_response.assert_not_called()
+    assert IntentAnalyzer.tier_stats["pattern_hits"] == hits_before + 1
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_message_goes_to_llm(analyzer):
+    fallbacks_before = IntentAnalyzer.tier_stats["llm_fallbacks"]
+
+    result = await analyzer.analyze_intent("je veux annuler ma demande de plomberie, la fuite continue")
+
+    analyzer.ai_service.generate_response.assert_awaited_once()
+    assert "ai_analysis" in result["analysis_methods"]
+    assert IntentAnalyzer.tier_stats["llm_fallbacks"] == fallbacks_before + 1
+
+
+@pytest.mark.asyncio
+async def test_service_requests_always_use_llm(analyzer):
+    await analyzer.analyze_intent("plomberie")
+
+    analyzer.ai_service.generate_response.assert_awaited_once()
+
+
+def test_shared_features_agree_with_keyword_tables(analyzer):
+    messages = ["na how far", "I no want again", "voir mes demandes", "water don enter house", "rien"]
+    categories = [
+        category for category in analyzer.cameroon_patterns
+        if category not in ("service_types", "request_reference_patterns")
+    ]
+    for message in messages:
+        lowered = message.lower()
+        features = extract_text_features(message)
+        for category in categories:
+            expected = any(pattern in lowered for pattern in analyzer.cameroon_patterns[category])
+            assert features.has(f"intent.{category}") == expected
+
+
+def test_threshold_is_configurable(analyzer):
+    strict = IntentAnalyzer(confidence_threshold=0.99)
+    assert strict.confidence_threshold == 0.99
+    stats = strict.get_tier_stats()
+    assert "hit_rate" in stats
+    assert stats["confidence_threshold"] == 0.99
@@ -0,0 +1,34 @@
+"""
+Intent tier endpoint tests
+Calls the /api/llm/intent-tiers handler the way the router does
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from app.api import auth
+from app.config import get_settings
+
+LLM_STATUS_PATH = Path(__file__).resolve().parents[2] / "old-endpoint" / "llm_status.py"
+
+
+@pytest.fixture
+def llm_status(monkeypatch):
+    # The legacy router imports an admin dependency app.api.auth no longer defines
+    monkeypatch.setattr(auth, "get_current_admin_user", lambda: None, raising=False)
+    spec = importlib.util.spec_from_file_location("llm_status", LLM_STATUS_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.asyncio
+async def test_intent_tiers_endpoint_reports_counters_and_threshold(llm_status):
+    result = await llm_status.get_intent_tier_stats(current_user=None)
+
+    assert result["success"] is True
+    tiers = result["intent_tiers"]
+    assert {"pattern_hits", "classifier_hits", "llm_fallbacks", "hit_rate"} <= set(tiers)
+    assert tiers["confidence_threshold"] == get_settings().intent_pattern_confidence_threshold
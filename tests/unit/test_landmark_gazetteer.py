@@ -0,0 +1,114 @@
+"""
+Landmark gazetteer tests
+Checks the automaton against a naive scan, whole-word and accent-folded
+matching, and that scheduling, provider matching and intent analysis resolve
+locations through the gazetteer, including phrases learned from confirmations
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, Landmark, LocationMatch
+from app.models.dynamic_services import Zone, ZoneType
+from app.services.intent_analyzer import IntentAnalyzer
+from app.services.landmark_gazetteer import (
+    AREA, LANDMARK, AhoCorasick, LandmarkGazetteer, get_landmark_gazetteer, invalidate_landmark_gazetteer
+)
+from app.services.provider_matcher import ProviderMatcher
+from app.services.scheduling_service import SchedulingService
+
+
+def test_automaton_finds_every_occurrence_like_a_naive_scan():
+    rng = random.Random(7)
+    patterns = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(40)}
+    automaton = AhoCorasick()
+    for pattern in patterns:
+        automaton.add(pattern, pattern)
+    automaton.build()
+
+    for _ in range(20):
+        text = "".join(rng.choice("abc") for _ in range(30))
+        expected = sorted(
+            pattern for pattern in patterns
+            for start in range(len(text)) if text.startswith(pattern, start)
+        )
+        assert sorted(automaton.iter(text)) == expected
+
+
+def test_builtin_places_match_whole_words_without_accents():
+    gazetteer = LandmarkGazetteer.builtin()
+
+    matches = gazetteer.resolve("Je suis à BONAMOUSSADI, pres du marche")
+    assert [(m.place.name, m.place.kind) for m in matches] == [("Bonamoussadi", AREA), ("marché", "reference")]
+
+    assert gazetteer.resolve("j'ai totalement oublié") == []
+    assert [m.place.keyword for m in gazetteer.resolve("derrière la station total")] == ["station_total"]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[Landmark.__table__, LocationMatch.__table__, Zone.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    session.add_all([
+        Landmark(name="Pharmacie du Rond-Point", landmark_type="pharmacy", area="Bonamoussadi",
+                 coordinates="4.0935,9.7402", aliases=["pharmacie rond point"],
+                 common_references=["près de la pharmacie"]),
+        Landmark(name="Supermarché Mahima", landmark_type="market", area="Bonamoussadi",
+                 coordinates="4.0921,9.7388", aliases=["mahima"]),
+        Landmark(name="Marché Sandaga", landmark_type="market", area="Akwa", aliases=["sandaga"]),
+        Zone(code="bonaberi", name="Bonabéri", zone_type=ZoneType.DISTRICT, latitude=4.07, longitude=9.66),
+    ])
+    session.commit()
+    invalidate_landmark_gazetteer()
+    yield session
+    session.close()
+    invalidate_landmark_gazetteer()
+
+
+def test_scheduling_ranks_landmarks_in_the_requested_area(db):
+    scheduling = SchedulingService(db)
+
+    matches = scheduling.find_landmark_matches("près du supermarché Mahima")
+    assert matches[0]["name"] == "Supermarché Mahima"
+    assert matches[0]["coordinates"] == "4.0921,9.7388"
+    assert matches[0]["confidence"] >= 0.9
+
+    # Sandaga is in Akwa, not in the default area
+    assert scheduling.find_landmark_matches("au marché sandaga") == []
+    assert scheduling.find_landmark_matches("au marché sandaga", area="Akwa")[0]["name"] == "Marché Sandaga"
+
+
+def test_confirmed_phrases_are_learned(db):
+    scheduling = SchedulingService(db)
+    phrase = "derrière chez Mama Ngono"
+    assert scheduling.find_landmark_matches(phrase) == []
+
+    pharmacy = db.query(Landmark).filter(Landmark.name == "Pharmacie du Rond-Point").one()
+    request = SimpleNamespace(id=1, location=phrase)
+    scheduling.confirm_location_match(request, pharmacy.id)
+
+    matches = scheduling.find_landmark_matches("c'est derriere chez mama ngono")
+    assert [m["landmark_id"] for m in matches] == [pharmacy.id]
+    assert next(p for p in get_landmark_gazetteer(db).places if p.id == pharmacy.id).confirmations == 1
+
+
+def test_provider_keywords_and_intent_location_share_the_gazetteer(db):
+    matcher = ProviderMatcher(db)
+    assert matcher._extract_location_keywords("Makepe, près de la station Shell") == ["station_shell", "makepe"]
+    assert matcher._extract_location_keywords("au supermarché Mahima") == ["bonamoussadi"]
+    assert matcher._extract_location_keywords("Bonabéri") == ["bonaberi"]
+    assert matcher._extract_location_keywords("quelque part") == ["bonamoussadi"]
+
+    get_landmark_gazetteer(db)
+    analyzer = IntentAnalyzer()
+    assert analyzer._detect_location_enhanced("je suis chez moi") == "Bonamoussadi"
+    assert analyzer._detect_location_enhanced("à Douala") == "Douala"
+    assert analyzer._detect_location_enhanced("près du marché à Akwa") == "Près de marché, Akwa"
+    assert analyzer._detect_location_enhanced("à côté de mahima") == "Près de Supermarché Mahima, Bonamoussadi"
+    assert analyzer._detect_location_enhanced("bonjour") is None
+    assert all(m.place.kind == LANDMARK for m in get_landmark_gazetteer().resolve("sandaga"))
@@ -0,0 +1,100 @@
+"""
+Leaderboard tests
+Checks the top-k boards against a full sort of every provider, that the
+number of queries does not grow with the provider count and that boards are
+served from the cache for any limit
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.analytics_rollup_models import RequestRollupDaily, RequestRollupHourly, RollupWatermark
+from app.models.database_models import Base, Provider, ServiceRequest, User
+from app.services.analytics_rollups import summarize_rollups
+from app.services.leaderboard import EMPTY, LeaderboardCache, _provider_score, period_range, top_providers
+
+PROVIDERS = 200
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[
+        User.__table__, Provider.__table__, ServiceRequest.__table__,
+        RequestRollupHourly.__table__, RequestRollupDaily.__table__, RollupWatermark.__table__
+    ])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    user = User(whatsapp_id="237690000000", name="Client")
+    session.add(user)
+    session.add_all([
+        Provider(name=f"P{i}", whatsapp_id=str(i), phone_number=str(i), services=["plomberie"],
+                 coverage_areas=["Akwa"], rating=(i * 37 % 50) / 10 if i % 5 else None)
+        for i in range(PROVIDERS)
+    ])
+    session.flush()
+    now = datetime.now()
+    session.add_all([
+        ServiceRequest(
+            user_id=user.id, provider_id=1 + (i * 7) % 60, service_type=["plomberie", "electricite"][i % 3 == 2],
+            description="Panne", location=["Akwa", "Deido", "Makepe"][i % 3],
+            status="completed" if i % 3 else "en attente", created_at=now - timedelta(hours=i)
+        )
+        for i in range(300)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def full_sort(db, metric):
+    """The former implementation: score every provider, sort them all"""
+    start, end = period_range("30d")
+    stats = summarize_rollups(
+        db, start, end, statuses=("completed",), group_by="provider_id",
+        filters=lambda source: [source.provider_id.isnot(None)]
+    )
+    scored = [
+        (_provider_score(metric, stats.get(provider.id, EMPTY), float(provider.rating or 0)), provider.id)
+        for provider in db.query(Provider).order_by(Provider.id).all()
+    ]
+    return [provider_id for _, provider_id in sorted(scored, key=lambda item: -item[0])]
+
+
+@pytest.mark.parametrize("metric", ["rating", "requests", "revenue", "responseTime"])
+def test_top_k_matches_a_full_sort(db, metric):
+    start, end = period_range("30d")
+    entries, total = top_providers(db, start, end, metric, 10)
+
+    assert total == PROVIDERS
+    assert [int(entry["id"]) for entry in entries] == full_sort(db, metric)[:10]
+
+
+def test_query_count_does_not_grow_with_providers(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    start, end = period_range("30d")
+
+    top_providers(db, start, end, "requests", 10)
+    assert len(statements) <= 4
+
+
+def test_boards_are_cached_per_category_period_and_metric(db):
+    cache = LeaderboardCache(ttl_seconds=60)
+    board = cache.get(db, "providers", "30d", "revenue", 5)
+    assert [entry["rank"] for entry in board["entries"]] == [1, 2, 3, 4, 5]
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    larger = cache.get(db, "providers", "30d", "revenue", 20)
+    assert statements == []
+    assert larger["entries"][:5] == board["entries"]
+    assert len(larger["entries"]) == 20
+
+    services = cache.get(db, "services", "30d", "requests", 10)
+    assert [entry["id"] for entry in services["entries"]] == ["service_plomberie", "service_electricite"]
+    assert services["total"] == 2
+    regions = cache.get(db, "regions", "30d", "requests", 2)
+    assert len(regions["entries"]) == 2 and regions["total"] == 3
+    assert cache.get_stats()["hits"] == 1
@@ -0,0 +1,81 @@
+"""
+Shared async LLM client pool tests
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.services.llm_client_pool import LLMClientPool, cancel_on_disconnect, ClientDisconnected
+from app.services.multi_llm_service import MultiLLMService, LLMProvider
+
+
+class FakeClaudeMessages:
+    """Async stand-in for ``AsyncAnthropic.messages`` that records concurrency"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(content=[SimpleNamespace(text=f"ok:{kwargs['messages'][-1]['content']}")])
+
+
+@pytest.fixture
+def pool():
+    pool = LLMClientPool()
+    pool._claude = SimpleNamespace(messages=FakeClaudeMessages())
+    pool._semaphores["claude"] = asyncio.Semaphore(3)
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently_up_to_provider_limit(pool):
+    calls = [
+        pool.claude_messages(model="m", max_tokens=10, messages=[{"role": "user", "content": str(i)}])
+        for i in range(10)
+    ]
+    responses = await asyncio.gather(*calls)
+
+    assert len(responses) == 10
+    assert pool._claude.messages.peak == 3
+    assert pool.get_stats()["claude"]["completed"] == 10
+    assert pool.get_stats()["claude"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect_cancels_llm_call(pool):
+    pool._claude.messages.delay = 5
+
+    class DisconnectedRequest:
+        async def is_disconnected(self):
+            return True
+
+    with pytest.raises(ClientDisconnected):
+        await cancel_on_disconnect(
+            DisconnectedRequest(),
+            pool.claude_messages(model="m", max_tokens=10, messages=[{"role": "user", "content": "x"}]),
+            poll_interval=0.01
+        )
+    await asyncio.sleep(0)
+
+    assert pool.get_stats()["claude"]["cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_multi_llm_service_uses_pool(pool):
+    service = MultiLLMService()
+    service.client_pool = pool
+    service.providers = {LLMProvider.CLAUDE: pool._claude}
+
+    response = await service.generate_response(messages=[{"role": "user", "content": "bonjour"}])
+
+    assert response == "ok:bonjour"
+    assert service.success_counts[LLMProvider.CLAUDE] == 1
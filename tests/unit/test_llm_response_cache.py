@@ -0,0 +1,172 @@
+"""
+LLM response cache tests
+"""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, Provider, ServiceRequest, User
+from app.models.dynamic_services import Service, ServiceCategory, Zone
+from app.services.ai_service import AIService
+from app.services.intent_analyzer import IntentAnalyzer
+from app.services.llm_conversation_manager import LLMConversationManager
+from app.services.llm_response_cache import LLMResponseCache, normalize_text
+from app.services.multi_llm_service import MultiLLMService, LLMProvider
+
+
+def user(content):
+    return [{"role": "user", "content": content}]
+
+
+@pytest.fixture
+def cache():
+    return LLMResponseCache(
+        ttl_seconds=60, max_entries=3, redis_url="", near_duplicate=True, similarity_threshold=0.8
+    )
+
+
+def templated(message):
+    return user(f'Message utilisateur: "{message}"\nAnalyse ce message et fournis un JSON avec service_type, location, urgency')
+
+
+def test_normalize_text_folds_case_accents_and_punctuation():
+    assert normalize_text("  Combien pour l'Électricité ?? ") == "combien pour l electricite"
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_ignores_formatting(cache):
+    await cache.set(user("Quels services ?"), "Plomberie, électricité...", system_prompt="Tu es   Djobea")
+
+    assert await cache.get(user("quels services"), system_prompt="Tu es Djobea") == "Plomberie, électricité..."
+    assert cache.get_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_hits_only_within_same_context(cache):
+    question = "combien pour plomberie"
+    await cache.set(user(question), "5000 à 15000 XAF", system_prompt="faq", match_text=question)
+
+    rephrased = "Bonjour, combien pour la plomberie svp"
+    assert await cache.get(user(rephrased), system_prompt="faq", match_text=rephrased) == "5000 à 15000 XAF"
+    assert await cache.get(user(question), system_prompt="autre contexte", match_text=question) is None
+    stats = cache.get_stats()
+    assert stats["near_hits"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_templated_prompts_are_exact_match_only(cache):
+    await cache.set(templated("J'ai une fuite d'eau à Akwa"), '{"location": "Akwa"}', system_prompt="analyse")
+
+    assert await cache.get(templated("J'ai une fuite d'eau à Deido"), system_prompt="analyse") is None
+    assert await cache.get(templated("J'ai une fuite d'eau à Akwa"), system_prompt="analyse") == '{"location": "Akwa"}'
+
+
+def test_near_duplicate_lookup_is_off_by_default():
+    assert LLMResponseCache(redis_url="").near_duplicate is False
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(cache):
+    for i in range(4):
+        await cache.set(user(f"question numero {i}"), f"réponse {i}")
+
+    assert await cache.get(user("question numero 0")) is None
+    assert await cache.get(user("question numero 3")) == "réponse 3"
+    assert cache.get_stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_not_served():
+    cache = LLMResponseCache(ttl_seconds=0, redis_url="", near_duplicate=False)
+    await cache.set(user("quels services"), "réponse")
+
+    assert await cache.get(user("quels services")) is None
+
+
+def test_excluded_intents_are_not_cacheable(cache):
+    assert not cache.is_cacheable(user("au secours"), intent="urgence")
+    assert not cache.is_cacheable(user("je ne suis pas content"), intent="plainte")
+    assert not cache.is_cacheable([{"role": "user", "content": [{"type": "image"}]}])
+    assert cache.is_cacheable(user("quels services"), intent="question_info")
+
+
+@pytest.mark.asyncio
+async def test_multi_llm_service_serves_repeats_from_cache(cache):
+    service = MultiLLMService()
+    service.response_cache = cache
+    service.providers = {LLMProvider.CLAUDE: object()}
+    service._generate_claude = AsyncMock(return_value="Nous proposons plomberie et électricité")
+
+    first = await service.generate_response(user("quels services ?"), system_prompt="faq")
+    second = await service.generate_response(user("Quels services"), system_prompt="faq")
+    await service.generate_response(user("quels services ?"), system_prompt="faq", intent="urgence")
+
+    assert first == second
+    assert service._generate_claude.await_count == 2
+    assert service.get_cache_stats()["bypassed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_intent_analyzer_forwards_detected_intent_to_cache(cache):
+    service = MultiLLMService()
+    service.response_cache = cache
+    service.providers = {LLMProvider.CLAUDE: object()}
+    service._generate_claude = AsyncMock(
+        return_value='{"primary_intent": "emergency", "confidence": 0.9, "extracted_info": {}}'
+    )
+    analyzer = IntentAnalyzer()
+    analyzer.ai_service = AIService()
+    analyzer.ai_service.multi_llm = service
+
+    urgent = "urgent, problème grave, ça déborde partout"
+    await analyzer.analyze_intent(urgent)
+    await analyzer.analyze_intent(urgent)
+
+    assert service._generate_claude.await_count == 2
+    assert service.get_cache_stats()["bypassed"] == 2
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[
+        User.__table__, Provider.__table__, ServiceRequest.__table__,
+        ServiceCategory.__table__, Service.__table__, Zone.__table__
+    ])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.mark.asyncio
+async def test_reworded_pricing_questions_reuse_the_analysis_but_service_requests_do_not(db, cache):
+    def analysis(action_code, location=None):
+        return json.dumps({"action_code": action_code, "confidence": 0.9, "extracted_info": {"location": location}})
+
+    service = MultiLLMService()
+    service.response_cache = cache
+    service.providers = {LLMProvider.CLAUDE: object()}
+    service._generate_claude = AsyncMock(side_effect=[
+        analysis("provide_pricing"),
+        analysis("create_service_request", "Akwa"),
+        analysis("create_service_request", "Deido"),
+    ])
+    manager = LLMConversationManager(db)
+    manager.ai_service.multi_llm = service
+
+    first = await manager._analyze_with_llm("combien pour plomberie", [], "237690000001", "info_request")
+    reworded = await manager._analyze_with_llm("Bonjour, combien pour la plomberie svp", [], "237690000002", "info_request")
+    # Similar enough to near-match, but service request analyses are never indexed for it
+    request = "grosse fuite d'eau plomberie cuisine salle douche robinet tuyau {}"
+    akwa = await manager._analyze_with_llm(request.format("Akwa"), [], "237690000003", "info_request")
+    deido = await manager._analyze_with_llm(request.format("Deido"), [], "237690000004", "info_request")
+
+    assert first == reworded
+    assert cache.get_stats()["near_hits"] == 1
+    assert (akwa["extracted_info"]["location"], deido["extracted_info"]["location"]) == ("Akwa", "Deido")
+    assert service._generate_claude.await_count == 3
@@ -0,0 +1,252 @@
+"""
+Message ingestion tests
+Checks that duplicate MessageSids are processed once, that each phone
+number's messages run in order while users run in parallel, that failures
+and metrics are recorded, that pending and stale rows are recovered and
+that a row queued twice is only handled once, that per-number order holds
+across processes, and that provider replies
+are routed to the provider-response handler
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database_models import Provider, RequestStatus, ServiceRequest, User
+from app.models.ingestion_models import Base, InboundMessage
+from app.services import notification_dispatcher
+from app.services.message_ingestion import InboundJob, MessageIngestionQueue, converse
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[InboundMessage.__table__])
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+
+class Recorder:
+    """Handler recording the processing order and overlap"""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.processed = []
+        self.active = set()
+        self.max_parallel = 0
+        self.overlaps = 0
+
+    async def __call__(self, db, job):
+        if job.phone_number in self.active:
+            self.overlaps += 1
+        self.active.add(job.phone_number)
+        self.max_parallel = max(self.max_parallel, len(self.active))
+        await asyncio.sleep(self.delay)
+        if job.body == "boom":
+            self.active.discard(job.phone_number)
+            raise RuntimeError("LLM unavailable")
+        self.processed.append((job.phone_number, job.body))
+        self.active.discard(job.phone_number)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_message_sids_are_processed_once(session_factory):
+    recorder = Recorder()
+    queue = MessageIngestionQueue(handler=recorder, workers=4, session_factory=session_factory)
+    db = session_factory()
+
+    assert await queue.ingest(db, "SM1", "237690000001", "Bonjour")
+    assert not await queue.ingest(db, "SM1", "237690000001", "Bonjour")
+    await queue.join()
+
+    assert recorder.processed == [("237690000001", "Bonjour")]
+    assert db.query(InboundMessage).one().status == "processed"
+    assert queue.get_stats()["duplicates"] == 1
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_messages_run_in_order_per_user_and_in_parallel_across_users(session_factory):
+    recorder = Recorder()
+    queue = MessageIngestionQueue(handler=recorder, workers=8, session_factory=session_factory)
+    db = session_factory()
+    users = [f"23769000000{i}" for i in range(4)]
+
+    for n in range(5):
+        for user in users:
+            await queue.ingest(db, f"SM{user}{n}", user, f"message {n}")
+    assert queue.get_stats()["queue_depth"] + queue.get_stats()["in_flight"] == 20
+    await queue.join()
+
+    for user in users:
+        assert [body for phone, body in recorder.processed if phone == user] == [f"message {n}" for n in range(5)]
+    assert recorder.overlaps == 0
+    assert recorder.max_parallel == len(users)
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_failures_and_metrics_are_recorded(session_factory):
+    queue = MessageIngestionQueue(handler=Recorder(delay=0), workers=2, session_factory=session_factory)
+    db = session_factory()
+
+    await queue.ingest(db, "SM1", "237690000001", "boom")
+    await queue.ingest(db, "SM2", "237690000001", "Fuite d'eau")
+    await queue.join()
+
+    statuses = dict(db.query(InboundMessage.message_sid, InboundMessage.status).all())
+    assert statuses == {"SM1": "failed", "SM2": "processed"}
+    stats = queue.get_stats()
+    assert (stats["processed"], stats["failed"], stats["queue_depth"], stats["lag_seconds"]) == (1, 1, 0, 0.0)
+    assert stats["processing_ms"]["max"] >= stats["processing_ms"]["p50"] > 0
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_rows_are_recovered_in_order(session_factory):
+    db = session_factory()
+    abandoned = datetime.utcnow() - timedelta(minutes=10)
+    db.add_all([
+        InboundMessage(message_sid="SM1", phone_number="237690000001", body="un"),
+        InboundMessage(message_sid="SM2", phone_number="237690000001", body="deux", status="processing", attempts=1,
+                       claimed_at=abandoned),
+        InboundMessage(message_sid="SM3", phone_number="237690000002", body="poison", status="processing", attempts=3,
+                       claimed_at=abandoned),
+        InboundMessage(message_sid="SM4", phone_number="237690000002", body="fini", status="processed"),
+        InboundMessage(message_sid="SM5", phone_number="237690000003", body="en cours", status="processing",
+                       attempts=1, claimed_at=datetime.utcnow()),
+    ])
+    db.commit()
+
+    recorder = Recorder(delay=0)
+    queue = MessageIngestionQueue(
+        handler=recorder, workers=2, max_attempts=3, session_factory=session_factory, stale_seconds=300
+    )
+    assert await queue.recover() == 2
+    await queue.join()
+
+    assert recorder.processed == [("237690000001", "un"), ("237690000001", "deux")]
+    assert db.query(InboundMessage).filter_by(message_sid="SM3").one().status == "failed"
+    # Claimed within the stale window: still owned by a live worker
+    assert db.query(InboundMessage).filter_by(message_sid="SM5").one().status == "processing"
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_overlapping_workers_handle_a_message_once(session_factory):
+    db = session_factory()
+    db.add(InboundMessage(message_sid="SM1", phone_number="237690000001", body="Bonjour"))
+    db.commit()
+
+    recorder = Recorder()
+    queues = [MessageIngestionQueue(handler=recorder, workers=2, session_factory=session_factory) for _ in range(2)]
+    assert [await queue.recover() for queue in queues] == [1, 1]
+    await asyncio.gather(*(queue.join() for queue in queues))
+
+    assert recorder.processed == [("237690000001", "Bonjour")]
+    row = db.query(InboundMessage).one()
+    assert (row.status, row.attempts) == ("processed", 1)
+    assert sum(queue.get_stats()["claim_conflicts"] for queue in queues) == 1
+    for queue in queues:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_newer_message_waits_for_an_older_one_handled_by_another_process(session_factory):
+    db = session_factory()
+    db.add_all([
+        InboundMessage(message_sid="SM1", phone_number="237690000001", body="un", status="processing", attempts=1,
+                       claimed_at=datetime.utcnow()),
+        InboundMessage(message_sid="SM2", phone_number="237690000001", body="deux"),
+    ])
+    db.commit()
+
+    recorder = Recorder(delay=0)
+    queue = MessageIngestionQueue(handler=recorder, workers=2, session_factory=session_factory,
+                                  claim_retry_seconds=0.01)
+    assert await queue.recover() == 1
+    await asyncio.sleep(0.05)
+    assert recorder.processed == []
+
+    # The other process finishes the older message
+    db.query(InboundMessage).filter_by(message_sid="SM1").update({"status": "processed"})
+    db.commit()
+    await queue.join()
+
+    assert recorder.processed == [("237690000001", "deux")]
+    assert queue.get_stats()["ordering_waits"] >= 1
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_older_unclaimed_message_is_adopted_and_handled_first(session_factory):
+    db = session_factory()
+    # Accepted by a process that stopped before queueing it
+    db.add(InboundMessage(message_sid="SM1", phone_number="237690000001", body="un"))
+    db.commit()
+
+    recorder = Recorder(delay=0)
+    queue = MessageIngestionQueue(handler=recorder, workers=2, session_factory=session_factory)
+    await queue.ingest(db, "SM2", "237690000001", "deux")
+    await queue.join()
+
+    assert recorder.processed == [("237690000001", "un"), ("237690000001", "deux")]
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_provider_replies_go_to_the_provider_response_handler(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__, Provider.__table__, ServiceRequest.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    client = User(whatsapp_id="237690000001", name="Client", phone_number="237690000001")
+    provider = Provider(name="Plombier", whatsapp_id="237670000009", phone_number="237670000009",
+                        services=["plomberie"], coverage_areas=["Akwa"], total_jobs=0)
+    db.add_all([client, provider])
+    db.flush()
+    request = ServiceRequest(user_id=client.id, service_type="plomberie", description="Fuite", location="Akwa",
+                             status=RequestStatus.PENDING)
+    db.add(request)
+    db.commit()
+
+    sent = []
+    monkeypatch.setattr(notification_dispatcher, "get_notification_dispatcher",
+                        lambda: SimpleNamespace(send=AsyncMock(side_effect=sent.append)))
+    acceptance = AsyncMock(return_value=True)
+    monkeypatch.setitem(sys.modules, "app.services.communication_service", SimpleNamespace(
+        CommunicationService=lambda: SimpleNamespace(send_provider_acceptance=acceptance)
+    ))
+
+    reply = await converse(db, InboundJob(id=1, phone_number="237670000009", body="OUI",
+                                          received_at=datetime.utcnow()))
+
+    assert (request.status, request.provider_id) == (RequestStatus.ASSIGNED, provider.id)
+    assert provider.total_jobs == 1
+    acceptance.assert_awaited_once_with(request.id, provider.id, db)
+    assert reply.startswith("✅ Mission acceptée")
+    assert [(n.to, n.notification_type) for n in sent] == [("237670000009", "provider_reply")]
+
+    # Clients still go to the conversation engine
+    engine_calls = []
+
+    class Engine:
+        def __init__(self, db):
+            pass
+
+        async def process_natural_conversation(self, phone_number, message, whatsapp_id=None):
+            engine_calls.append((phone_number, message))
+            return SimpleNamespace(response_message="Bonjour !")
+
+    monkeypatch.setitem(sys.modules, "app.services.natural_conversation_engine",
+                        SimpleNamespace(NaturalConversationEngine=Engine))
+    await converse(db, InboundJob(id=2, phone_number="237690000001", body="OUI", received_at=datetime.utcnow()))
+
+    assert engine_calls == [("237690000001", "OUI")]
+    assert sent[-1].notification_type == "conversation_reply"
+    db.close()
@@ -0,0 +1,121 @@
+"""
+Notification dispatcher tests
+Checks concurrent fan-out, per-channel rate limiting and batched status
+write-back to the notification queue and log
+"""
+
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base as QueueBase
+from app.models.database_models import Base
+from app.models.notification import NotificationQueue
+from app.models.tracking_models import NotificationLog
+from app.services.notification_dispatcher import (
+    NotificationDispatcher, OutboundNotification, TokenBucket
+)
+
+ROUND_TRIP = 0.2
+
+
+class SlowSender:
+    """Blocking sender standing in for the Twilio client"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def __call__(self, to, message):
+        time.sleep(ROUND_TRIP)
+        self.sent.append((to, time.monotonic()))
+        return to not in self.failing
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    QueueBase.metadata.create_all(engine, tables=[NotificationQueue.__table__])
+    Base.metadata.create_all(engine, tables=[NotificationLog.__table__])
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_fan_out_takes_one_round_trip(session_factory):
+    sender = SlowSender(failing={"+237600000002"})
+    dispatcher = NotificationDispatcher(
+        senders={"whatsapp": sender}, workers=4, rates={"whatsapp": (100, 10)}, session_factory=session_factory
+    )
+
+    start = time.perf_counter()
+    results = await dispatcher.fan_out(
+        OutboundNotification(to=f"+23760000000{i}", message="Nouvelle demande", log=True, request_id="7")
+        for i in range(1, 4)
+    )
+    elapsed = time.perf_counter() - start
+    await dispatcher.close()
+
+    assert results == [True, False, True]
+    assert elapsed < 2 * ROUND_TRIP
+    with session_factory() as db:
+        logs = db.query(NotificationLog).order_by(NotificationLog.user_id).all()
+        assert [log.delivery_status for log in logs] == ["sent", "failed", "sent"]
+        assert all(log.request_id == "7" for log in logs)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_sends():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        await bucket.acquire()
+    # Two burst tokens, then four refills at 20/s
+    assert time.perf_counter() - start >= 4 / 20 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_queue_rows_are_written_back_in_one_batch(session_factory):
+    with session_factory() as db:
+        rows = [
+            NotificationQueue(user_id="1", message="a", status="failed", retry_count=0, max_retries=3),
+            NotificationQueue(user_id="2", message="b", status="failed", retry_count=0, max_retries=3),
+            NotificationQueue(user_id="3", message="c", status="pending", retry_count=2, max_retries=3,
+                              error_message="timeout"),
+        ]
+        db.add_all(rows)
+        db.commit()
+        ids = [row.id for row in rows]
+
+    sender = SlowSender(failing={"+2", "+3"})
+    dispatcher = NotificationDispatcher(
+        senders={"whatsapp": sender}, workers=3, rates={"whatsapp": (0, 1)}, session_factory=session_factory
+    )
+    await dispatcher.fan_out(
+        OutboundNotification(to=f"+{i}", message="retry", queue_id=queue_id) for i, queue_id in enumerate(ids, 1)
+    )
+    assert await dispatcher.flush() == 3
+    await dispatcher.close()
+
+    with session_factory() as db:
+        sent, retry, exhausted = [db.get(NotificationQueue, queue_id) for queue_id in ids]
+        assert (sent.status, sent.retry_count) == ("sent", 1)
+        assert sent.sent_at is not None
+        assert (retry.status, retry.retry_count) == ("pending", 1)
+        assert (exhausted.status, exhausted.retry_count) == ("failed", 3)
+        assert exhausted.error_message == "Max retries exceeded"
+
+
+@pytest.mark.asyncio
+async def test_sender_errors_resolve_as_failures(session_factory):
+    def broken(to, message):
+        raise RuntimeError("twilio down")
+
+    dispatcher = NotificationDispatcher(senders={"whatsapp": broken}, workers=1, session_factory=session_factory)
+    assert await dispatcher.send(OutboundNotification(to="+1", message="x")) is False
+    with pytest.raises(ValueError):
+        dispatcher._sender_for("sms")
+    await dispatcher.close()
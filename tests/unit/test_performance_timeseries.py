@@ -0,0 +1,82 @@
+"""
+Performance time-series tests
+Checks the bucketed /performance query against per-interval Python counts
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, User, ServiceRequest
+from app.api.analytics.performance import get_performance_data, get_date_range, get_time_intervals
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[User.__table__, ServiceRequest.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def seeded_requests(db):
+    user = User(whatsapp_id="237690000000", name="Client")
+    db.add(user)
+    db.flush()
+
+    now = datetime.now()
+    statuses = ["terminée", "en attente", "annulée", "terminée", "en cours", "terminée"]
+    requests = []
+    for i in range(400):
+        request = ServiceRequest(
+            user_id=user.id, service_type="plomberie", description="Fuite", location="Akwa",
+            status=statuses[i % 6], urgency=["high", "normal", "low"][i % 3],
+            created_at=now - timedelta(hours=21 * i + 5, minutes=i % 60)
+        )
+        db.add(request)
+        requests.append(request)
+    db.commit()
+    return requests
+
+
+def _expected_series(requests, period, granularity):
+    start, end = get_date_range(period)
+    intervals = get_time_intervals(start, end, granularity)
+    success, response = [], []
+    for i, interval_start in enumerate(intervals):
+        interval_end = intervals[i + 1] if i + 1 < len(intervals) else end
+        rows = [r for r in requests if interval_start <= r.created_at < interval_end]
+        handled = [r for r in rows if r.status != "en attente"]
+        success.append(round(sum(1 for r in rows if r.status == "terminée") / len(rows) * 100, 1) if rows else 0.0)
+        response.append(round(sum(
+            15.0 * (0.7 if r.urgency == "high" else 1.3 if r.urgency == "low" else 1.0) for r in handled
+        ) / len(handled), 1) if handled else 0.0)
+    return success, response
+
+
+@pytest.mark.parametrize("period,granularity", [
+    ("24h", "hour"), ("30d", "day"), ("90d", "week"), ("1y", "month"), ("1y", "day")
+])
+def test_bucketed_series_matches_per_interval_counts(db, seeded_requests, period, granularity):
+    response = get_performance_data(
+        period=period, granularity=granularity, metrics=[], current_user=None, db=db
+    )
+
+    success, response_time = _expected_series(seeded_requests, period, granularity)
+    datasets = {dataset.label: dataset.data for dataset in response.data.datasets}
+    assert datasets["Taux de succès (%)"] == success
+    assert datasets["Temps de réponse (min)"] == response_time
+    assert len(response.data.labels) == response.data.summary.totalDataPoints == len(success)
+
+
+def test_year_of_daily_points_is_one_query(db, seeded_requests):
+    queries = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+    response = get_performance_data(period="1y", granularity="day", metrics=["successRate"], current_user=None, db=db)
+
+    assert response.data.summary.totalDataPoints >= 365
+    assert len(queries) == 1
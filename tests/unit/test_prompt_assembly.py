@@ -0,0 +1,99 @@
+"""
+Prompt assembly tests
+Checks that static prefixes are rendered once per catalog version, that a
+catalog write produces a new prefix, that Claude receives the prefix as a
+cached block and that token usage is recorded per prompt
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.dynamic_services import Base, Service, ServiceCategory, Zone
+from app.services.multi_llm_service import MultiLLMService
+from app.services.prompt_assembly import PromptAssembler, SystemPrompt, get_prompt_assembler
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[ServiceCategory.__table__, Service.__table__, Zone.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    category = ServiceCategory(code="maison", name="Maison", name_fr="Maison")
+    session.add(category)
+    session.flush()
+    session.add_all([
+        Service(code="plomberie", name="Plomberie", category_id=category.id, description="Fuites",
+                min_price_xaf=5000, max_price_xaf=15000),
+        Service(code="jardinage", name="Jardinage", category_id=category.id, status="discontinued"),
+        Zone(code="akwa", name="Akwa", zone_type="district"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def render(catalog):
+    return "SERVICES: " + ", ".join(f"{s['name']} ({s['category']})" for s in catalog.services) + \
+        " | ZONES: " + ", ".join(zone["name"] for zone in catalog.zones)
+
+
+def test_prefix_is_rendered_once_per_catalog_version(db):
+    assembler = PromptAssembler(catalog_ttl_seconds=60)
+    first = assembler.build("analysis", render, dynamic="turn 1", db=db)
+    assert first.static == "SERVICES: Plomberie (Maison) | ZONES: Akwa"
+    assert str(first) == first.static + "\n\nturn 1"
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    second = assembler.build("analysis", render, dynamic="turn 2", db=db)
+    assert statements == []
+    assert (second.static, second.version) == (first.static, first.version)
+    assert assembler.get_stats()["prefix_renders"] == 1
+
+
+def test_catalog_writes_produce_a_new_prefix(db):
+    assembler = get_prompt_assembler()
+    before = assembler.build("analysis_write_test", render, db=db)
+
+    db.add(Zone(code="deido", name="Deido", zone_type="district"))
+    db.commit()
+    after = assembler.build("analysis_write_test", render, db=db)
+
+    assert after.static.endswith("ZONES: Akwa, Deido")
+    assert after.version != before.version
+
+
+def test_without_a_session_the_fallback_catalog_is_used():
+    prompt = PromptAssembler().build("analysis", render)
+    assert "Plomberie" in prompt.static and "Bonamoussadi" in prompt.static
+
+
+class FakeClaudePool:
+    def __init__(self):
+        self.calls = []
+
+    async def claude_messages(self, **kwargs):
+        self.calls.append(kwargs)
+        usage = SimpleNamespace(input_tokens=40, output_tokens=12, cache_read_input_tokens=1500,
+                                cache_creation_input_tokens=0)
+        return SimpleNamespace(content=[SimpleNamespace(text="{}")], usage=usage)
+
+
+@pytest.mark.asyncio
+async def test_claude_receives_a_cached_prefix_block_and_usage_is_recorded():
+    service = MultiLLMService.__new__(MultiLLMService)
+    service.client_pool = FakeClaudePool()
+    prompt = SystemPrompt("RULES", "STATE", name="usage_test")
+
+    await service._generate_claude([{"role": "user", "content": "Bonjour"}], prompt)
+
+    assert service.client_pool.calls[0]["system"] == [
+        {"type": "text", "text": "RULES", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "STATE"},
+    ]
+    usage = get_prompt_assembler().get_stats()["usage"]["usage_test"]
+    assert (usage["calls"], usage["input_tokens"], usage["cache_read_tokens"]) == (1, 40, 1500)
+    assert usage["cache_hit_rate"] == pytest.approx(1500 / 1540)
@@ -0,0 +1,125 @@
+"""
+Provider list pagination tests
+Checks that keyset pages walk every provider exactly once in sort order and
+that the stats block comes from one cached aggregate
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, Provider
+from app.models.provider_models import ProvidersFilters, SortBy, SortOrder
+from app.services import provider_service
+from app.services.provider_service import ProviderService, aggregate_provider_counts, encode_cursor
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[Provider.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def providers(db):
+    start = datetime(2026, 1, 1, 8, 0)
+    providers = [
+        Provider(
+            name=f"Prestataire {i % 13:02d}", whatsapp_id=f"2376900{i:05d}", phone_number=f"2376900{i:05d}",
+            services=["plomberie"], coverage_areas=["Bonamoussadi"], service_type="plomberie",
+            status=["active", "active", "inactive", "suspended"][i % 4], is_available=i % 3 != 0,
+            rating=None if i % 11 == 0 else (i % 4) + 0.5, total_jobs=i % 7,
+            created_at=start + timedelta(days=i % 40)
+        )
+        for i in range(95)
+    ]
+    db.add_all(providers)
+    db.commit()
+    return providers
+
+
+@pytest.fixture
+def service(db, monkeypatch):
+    # The API model needs columns the legacy table does not have; ids are enough here
+    monkeypatch.setattr(ProviderService, "_convert_to_provider", lambda self, provider: provider.id)
+    monkeypatch.setattr(provider_service, "_cached_stats", None)
+    return ProviderService(db)
+
+
+def walk(service, filters, limit=10):
+    ids, cursor = [], None
+    while True:
+        page, pagination, _ = service.get_providers(filters, limit=limit, cursor=cursor)
+        ids += page
+        cursor = pagination.nextCursor
+        assert pagination.hasNext == (cursor is not None)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort_by, order, key", [
+    (None, SortOrder.ASC, lambda p: p.id),
+    (SortBy.NAME, SortOrder.ASC, lambda p: (p.name, p.id)),
+    (SortBy.RATING, SortOrder.DESC, lambda p: (p.rating or 0.0, p.id)),
+    (SortBy.JOIN_DATE, SortOrder.DESC, lambda p: (p.created_at, p.id)),
+])
+def test_cursor_walk_returns_every_provider_once_in_order(service, providers, sort_by, order, key):
+    filters = ProvidersFilters(sortBy=sort_by, sortOrder=order)
+    expected = [p.id for p in sorted(providers, key=key, reverse=order == SortOrder.DESC)]
+    assert walk(service, filters) == expected
+
+
+def test_cursor_pages_do_not_offset_or_recount_stats(db, service, providers):
+    filters = ProvidersFilters(sortBy=SortBy.RATING, sortOrder=SortOrder.DESC)
+    _, first, _ = service.get_providers(filters, limit=20)
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2:4]))
+    _, second, _ = service.get_providers(filters, limit=20, cursor=first.nextCursor, estimate_total=True)
+
+    # One page query (SQLite always renders OFFSET; it stays 0); the total and stats come from the cache
+    assert len(statements) == 1
+    assert statements[0][1][-1] == 0
+    assert second.total == len(providers) and second.estimatedTotal
+    assert second.hasPrev
+
+
+def test_invalid_or_foreign_cursor_is_rejected(service, providers):
+    with pytest.raises(ValueError):
+        service.get_providers(limit=10, cursor="not-a-cursor")
+
+    name_cursor = encode_cursor(f"{SortBy.NAME.value}:asc", "Prestataire 03", 4)
+    with pytest.raises(ValueError):
+        service.get_providers(ProvidersFilters(sortBy=SortBy.RATING), limit=10, cursor=name_cursor)
+
+
+def test_stats_come_from_one_aggregate(db, service, providers):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    counts = aggregate_provider_counts(db, datetime(2026, 2, 1))
+    assert len(statements) == 1
+
+    rated = [p.rating for p in providers if p.rating is not None]
+    assert counts["total"] == len(providers)
+    assert counts["active"] == sum(1 for p in providers if p.status == "active")
+    assert counts["suspended"] == sum(1 for p in providers if p.status == "suspended")
+    assert counts["available"] == sum(1 for p in providers if p.is_available)
+    assert counts["newThisMonth"] == sum(1 for p in providers if p.created_at >= datetime(2026, 2, 1))
+    assert counts["avgRating"] == pytest.approx(sum(rated) / len(rated))
+
+
+def test_iter_providers_reads_in_cursor_chunks(db, service, providers):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2:4]))
+    filters = ProvidersFilters(status="active", sortBy=SortBy.MISSIONS)
+
+    ids = list(service.iter_providers(filters, chunk_size=7))
+
+    active = [p for p in providers if p.status == "active"]
+    assert ids == [p.id for p in sorted(active, key=lambda p: (p.total_jobs, p.id))]
+    assert len(statements) == len(active) // 7 + 1
+    assert all(params[-1] == 0 for _, params in statements)
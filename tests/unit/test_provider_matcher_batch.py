@@ -0,0 +1,95 @@
+"""
+Batch provider scoring tests
+Checks that the single-query ranking path matches the per-provider path
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, User, Provider, ServiceRequest
+from app.services.landmark_gazetteer import get_landmark_gazetteer
+from app.services.provider_matcher import ProviderMatcher
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[User.__table__, Provider.__table__, ServiceRequest.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def seeded_providers(db):
+    user = User(whatsapp_id="237690000000", name="Client")
+    db.add(user)
+    db.flush()
+
+    now = datetime.now()
+    response_minutes = [3, 5, 8, 15, 25, 45, None, 12]
+    workloads = [0, 1, 2, 3, 0, 1, 4, 0]
+    providers = []
+    for i, (minutes, jobs) in enumerate(zip(response_minutes, workloads)):
+        provider = Provider(
+            name=f"Prestataire {i}", whatsapp_id=f"23769100000{i}", phone_number=f"23769100000{i}",
+            services=["plomberie"] if i % 2 else ["plomberie", "électricité"],
+            coverage_areas=["bonamoussadi"] if i % 3 else ["makepe"],
+            is_active=True, is_available=(i != 5), rating=3.5 + (i % 4) * 0.4, total_jobs=i * 3
+        )
+        db.add(provider)
+        db.flush()
+        providers.append(provider)
+
+        if minutes is not None:
+            created = now - timedelta(days=2)
+            db.add(ServiceRequest(
+                user_id=user.id, provider_id=provider.id, service_type="plomberie",
+                description="Fuite", location="Bonamoussadi", status="completed",
+                created_at=created, accepted_at=created + timedelta(minutes=minutes)
+            ))
+        for _ in range(jobs):
+            db.add(ServiceRequest(
+                user_id=user.id, provider_id=provider.id, service_type="plomberie",
+                description="Fuite", location="Bonamoussadi", status="in_progress",
+                created_at=now - timedelta(days=60)
+            ))
+    db.commit()
+    return providers
+
+
+def test_batch_ranking_matches_per_provider_ranking(db, seeded_providers):
+    request = ServiceRequest(service_type="plomberie", location="Bonamoussadi carrefour")
+
+    batch = ProviderMatcher(db, batch_scoring=True).rank_providers(seeded_providers, request)
+    scalar = ProviderMatcher(db, batch_scoring=False).rank_providers(seeded_providers, request)
+
+    assert [s.provider_id for s in batch] == [s.provider_id for s in scalar]
+    for b, s in zip(batch, scalar):
+        assert b.total_score == s.total_score
+        assert b.response_time_score == s.response_time_score
+        assert b.availability_score == s.availability_score
+
+
+def test_batch_ranking_uses_single_query(db, seeded_providers):
+    # Location keywords come from the cached gazetteer, loaded once per process
+    get_landmark_gazetteer(db)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    request = ServiceRequest(service_type="plomberie", location="Bonamoussadi")
+    ProviderMatcher(db).rank_providers(seeded_providers, request)
+
+    assert len(statements) == 1
+
+
+def test_batch_ranking_falls_back_on_query_error(db, seeded_providers, monkeypatch):
+    matcher = ProviderMatcher(db)
+    monkeypatch.setattr(matcher, "_load_provider_metrics", lambda ids: (_ for _ in ()).throw(RuntimeError("db down")))
+
+    request = ServiceRequest(service_type="plomberie", location="Bonamoussadi")
+    ranked = matcher.rank_providers(seeded_providers, request)
+
+    assert len(ranked) == len(seeded_providers)
@@ -0,0 +1,113 @@
+"""
+Provider stats tests
+Checks the single-query dashboard figures against a Python recomputation and
+that cached figures are dropped when the provider's requests change
+"""
+
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, User, Provider, ServiceRequest, RequestStatus
+from app.services import provider_stats
+from app.services.provider_stats import (
+    COMPLETED_STATUSES, DECLINED_STATUSES, NEW_STATUSES, ProviderStatsCache,
+    compute_provider_stats, period_starts, provider_activity
+)
+
+DAY = date(2026, 3, 4)  # a Wednesday; the week starts on 2 March, the month on 1 March
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[User.__table__, Provider.__table__, ServiceRequest.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def seeded(db):
+    user = User(whatsapp_id="237690000000", name="Client")
+    db.add(user)
+    db.flush()
+
+    statuses = [RequestStatus.PENDING.value, RequestStatus.ASSIGNED.value, RequestStatus.COMPLETED.value,
+                RequestStatus.CANCELLED.value, "COMPLETED"]
+    requests = []
+    start = datetime(2026, 2, 20, 8, 0)
+    for i in range(120):
+        created = start + timedelta(hours=5 * i)
+        requests.append(ServiceRequest(
+            user_id=user.id, provider_id=1 if i % 3 else 2, service_type=["plomberie", "électricité"][i % 2],
+            description="Panne", location="Akwa", status=statuses[i % 5], final_cost=1000.0 + i,
+            created_at=created, accepted_at=created + timedelta(minutes=10 + i % 7) if i % 4 == 0 else None
+        ))
+    db.add_all(requests)
+    db.commit()
+    return requests
+
+
+def _expected(requests, provider_id, since):
+    upper = datetime.combine(DAY + timedelta(days=1), datetime.min.time())
+    rows = [r for r in requests if r.provider_id == provider_id and since <= r.created_at < upper]
+    return {
+        "total": len(rows),
+        "new": sum(1 for r in rows if r.status in NEW_STATUSES),
+        "completed": sum(1 for r in rows if r.status in COMPLETED_STATUSES),
+        "declined": sum(1 for r in rows if r.status in DECLINED_STATUSES),
+        "earnings": sum(r.final_cost for r in rows if r.status in COMPLETED_STATUSES),
+    }
+
+
+def test_single_query_matches_recomputation(db, seeded):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    stats = compute_provider_stats(db, 1, DAY)
+    assert len(statements) == 1
+    assert "date(" not in statements[0].lower()
+
+    for name, start in period_starts(DAY).items():
+        expected = _expected(seeded, 1, datetime.combine(start, datetime.min.time()))
+        period = getattr(stats, name)
+        assert (period.total, period.new, period.completed, period.declined) == (
+            expected["total"], expected["new"], expected["completed"], expected["declined"]
+        )
+        assert period.earnings == pytest.approx(expected["earnings"])
+
+    month_start = datetime(2026, 3, 1)
+    accepted = [r for r in seeded if r.provider_id == 1 and r.accepted_at
+                and month_start <= r.created_at < datetime(2026, 3, 5)]
+    expected_minutes = sum((r.accepted_at - r.created_at).total_seconds() for r in accepted) / len(accepted) / 60
+    assert stats.response_time_minutes == pytest.approx(expected_minutes, abs=0.1)
+
+
+def test_cache_is_invalidated_on_status_change(db, seeded, monkeypatch):
+    cache = ProviderStatsCache(ttl_seconds=3600)
+    monkeypatch.setattr(provider_stats, "_provider_stats_cache", cache)
+    first = cache.get(db, 1, DAY)
+    assert cache.get(db, 1, DAY) is first
+
+    open_request = next(r for r in seeded if r.provider_id == 1 and r.status not in COMPLETED_STATUSES
+                        and r.created_at.date() == DAY)
+    open_request.status = RequestStatus.COMPLETED.value
+    db.commit()
+
+    refreshed = cache.get(db, 1, DAY)
+    assert refreshed is not first
+    assert refreshed.today.completed == first.today.completed + 1
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_activity_covers_every_day_in_range(db, seeded):
+    activity = provider_activity(db, 1, date(2026, 2, 26), DAY)
+
+    assert list(activity["daily"]) == [date(2026, 2, 26) + timedelta(days=i) for i in range(7)]
+    in_range = [r for r in seeded if r.provider_id == 1 and datetime(2026, 2, 26) <= r.created_at < datetime(2026, 3, 5)]
+    assert sum(activity["service_breakdown"].values()) == len(in_range)
+    assert sum(activity["heatmap"].values()) == len(in_range)
+    assert sum(day["requests"] for day in activity["daily"].values()) == sum(
+        1 for r in in_range if r.status in COMPLETED_STATUSES
+    )
@@ -0,0 +1,125 @@
+"""
+Session store tests
+Runs the session manager, dynamic service cache and rate limiter against the
+in-process store backend
+"""
+
+import pytest
+
+from app.models.conversation_session import ConversationMessage, ConversationState
+from app.services.session_store import (
+    COMPRESS_THRESHOLD, LocalSessionStore, SessionStore, decode_value, encode_value
+)
+from app.services.session_manager import SessionManager
+from app.services.dynamic_service_cache import DynamicServiceCache
+from app.middleware.security import RateLimitMiddleware
+
+
+@pytest.fixture
+def store():
+    return LocalSessionStore()
+
+
+def test_encoding_is_compact_and_compresses_large_payloads():
+    small = {"state": "initial", "data": [1, 2, 3]}
+    assert encode_value(small) == b'j{"state":"initial","data":[1,2,3]}'
+    assert decode_value(encode_value(small)) == small
+
+    large = {"history": ["Bonjour, j'ai une fuite d'eau à Bonamoussadi"] * 100}
+    encoded = encode_value(large)
+    assert encoded[:1] == b"z"
+    assert len(encoded) < COMPRESS_THRESHOLD
+    assert decode_value(encoded) == large
+
+
+def test_decode_reads_values_written_before_the_marker_byte():
+    assert decode_value('{"session_id": "s1"}') == {"session_id": "s1"}
+
+
+@pytest.mark.asyncio
+async def test_local_store_multi_key_operations(store):
+    await store.set_many({"zones:all": [1], "zones:douala": [2], "session:s1": {"a": 1}}, ttl=60)
+
+    assert await store.get_many(["zones:all", "session:s1", "missing"]) == {"zones:all": [1], "session:s1": {"a": 1}}
+    assert await store.delete_pattern("zones:*") == 2
+    assert await store.get("zones:douala") is None
+    assert await store.get("session:s1") == {"a": 1}
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnlyStore(SessionStore):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyStore()
+
+
+@pytest.mark.asyncio
+async def test_local_store_sweeps_expired_windows_on_increment():
+    store = LocalSessionStore(purge_interval=0)
+    for i in range(5):
+        await store.incr_window(f"rate:+23769000000{i}", "w1", ttl=0)
+
+    await store.incr_window("rate:+237691111111", "w1", ttl=60)
+
+    assert list(store.windows) == ["rate:+237691111111"]
+
+
+@pytest.mark.asyncio
+async def test_local_store_expires_keys(store):
+    await store.set("search:fuite", ["plomberie"], ttl=0)
+    assert await store.get("search:fuite") is None
+
+
+@pytest.mark.asyncio
+async def test_session_manager_round_trips_sessions_through_store(store):
+    manager = SessionManager(store=store)
+    session = await manager.create_session("42", "+237690000000")
+    session.add_message(ConversationMessage(id="m1", message_type="incoming", content="J'ai une fuite"))
+    session.transition_to(ConversationState.COLLECTING, "test")
+    await manager.update_session(session)
+
+    # Drop the in-memory copy so the next read comes from the store
+    manager.active_sessions.clear()
+    restored = await manager.get_session(session.session_id)
+
+    assert restored.current_state == ConversationState.COLLECTING
+    assert [message.content for message in restored.conversation_history] == ["J'ai une fuite"]
+
+
+@pytest.mark.asyncio
+async def test_session_cleanup_removes_expired_sessions_in_one_batch(store):
+    manager = SessionManager(store=store)
+    sessions = [await manager.create_session(str(i), "+2376900000%02d" % i) for i in range(3)]
+    for session in sessions[:2]:
+        session.expires_at = session.created_at
+
+    assert await manager.cleanup_expired_sessions() == 2
+    assert set(manager.active_sessions) == {sessions[2].session_id}
+    assert await store.get_many([f"session:{s.session_id}" for s in sessions]) == {
+        f"session:{sessions[2].session_id}": sessions[2].to_dict()
+    }
+
+
+@pytest.mark.asyncio
+async def test_dynamic_service_cache_shares_store_and_keeps_sessions_on_clear(store):
+    cache = DynamicServiceCache(store=store)
+    await store.set("session:s1", {"a": 1}, ttl=60)
+    await cache.set_zones([{"code": "BNM"}])
+
+    assert await cache.get_zones() == [{"code": "BNM"}]
+    await cache.clear_all_cache()
+    assert await cache.get_zones() is None
+    assert await store.get("session:s1") == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_counts_in_shared_store(store):
+    limiter = RateLimitMiddleware(app=None, store=store)
+    limiter.rate_limits["default"] = {"limit": 2, "window": 60}
+
+    results = [await limiter._check_rate_limit("10.0.0.1", "default", "/") for _ in range(3)]
+
+    assert results == [True, True, False]
+    assert (await limiter._get_limit_info("10.0.0.1", "default", "/"))["count"] == 3
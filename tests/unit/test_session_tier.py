@@ -0,0 +1,88 @@
+"""
+In-memory session tier tests
+Covers the user index, size and idle eviction, write-back and lock release
+"""
+
+import asyncio
+import pytest
+
+from app.services.session_store import LocalSessionStore
+from app.services.session_manager import SessionManager
+
+
+@pytest.fixture
+def store():
+    return LocalSessionStore()
+
+
+@pytest.fixture
+def manager(store):
+    return SessionManager(store=store, max_sessions_in_memory=3, idle_eviction_seconds=60)
+
+
+async def _create(manager, user_id):
+    return await manager.create_session(user_id, f"+23769{user_id:0>7}")
+
+
+@pytest.mark.asyncio
+async def test_user_lookup_uses_index(manager):
+    sessions = [await _create(manager, str(i)) for i in range(3)]
+
+    assert await manager.get_user_active_session("1") is sessions[1]
+    assert await manager.get_user_active_session("9") is None
+    assert manager.get_session_tier_stats()["indexed_users"] == 3
+
+
+@pytest.mark.asyncio
+async def test_size_bound_evicts_least_recently_used_with_write_back(manager, store):
+    sessions = [await _create(manager, str(i)) for i in range(3)]
+    # Touch the oldest so the second one becomes least recently used
+    await manager.get_session(sessions[0].session_id)
+    sessions[1].update_collected_data("location", "Bonamoussadi")
+
+    fourth = await _create(manager, "3")
+
+    assert set(manager.active_sessions) == {sessions[0].session_id, sessions[2].session_id, fourth.session_id}
+    assert sessions[1].session_id not in manager.session_locks
+    assert await manager.get_user_active_session("1") is None
+    written = await store.get(f"session:{sessions[1].session_id}")
+    assert written["collected_data"]["location"] == "Bonamoussadi"
+
+    stats = manager.get_session_tier_stats()
+    assert stats["resident"] == 3
+    assert stats["evictions"] == 1
+    assert stats["locks"] == 3
+
+
+@pytest.mark.asyncio
+async def test_evicted_session_is_reloaded_from_store(manager):
+    sessions = [await _create(manager, str(i)) for i in range(4)]
+
+    restored = await manager.get_session(sessions[0].session_id)
+
+    assert restored.session_id == sessions[0].session_id
+    assert len(manager.active_sessions) == 3
+
+
+@pytest.mark.asyncio
+async def test_idle_eviction_skips_sessions_being_updated(manager):
+    sessions = [await _create(manager, str(i)) for i in range(2)]
+    for session_id in manager.active_sessions:
+        manager.active_sessions.last_access[session_id] -= 120
+
+    lock = manager.session_locks[sessions[0].session_id]
+    async with lock:
+        assert await manager.evict_idle_sessions() == 1
+
+    assert list(manager.active_sessions) == [sessions[0].session_id]
+    assert manager.get_session_tier_stats()["idle_evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_keep_tier_bounded(manager):
+    sessions = [await _create(manager, str(i)) for i in range(3)]
+
+    await asyncio.gather(*[manager.update_session(session) for session in sessions * 3])
+
+    assert len(manager.active_sessions) == 3
+    assert manager.get_session_tier_stats()["unsaved"] == 3
@@ -0,0 +1,93 @@
+"""
+System state tests
+Checks the snapshot figures, that fresh reads issue no queries and that
+provider and request writes trigger a reload
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base, Provider, RequestStatus, ServiceRequest, User
+from app.services.system_state import (
+    SystemStateService, get_system_state, get_system_state_service, load_system_state
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[User.__table__, Provider.__table__, ServiceRequest.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    user = User(whatsapp_id="237690000000", name="Client")
+    session.add(user)
+    session.flush()
+    session.add_all([
+        Provider(name=name, whatsapp_id=name, phone_number=name, services=services, coverage_areas=["Akwa"],
+                 is_available=available, is_active=active)
+        for name, services, available, active in (
+            ("A", ["plomberie", "électricité"], True, True),
+            ("B", ["Plomberie"], True, True),
+            ("C", ["électricité"], False, True),
+            ("D", ["plomberie"], True, False),
+        )
+    ])
+    session.add_all([
+        ServiceRequest(user_id=user.id, service_type="plomberie", description="Fuite", location="Akwa",
+                       status=status)
+        for status in (RequestStatus.PENDING, RequestStatus.PENDING, RequestStatus.COMPLETED)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_snapshot_counts_availability_and_capacity_per_service(db):
+    state = load_system_state(db)
+
+    assert (state.active_providers, state.available_providers, state.pending_requests) == (3, 2, 2)
+    assert state.capacity_for("Plomberie") == {"available_providers": 2, "pending_requests": 2}
+    assert state.capacity_for("électricité") == {"available_providers": 1, "pending_requests": 0}
+    assert state.to_dict()["provider_availability"] == "normal"
+    assert state.to_dict()["system_load"] == "normal"
+
+
+def test_fresh_reads_issue_no_queries_until_a_write(db, monkeypatch):
+    service = get_system_state_service()
+    monkeypatch.setattr(service, "refresh_seconds", 60)
+    monkeypatch.setattr(service, "min_refresh_seconds", 0)
+    service.refresh(db)
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for _ in range(50):
+        assert get_system_state(db).available_providers == 2
+    assert statements == []
+
+    # A committed request write marks the shared snapshot stale
+    db.add(ServiceRequest(user_id=1, service_type="électricité", description="Panne", location="Akwa",
+                          status=RequestStatus.PENDING))
+    db.commit()
+    state = get_system_state(db)
+    assert state.pending_requests == 3
+    assert state.system_load == "high"
+    assert len(statements) == 1 + 3
+
+
+def test_reads_without_a_session_serve_the_last_snapshot():
+    service = SystemStateService()
+    assert service.get().to_dict()["system_load"] == "unknown"
+    assert service.get_stats()["refreshes"] == 0
+
+
+def test_rolled_back_writes_do_not_mark_the_snapshot_stale(db):
+    service = get_system_state_service()
+    service.refresh(db)
+
+    db.add(ServiceRequest(user_id=1, service_type="plomberie", description="Fuite", location="Akwa",
+                          status=RequestStatus.PENDING))
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert not service._stale
@@ -0,0 +1,89 @@
+"""
+Local text classifier tests
+Checks training and versioned artifacts, the confidence threshold and that a
+confident local label spares the interruption LLM call
+"""
+
+import pytest
+
+from app.services import text_classifier
+from app.services.dialogue_flow_manager import DialogueContext, DialogueState
+from app.services.interruption_manager import InterruptionManager, InterruptionState, InterruptionType
+from app.services.text_classifier import (
+    INTERRUPTION, LocalTextClassifier, TextClassifierRegistry, latest_artifact, train_classifier
+)
+
+pytestmark = pytest.mark.skipif(not text_classifier.SKLEARN_AVAILABLE, reason="scikit-learn not installed")
+
+ORDINARY = [
+    "ma cuisine est inondée depuis ce matin", "le robinet de la douche goutte",
+    "j'habite à Bonamoussadi près du carrefour", "la prise du salon ne marche plus",
+    "c'est pour demain vers 10h", "mon numéro est le 699 00 00 00",
+    "le tuyau sous l'évier fuit beaucoup", "il y a une coupure dans la chambre",
+    "je suis au quartier Akwa", "le chauffe-eau fait un bruit bizarre",
+]
+SUPERVISOR = [
+    "votre superviseur doit me rappeler", "donnez-moi votre superviseur",
+    "un superviseur au téléphone maintenant", "je réclame un superviseur",
+    "mettez votre superviseur en ligne", "superviseur immédiatement",
+    "je veux discuter avec le superviseur", "appelez le superviseur",
+    "transférez au superviseur", "superviseur s'il vous plaît",
+]
+
+
+@pytest.fixture(scope="module")
+def trained():
+    texts = ORDINARY + SUPERVISOR
+    labels = ["none"] * len(ORDINARY) + ["escalation"] * len(SUPERVISOR)
+    return train_classifier(INTERRUPTION, texts, labels, holdout=0.2)
+
+
+def test_training_reports_holdout_and_saves_versioned_artifacts(trained, tmp_path):
+    classifier, report = trained
+    assert report.samples == 20 and report.labels == {"escalation": 10, "none": 10}
+    assert report.holdout_samples == 4 and report.holdout_accuracy is not None
+    assert classifier.predict("passez-moi le superviseur")[0] == "escalation"
+
+    older = LocalTextClassifier(INTERRUPTION, classifier.pipeline, {"version": "20000101000000-00000000"})
+    older.save(str(tmp_path))
+    newest = classifier.save(str(tmp_path))
+    assert latest_artifact(str(tmp_path), INTERRUPTION) == newest
+
+    registry = TextClassifierRegistry(directory=str(tmp_path), min_confidence=0.5)
+    assert registry.load() == {INTERRUPTION: classifier.version}
+
+
+def test_registry_falls_back_below_threshold(trained):
+    classifier, _ = trained
+    strict = TextClassifierRegistry(min_confidence=1.01)
+    strict.register(classifier)
+    assert strict.predict(INTERRUPTION, "passez-moi le superviseur") is None
+    assert strict.predict("intent", "statut") is None
+
+    stats = strict.get_stats()["tasks"]
+    assert stats[INTERRUPTION]["fallbacks"] == 1 and stats["intent"]["fallbacks"] == 1
+
+    lenient = TextClassifierRegistry(min_confidence=0.5)
+    lenient.register(classifier)
+    prediction = lenient.predict(INTERRUPTION, "passez-moi le superviseur")
+    assert prediction.label == "escalation" and prediction.model_version == classifier.version
+
+
+@pytest.mark.asyncio
+async def test_confident_local_label_skips_the_llm(trained, monkeypatch):
+    registry = TextClassifierRegistry(min_confidence=0.5)
+    registry.register(trained[0])
+    monkeypatch.setattr(text_classifier, "_registry", registry)
+
+    manager = InterruptionManager()
+
+    async def no_llm(*args):
+        raise AssertionError("LLM interruption detection should not run")
+
+    monkeypatch.setattr(manager, "_ai_based_interruption_detection", no_llm)
+    context = DialogueContext(current_state=DialogueState.COLLECTING)
+
+    event = await manager.detect_interruption("passez-moi le superviseur", context, InterruptionState())
+    assert event.type == InterruptionType.ESCALATION
+
+    assert await manager.detect_interruption("le tuyau de la cuisine fuit", context, InterruptionState()) is None
@@ -0,0 +1,64 @@
+"""
+Shared text feature extraction tests
+Checks normalization, single-pass group matching and versioning, and that
+the analyzers of one turn read the same extraction instead of rescanning
+"""
+
+import pytest
+
+from app.services.dialogue_flow_manager import DialogueContext, DialogueState
+from app.services.escalation_pipeline import analyze_message
+from app.services.intent_analyzer import IntentAnalyzer
+from app.services.interruption_manager import InterruptionManager, InterruptionState, InterruptionType
+from app.services.text_features import TextFeatureExtractor, fold, get_text_feature_extractor
+
+
+def test_normalization_keeps_display_and_matching_forms_apart():
+    extractor = TextFeatureExtractor()
+    features = extractor.extract("  Slt, Wata no dey comot à la   Cité  ")
+
+    assert features.normalized == "salut, pas d'eau à la   cité"
+    assert features.folded == "slt, water no dey comot a la cite"
+    assert features.tokens == ("slt,", "water", "no", "dey", "comot", "a", "la", "cite")
+    assert fold("Électricité") == "electricite"
+
+
+def test_groups_are_matched_in_one_pass_and_cached_per_version():
+    extractor = TextFeatureExtractor()
+    extractor.register({"water": ["eau", "wata no dey comot"], "help": ["aide", "à l'aide"]})
+    version = extractor.version
+
+    features = extractor.extract("À l'aide, WATTA no dey comot, plus d'eau !")
+    assert features.terms("help") == {"aide", "a l'aide"}
+    assert features.count("water") == 2 and features.has("water") and not features.has("other")
+    assert 0 < features.coverage("help") < 1
+    assert features.punctuation["!"] == 1
+
+    assert extractor.extract("À l'aide, WATTA no dey comot, plus d'eau !") is features
+    extractor.register({"water": ["eau", "wata no dey comot"]})
+    assert extractor.version == version
+    assert extractor.get_stats()["hits"] == 1
+
+    extractor.register({"water": ["eau"]})
+    refreshed = extractor.ensure(None, features)
+    assert refreshed is not features and refreshed.terms("water") == {"eau"}
+
+
+@pytest.mark.asyncio
+async def test_turn_analyzers_share_one_extraction():
+    analyzer = IntentAnalyzer()
+    manager = InterruptionManager()
+    extractor = get_text_feature_extractor()
+    message = "Laisse tomber, j'arrête, je ne veux plus de plomberie"
+
+    features = extractor.extract(message)
+    misses = extractor.get_stats()["misses"]
+
+    assert analyzer._quick_pattern_analysis(message, features)["primary_intent"] == "new_service_request"
+    event = await manager.detect_interruption(
+        message, DialogueContext(current_state=DialogueState.COLLECTING), InterruptionState(), features
+    )
+    assert event.type == InterruptionType.CANCELLATION
+    assert analyze_message(message, text_features=features).negative_count == 0
+
+    assert extractor.get_stats()["misses"] == misses
@@ -0,0 +1,108 @@
+"""
+Zone spatial index tests
+Checks radius and nearest lookups against brute-force geodesic distances
+"""
+
+import random
+import pytest
+from geopy.distance import geodesic
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database_models import Base
+from app.models.dynamic_services import Zone, ZoneType
+from app.services.zone_service import ZoneService
+from app.services.zone_spatial_index import ZoneSpatialIndex, invalidate_zone_spatial_index
+
+# Haversine vs the WGS-84 ellipsoid differs by well under 1% at city scale
+TOLERANCE = 0.006
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(7)
+    # Greater Douala, plus a few far-away zones
+    coordinates = [(4.0 + rng.random() * 0.2, 9.6 + rng.random() * 0.2) for _ in range(2000)]
+    coordinates += [(3.87, 11.52), (-4.32, 15.31), (48.85, 2.35)]
+    return coordinates
+
+
+@pytest.fixture
+def index(points):
+    zone_types = ["district" if i % 4 else "neighborhood" for i in range(len(points))]
+    return ZoneSpatialIndex(
+        list(range(1, len(points) + 1)),
+        [lat for lat, _ in points],
+        [lon for _, lon in points],
+        zone_types
+    )
+
+
+def test_radius_query_matches_brute_force(index, points):
+    origin = (4.06, 9.71)
+    hits = index.within_radius(*origin, radius_km=3)
+
+    expected = {
+        i + 1 for i, point in enumerate(points) if geodesic(origin, point).kilometers <= 3 * (1 - TOLERANCE)
+    }
+    assert expected <= {zone_id for zone_id, _ in hits}
+    distances = [distance for _, distance in hits]
+    assert distances == sorted(distances)
+    assert all(distance <= 3 for distance in distances)
+    for zone_id, distance in hits[:20]:
+        assert distance == pytest.approx(geodesic(origin, points[zone_id - 1]).kilometers, rel=TOLERANCE)
+
+
+def test_radius_query_filters_zone_type(index):
+    hits = index.within_radius(4.06, 9.71, radius_km=5, zone_type="neighborhood")
+    assert hits and all((zone_id - 1) % 4 == 0 for zone_id, _ in hits)
+
+
+def test_nearest_many_matches_brute_force(index, points):
+    queries = [(4.05, 9.70), (4.15, 9.75), (3.9, 11.5), (45.0, 3.0)]
+
+    ids, distances = index.nearest_many(queries, k=2)
+
+    for row, query in enumerate(queries):
+        ranked = sorted(range(len(points)), key=lambda i: geodesic(query, points[i]).kilometers)
+        assert ids[row, 0] == ranked[0] + 1
+        assert distances[row, 0] == pytest.approx(geodesic(query, points[ranked[0]]).kilometers, rel=TOLERANCE)
+        assert distances[row, 0] <= distances[row, 1]
+
+
+def test_nearest_handles_more_neighbours_than_zones():
+    small = ZoneSpatialIndex([1, 2], [4.05, 4.06], [9.70, 9.71], ["city", "city"])
+    assert [zone_id for zone_id, _ in small.nearest(4.0, 9.7, k=5)] == [1, 2]
+    assert small.nearest(4.0, 9.7, zone_type="district") == []
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine, tables=[Zone.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    invalidate_zone_spatial_index()
+    yield session
+    session.close()
+    invalidate_zone_spatial_index()
+
+
+@pytest.mark.asyncio
+async def test_zone_service_lookups_use_index_and_see_new_zones(db):
+    service = ZoneService()
+    await service.create_zone(db, "akwa", "Akwa", ZoneType.DISTRICT, latitude=4.0511, longitude=9.7007, radius_km=2)
+    await service.create_zone(db, "deido", "Deido", ZoneType.DISTRICT, latitude=4.0611, longitude=9.7106)
+
+    results = await service.find_nearest_zones(db, 4.0520, 9.7010, radius_km=5)
+    assert [result["zone"].code for result in results] == ["akwa", "deido"]
+    assert results[0]["within_radius"] is True
+
+    # Creating a zone invalidates the cached index
+    await service.create_zone(db, "bonamoussadi", "Bonamoussadi", ZoneType.DISTRICT, latitude=4.0906, longitude=9.7431)
+    nearby = await service.find_nearby_zones(db, 4.0900, 9.7430, radius_km=1)
+    assert [zone.code for zone in nearby] == ["bonamoussadi"]
+
+    bulk = await service.find_nearest_zone_for_points(
+        db, [(4.0515, 9.7005), (4.0905, 9.7435), (48.85, 2.35)], max_distance_km=50
+    )
+    assert [result["zone"].code if result else None for result in bulk] == ["akwa", "bonamoussadi", None]